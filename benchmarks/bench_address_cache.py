@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.filters import flatten_protocols  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+from network_monitor.protocols.protocol_utils import address_cache_stats, set_address_cache_size  # noqa
+
+"""
+    Address formatting cost per packet of the serialized packets. Every packet formats the MAC addresses of
+    the frame and the addresses of the IP or ARP header, the trace has a few thousand distinct hosts. The
+    formatting is timed without the caches (size 0) and with the configured cache size, the hit rate of
+    every formatter is reported.
+
+    python3 benchmarks/bench_address_cache.py -n 100000 --hosts 2000 --cache-size 4096
+"""
+
+# address fields of the protocols in the trace
+ADDRESS_FIELDS = {
+    "AF_Packet": ("Hardware_Physical_Address",),
+    "Packet_802_3": ("Destination_MAC", "Source_MAC"),
+    "IPv4": ("Source_Address", "Destination_Address"),
+    "IPv6": ("Source_Address", "Destination_Address"),
+    "ARP": ("SHA", "SPA", "THA", "TPA"),
+}
+
+
+def format_addresses(frames: list) -> float:
+    """ return the seconds spent decoding the address fields of the frames """
+    elapsed: float = 0
+    for raw_bytes, address in frames:
+        protocols = [AF_Packet(address)]
+        protocols.extend(flatten_protocols(Packet_802_3(raw_bytes)))
+
+        start = time.perf_counter()
+        for protocol in protocols:
+            for name in ADDRESS_FIELDS.get(type(protocol).__name__, ()):
+                getattr(protocol, name)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def serialize(frames: list) -> float:
+    start = time.perf_counter()
+    for raw_bytes, address in frames:
+        AF_Packet(address).serialize()
+        for protocol in flatten_protocols(Packet_802_3(raw_bytes)):
+            protocol.serialize()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="address formatting cache benchmark")
+    parser.add_argument("-n", "--packets", default=100000, type=int)
+    parser.add_argument("--hosts", default=2000, type=int,
+                        help="distinct hosts of the trace")
+    parser.add_argument("--cache-size", default=4096, type=int)
+    args = parser.parse_args()
+
+    frames = traffic(args.packets, hosts=args.hosts)
+    for size in (0, args.cache_size):
+        set_address_cache_size(size)
+        formatting = format_addresses(frames)
+        set_address_cache_size(size)
+        serialized = serialize(frames)
+        print(f"cache size {size:>6}: formatting {formatting / args.packets * 1e6:5.2f} us/packet, "
+              f"serialized {serialized / args.packets * 1e6:5.2f} us/packet")
+
+    stats = address_cache_stats()
+    for name in ("mac", "ipv4", "ipv6"):
+        hits, misses = stats[f"{name}_address_cache_hits"], stats[f"{name}_address_cache_misses"]
+        print(f"{name:>4}: hit rate {hits / max(1, hits + misses):6.1%}, "
+              f"{stats[f'{name}_address_cache_size']} cached addresses")
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from collections import Counter
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.filters import get_protocol  # noqa
+from network_monitor.protocols import Packet_802_3, TCP, UDP  # noqa
+from network_monitor.protocols.batch_decoder import count_by, decode_headers  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Filter, Packet_Parser  # noqa
+
+"""
+    Vectorized batch decoding of the Ethernet/IP/TCP and UDP headers into a numpy array compared with the protocol
+    parsers. Reports the header decoding cost per frame, the cost of a parser whose filter drops the HTTPS traffic
+    (70% of the synthetic trace) and of the wire bytes per destination port aggregation.
+
+    python3 benchmarks/bench_batch_decoding.py -n 100000 -b 256
+"""
+
+
+def per_frame(batches: list) -> float:
+    start = time.perf_counter()
+    for batch in batches:
+        for _, (raw_bytes, _) in batch:
+            Packet_802_3(raw_bytes)
+    return time.perf_counter() - start
+
+
+def vectorized(batches: list) -> float:
+    start = time.perf_counter()
+    for batch in batches:
+        decode_headers(batch)
+    return time.perf_counter() - start
+
+
+async def parse(packet_parser: Packet_Parser, batches: list) -> float:
+    start = time.perf_counter()
+    for batch in batches:
+        for frame in packet_parser.filter_batch(batch):
+            await packet_parser.process_frame(frame)
+    return time.perf_counter() - start
+
+
+def bytes_per_port_objects(batches: list) -> float:
+    start = time.perf_counter()
+    counts: Counter = Counter()
+    for batch in batches:
+        for _, (raw_bytes, _) in batch:
+            out_packet = Packet_802_3(raw_bytes)
+            transport = get_protocol(out_packet, TCP) or get_protocol(
+                out_packet, UDP)
+            if transport is not None:
+                counts[transport.Destination_Port] += len(raw_bytes)
+    return time.perf_counter() - start
+
+
+def bytes_per_port_arrays(batches: list) -> float:
+    start = time.perf_counter()
+    counts: Counter = Counter()
+    for batch in batches:
+        for (port,), (_, size) in count_by(decode_headers(batch), "destination_port").items():
+            counts[port] += size
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="numpy batch decoding benchmark")
+    parser.add_argument("-n", "--packets", default=100000, type=int)
+    parser.add_argument("-b", "--batch-size", default=256, type=int)
+    args = parser.parse_args()
+
+    frames = [(time.time(), frame) for frame in traffic(args.packets)]
+    batches = [frames[idx:idx + args.batch_size]
+               for idx in range(0, len(frames), args.batch_size)]
+
+    def report(name: str, elapsed: float) -> None:
+        print(f"{name:>32}: {elapsed / args.packets * 1e6:6.2f} us/frame, "
+              f"{args.packets / elapsed:9.0f} frames/s")
+
+    report("decode, protocol parsers", per_frame(batches))
+    report("decode, numpy", vectorized(batches))
+
+    for batch_decoding in (False, True):
+        packet_filter = Packet_Filter()
+        packet_filter.register(
+            Filter("https", {"TCP": {"Destination_Port": 443}}))
+        packet_parser = Packet_Parser(
+            packet_filter, batch_decoding=batch_decoding)
+        report(f"parse and filter, batch {batch_decoding}",
+               asyncio.run(parse(packet_parser, batches)))
+
+    report("bytes per port, protocol parsers", bytes_per_port_objects(batches))
+    report("bytes per port, numpy", bytes_per_port_arrays(batches))
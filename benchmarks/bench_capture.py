@@ -0,0 +1,81 @@
+import argparse
+import multiprocessing
+import socket
+import sys
+import time
+import os
+
+sys.path.insert(0, os.getcwd())
+
+from network_monitor.services.interface_listener import InterfaceContextManager, Interface_Listener  # noqa
+from network_monitor.services.packet_ring import Packet_Ring  # noqa
+
+"""
+    Compare the recvfrom, recvmsg with kernel timestamps and TPACKET_V3 ring capture paths of the
+    interface listener.
+
+    Requires super user privileges, traffic is generated on the loopback interface.
+
+    sudo python3 benchmarks/bench_capture.py -d 5
+"""
+
+
+def generate_traffic(stop: multiprocessing.Event, payload_size: int) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payload = b"x" * payload_size
+    while not stop.is_set():
+        for _ in range(1000):
+            sock.sendto(payload, ("127.0.0.1", 9))
+
+
+def capture(mode: str, interface_name: str, duration: float, payload_size: int) -> int:
+    icm = InterfaceContextManager(
+        interface_name, kernel_timestamps=mode == "timestamps")
+    pm_socket = icm.get_socket()
+    pm_socket.settimeout(0.1)
+
+    listener = Interface_Listener(
+        interface_name, "./", capture_mode="ring" if mode == "ring" else "socket")
+    if mode == "ring":
+        packet_ring = Packet_Ring(pm_socket, block_size=1 << 20, block_count=64)
+        read_frames = packet_ring.read
+    else:
+        recv = listener._recv_socket_timestamped if mode == "timestamps" else listener._recv_socket
+
+        def read_frames():
+            try:
+                return recv(pm_socket)
+            except socket.timeout:
+                return []
+
+    stop = multiprocessing.Event()
+    generator = multiprocessing.Process(
+        target=generate_traffic, args=(stop, payload_size))
+    generator.start()
+
+    frames: int = 0
+    end: float = time.monotonic() + duration
+    try:
+        while time.monotonic() < end:
+            frames += len(read_frames())
+    finally:
+        stop.set()
+        generator.join()
+        if mode == "ring":
+            packet_ring.close()
+        icm.close()
+
+    return frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="capture path benchmark")
+    parser.add_argument("-i", "--interface", default="lo", type=str)
+    parser.add_argument("-d", "--duration", default=5.0, type=float)
+    parser.add_argument("-s", "--payload-size", default=64, type=int)
+    args = parser.parse_args()
+
+    for mode in ("socket", "timestamps", "ring"):
+        frames = capture(mode, args.interface,
+                         args.duration, args.payload_size)
+        print(f"{mode:>8}: {frames / args.duration:12.0f} frames/s")
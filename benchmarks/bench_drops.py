@@ -0,0 +1,97 @@
+import argparse
+import multiprocessing
+import socket
+import sys
+import tempfile
+import time
+import os
+
+sys.path.insert(0, os.getcwd())
+
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+from network_monitor.services import Interface_Listener  # noqa
+from network_monitor.services.capture_statistics import capture_completeness  # noqa
+
+"""
+    Show the effect of the socket receive buffer and ring size on the frames dropped by the kernel. The
+    consumer parses and serializes every frame, bursts of traffic overflow small buffers.
+
+    Requires super user privileges, traffic is generated on the loopback interface.
+
+    sudo python3 benchmarks/bench_drops.py -d 5
+"""
+
+
+def generate_traffic(stop: multiprocessing.Event, payload_size: int, burst: int, idle: float) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payload = b"x" * payload_size
+    while not stop.is_set():
+        # bursts followed by idle time the consumer can use to catch up
+        for _ in range(burst):
+            sock.sendto(payload, ("127.0.0.1", 9))
+        time.sleep(idle)
+
+
+def capture(interface_name: str, duration: float, payload_size: int, burst: int, idle: float, capture_mode: str, receive_buffer_size: int, ring_block_count: int) -> dict:
+    listener = Interface_Listener(
+        interface_name,
+        tempfile.gettempdir(),
+        capture_mode=capture_mode,
+        ring_block_size=1 << 16,
+        ring_block_count=ring_block_count,
+        receive_buffer_size=receive_buffer_size
+    )
+    read_frames = listener.open_capture()
+
+    stop = multiprocessing.Event()
+    generator = multiprocessing.Process(
+        target=generate_traffic, args=(stop, payload_size, burst, idle))
+    generator.start()
+
+    end: float = time.monotonic() + duration
+    try:
+        while time.monotonic() < end:
+            try:
+                frames = read_frames()
+            except BlockingIOError:
+                continue
+            for _, (raw_bytes, address) in frames:
+                AF_Packet(address).serialize()
+                Packet_802_3(raw_bytes).serialize()
+    finally:
+        stop.set()
+        generator.join()
+
+    counters = listener.capture_statistics.poll()
+    listener.close_capture()
+    return counters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="kernel drops by receive buffer and ring size")
+    parser.add_argument("-i", "--interface", default="lo", type=str)
+    parser.add_argument("-d", "--duration", default=5.0, type=float)
+    parser.add_argument("-s", "--payload-size", default=64, type=int)
+    parser.add_argument("-b", "--burst", default=2000, type=int,
+                        help="datagrams per burst")
+    parser.add_argument("--idle", default=0.5, type=float,
+                        help="seconds between bursts")
+    args = parser.parse_args()
+
+    configurations = [
+        ("socket", 1 << 16, 0),
+        ("socket", 1 << 20, 0),
+        ("socket", 1 << 23, 0),
+        ("ring", None, 4),
+        ("ring", None, 32),
+        ("ring", None, 256),
+    ]
+    for capture_mode, receive_buffer_size, ring_block_count in configurations:
+        counters = capture(args.interface, args.duration, args.payload_size, args.burst, args.idle,
+                           capture_mode, receive_buffer_size, ring_block_count)
+        size = f"rcvbuf {receive_buffer_size}" if capture_mode == "socket" else f"ring {ring_block_count << 16}"
+        print(
+            f"{capture_mode:>6} {size:>16}: received {counters['packets_kernel_received']:9d}, "
+            f"dropped {counters['packets_kernel_dropped']:9d}, {capture_completeness(counters)}"
+        )
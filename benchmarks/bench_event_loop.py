@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import multiprocessing
+import queue
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import os
+
+sys.path.insert(0, os.getcwd())
+
+from network_monitor.services import Interface_Listener, Packet_Parser, Service_Control  # noqa
+
+"""
+    Compare the three thread layout (listener thread, parser thread and submitter thread connected by
+    queue.Queue) with the single event loop layout (non blocking listener registered with loop.add_reader,
+    parser and submitter tasks connected by asyncio.Queue).
+
+    The submitter is replaced by a sink recording the latency between the sniffed timestamp and the
+    moment the processed packet reaches the sink.
+
+    Requires super user privileges, traffic is generated on the loopback interface.
+
+    sudo python3 benchmarks/bench_event_loop.py -d 5
+    sudo python3 benchmarks/bench_event_loop.py -d 5 -r 5000
+    sudo python3 benchmarks/bench_event_loop.py -d 5 -b 1,16,64,256
+"""
+
+
+def generate_traffic(stop: multiprocessing.Event, payload_size: int, rate: int) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payload = b"x" * payload_size
+    # bursts every 10 milliseconds, rate 0 floods the interface
+    burst: int = max(rate // 100, 1) if rate else 1000
+    next_burst: float = time.monotonic()
+    while not stop.is_set():
+        for _ in range(burst):
+            sock.sendto(payload, ("127.0.0.1", 9))
+        if rate:
+            next_burst += 0.01
+            time.sleep(max(next_burst - time.monotonic(), 0))
+
+
+def spawn_event_loop(service_object, service_control: Service_Control) -> None:
+    asyncio.run(service_object.worker(service_control))
+
+
+def threads_layout(interface_name: str, duration: float, batch_size: int, latencies: list) -> None:
+    listener_control = Service_Control("listener")
+    parser_control = Service_Control("parser")
+    listener_control.out_channel = parser_control.in_channel = queue.Queue()
+    parser_control.out_channel = queue.Queue()
+
+    threads = [
+        threading.Thread(target=spawn_event_loop, args=(
+            Interface_Listener(interface_name, tempfile.gettempdir(), batch_size=batch_size), listener_control)),
+        threading.Thread(target=spawn_event_loop, args=(
+            Packet_Parser(), parser_control)),
+    ]
+    for thread in threads:
+        thread.start()
+
+    end: float = time.monotonic() + duration
+    while time.monotonic() < end:
+        try:
+            packets = parser_control.out_channel.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        now = time.time()
+        latencies.extend(now - packet["Info"]["Sniffed_Timestamp"]
+                         for packet in packets)
+        parser_control.out_channel.task_done()
+
+    listener_control.sentinal = False
+    parser_control.sentinal = False
+    for thread in threads:
+        thread.join()
+
+
+async def single_loop_layout(interface_name: str, duration: float, batch_size: int, latencies: list) -> None:
+    listener_control = Service_Control("listener")
+    parser_control = Service_Control("parser")
+    listener_control.out_channel = parser_control.in_channel = asyncio.Queue()
+    parser_control.out_channel = asyncio.Queue()
+
+    tasks = [
+        asyncio.create_task(Interface_Listener(
+            interface_name, tempfile.gettempdir(), batch_size=batch_size).reader(listener_control)),
+        asyncio.create_task(Packet_Parser().worker(parser_control)),
+    ]
+
+    end: float = time.monotonic() + duration
+    while time.monotonic() < end:
+        try:
+            # drain without suspending, wait_for costs a loop iteration per packet
+            packets = parser_control.out_channel.get_nowait()
+        except asyncio.QueueEmpty:
+            try:
+                packets = await asyncio.wait_for(parser_control.out_channel.get(), timeout=0.1)
+            except asyncio.TimeoutError:
+                continue
+        now = time.time()
+        latencies.extend(now - packet["Info"]["Sniffed_Timestamp"]
+                         for packet in packets)
+        parser_control.out_channel.task_done()
+
+    listener_control.sentinal = False
+    parser_control.sentinal = False
+    await asyncio.gather(*tasks)
+
+
+def capture(layout: str, interface_name: str, duration: float, batch_size: int) -> list:
+    latencies: list = []
+    if layout == "threads":
+        threads_layout(interface_name, duration, batch_size, latencies)
+    else:
+        asyncio.run(single_loop_layout(
+            interface_name, duration, batch_size, latencies))
+    return sorted(latencies)
+
+
+def run(layout: str, interface_name: str, duration: float, payload_size: int, rate: int, batch_size: int) -> list:
+    stop = multiprocessing.Event()
+    generator = multiprocessing.Process(
+        target=generate_traffic, args=(stop, payload_size, rate))
+    generator.start()
+
+    try:
+        # fresh process per layout, the service loggers close their streams on exit
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            return pool.apply(capture, (layout, interface_name, duration, batch_size))
+    finally:
+        stop.set()
+        generator.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="three thread vs single event loop benchmark")
+    parser.add_argument("-i", "--interface", default="lo", type=str)
+    parser.add_argument("-d", "--duration", default=5.0, type=float)
+    parser.add_argument("-s", "--payload-size", default=64, type=int)
+    parser.add_argument("-r", "--rate", default=0, type=int,
+                        help="datagrams per second, 0 floods the interface")
+    parser.add_argument("-b", "--batch-sizes", default="1,64", type=str,
+                        help="comma separated batch sizes of the hand-off between the services")
+    args = parser.parse_args()
+
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        for layout in ("threads", "loop"):
+            latencies = run(layout, args.interface, args.duration,
+                            args.payload_size, args.rate, batch_size)
+            name = f"{layout} batch {batch_size}"
+            if not latencies:
+                print(f"{name:>18}: no packets processed")
+                continue
+            print(
+                f"{name:>18}: {len(latencies) / args.duration:10.0f} packets/s, "
+                f"latency median {statistics.median(latencies) * 1e3:8.3f} ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:8.3f} ms"
+            )
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.filters.deep_walker import flatten_protocols  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Filter  # noqa
+
+"""
+    Filter cost per packet of the cidr and range expressions. A prefix costs the same whatever the number of
+    addresses it covers, and a port range in one filter is compared with the same range written as one filter
+    per port.
+
+    python3 benchmarks/bench_filter_expressions.py -n 50000
+"""
+
+
+def configurations() -> dict:
+    return {
+        "cidr /24": [Filter("prefix", {"IPv4": {"Source_Address": {"cidr": "10.0.3.0/24"}}})],
+        "cidr /8": [Filter("prefix", {"IPv4": {"Source_Address": {"cidr": "10.0.0.0/8"}}})],
+        "cidr 1000 prefixes": [Filter("prefixes", {"IPv4": {"Source_Address": {"cidr": [
+            f"172.{16 + (idx >> 8)}.{idx & 255}.0/{20 + idx % 9}" for idx in range(1000)]}}})],
+        "ports 8000-8100 range": [Filter("ports", {"TCP": {"Destination_Port": {"range": [8000, 8100]}}})],
+        "ports 8000-8100 equality": [Filter(f"port_{port}", {"TCP": {"Destination_Port": port}})
+                                     for port in range(8000, 8101)],
+        "ports 8000-8100 in": [Filter("ports", {"TCP": {"Destination_Port": {"in": list(range(8000, 8101))}}})],
+    }
+
+
+def parse(frames: list) -> list:
+    packets = []
+    for raw_bytes, address in frames:
+        protocols = {p.Protocol_Name: p for p in flatten_protocols(
+            Packet_802_3(raw_bytes))}
+        protocols["AF_Packet"] = AF_Packet(address)
+        packets.append(protocols)
+    return packets
+
+
+def match(packet_filter: Packet_Filter, packets: list) -> float:
+    start = time.perf_counter()
+    for protocols in packets:
+        packet_filter.match(protocols)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="filter expressions benchmark")
+    parser.add_argument("-n", "--packets", default=50000, type=int)
+    args = parser.parse_args()
+
+    # the lazy fields are decoded by a first pass, only the filters are timed
+    packets = parse(traffic(args.packets))
+    warm_up = Packet_Filter()
+    warm_up.register(Filter("warm_up", {"IPv4": {"Source_Address": "0.0.0.0"}}))
+    match(warm_up, packets)
+
+    for name, filters in configurations().items():
+        packet_filter = Packet_Filter()
+        packet_filter.register(filters)
+        elapsed = match(packet_filter, packets)
+        print(f"{name:>26}: {elapsed / args.packets * 1e6:6.2f} us/packet")
@@ -0,0 +1,115 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.filters.deep_walker import flatten_protocols  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3, batch_decoder  # noqa
+from network_monitor.protocols.batch_decoder import decode_headers, filter_mask  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Filter, Packet_Parser  # noqa
+
+"""
+    Filter cost per packet for blocklists of 10 to 100k filters, the indexed Packet_Filter compared with the filters
+    applied one by one. The blocklist holds IPv4 source addresses and destination address and port pairs, one
+    host of the synthetic traffic is blocked. The protocol objects are parsed before the run, only the filters
+    are timed. With numpy the batch path is timed as well: filter_batch on the decoded headers of batches of
+    frames, compared with filter_mask applied once per filter to a batch.
+
+    python3 benchmarks/bench_filter_index.py -n 20000 -f 10,1000,100000
+"""
+
+
+def blocklist(count: int) -> list:
+    filters = [Filter("blocked_host", {"IPv4": {"Source_Address": "10.0.0.5"}})]
+    for idx in range(1, count):
+        address = f"172.{16 + (idx >> 16) % 16}.{(idx >> 8) & 255}.{idx & 255}"
+        if idx % 2:
+            filters.append(
+                Filter(f"source_{idx}", {"IPv4": {"Source_Address": address}}))
+        else:
+            filters.append(Filter(f"service_{idx}", {"IPv4": {
+                           "Destination_Address": address}, "TCP": {"Destination_Port": 443}}))
+    return filters
+
+
+def parse(frames: list) -> list:
+    """ return the protocol objects of the frames keyed by protocol name and the serialized packets """
+    packets = []
+    for raw_bytes, address in frames:
+        protocols = {protocol.Protocol_Name: protocol for protocol in flatten_protocols(
+            Packet_802_3(raw_bytes))}
+        protocols["AF_Packet"] = AF_Packet(address)
+        packets.append((protocols, {name: protocol.serialize()
+                       for name, protocol in protocols.items()}))
+    return packets
+
+
+def indexed(packet_filter: Packet_Filter, packets: list) -> float:
+    start = time.perf_counter()
+    for protocols, _ in packets:
+        packet_filter.match(protocols)
+    return time.perf_counter() - start
+
+
+def linear(filters: list, packets: list) -> float:
+    start = time.perf_counter()
+    for _, packet in packets:
+        any(filter_.apply(packet) for filter_ in filters)
+    return time.perf_counter() - start
+
+
+def batched(packet_filter: Packet_Filter, batches: list) -> float:
+    packet_parser = Packet_Parser(packet_filter, batch_decoding=True)
+    # the column keys are built once after the filters are registered
+    packet_parser.filter_batch(batches[0])
+    start = time.perf_counter()
+    for batch in batches:
+        packet_parser.filter_batch(batch)
+    return time.perf_counter() - start
+
+
+def batched_linear(filters: list, batch: list) -> float:
+    start = time.perf_counter()
+    headers = decode_headers(batch)
+    for filter_ in filters:
+        filter_mask(filter_.Definition, headers)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="indexed filter benchmark")
+    parser.add_argument("-n", "--packets", default=20000, type=int)
+    parser.add_argument("-f", "--filters", default="10,1000,100000",
+                        help="comma separated blocklist sizes")
+    parser.add_argument("--linear-packets", default=200, type=int,
+                        help="packets filtered one filter at a time, the linear run grows with the filters")
+    parser.add_argument("-b", "--batch-size", default=256, type=int,
+                        help="frames per decoded batch, the linear batch run filters one batch")
+    args = parser.parse_args()
+
+    frames = traffic(args.packets)
+    packets = parse(frames)
+    batches = [[(time.time(), frame) for frame in frames[idx:idx + args.batch_size]]
+               for idx in range(0, len(frames), args.batch_size)]
+
+    for count in (int(size) for size in args.filters.split(",")):
+        filters = blocklist(count)
+        packet_filter = Packet_Filter()
+        packet_filter.register(filters)
+
+        elapsed = indexed(packet_filter, packets)
+        linear_elapsed = linear(filters, packets[:args.linear_packets])
+        print(f"{count:>7} filters: indexed {elapsed / len(packets) * 1e6:8.2f} us/packet, "
+              f"linear {linear_elapsed / min(len(packets), args.linear_packets) * 1e6:10.2f} us/packet")
+
+        if batch_decoder.np is None:
+            continue
+        batch_elapsed = batched(packet_filter, batches)
+        batch_linear_elapsed = batched_linear(filters, batches[0])
+        print(f"{'':>16} batch   {batch_elapsed / len(frames) * 1e6:8.2f} us/packet, "
+              f"linear {batch_linear_elapsed / len(batches[0]) * 1e6:10.2f} us/packet")
@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.configurations import DevConfig  # noqa
+from network_monitor.filters.deep_walker import flatten_protocols  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+
+"""
+    Parse and filter cost per packet with the DevConfig loopback and backend filters, the filters applied to the
+    protocol objects before serialization compared with the filters applied to the serialized packets. The drop
+    ratio of the frames is captured on the loopback interface and dropped by the filters.
+
+    python3 benchmarks/bench_filter_predicates.py -n 100000 --drop-ratio 0.9
+"""
+
+
+def frames(count: int, drop_ratio: float) -> list:
+    rng = random.Random(0)
+    out = []
+    for raw_bytes, address in traffic(count):
+        if rng.random() < drop_ratio:
+            address = ("lo",) + address[1:]
+        out.append((raw_bytes, address))
+    return out
+
+
+def serialize_then_filter(filters: list, frames: list) -> float:
+    start = time.perf_counter()
+    for raw_bytes, address in frames:
+        af_packet = AF_Packet(address)
+        packet = {p.Protocol_Name: p.serialize()
+                  for p in flatten_protocols(Packet_802_3(raw_bytes))}
+        packet["AF_Packet"] = af_packet.serialize()
+        any(filter_.apply(packet) for filter_ in filters)
+    return time.perf_counter() - start
+
+
+def filter_then_serialize(packet_filter: Packet_Filter, frames: list) -> float:
+    start = time.perf_counter()
+    for raw_bytes, address in frames:
+        packet_filter.apply(AF_Packet(address), Packet_802_3(raw_bytes))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="filter predicates benchmark")
+    parser.add_argument("-n", "--packets", default=100000, type=int)
+    parser.add_argument("--drop-ratio", default="0.0,0.5,0.9",
+                        help="comma separated ratios of loopback frames")
+    args = parser.parse_args()
+
+    filters = DevConfig().Filters
+    packet_filter = Packet_Filter()
+    packet_filter.register(filters)
+
+    for drop_ratio in (float(ratio) for ratio in args.drop_ratio.split(",")):
+        captured = frames(args.packets, drop_ratio)
+        serialized = serialize_then_filter(filters, captured)
+        predicates = filter_then_serialize(packet_filter, captured)
+        print(f"drop ratio {drop_ratio:4.2f}: serialize then filter {serialized / args.packets * 1e6:6.2f} us/packet, "
+              f"filter then serialize {predicates / args.packets * 1e6:6.2f} us/packet")
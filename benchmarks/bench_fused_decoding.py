@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import arp, ethernet, ipv4, ipv6, tcp, udp  # noqa
+from network_monitor.filters import flatten_protocols  # noqa
+from network_monitor.protocols import Packet_802_3  # noqa
+from network_monitor.protocols.fast_paths import FUSED_DECODERS  # noqa
+
+"""
+    Decoding throughput per protocol stack with the fused decoders and with the registered protocol parsers
+    only. Parsed constructs the protocol objects, serialized also decodes and serializes every field.
+
+    python3 benchmarks/bench_fused_decoding.py -n 100000
+"""
+
+MAC: bytes = b"\x02\x00\x00\x00\x00\x01"
+PAYLOAD: bytes = b"\x00" * 512
+
+STACKS = {
+    "Ethernet/IPv4/TCP": ethernet(MAC, MAC, 0x0800, ipv4("10.0.0.1", "10.0.0.2", 6, tcp(40000, 443, PAYLOAD))),
+    "Ethernet/IPv4/UDP": ethernet(MAC, MAC, 0x0800, ipv4("10.0.0.1", "10.0.0.2", 17, udp(40000, 53, PAYLOAD))),
+    "Ethernet/IPv6/TCP": ethernet(MAC, MAC, 0x86DD, ipv6("fd00::1", "fd00::2", 6, tcp(40000, 443, PAYLOAD))),
+    "Ethernet/IPv6/UDP": ethernet(MAC, MAC, 0x86DD, ipv6("fd00::1", "fd00::2", 17, udp(40000, 53, PAYLOAD))),
+    "Ethernet/ARP": ethernet(MAC, MAC, 0x0806, arp("10.0.0.1", "10.0.0.2")),
+}
+
+
+def parsed(raw_bytes: bytes) -> None:
+    Packet_802_3(raw_bytes)
+
+
+def serialized(raw_bytes: bytes) -> None:
+    for protocol in flatten_protocols(Packet_802_3(raw_bytes)):
+        protocol.serialize()
+
+
+def throughput(consume, raw_bytes: bytes, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        consume(raw_bytes)
+    return number / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fused decoding benchmark")
+    parser.add_argument("-n", "--number", default=100000, type=int)
+    args = parser.parse_args()
+
+    fused_decoders = dict(FUSED_DECODERS)
+    for name, raw_bytes in STACKS.items():
+        results = []
+        for consume in (parsed, serialized):
+            FUSED_DECODERS.clear()
+            registered = throughput(consume, raw_bytes, args.number)
+            FUSED_DECODERS.update(fused_decoders)
+            fused = throughput(consume, raw_bytes, args.number)
+            results.append(
+                f"{consume.__name__} {registered:8.0f} -> {fused:8.0f} packets/s")
+        print(f"{name:>18}: " + ", ".join(results))
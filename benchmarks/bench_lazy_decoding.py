@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.filters import flatten_protocols  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3, TCP, UDP  # noqa
+
+"""
+    Parse cost per packet of the protocol objects. Filtered out packets are only constructed, a consumer
+    reading the ports decodes two fields and a forwarded packet is serialized. With lazy decoding the
+    fields are decoded on first access, packets that are never serialized skip the address formatting
+    and the flag and option dictionaries.
+
+    python3 benchmarks/bench_lazy_decoding.py -n 100000
+"""
+
+
+def construct(af_packet: AF_Packet, out_packet: Packet_802_3) -> None:
+    pass
+
+
+def ports(af_packet: AF_Packet, out_packet: Packet_802_3) -> None:
+    for protocol in flatten_protocols(out_packet):
+        if isinstance(protocol, (TCP, UDP)):
+            protocol.Source_Port, protocol.Destination_Port
+
+
+def serialize(af_packet: AF_Packet, out_packet: Packet_802_3) -> None:
+    af_packet.serialize()
+    for protocol in flatten_protocols(out_packet):
+        protocol.serialize()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="lazy field decoding benchmark")
+    parser.add_argument("-n", "--packets", default=100000, type=int)
+    args = parser.parse_args()
+
+    frames = traffic(args.packets)
+    for name, consume in (("filtered out", construct), ("ports", ports), ("serialized", serialize)):
+        start = time.perf_counter()
+        for raw_bytes, address in frames:
+            consume(AF_Packet(address), Packet_802_3(raw_bytes))
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14}: {elapsed / args.packets * 1e6:6.2f} us/packet, "
+              f"{args.packets / elapsed:9.0f} packets/s")
@@ -0,0 +1,86 @@
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.services import Bounded_Queue, low_priority_frames  # noqa
+
+"""
+    Memory of the listener to parser queue under a synthetic overload. A producer thread puts frame batches
+    on the queue faster than the consumer thread takes them, the traced memory is sampled every second.
+    The unbounded queue grows for the whole run, the bounded policies stay flat.
+
+    python3 benchmarks/bench_overload.py -d 5 --max-depth 256
+"""
+
+
+def overload(channel: queue.Queue, batches: list, duration: float, consume_delay: float) -> list:
+    stop = threading.Event()
+
+    def consumer() -> None:
+        while not stop.is_set():
+            try:
+                channel.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            channel.task_done()
+            # the parser takes much longer per batch than the listener
+            time.sleep(consume_delay)
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+
+    tracemalloc.start()
+    samples: list = []
+    start: float = time.monotonic()
+    next_sample: float = start + 1
+    idx: int = 0
+    while time.monotonic() - start < duration:
+        # copies, the listener receives new frames
+        channel.put_nowait([(timestamp, (bytes(raw_bytes), address))
+                            for timestamp, (raw_bytes, address) in batches[idx % len(batches)]])
+        idx += 1
+        if time.monotonic() >= next_sample:
+            next_sample += 1
+            samples.append((channel.qsize(), tracemalloc.get_traced_memory()[0]))
+    tracemalloc.stop()
+
+    stop.set()
+    thread.join()
+    return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="queue memory under overload")
+    parser.add_argument("-d", "--duration", default=5, type=float,
+                        help="seconds of overload per policy")
+    parser.add_argument("--max-depth", default=256, type=int)
+    parser.add_argument("-b", "--batch-size", default=64, type=int)
+    parser.add_argument("--consume-delay", default=0.001, type=float,
+                        help="seconds the consumer spends per batch")
+    args = parser.parse_args()
+
+    frames = [(time.time(), frame) for frame in traffic(4096)]
+    batches = [frames[idx:idx + args.batch_size]
+               for idx in range(0, len(frames), args.batch_size)]
+
+    low_priority = low_priority_frames(["UDP", "ICMP", "ICMPv6", "ARP"])
+    channels = [
+        ("unbounded", lambda: Bounded_Queue(0, "drop_newest")),
+        ("block", lambda: Bounded_Queue(args.max_depth, "block")),
+        ("drop_newest", lambda: Bounded_Queue(args.max_depth, "drop_newest")),
+        ("drop_oldest", lambda: Bounded_Queue(args.max_depth, "drop_oldest")),
+        ("shed", lambda: Bounded_Queue(args.max_depth, "shed", low_priority)),
+    ]
+    for name, create_channel in channels:
+        channel = create_channel()
+        samples = overload(channel, batches, args.duration, args.consume_delay)
+        memory = " ".join(f"{size / 1e6:7.1f}" for _, size in samples)
+        print(f"{name:>12}: MB per second {memory}, depth {samples[-1][0]:6d}, {dict(channel.stats)}")
@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.protocols import Protocol_Parser  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Packet_Parser  # noqa
+
+"""
+    Parse and serialize cost per packet when decoding stops at the deepest layer used by the output protocols,
+    from every layer down to the AF_Packet information only.
+
+    python3 benchmarks/bench_parse_depth.py -n 100000
+"""
+
+OUTPUTS = {
+    "every layer": None,
+    "network layer": ["AF_Packet", "Packet_802_3", "Packet_802_2", "IPv4", "IPv6", "ARP"],
+    "link layer": ["AF_Packet", "Packet_802_3", "Packet_802_2"],
+    "AF_Packet": ["AF_Packet"],
+}
+
+
+async def parse(packet_parser: Packet_Parser, frames: list) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        await packet_parser.process_frame(frame)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="partial parsing benchmark")
+    parser.add_argument("-n", "--packets", default=100000, type=int)
+    args = parser.parse_args()
+
+    frames = [(time.time(), frame) for frame in traffic(args.packets)]
+
+    for name, output_protocols in OUTPUTS.items():
+        packet_filter = Packet_Filter(output_protocols=output_protocols)
+        Protocol_Parser.set_parse_depth(packet_filter.protocol_names())
+        elapsed = asyncio.run(parse(Packet_Parser(packet_filter), frames))
+        print(f"{name:>14}: {elapsed / args.packets * 1e6:6.2f} us/packet, "
+              f"{args.packets / elapsed:9.0f} packets/s")
@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.services import Packet_Parser, Parser_Pool, Parser_Pool_Worker, Service_Control  # noqa
+
+"""
+    Parsing throughput of the parser pool from 1 to N worker processes. The frames are copied into the shared
+    memory ring by the dispatcher and the processed packets are taken from the submitter queue by a collector
+    thread. The single process Packet_Parser is the baseline. The workers are started and warmed up before the
+    run is timed, the throughput only scales with the number of cores the process may run on. Runs with more
+    workers than usable cores are marked oversubscribed, their speedup is not a scaling number. The dispatcher
+    and the collector need a core of their own, take the scaling numbers on a host with more cores than workers.
+
+    python3 benchmarks/bench_parser_pool.py -n 50000 -w 1,2,4,8
+"""
+
+
+async def parse_in_process(frames: list) -> float:
+    packet_parser = Packet_Parser()
+    start = time.perf_counter()
+    for frame in frames:
+        await packet_parser.process_frame(frame)
+    return time.perf_counter() - start
+
+
+def run_pool(workers: int, frames: list, batch_size: int, slot_count: int) -> float:
+    pool = Parser_Pool(Parser_Pool_Worker(), workers, slot_count=slot_count)
+    service_control = Service_Control("packet parser")
+    service_control.out_channel = pool.context.Queue()
+    service_control.stats_channel = pool.context.Queue()
+    service_control.stop_event = pool.context.Event()
+    service_control.processes = pool.processes(
+        service_control.stop_event, service_control.out_channel, service_control.stats_channel)
+    for process in service_control.processes:
+        process.start()
+
+    # every worker parses a warm up batch before the run is timed
+    warm_up = frames[:batch_size * workers * 4]
+    batches = [frames[idx:idx + batch_size]
+               for idx in range(0, len(frames), batch_size)]
+    expected = len(warm_up) + len(frames)
+    received = [0]
+    warmed_up = threading.Event()
+    done = threading.Event()
+
+    def collect() -> None:
+        while received[0] < expected:
+            received[0] += len(service_control.out_channel.get())
+            if received[0] >= len(warm_up):
+                warmed_up.set()
+        done.set()
+
+    collector = threading.Thread(target=collect, daemon=True)
+    collector.start()
+
+    elapsed: list = []
+
+    async def timed() -> None:
+        service_control.in_channel = asyncio.Queue()
+        task = asyncio.create_task(pool.worker(service_control))
+        service_control.in_channel.put_nowait(warm_up)
+        while not warmed_up.is_set():
+            await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        for batch in batches:
+            service_control.in_channel.put_nowait(batch)
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+        elapsed.append(time.perf_counter() - start)
+
+        service_control.sentinal = False
+        await task
+
+    asyncio.run(timed())
+    for process in service_control.processes:
+        process.join()
+    return elapsed[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="parser pool scaling benchmark")
+    parser.add_argument("-n", "--packets", default=50000, type=int)
+    parser.add_argument("-w", "--workers", default="1,2,4",
+                        help="comma separated worker counts")
+    parser.add_argument("-b", "--batch-size", default=64, type=int)
+    parser.add_argument("--slots", default=4096, type=int,
+                        help="frames held by the shared memory ring")
+    args = parser.parse_args()
+
+    frames = [(time.time(), frame) for frame in traffic(args.packets)]
+    # the affinity mask, not the host cores, bounds the workers running in parallel
+    cores: int = len(os.sched_getaffinity(0)) if hasattr(
+        os, "sched_getaffinity") else os.cpu_count()
+    print(f"cores: {os.cpu_count()}, usable: {cores}")
+
+    baseline = asyncio.run(parse_in_process(frames))
+    print(f"{'in process':>12}: {args.packets / baseline:9.0f} packets/s")
+
+    for workers in (int(count) for count in args.workers.split(",")):
+        elapsed = run_pool(workers, frames, args.batch_size, args.slots)
+        speedup = baseline / elapsed
+        print(f"{workers:>4} workers: {args.packets / elapsed:9.0f} packets/s, "
+              f"speedup {speedup:5.2f}, efficiency {speedup / workers:5.2f}"
+              f"{', oversubscribed' if workers + 1 > cores else ''}")
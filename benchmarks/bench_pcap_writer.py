@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.protocols import AF_Packet  # noqa
+from network_monitor.services import Pcap_Writer, Packet_Parser  # noqa
+
+"""
+    Cost of the raw capture sink. Compares the pcap and pcapng writers with the JSON and base64 lines of
+    capture_raw_logger, and the packet parser throughput with and without the pcap writer thread
+    receiving the same frame batches.
+
+    python3 benchmarks/bench_pcap_writer.py -n 50000
+"""
+
+
+def write_lines(directory: str, batches: list) -> None:
+    # capture_raw_logger format, address as json and the frame as base64, one write per line
+    with open(os.path.join(directory, "capture.lp"), "w") as fout:
+        for batch in batches:
+            for _, (raw_bytes, address) in batch:
+                fout.write(json.dumps(AF_Packet(address).serialize()) + "\n")
+                fout.write(base64.b64encode(raw_bytes).decode("utf-8") + "\n")
+
+
+def write_pcap(directory: str, batches: list, file_format: str) -> None:
+    pcap_writer = Pcap_Writer(directory, file_format=file_format)
+    pcap_writer.open()
+    for batch in batches:
+        pcap_writer.write(batch)
+    pcap_writer.close()
+
+
+def directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+async def parse(batches: list) -> None:
+    packet_parser = Packet_Parser()
+    for batch in batches:
+        for frame in batch:
+            await packet_parser.process_frame(frame)
+
+
+def parse_with_writer(batches: list, directory: str) -> None:
+    channel: queue.Queue = queue.Queue()
+    pcap_writer = Pcap_Writer(directory)
+    pcap_writer.open()
+
+    def writer() -> None:
+        while True:
+            batch = channel.get()
+            if batch is None:
+                break
+            pcap_writer.write(batch)
+        pcap_writer.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    # the listener puts every batch on the writer queue as well
+    for batch in batches:
+        channel.put_nowait(batch)
+    asyncio.run(parse(batches))
+    channel.put(None)
+    thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="raw capture sink benchmark")
+    parser.add_argument("-n", "--packets", default=50000, type=int)
+    parser.add_argument("-b", "--batch-size", default=64, type=int)
+    args = parser.parse_args()
+
+    frames = [(time.time(), frame) for frame in traffic(args.packets)]
+    batches = [frames[idx:idx + args.batch_size]
+               for idx in range(0, len(frames), args.batch_size)]
+    captured: int = sum(len(raw_bytes) for _, (raw_bytes, _) in frames)
+
+    sinks = [
+        ("json lines", write_lines),
+        ("pcap", lambda directory, batches: write_pcap(
+            directory, batches, "pcap")),
+        ("pcapng", lambda directory, batches: write_pcap(
+            directory, batches, "pcapng")),
+    ]
+    for name, sink in sinks:
+        directory = tempfile.mkdtemp()
+        try:
+            start = time.perf_counter()
+            sink(directory, batches)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>12}: {len(frames) / elapsed:10.0f} frames/s, {directory_size(directory) / captured:5.2f} bytes on disk per captured byte")
+        finally:
+            shutil.rmtree(directory)
+
+    start = time.perf_counter()
+    asyncio.run(parse(batches))
+    without_writer = time.perf_counter() - start
+
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        parse_with_writer(batches, directory)
+        with_writer = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{'parser':>12}: {len(frames) / without_writer:10.0f} frames/s without writer, "
+          f"{len(frames) / with_writer:10.0f} frames/s with writer thread")
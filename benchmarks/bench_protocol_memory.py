@@ -0,0 +1,49 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.filters import flatten_protocols  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+
+"""
+    Memory held per packet by the parsed protocol objects, e.g. while queued between the parser stages.
+    The frames are allocated before tracing, only the protocol objects and their decoded fields are
+    counted. Parsed holds the objects as created, decoded after every field was accessed by serialize.
+
+    python3 benchmarks/bench_protocol_memory.py -n 100000
+"""
+
+
+def held_per_packet(frames, decode: bool) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    packets = [(AF_Packet(address), Packet_802_3(raw_bytes))
+               for raw_bytes, address in frames]
+    if decode:
+        for af_packet, out_packet in packets:
+            af_packet.serialize()
+            for protocol in flatten_protocols(out_packet):
+                protocol.serialize()
+
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del packets
+    return (held - before) / len(frames)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="protocol object memory benchmark")
+    parser.add_argument("-n", "--packets", default=100000, type=int)
+    args = parser.parse_args()
+
+    frames = traffic(args.packets)
+    for name, decode in (("parsed", False), ("decoded", True)):
+        print(f"{name:>8}: {held_per_packet(frames, decode):7.0f} bytes per packet")
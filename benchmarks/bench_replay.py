@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from network_monitor.services import Pcap_Reader, Packet_Parser  # noqa
+from synthetic_traffic import traffic  # noqa
+
+"""
+    Throughput of the pcap replay source and of the packet parser fed by it. Replays a recorded trace when
+    a file is provided, otherwise a pcap file of synthetic traffic is written first. Does not require
+    super user privileges.
+
+    python3 benchmarks/bench_replay.py -n 100000
+    python3 benchmarks/bench_replay.py -f capture.pcapng
+"""
+
+
+def write_synthetic_pcap(filename: str, count: int) -> None:
+    with open(filename, "wb") as fout:
+        fout.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for idx, (raw_bytes, _) in enumerate(traffic(count)):
+            # 10 microseconds between frames
+            fout.write(struct.pack("<IIII", 1600000000 + idx // 100000, idx % 100000 * 10,
+                                   len(raw_bytes), len(raw_bytes)) + raw_bytes)
+
+
+async def parse(filename: str) -> int:
+    packet_parser = Packet_Parser()
+    count: int = 0
+    for frame in Pcap_Reader(filename):
+        await packet_parser.process_frame(frame)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pcap replay throughput")
+    parser.add_argument("-f", "--file", default=None, type=str,
+                        help="pcap or pcapng file, synthetic traffic when not provided")
+    parser.add_argument("-n", "--count", default=100000, type=int,
+                        help="number of synthetic frames")
+    args = parser.parse_args()
+
+    filename: str = args.file
+    if filename is None:
+        filename = os.path.join(tempfile.mkdtemp(), "synthetic.pcap")
+        write_synthetic_pcap(filename, args.count)
+
+    try:
+        start: float = time.perf_counter()
+        frames: int = sum(1 for _ in Pcap_Reader(filename))
+        elapsed: float = time.perf_counter() - start
+        print(f"   read: {frames / elapsed:12.0f} frames/s, {os.path.getsize(filename) / elapsed / 1e6:8.1f} MB/s")
+
+        start = time.perf_counter()
+        packets: int = asyncio.run(parse(filename))
+        elapsed = time.perf_counter() - start
+        print(f"  parse: {packets / elapsed:12.0f} frames/s")
+    finally:
+        if args.file is None:
+            os.remove(filename)
@@ -0,0 +1,66 @@
+import argparse
+import dataclasses
+import os
+import socket
+import struct
+import sys
+import timeit
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import arp, ethernet, ipv4, ipv6, tcp, udp  # noqa
+from network_monitor.protocols import Protocol_Parser  # noqa
+
+"""
+    Serialization cost of every registered protocol, dataclasses.asdict with the protocol name looked up
+    by class compared to the serialize method generated at registration with the precomputed name. The
+    fields are decoded before timing, only the serialization is measured.
+
+    python3 benchmarks/bench_serializers.py -n 100000
+"""
+
+MAC: bytes = b"\x02\x00\x00\x00\x00\x01"
+
+# constructor arguments of a sample object per protocol
+SAMPLES = {
+    "AF_Packet": (("eth0", 0x0800, socket.PACKET_HOST, 1, MAC),),
+    "Packet_802_3": (ethernet(MAC, MAC, 0x0800, ipv4("10.0.0.1", "10.0.0.2", 6, tcp(40000, 443, b""))),),
+    "Packet_802_2": (bytes([1, 1, 3]) + b"lsap",),
+    "LSAP_One": (b"lsap",),
+    "SNAP_Ext": (b"\x00\x00\x00\x08\x00" + ipv4("10.0.0.1", "10.0.0.2", 17, udp(40000, 53, b"")),),
+    "IPv4": (ipv4("10.0.0.1", "10.0.0.2", 6, tcp(40000, 443, b"")),),
+    "IPv6": (ipv6("fd00::1", "fd00::2", 6, tcp(40000, 443, b"")),),
+    "ARP": (arp("10.0.0.1", "10.0.0.2"),),
+    "CDP": (b"cdp",),
+    "LLDP": (struct.pack("! H", (1 << 9) | 4) + b"ab" + struct.pack("! H", 0),),
+    "Xerox": (b"xerox",),
+    "ICMP": (b"\x08\x00\x12\x34abcd",),
+    "ICMPv6": (b"\x87\x00\x12\x34abcd",),
+    "IGMP": (b"\x11\x64\x12\x34\xe0\x00\x00\x01",),
+    "TCP": (tcp(40000, 443, b"x" * 100),),
+    "UDP": (udp(40000, 53, b"x" * 10),),
+    "Unknown": ("no protocol parser available", 99, b""),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="protocol serializer benchmark")
+    parser.add_argument("-n", "--number", default=100000, type=int)
+    args = parser.parse_args()
+
+    registered = {protocol_parser.__name__ for layer_parsers in Protocol_Parser.parsers.values()
+                  for protocol_parser in layer_parsers.values()}
+    assert registered <= set(SAMPLES), registered - set(SAMPLES)
+
+    for name, arguments in SAMPLES.items():
+        protocol = Protocol_Parser.get_protocol_class_by_name(name)(*arguments)
+        # decode the lazy fields
+        protocol.serialize()
+
+        asdict = timeit.timeit(lambda: {Protocol_Parser.get_protocol_name_by_class(
+            protocol.__class__): dataclasses.asdict(protocol)}, number=args.number)
+        generated = timeit.timeit(
+            lambda: {protocol.Protocol_Name: protocol.serialize()}, number=args.number)
+        print(f"{name:>13}: asdict {asdict / args.number * 1e9:6.0f} ns, "
+              f"generated {generated / args.number * 1e9:6.0f} ns, {asdict / generated:5.1f}x")
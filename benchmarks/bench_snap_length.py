@@ -0,0 +1,80 @@
+import argparse
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+import os
+
+sys.path.insert(0, os.getcwd())
+
+from network_monitor.services import Interface_Listener  # noqa
+
+"""
+    Memory held per queued frame with and without a snap length. Bulk sized datagrams are captured and
+    kept in a list, as they would wait in the queue between the listener and the parser.
+
+    Requires super user privileges, traffic is generated on the loopback interface.
+
+    sudo python3 benchmarks/bench_snap_length.py -n 5000
+"""
+
+
+def capture(interface_name: str, capture_mode: str, snap_length: int, count: int, payload_size: int) -> float:
+    listener = Interface_Listener(
+        interface_name,
+        tempfile.gettempdir(),
+        capture_mode=capture_mode,
+        ring_block_size=1 << 20,
+        ring_block_count=64,
+        receive_buffer_size=1 << 26,
+        snap_length=snap_length
+    )
+    read_frames = listener.open_capture()
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payload = b"x" * payload_size
+
+    tracemalloc.start()
+    queued = []
+    deadline: float = time.monotonic() + 10
+    try:
+        while len(queued) < count and time.monotonic() < deadline:
+            # only the sent datagrams are kept, the loopback interface shows every frame twice
+            for _ in range(64):
+                sender.sendto(payload, ("127.0.0.1", 9))
+            try:
+                frames = read_frames()
+            except BlockingIOError:
+                continue
+            queued.extend(frame for frame in frames if len(frame) > 2 or len(
+                frame[1][0]) > payload_size)
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        sender.close()
+        listener.close_capture()
+
+    # the preallocated pool buffers are not traced, buffers allocated once the pool is exhausted are
+    if capture_mode == "pool":
+        allocated += min(len(queued), listener.buffer_pool.buffer_count) * \
+            listener.buffer_pool.buffer_size
+
+    return allocated / max(len(queued), 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="memory per queued frame by snap length")
+    parser.add_argument("-i", "--interface", default="lo", type=str)
+    parser.add_argument("-n", "--count", default=5000, type=int)
+    parser.add_argument("-s", "--payload-size", default=1400, type=int)
+    parser.add_argument("-l", "--snap-length", default=128, type=int)
+    args = parser.parse_args()
+
+    for capture_mode in ("socket", "pool", "ring"):
+        for snap_length in (0, args.snap_length):
+            per_frame = capture(args.interface, capture_mode,
+                                snap_length, args.count, args.payload_size)
+            print(
+                f"{capture_mode:>6} snap length {snap_length:5d}: {per_frame:10.0f} bytes per queued frame")
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_traffic import traffic  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+from network_monitor.services import Packet_Filter, Buffer_Pool  # noqa
+
+"""
+    Allocations per packet when frames are parsed from fresh bytes objects (recvfrom) compared to
+    views on recycled pool buffers (recvfrom_into).
+
+    python3 benchmarks/bench_zero_copy.py -n 20000
+"""
+
+
+def run(frames, pooled: bool):
+    packet_filter = Packet_Filter()
+    buffer_pool = Buffer_Pool(buffer_count=64)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    allocated: int = 0
+    start = time.perf_counter()
+    for raw_bytes, address in frames:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        if pooled:
+            # recvfrom_into a pooled buffer
+            buffer = buffer_pool.acquire()
+            buffer[:len(raw_bytes)] = raw_bytes
+            frame = memoryview(buffer)[:len(raw_bytes)]
+        else:
+            # recvfrom allocates the frame
+            frame = bytes(raw_bytes)
+
+        af_packet = AF_Packet(address)
+        packet_filter.apply(af_packet, Packet_802_3(frame))
+        buffer_pool.release(frame)
+
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    return allocated / len(frames), buffer_pool.stats, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="zero copy receive benchmark")
+    parser.add_argument("-n", "--packets", default=20000, type=int)
+    args = parser.parse_args()
+
+    # bytearray so the recvfrom emulation allocates a new bytes object per frame
+    frames = [(bytearray(raw_bytes), address)
+              for raw_bytes, address in traffic(args.packets)]
+    for name, pooled in (("recvfrom", False), ("recvfrom_into pool", True)):
+        per_packet, stats, elapsed = run(frames, pooled)
+        print(f"{name:>20}: peak bytes allocated per packet {per_packet:8.0f}, "
+              f"{args.packets / elapsed:8.0f} packets/s (traced), pool {dict(stats)}")
@@ -0,0 +1,108 @@
+import random
+import socket
+import struct
+
+from typing import List, Tuple
+
+"""
+    Synthetic frames used by the benchmarks. The traffic mix approximates a busy uplink:
+    mostly IPv4 TCP bulk transfer, some UDP (dns, ntp), IPv6 TCP and a little ARP.
+"""
+
+ETH_P_IP: int = 0x0800
+ETH_P_ARP: int = 0x0806
+ETH_P_IPV6: int = 0x86DD
+
+# (ethertype/transport, weight)
+TRAFFIC_MIX: List[Tuple[str, int]] = [
+    ("ipv4_tcp", 70),
+    ("ipv4_udp", 15),
+    ("ipv6_tcp", 10),
+    ("ipv6_udp", 3),
+    ("arp", 2),
+]
+
+
+def ethernet(destination: bytes, source: bytes, ethertype: int, payload: bytes) -> bytes:
+    return struct.pack("! 6s 6s H", destination, source, ethertype) + payload
+
+
+def ipv4(source: str, destination: str, protocol: int, payload: bytes) -> bytes:
+    header = struct.pack(
+        "! B B H H H B B H 4s 4s",
+        (4 << 4) | 5, 0, 20 + len(payload), 0, 0x4000, 64, protocol, 0,
+        socket.inet_aton(source), socket.inet_aton(destination)
+    )
+    return header + payload
+
+
+def ipv6(source: str, destination: str, next_header: int, payload: bytes) -> bytes:
+    header = struct.pack(
+        "! I H B B 16s 16s",
+        6 << 28, len(payload), next_header, 64,
+        socket.inet_pton(socket.AF_INET6, source),
+        socket.inet_pton(socket.AF_INET6, destination)
+    )
+    return header + payload
+
+
+def tcp(source_port: int, destination_port: int, payload: bytes, flags: int = 0x18) -> bytes:
+    header = struct.pack(
+        "! H H L L B B H H H",
+        source_port, destination_port, 1, 1, 5 << 4, flags, 65535, 0, 0
+    )
+    return header + payload
+
+
+def udp(source_port: int, destination_port: int, payload: bytes) -> bytes:
+    return struct.pack("! H H H H", source_port, destination_port, 8 + len(payload), 0) + payload
+
+
+def arp(sender_ip: str, target_ip: str) -> bytes:
+    return struct.pack(
+        "! H H B B H 6s 4s 6s 4s", 1, ETH_P_IP, 6, 4, 1,
+        b"\x02" * 6, socket.inet_aton(sender_ip), b"\x00" * 6, socket.inet_aton(target_ip)
+    )
+
+
+def random_frame(rng: random.Random, hosts: int = 2000) -> Tuple[bytes, Tuple[str, int, int, int, bytes]]:
+    """ return a (raw_bytes, address) tuple as returned by recvfrom on an AF_PACKET socket """
+    kind: str = rng.choices([k for k, _ in TRAFFIC_MIX], [
+                            w for _, w in TRAFFIC_MIX])[0]
+
+    host: int = rng.randrange(hosts)
+    src_mac: bytes = struct.pack("! H I", 0x0200, host)
+    dst_mac: bytes = b"\x02\x00\x00\x00\x00\x01"
+    src_ip: str = f"10.{(host >> 16) & 255}.{(host >> 8) & 255}.{host & 255}"
+    src_ip6: str = f"fd00::{host:x}"
+    bulk: bool = rng.random() < 0.6
+    payload: bytes = b"\x00" * (1400 if bulk else rng.randrange(0, 200))
+
+    if kind == "ipv4_tcp":
+        ethertype = ETH_P_IP
+        packet = ipv4(src_ip, "192.168.1.10", 6, tcp(
+            rng.randrange(1024, 65535), 443, payload))
+    elif kind == "ipv4_udp":
+        ethertype = ETH_P_IP
+        packet = ipv4(src_ip, "192.168.1.1", 17, udp(
+            rng.randrange(1024, 65535), 53, payload[:120]))
+    elif kind == "ipv6_tcp":
+        ethertype = ETH_P_IPV6
+        packet = ipv6(src_ip6, "fd00::1", 6, tcp(
+            rng.randrange(1024, 65535), 443, payload))
+    elif kind == "ipv6_udp":
+        ethertype = ETH_P_IPV6
+        packet = ipv6(src_ip6, "fd00::1", 17, udp(
+            rng.randrange(1024, 65535), 123, payload[:48]))
+    else:
+        ethertype = ETH_P_ARP
+        packet = arp(src_ip, "10.0.0.1")
+
+    raw_bytes: bytes = ethernet(dst_mac, src_mac, ethertype, packet)
+    address = ("eth0", ethertype, socket.PACKET_HOST, 1, src_mac)
+    return raw_bytes, address
+
+
+def traffic(count: int, seed: int = 0, hosts: int = 2000) -> List[Tuple[bytes, Tuple[str, int, int, int, bytes]]]:
+    rng = random.Random(seed)
+    return [random_frame(rng, hosts) for _ in range(count)]
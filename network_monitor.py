@@ -2,6 +2,7 @@ from typing import Optional, Dict, Callable, Awaitable, Coroutine, List, Any
 from aiologger import Logger
 from logging import Formatter
 from network_monitor.protocols import Protocol_Parser
+from network_monitor.protocols.protocol_utils import set_address_cache_size
 from network_monitor.configurations import DevConfig
 from network_monitor.services import (
     Service_Type,
@@ -11,7 +12,17 @@ from network_monitor.services import (
     Interface_Listener,
     Packet_Parser,
     Packet_Submitter,
-    Packet_Filter
+    Packet_Filter,
+    Buffer_Pool,
+    Fanout_Worker,
+    Parser_Pool,
+    Parser_Pool_Worker,
+    Pcap_Replay,
+    Pcap_Writer,
+    Bounded_Queue,
+    Bounded_Async_Queue,
+    low_priority_frames,
+    low_priority_packets
 )
 from network_monitor import (
     generate_configuration_template,
@@ -22,6 +33,7 @@ import netifaces
 import argparse
 import asyncio
 import queue
+import multiprocessing
 import os
 import signal
 import functools
@@ -38,6 +50,13 @@ def spawn_event_loop(service_object: Any, service_control: Service_Control):
     asyncio.run(service_object.worker(service_control))
 
 
+def stage_queue(single_event_loop: bool, max_depth: int, policy: str, low_priority: Callable[[Any], bool], on_drop: Optional[Callable[[List[Any]], None]] = None):
+    # bounded queue between two services, the overload policy is applied when the consumer falls behind
+    if single_event_loop:
+        return Bounded_Async_Queue(max_depth, policy, low_priority, on_drop)
+    return Bounded_Queue(max_depth, policy, low_priority, on_drop)
+
+
 async def packet_submitter_service(services_manager: Service_Manager, service_control: Service_Control, **kwargs) -> None:
 
     # retrieve args
@@ -45,6 +64,12 @@ async def packet_submitter_service(services_manager: Service_Manager, service_co
     local_metadata_storage: str = kwargs.pop("LocalMetadataStorage")
     resubmission_interval: int = kwargs.pop("ResubmissionInterval")
     log_directory = kwargs.pop("GeneralLogStorage")
+    fanout_workers: int = kwargs.pop("FanoutWorkers")
+    parser_workers: int = kwargs.pop("ParserWorkers")
+    single_event_loop: bool = kwargs.pop("SingleEventLoop")
+    max_depth: int = kwargs.pop("QueueMaxDepth")
+    policy: str = kwargs.pop("QueuePolicy")
+    shed_protocols: List[str] = kwargs.pop("ShedProtocols")
     # configure packet submitter service
     packet_submitter: Packet_Submitter = Packet_Submitter(
 
@@ -54,22 +79,33 @@ async def packet_submitter_service(services_manager: Service_Manager, service_co
         resubmission_interval
     )
 
-    service_control.in_channel = queue.Queue()
+    if fanout_workers > 0 or parser_workers > 0:
+        # the fanout or parser worker processes put the processed packets on the queue
+        # the worker processes wait for room, the queue policies are not applied between processes
+        service_control.in_channel = multiprocessing.get_context(
+            "spawn").JoinableQueue(max_depth)
+    else:
+        service_control.in_channel = stage_queue(
+            single_event_loop, max_depth, policy, low_priority_packets(shed_protocols))
 
     # register queue for easy reference between services
     services_manager.register_queue_reference(
         Data_Queue_Identifier.Processed_Data, service_control.in_channel)
 
-    service_control.thread = threading.Thread(
-        group=None,
-        target=spawn_event_loop,
-        args=(
-            packet_submitter,
-            service_control
-        ),
-        name="packet=submitter-service",
-        daemon=False
-    )
+    if single_event_loop:
+        service_control.task = asyncio.create_task(
+            packet_submitter.worker(service_control), name="packet-submitter-service")
+    else:
+        service_control.thread = threading.Thread(
+            group=None,
+            target=spawn_event_loop,
+            args=(
+                packet_submitter,
+                service_control
+            ),
+            name="packet=submitter-service",
+            daemon=False
+        )
 
     services_manager.add_service(
         Service_Identifier.Packet_Submitter_Service, service_control)
@@ -80,32 +116,169 @@ async def interface_listener_service(services_manager: Service_Manager, service_
     # retrieve kwargs
     interface_name = kwargs.pop("InterfaceName")
     log_directory = kwargs.pop("GeneralLogStorage")
+    capture_mode = kwargs.pop("CaptureMode")
+    ring_block_size = kwargs.pop("RingBlockSize")
+    ring_block_count = kwargs.pop("RingBlockCount")
+    buffer_pool = kwargs.pop("BufferPool")
+    filters = kwargs.pop("Filters")
+    single_event_loop: bool = kwargs.pop("SingleEventLoop")
+    batch_size: int = kwargs.pop("BatchSize")
+    batch_flush_interval: float = kwargs.pop("BatchFlushInterval")
+    kernel_timestamps: bool = kwargs.pop("KernelTimestamps")
+    receive_buffer_size: Optional[int] = kwargs.pop("ReceiveBufferSize")
+    snap_length: int = kwargs.pop("SnapLength")
+    capture_channel: Optional[queue.Queue] = kwargs.pop("CaptureChannel")
+    sampling_mode: Optional[str] = kwargs.pop("SamplingMode")
+    sampling_rate: int = kwargs.pop("SamplingRate")
+    max_depth: int = kwargs.pop("QueueMaxDepth")
+    policy: str = kwargs.pop("QueuePolicy")
+    shed_protocols: List[str] = kwargs.pop("ShedProtocols")
 
     # configure interface and log directory for interface listener
     interface_listener: Interface_Listener = Interface_Listener(
         interface_name,
-        log_directory
+        log_directory,
+        capture_mode=capture_mode,
+        ring_block_size=ring_block_size,
+        ring_block_count=ring_block_count,
+        buffer_pool=buffer_pool,
+        filters=filters,
+        batch_size=batch_size,
+        flush_interval=batch_flush_interval,
+        kernel_timestamps=kernel_timestamps,
+        receive_buffer_size=receive_buffer_size,
+        snap_length=snap_length,
+        capture_channel=capture_channel,
+        sampling_mode=sampling_mode,
+        sampling_rate=sampling_rate
     )
 
+    on_drop: Optional[Callable[[List[Any]], None]] = None
+    if interface_listener.buffer_pool is not None:
+        # the dropped frames are not released by the parser
+        def on_drop(frames: List[Any]) -> None:
+            for frame in frames:
+                interface_listener.buffer_pool.release(frame[1][0])
+
     # configure interface listener output queue
-    service_control.out_channel = queue.Queue()
+    service_control.out_channel = stage_queue(
+        single_event_loop, max_depth, policy, low_priority_frames(shed_protocols), on_drop)
 
     # register queue for easy reference between services
     services_manager.register_queue_reference(
         Data_Queue_Identifier.Raw_Data, service_control.out_channel)
-    # configure service thread
+
+    if single_event_loop:
+        # non blocking socket registered with the application loop
+        service_control.task = asyncio.create_task(
+            interface_listener.reader(service_control), name="interface-listener-service")
+    else:
+        # configure service thread
+        service_control.thread = threading.Thread(
+            group=None,
+            target=spawn_event_loop,
+            name="interface-listener-service",
+            args=(
+                interface_listener,
+                service_control,
+            ),
+            daemon=False
+        )
+
+    # add thread to services manager and start
+    services_manager.add_service(
+        Service_Identifier.Interface_Listener_Service, service_control)
+
+
+async def pcap_writer_service(services_manager: Service_Manager, service_control: Service_Control, **kwargs) -> None:
+
+    # retrieve kwargs
+    pcap_storage: str = kwargs.pop("PcapStorage")
+    pcap_format: str = kwargs.pop("PcapFormat")
+    max_file_size: int = kwargs.pop("PcapMaxFileSize")
+    rotate_interval: float = kwargs.pop("PcapRotateInterval")
+    max_files: int = kwargs.pop("PcapMaxFiles")
+
+    pcap_writer: Pcap_Writer = Pcap_Writer(
+        pcap_storage,
+        file_format=pcap_format,
+        max_file_size=max_file_size,
+        rotate_interval=rotate_interval,
+        max_files=max_files
+    )
+
+    # bounded, the listener does not wait for the writer
+    service_control.in_channel = queue.Queue(
+        maxsize=Pcap_Writer.MAX_QUEUED_BATCHES)
+
+    # register queue for easy reference between services
+    services_manager.register_queue_reference(
+        Data_Queue_Identifier.Raw_Capture, service_control.in_channel)
+
+    # file writes block, the writer always runs in its own thread
     service_control.thread = threading.Thread(
         group=None,
         target=spawn_event_loop,
-        name="interface-listener-service",
+        name="pcap-writer-service",
         args=(
-            interface_listener,
+            pcap_writer,
             service_control,
         ),
         daemon=False
     )
 
-    # add thread to services manager and start
+    services_manager.add_service(
+        Service_Identifier.Pcap_Writer_Service, service_control)
+
+
+async def pcap_replay_service(services_manager: Service_Manager, service_control: Service_Control, **kwargs) -> None:
+
+    # retrieve kwargs
+    replay_file: str = kwargs.pop("ReplayFile")
+    replay_speed: float = kwargs.pop("ReplaySpeed")
+    interface_name = kwargs.pop("InterfaceName")
+    single_event_loop: bool = kwargs.pop("SingleEventLoop")
+    batch_size: int = kwargs.pop("BatchSize")
+    batch_flush_interval: float = kwargs.pop("BatchFlushInterval")
+    sampling_mode: Optional[str] = kwargs.pop("SamplingMode")
+    sampling_rate: int = kwargs.pop("SamplingRate")
+    max_depth: int = kwargs.pop("QueueMaxDepth")
+    policy: str = kwargs.pop("QueuePolicy")
+    shed_protocols: List[str] = kwargs.pop("ShedProtocols")
+
+    # the replay takes the place of the interface listener
+    pcap_replay: Pcap_Replay = Pcap_Replay(
+        replay_file,
+        interface_name=interface_name,
+        speed=replay_speed,
+        batch_size=batch_size,
+        flush_interval=batch_flush_interval,
+        sampling_mode=sampling_mode,
+        sampling_rate=sampling_rate
+    )
+
+    service_control.out_channel = stage_queue(
+        single_event_loop, max_depth, policy, low_priority_frames(shed_protocols))
+
+    # register queue for easy reference between services
+    services_manager.register_queue_reference(
+        Data_Queue_Identifier.Raw_Data, service_control.out_channel)
+
+    if single_event_loop:
+        service_control.task = asyncio.create_task(
+            pcap_replay.worker(service_control), name="pcap-replay-service")
+    else:
+        service_control.thread = threading.Thread(
+            group=None,
+            target=spawn_event_loop,
+            name="pcap-replay-service",
+            args=(
+                pcap_replay,
+                service_control,
+            ),
+            daemon=False
+        )
+
     services_manager.add_service(
         Service_Identifier.Interface_Listener_Service, service_control)
 
@@ -116,17 +289,39 @@ async def packet_parser_service(services_manager: Service_Manager, service_contr
     filter_submission_traffic = kwargs.pop("FilterSubmissionTraffic")
     filters = kwargs.pop("Filters")
     undefinedprotocolstorage = kwargs.pop("UndefinedProtocolStorage")
+    buffer_pool = kwargs.pop("BufferPool")
+    single_event_loop: bool = kwargs.pop("SingleEventLoop")
+    sampling_rate: int = kwargs.pop("SamplingRate")
+    unknown_protocol_interval: float = kwargs.pop("UnknownProtocolLogInterval")
+    unknown_protocol_samples: int = kwargs.pop("UnknownProtocolSamples")
+    unknown_protocol_max_file_size: int = kwargs.pop(
+        "UnknownProtocolMaxFileSize")
+    address_cache_size: int = kwargs.pop("AddressCacheSize")
+    batch_decoding: bool = kwargs.pop("BatchDecoding")
+    parser_workers: int = kwargs.pop("ParserWorkers")
+    parser_ring_slots: int = kwargs.pop("ParserRingSlots")
+    parser_ring_slot_size: int = kwargs.pop("ParserRingSlotSize")
+    output_protocols: List[str] = kwargs.pop("OutputProtocols")
+    stop_protocols: List[str] = kwargs.pop("StopProtocols")
+
+    # size the formatted address caches of the protocol parsers
+    set_address_cache_size(address_cache_size)
 
     # set protocol parser raw output directory
-    Protocol_Parser.set_output_directory(undefinedprotocolstorage)
+    Protocol_Parser.set_output_directory(
+        undefinedprotocolstorage, unknown_protocol_interval, unknown_protocol_samples, unknown_protocol_max_file_size)
 
     # create a new Packet_Filter. The Packet_Filter holds all filters and applies them to the captured packets
     packet_filter: Packet_Filter = Packet_Filter(
-        filter_submission_traffic)
+        filter_submission_traffic, output_protocols=output_protocols)
 
     # register all filters define in the configuration file
     packet_filter.register(filters)
 
+    # decoding stops at the deepest layer used by the filters and the output
+    Protocol_Parser.set_parse_depth(
+        packet_filter.protocol_names(), stop_protocols)
+
     # configure service control
     service_control.in_channel = services_manager.retrieve_queue_reference(
         Data_Queue_Identifier.Raw_Data)
@@ -134,24 +329,135 @@ async def packet_parser_service(services_manager: Service_Manager, service_contr
         Data_Queue_Identifier.Processed_Data)
     # retrieve reference for queues from thread
 
-    packet_parser = Packet_Parser(packet_filter)
-
-    service_control.thread = threading.Thread(
-        group=None,
-        target=spawn_event_loop,
-        name="packet-parser-service-service",
-        args=(
-            packet_parser,
-            service_control,
-        ),
-        daemon=False
-    )
+    packet_parser = Packet_Parser(
+        packet_filter, buffer_pool=buffer_pool, sampling_rate=sampling_rate, batch_decoding=batch_decoding)
+
+    if parser_workers > 0:
+        # the service dispatches the frames to worker processes through a shared memory ring
+        packet_parser = Parser_Pool(
+            Parser_Pool_Worker(
+                filters=filters,
+                undefined_protocol_storage=undefinedprotocolstorage,
+                sampling_rate=sampling_rate,
+                batch_decoding=batch_decoding,
+                address_cache_size=address_cache_size,
+                unknown_protocol_interval=unknown_protocol_interval,
+                unknown_protocol_samples=unknown_protocol_samples,
+                unknown_protocol_max_file_size=unknown_protocol_max_file_size,
+                output_protocols=output_protocols,
+                stop_protocols=stop_protocols
+            ),
+            parser_workers,
+            slot_count=parser_ring_slots,
+            slot_size=parser_ring_slot_size,
+            buffer_pool=buffer_pool
+        )
+        service_control.stop_event = packet_parser.context.Event()
+        service_control.stats_channel = packet_parser.context.Queue()
+        service_control.processes = packet_parser.processes(
+            service_control.stop_event, service_control.out_channel, service_control.stats_channel)
+
+    if single_event_loop:
+        service_control.task = asyncio.create_task(
+            packet_parser.worker(service_control), name="packet-parser-service")
+    else:
+        service_control.thread = threading.Thread(
+            group=None,
+            target=spawn_event_loop,
+            name="packet-parser-service-service",
+            args=(
+                packet_parser,
+                service_control,
+            ),
+            daemon=False
+        )
 
     # add asynchronous service
     services_manager.add_service(
         Service_Identifier.Packet_Parser_Service, service_control)
 
 
+async def fanout_worker_service(services_manager: Service_Manager, service_control: Service_Control, **kwargs) -> None:
+
+    # retrieve kwargs
+    interface_name = kwargs.pop("InterfaceName")
+    log_directory = kwargs.pop("GeneralLogStorage")
+    capture_mode = kwargs.pop("CaptureMode")
+    ring_block_size = kwargs.pop("RingBlockSize")
+    ring_block_count = kwargs.pop("RingBlockCount")
+    filters = kwargs.pop("Filters")
+    undefinedprotocolstorage = kwargs.pop("UndefinedProtocolStorage")
+    fanout_workers: int = kwargs.pop("FanoutWorkers")
+    fanout_group: int = kwargs.pop("FanoutGroup")
+    batch_size: int = kwargs.pop("BatchSize")
+    batch_flush_interval: float = kwargs.pop("BatchFlushInterval")
+    kernel_timestamps: bool = kwargs.pop("KernelTimestamps")
+    receive_buffer_size: Optional[int] = kwargs.pop("ReceiveBufferSize")
+    snap_length: int = kwargs.pop("SnapLength")
+    sampling_mode: Optional[str] = kwargs.pop("SamplingMode")
+    sampling_rate: int = kwargs.pop("SamplingRate")
+    unknown_protocol_interval: float = kwargs.pop("UnknownProtocolLogInterval")
+    unknown_protocol_samples: int = kwargs.pop("UnknownProtocolSamples")
+    unknown_protocol_max_file_size: int = kwargs.pop(
+        "UnknownProtocolMaxFileSize")
+    address_cache_size: int = kwargs.pop("AddressCacheSize")
+    batch_decoding: bool = kwargs.pop("BatchDecoding")
+    output_protocols: List[str] = kwargs.pop("OutputProtocols")
+    stop_protocols: List[str] = kwargs.pop("StopProtocols")
+
+    # every worker captures and parses on its own socket, the buffer pool is not shared between processes
+    fanout_worker: Fanout_Worker = Fanout_Worker(
+        interface_name,
+        log_directory,
+        fanout_group,
+        filters=filters,
+        undefined_protocol_storage=undefinedprotocolstorage,
+        capture_mode="socket" if capture_mode == "pool" else capture_mode,
+        ring_block_size=ring_block_size,
+        ring_block_count=ring_block_count,
+        batch_size=batch_size,
+        flush_interval=batch_flush_interval,
+        kernel_timestamps=kernel_timestamps,
+        receive_buffer_size=receive_buffer_size,
+        snap_length=snap_length,
+        sampling_mode=sampling_mode,
+        sampling_rate=sampling_rate,
+        unknown_protocol_interval=unknown_protocol_interval,
+        unknown_protocol_samples=unknown_protocol_samples,
+        unknown_protocol_max_file_size=unknown_protocol_max_file_size,
+        address_cache_size=address_cache_size,
+        batch_decoding=batch_decoding,
+        output_protocols=output_protocols,
+        stop_protocols=stop_protocols
+    )
+
+    # spawn, the worker processes must not inherit the application threads
+    context = multiprocessing.get_context("spawn")
+
+    service_control.stop_event = context.Event()
+    service_control.stats_channel = context.Queue()
+    service_control.out_channel = services_manager.retrieve_queue_reference(
+        Data_Queue_Identifier.Processed_Data)
+
+    service_control.processes = [
+        context.Process(
+            target=fanout_worker.run,
+            name=f"fanout-worker-{idx}",
+            args=(
+                service_control.stop_event,
+                service_control.out_channel,
+                service_control.stats_channel,
+            ),
+            daemon=False
+        )
+        for idx in range(fanout_workers)
+    ]
+
+    # add worker processes to services manager and start
+    services_manager.add_service(
+        Service_Identifier.Fanout_Worker_Service, service_control)
+
+
 async def exit_application(services_manager: Service_Manager):
 
     while not services_manager.terminate:
@@ -205,22 +511,24 @@ async def application(interface_name: Optional[str] = None, configuration_file:
     main_loop.add_signal_handler(
         signal.SIGINT, functools.partial(signal_handler))
 
-    # start listener service
-    il_service_control = Service_Control("interface listener")
-    await interface_listener_service(
-        services_manager,
-        il_service_control,
-        InterfaceName=app_config.InterfaceName,
-        GeneralLogStorage=app_config.GeneralLogStorage
-    )
-
-    #  wait and check if threads start successfully. need the sleep to give the os time to spawn new thread
-    await asyncio.sleep(0.1)
-    # check if threads started succesfull
-    if il_service_control.error:
-        print("error in interface listener thread")
-        services_manager.stop_all_service()
-        return EXIT_FAILURE
+    # replayed frames are parsed in the application process
+    fanout_workers: int = app_config.FanoutWorkers if app_config.ReplayFile is None else 0
+    # the fanout workers parse the frames they capture, the parser pool is only used with the parser service
+    parser_workers: int = app_config.ParserWorkers if fanout_workers == 0 else 0
+
+    # the captured frames are written by the pcap writer, live capture in the application process only
+    pcap_capture: bool = app_config.PcapCapture and fanout_workers == 0 and app_config.ReplayFile is None
+    # pooled buffers are returned by the parser while the pcap writer may still be writing them
+    capture_mode: str = "socket" if pcap_capture and app_config.CaptureMode == "pool" else app_config.CaptureMode
+
+    # receive buffers shared between the listener and parser, pool capture mode only
+    buffer_pool: Optional[Buffer_Pool] = None
+    if capture_mode == "pool" and app_config.ReplayFile is None:
+        buffer_pool = Buffer_Pool(
+            buffer_count=app_config.PoolBufferCount,
+            # truncated frames only need snap length buffers
+            buffer_size=app_config.SnapLength if app_config.SnapLength > 0 else Interface_Listener.BUFFER_SIZE
+        )
 
     # start packet submitter service
     ps_service_control = Service_Control("packet submiter")
@@ -230,7 +538,13 @@ async def application(interface_name: Optional[str] = None, configuration_file:
         RemoteMetadataStorage=app_config.RemoteMetadataStorage,
         LocalMetadataStorage=app_config.LocalMetadataStorage,
         ResubmissionInterval=app_config.ResubmissionInterval,
-        GeneralLogStorage=app_config.GeneralLogStorage)
+        GeneralLogStorage=app_config.GeneralLogStorage,
+        FanoutWorkers=fanout_workers,
+        ParserWorkers=parser_workers,
+        SingleEventLoop=app_config.SingleEventLoop,
+        QueueMaxDepth=app_config.ProcessedDataMaxDepth,
+        QueuePolicy=app_config.ProcessedDataPolicy,
+        ShedProtocols=app_config.ShedProtocols)
 
     #  wait and check if threads start successfully, need the sleep to give the os time to spawn new thread
     await asyncio.sleep(0.1)
@@ -239,22 +553,148 @@ async def application(interface_name: Optional[str] = None, configuration_file:
         services_manager.stop_all_service()
         return EXIT_FAILURE
 
-    # configure and packet parser service
-    pp_service_control = Service_Control("packet parser")
-    await packet_parser_service(
-        services_manager,
-        pp_service_control,
-        Filters=app_config.Filters,
-        FilterSubmissionTraffic=app_config.FilterSubmissionTraffic,
-        UndefinedProtocolStorage=app_config.UndefinedProtocolStorage
-    )
+    if fanout_workers > 0:
+        # worker processes capture and parse the frames, replaces the listener and parser services
+        fw_service_control = Service_Control("fanout workers")
+        await fanout_worker_service(
+            services_manager,
+            fw_service_control,
+            InterfaceName=app_config.InterfaceName,
+            GeneralLogStorage=app_config.GeneralLogStorage,
+            CaptureMode=app_config.CaptureMode,
+            RingBlockSize=app_config.RingBlockSize,
+            RingBlockCount=app_config.RingBlockCount,
+            Filters=app_config.Filters,
+            UndefinedProtocolStorage=app_config.UndefinedProtocolStorage,
+            UnknownProtocolLogInterval=app_config.UnknownProtocolLogInterval,
+            UnknownProtocolSamples=app_config.UnknownProtocolSamples,
+            UnknownProtocolMaxFileSize=app_config.UnknownProtocolMaxFileSize,
+            AddressCacheSize=app_config.AddressCacheSize,
+            BatchDecoding=app_config.BatchDecoding,
+            OutputProtocols=app_config.OutputProtocols,
+            StopProtocols=app_config.StopProtocols,
+            FanoutWorkers=app_config.FanoutWorkers,
+            FanoutGroup=app_config.FanoutGroup if app_config.FanoutGroup is not None else os.getpid() & 0xFFFF,
+            BatchSize=app_config.BatchSize,
+            BatchFlushInterval=app_config.BatchFlushInterval,
+            KernelTimestamps=app_config.KernelTimestamps,
+            ReceiveBufferSize=app_config.ReceiveBufferSize,
+            SnapLength=app_config.SnapLength,
+            SamplingMode=app_config.SamplingMode,
+            SamplingRate=app_config.SamplingRate
+        )
+
+        #  wait and check if processes start successfully, spawning a process imports the application
+        await asyncio.sleep(1)
+        if services_manager.check_for_exceptions():
+            print("error in fanout worker processes")
+            await services_manager.stop_all_service()
+            return EXIT_FAILURE
+    else:
+        if app_config.ReplayFile is not None:
+            # replay the frames of a capture file
+            il_service_control = Service_Control("pcap replay")
+            await pcap_replay_service(
+                services_manager,
+                il_service_control,
+                ReplayFile=app_config.ReplayFile,
+                ReplaySpeed=app_config.ReplaySpeed,
+                InterfaceName=app_config.InterfaceName,
+                SingleEventLoop=app_config.SingleEventLoop,
+                BatchSize=app_config.BatchSize,
+                BatchFlushInterval=app_config.BatchFlushInterval,
+                SamplingMode=app_config.SamplingMode,
+                SamplingRate=app_config.SamplingRate,
+                QueueMaxDepth=app_config.RawDataMaxDepth,
+                QueuePolicy=app_config.RawDataPolicy,
+                ShedProtocols=app_config.ShedProtocols
+            )
+        else:
+            capture_channel: Optional[queue.Queue] = None
+            if pcap_capture:
+                # started before the listener, receives the frame batches of the listener
+                pw_service_control = Service_Control("pcap writer")
+                await pcap_writer_service(
+                    services_manager,
+                    pw_service_control,
+                    PcapStorage=app_config.PcapStorage,
+                    PcapFormat=app_config.PcapFormat,
+                    PcapMaxFileSize=app_config.PcapMaxFileSize,
+                    PcapRotateInterval=app_config.PcapRotateInterval,
+                    PcapMaxFiles=app_config.PcapMaxFiles
+                )
 
-    #  wait and check if threads start successfully, need the sleep to give the os time to spawn new thread
-    await asyncio.sleep(0.1)
-    if pp_service_control.error:
-        print("error in packet parser service thread")
-        services_manager.stop_all_service()
-        return EXIT_FAILURE
+                await asyncio.sleep(0.1)
+                if pw_service_control.error:
+                    print("error in pcap writer service thread")
+                    await services_manager.stop_all_service()
+                    return EXIT_FAILURE
+                capture_channel = pw_service_control.in_channel
+
+            # start listener service
+            il_service_control = Service_Control("interface listener")
+            await interface_listener_service(
+                services_manager,
+                il_service_control,
+                InterfaceName=app_config.InterfaceName,
+                GeneralLogStorage=app_config.GeneralLogStorage,
+                CaptureMode=capture_mode,
+                RingBlockSize=app_config.RingBlockSize,
+                RingBlockCount=app_config.RingBlockCount,
+                BufferPool=buffer_pool,
+                Filters=app_config.Filters,
+                SingleEventLoop=app_config.SingleEventLoop,
+                BatchSize=app_config.BatchSize,
+                BatchFlushInterval=app_config.BatchFlushInterval,
+                KernelTimestamps=app_config.KernelTimestamps,
+                ReceiveBufferSize=app_config.ReceiveBufferSize,
+                SnapLength=app_config.SnapLength,
+                CaptureChannel=capture_channel,
+                SamplingMode=app_config.SamplingMode,
+                SamplingRate=app_config.SamplingRate,
+                QueueMaxDepth=app_config.RawDataMaxDepth,
+                QueuePolicy=app_config.RawDataPolicy,
+                ShedProtocols=app_config.ShedProtocols
+            )
+
+        #  wait and check if threads start successfully. need the sleep to give the os time to spawn new thread
+        await asyncio.sleep(0.1)
+        # check if threads started succesfull
+        if il_service_control.error:
+            print("error in interface listener thread")
+            services_manager.stop_all_service()
+            return EXIT_FAILURE
+
+        # configure and packet parser service
+        pp_service_control = Service_Control("packet parser")
+        await packet_parser_service(
+            services_manager,
+            pp_service_control,
+            Filters=app_config.Filters,
+            FilterSubmissionTraffic=app_config.FilterSubmissionTraffic,
+            UndefinedProtocolStorage=app_config.UndefinedProtocolStorage,
+            UnknownProtocolLogInterval=app_config.UnknownProtocolLogInterval,
+            UnknownProtocolSamples=app_config.UnknownProtocolSamples,
+            UnknownProtocolMaxFileSize=app_config.UnknownProtocolMaxFileSize,
+            AddressCacheSize=app_config.AddressCacheSize,
+            BatchDecoding=app_config.BatchDecoding,
+            OutputProtocols=app_config.OutputProtocols,
+            StopProtocols=app_config.StopProtocols,
+            ParserWorkers=parser_workers,
+            ParserRingSlots=app_config.ParserRingSlots,
+            ParserRingSlotSize=app_config.ParserRingSlotSize,
+            BufferPool=buffer_pool,
+            SingleEventLoop=app_config.SingleEventLoop,
+            # the rate is recorded in the Info of every packet when the frames are sampled
+            SamplingRate=app_config.SamplingRate if app_config.SamplingMode is not None else 1
+        )
+
+        #  wait and check if threads start successfully, need the sleep to give the os time to spawn new thread
+        await asyncio.sleep(0.1)
+        if pp_service_control.error:
+            print("error in packet parser service thread")
+            services_manager.stop_all_service()
+            return EXIT_FAILURE
 
     # block until signal shutdown
     services_manager.terminate = False
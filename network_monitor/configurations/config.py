@@ -10,6 +10,7 @@ class BaseConfig:
     AppLogEndpoint: str = "General"
     UnknownLogEndpoint: str = "Undefined_Protocols"
     OfflineLogEndpoint: str = "Local"
+    PcapLogEndpoint: str = "Pcap"
 
     def __init__(self, base_log_directory: Optional[str] = "./logs") -> None:
         """
@@ -23,9 +24,45 @@ class BaseConfig:
         os.makedirs(self.UndefinedProtocolStorage, exist_ok=True)
 
         self.InterfaceName: str = "eth0"
+        self.CaptureMode: str = "socket"
+        self.RingBlockSize: int = 1 << 22
+        self.RingBlockCount: int = 64
+        self.PoolBufferCount: int = 256
+        self.KernelTimestamps: bool = False
+        self.ReceiveBufferSize: Optional[int] = None
+        self.SnapLength: int = 0
+        self.ReplayFile: Optional[str] = None
+        self.ReplaySpeed: float = 0.0
+        self.SamplingMode: Optional[str] = None
+        self.SamplingRate: int = 1
+        self.PcapCapture: bool = False
+        self.PcapFormat: str = "pcap"
+        self.PcapMaxFileSize: int = 100 << 20
+        self.PcapRotateInterval: float = 3600
+        self.PcapMaxFiles: int = 10
+        self.FanoutWorkers: int = 0
+        self.FanoutGroup: Optional[int] = None
         self.RemoteMetadataStorage: str = "http://localhost:5050/packets"
         self.ResubmissionInterval: int = 300
         self.FilterSubmissionTraffic: bool = True
+        self.SingleEventLoop: bool = False
+        self.BatchSize: int = 64
+        self.BatchFlushInterval: float = 0.05
+        self.RawDataMaxDepth: int = 1024
+        self.RawDataPolicy: str = "block"
+        self.ProcessedDataMaxDepth: int = 1024
+        self.ProcessedDataPolicy: str = "block"
+        self.ShedProtocols: List[str] = []
+        self.UnknownProtocolLogInterval: float = 60.0
+        self.UnknownProtocolSamples: int = 1
+        self.UnknownProtocolMaxFileSize: int = 10 << 20
+        self.AddressCacheSize: int = 4096
+        self.BatchDecoding: bool = False
+        self.ParserWorkers: int = 0
+        self.ParserRingSlots: int = 4096
+        self.ParserRingSlotSize: int = 2048
+        self.OutputProtocols: List[str] = []
+        self.StopProtocols: List[str] = []
         self.Filters: List[Filter] = []
 
     @property
@@ -49,6 +86,13 @@ class BaseConfig:
         """
         return os.path.join(self.BaseLogDirectory, self.UnknownLogEndpoint)
 
+    @property
+    def PcapStorage(self) -> str:
+        """
+            return path where the pcap writer service will store the captured frames
+        """
+        return os.path.join(self.BaseLogDirectory, self.PcapLogEndpoint)
+
     def __str__(self) -> str:
 
         return f"Interface: {self.InterfaceName} Remote Metadata Storaga: {self.RemoteMetadataStorage}"
@@ -3,7 +3,8 @@ import re
 import os
 
 from .config import BaseConfig
-from ..services import Filter
+from ..services import Filter, Packet_Sampler, QUEUE_POLICIES
+from ..protocols import Protocol_Parser, batch_decoder
 from configparser import ConfigParser
 from typing import Optional
 
@@ -25,6 +26,65 @@ def load_config_from_file(configuration_path: str) -> BaseConfig:
             raise ValueError(f"{interfacename} is not a valid interface")
         app_config.InterfaceName = interfacename
 
+    # capture mode used by the listener service, socket, ring or pool
+    capturemode: str = config.get(
+        "ListenerService", "CaptureMode", fallback=app_config.CaptureMode)
+    if capturemode not in ("socket", "ring", "pool"):
+        raise ValueError(f"{capturemode} is not a valid capture mode")
+    app_config.CaptureMode = capturemode
+
+    app_config.RingBlockSize = config.getint(
+        "ListenerService", "RingBlockSize", fallback=app_config.RingBlockSize)
+    app_config.RingBlockCount = config.getint(
+        "ListenerService", "RingBlockCount", fallback=app_config.RingBlockCount)
+    app_config.PoolBufferCount = config.getint(
+        "ListenerService", "PoolBufferCount", fallback=app_config.PoolBufferCount)
+    app_config.KernelTimestamps = config.getboolean(
+        "ListenerService", "KernelTimestamps", fallback=app_config.KernelTimestamps)
+    app_config.ReceiveBufferSize = config.getint(
+        "ListenerService", "ReceiveBufferSize", fallback=app_config.ReceiveBufferSize)
+    # bytes captured per frame, 0 captures the whole frame
+    app_config.SnapLength = config.getint(
+        "ListenerService", "SnapLength", fallback=app_config.SnapLength)
+    if app_config.SnapLength < 0:
+        raise ValueError(
+            f"{app_config.SnapLength} is not a valid snap length")
+
+    # replay a pcap or pcapng file instead of listening on the interface
+    replayfile: Optional[str] = config.get(
+        "ListenerService", "ReplayFile", fallback=app_config.ReplayFile)
+    if replayfile is not None:
+        if not os.path.isfile(replayfile):
+            raise ValueError(f"{replayfile} does not exist")
+        app_config.ReplayFile = replayfile
+    app_config.ReplaySpeed = config.getfloat(
+        "ListenerService", "ReplaySpeed", fallback=app_config.ReplaySpeed)
+    if app_config.ReplaySpeed < 0:
+        raise ValueError(
+            f"{app_config.ReplaySpeed} is not a valid replay speed")
+
+    # keep one in SamplingRate frames (or flows), none keeps every frame
+    samplingmode: str = config.get(
+        "ListenerService", "SamplingMode", fallback="none")
+    if samplingmode != "none":
+        if samplingmode not in Packet_Sampler.MODES:
+            raise ValueError(f"{samplingmode} is not a valid sampling mode")
+        app_config.SamplingMode = samplingmode
+    app_config.SamplingRate = config.getint(
+        "ListenerService", "SamplingRate", fallback=app_config.SamplingRate)
+    if app_config.SamplingRate < 1:
+        raise ValueError(
+            f"{app_config.SamplingRate} is not a valid sampling rate")
+
+    # number of capture and parse worker processes joined to a PACKET_FANOUT group, 0 disables fanout
+    app_config.FanoutWorkers = config.getint(
+        "ListenerService", "FanoutWorkers", fallback=app_config.FanoutWorkers)
+    if app_config.FanoutWorkers < 0:
+        raise ValueError(
+            f"{app_config.FanoutWorkers} is not a valid number of fanout workers")
+    app_config.FanoutGroup = config.getint(
+        "ListenerService", "FanoutGroup", fallback=app_config.FanoutGroup)
+
     # filter all traffic generated by application
     filtersubmissiontraffic: bool = config.get(
         "Application", "FilterSubmissionTraffic"
@@ -32,6 +92,112 @@ def load_config_from_file(configuration_path: str) -> BaseConfig:
 
     app_config.FilterSubmissionTraffic = bool(filtersubmissiontraffic)
 
+    # run the listener, parser and submitter services on the application event loop instead of threads
+    app_config.SingleEventLoop = config.getboolean(
+        "Application", "SingleEventLoop", fallback=app_config.SingleEventLoop)
+
+    # frames and packets are handed between the services in batches, flushed when full or after the interval
+    app_config.BatchSize = config.getint(
+        "Application", "BatchSize", fallback=app_config.BatchSize)
+    if app_config.BatchSize < 1:
+        raise ValueError(f"{app_config.BatchSize} is not a valid batch size")
+    app_config.BatchFlushInterval = config.getfloat(
+        "Application", "BatchFlushInterval", fallback=app_config.BatchFlushInterval)
+
+    # maximum number of batches in the queues between the services and the overload policy, 0 is unbounded
+    for queue_name in ("RawData", "ProcessedData"):
+        max_depth: int = config.getint(
+            "Application", f"{queue_name}MaxDepth", fallback=getattr(app_config, f"{queue_name}MaxDepth"))
+        if max_depth < 0:
+            raise ValueError(f"{max_depth} is not a valid queue depth")
+        setattr(app_config, f"{queue_name}MaxDepth", max_depth)
+
+        policy: str = config.get(
+            "Application", f"{queue_name}Policy", fallback=getattr(app_config, f"{queue_name}Policy"))
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"{policy} is not a valid queue policy")
+        setattr(app_config, f"{queue_name}Policy", policy)
+
+    shedprotocols: str = config.get(
+        "Application", "ShedProtocols", fallback="")
+    app_config.ShedProtocols = [
+        name.strip() for name in shedprotocols.split(",") if name.strip()]
+    for name in app_config.ShedProtocols:
+        if Protocol_Parser.get_protocol_class_by_name(name) is None:
+            raise ValueError(f"{name} is not a valid protocol name")
+    if "shed" in (app_config.RawDataPolicy, app_config.ProcessedDataPolicy) and not app_config.ShedProtocols:
+        raise ValueError("the shed queue policy requires ShedProtocols")
+
+    # frames of unregistered protocols are counted per layer and identifier, the counts are logged once per
+    # interval and a sample of the raw frames is written to the logs Undefined_Protocols directory
+    app_config.UnknownProtocolLogInterval = config.getfloat(
+        "Application", "UnknownProtocolLogInterval", fallback=app_config.UnknownProtocolLogInterval)
+    if app_config.UnknownProtocolLogInterval <= 0:
+        raise ValueError(
+            f"{app_config.UnknownProtocolLogInterval} is not a valid unknown protocol log interval")
+    app_config.UnknownProtocolSamples = config.getint(
+        "Application", "UnknownProtocolSamples", fallback=app_config.UnknownProtocolSamples)
+    if app_config.UnknownProtocolSamples < 0:
+        raise ValueError(
+            f"{app_config.UnknownProtocolSamples} is not a valid number of unknown protocol samples")
+    app_config.UnknownProtocolMaxFileSize = config.getint(
+        "Application", "UnknownProtocolMaxFileSize", fallback=app_config.UnknownProtocolMaxFileSize)
+
+    # formatted MAC, IPv4 and IPv6 addresses cached per formatter, caps the memory of the caches
+    app_config.AddressCacheSize = config.getint(
+        "Application", "AddressCacheSize", fallback=app_config.AddressCacheSize)
+    if app_config.AddressCacheSize < 0:
+        raise ValueError(
+            f"{app_config.AddressCacheSize} is not a valid address cache size")
+
+    # decode the headers of a batch into a numpy array and drop the frames matched by the filters before parsing
+    app_config.BatchDecoding = config.getboolean(
+        "Application", "BatchDecoding", fallback=app_config.BatchDecoding)
+    if app_config.BatchDecoding and batch_decoder.np is None:
+        raise ValueError("BatchDecoding requires numpy")
+
+    # parse the frames in worker processes fed through a shared memory ring, 0 parses in the parser service
+    app_config.ParserWorkers = config.getint(
+        "Application", "ParserWorkers", fallback=app_config.ParserWorkers)
+    if app_config.ParserWorkers < 0:
+        raise ValueError(
+            f"{app_config.ParserWorkers} is not a valid number of parser workers")
+    app_config.ParserRingSlots = config.getint(
+        "Application", "ParserRingSlots", fallback=app_config.ParserRingSlots)
+    if app_config.ParserRingSlots < 1:
+        raise ValueError(
+            f"{app_config.ParserRingSlots} is not a valid number of parser ring slots")
+    app_config.ParserRingSlotSize = config.getint(
+        "Application", "ParserRingSlotSize", fallback=app_config.ParserRingSlotSize)
+    if app_config.ParserRingSlotSize < 64:
+        raise ValueError(
+            f"{app_config.ParserRingSlotSize} is not a valid parser ring slot size")
+
+    # protocols kept in the submitted packets, empty keeps every protocol. Decoding stops at the deepest layer
+    # used by the output and the filters, the upper layers of the StopProtocols are never decoded
+    for option in ("OutputProtocols", "StopProtocols"):
+        protocol_names: str = config.get("Application", option, fallback="")
+        setattr(app_config, option, [
+            name.strip() for name in protocol_names.split(",") if name.strip()])
+        for name in getattr(app_config, option):
+            if Protocol_Parser.get_protocol_class_by_name(name) is None:
+                raise ValueError(f"{name} is not a valid protocol name")
+
+    # write the captured frames to rotating pcap files
+    app_config.PcapCapture = config.getboolean(
+        "PcapWriterService", "Enabled", fallback=app_config.PcapCapture)
+    pcapformat: str = config.get(
+        "PcapWriterService", "Format", fallback=app_config.PcapFormat)
+    if pcapformat not in ("pcap", "pcapng"):
+        raise ValueError(f"{pcapformat} is not a valid capture file format")
+    app_config.PcapFormat = pcapformat
+    app_config.PcapMaxFileSize = config.getint(
+        "PcapWriterService", "MaxFileSize", fallback=app_config.PcapMaxFileSize)
+    app_config.PcapRotateInterval = config.getfloat(
+        "PcapWriterService", "RotateInterval", fallback=app_config.PcapRotateInterval)
+    app_config.PcapMaxFiles = config.getint(
+        "PcapWriterService", "MaxFiles", fallback=app_config.PcapMaxFiles)
+
     # url for monitor server, where packets are submitted
     url: str = config.get(
         "SubmitterService", "Url",
@@ -80,10 +246,79 @@ def generate_configuration_template(config_name: str):
 # Requires super user priviliages to change the interface to operate in promiscous
 [ListenerService]
 # InterfaceName = enp0s3
+# socket: one recvfrom per frame, ring: TPACKET_V3 ring buffer mapped into the process
+# pool: recvfrom_into buffers recycled by the packet parser
+# CaptureMode = socket
+# ring block size in bytes (multiple of the page size) and number of blocks, used by the ring capture mode
+# RingBlockSize = 4194304
+# RingBlockCount = 64
+# number of preallocated receive buffers, used by the pool capture mode
+# PoolBufferCount = 256
+# use the kernel receive timestamp of the frames as sniffed timestamp (SO_TIMESTAMPNS or the ring frame header)
+# KernelTimestamps = False
+# socket receive buffer size in bytes, the kernel drops frames when the buffer is full. Defaults to net.core.rmem_default
+# ReceiveBufferSize = 8388608
+# capture only the first bytes of every frame (headers), the wire length is kept for the packet and payload sizes. 0 captures the whole frame
+# SnapLength = 128
+# replay a pcap or pcapng file instead of listening on the interface, does not require super user privileges
+# ReplayFile = capture.pcap
+# replay speed relative to the recorded pacing, 1.0 replays at the original pacing and 0 as fast as possible
+# ReplaySpeed = 0
+# none: every frame, count: every SamplingRate-th frame, random: each frame with probability 1 / SamplingRate
+# flow: one in SamplingRate flows (both directions of a TCP or UDP connection). The rate is added to the Info of every packet
+# SamplingMode = none
+# SamplingRate = 1
+# number of worker processes capturing and parsing frames, the kernel distributes the frames by flow hash
+# FanoutWorkers = 0
+# fanout group id shared by the workers, defaults to the application process id
+# FanoutGroup = 1
 
 # Specify application settings. global settings some of which affect other services.
 [Application]
 # FilterSubmissionTraffic = True
+# run the listener, parser and submitter services on a single event loop instead of three threads
+# SingleEventLoop = False
+# number of frames handed between the services in one batch and the seconds before a partial batch is flushed
+# BatchSize = 64
+# BatchFlushInterval = 0.05
+# maximum number of batches in the listener to parser (RawData) and parser to submitter (ProcessedData) queues, 0 is unbounded
+# block: the producer waits, drop_newest: the new batch is dropped, drop_oldest: the oldest batch is dropped
+# shed: the ShedProtocols frames are removed from the new batches once the queue is half full, a batch that does not fit is dropped
+# RawDataMaxDepth = 1024
+# RawDataPolicy = block
+# ProcessedDataMaxDepth = 1024
+# ProcessedDataPolicy = block
+# ShedProtocols = ICMP, ICMPv6, IGMP, ARP, LLDP, CDP
+# frames of unregistered protocols are counted per layer and identifier and logged once per interval in seconds
+# UnknownProtocolLogInterval = 60
+# raw frames written per layer and identifier in an interval, no more frames are written once the file reaches the size in bytes
+# UnknownProtocolSamples = 1
+# UnknownProtocolMaxFileSize = 10485760
+# formatted MAC, IPv4 and IPv6 addresses cached per address type, 0 disables the caches
+# AddressCacheSize = 4096
+# decode the Ethernet, IP and TCP or UDP headers of a batch into a numpy array, the frames matched by the filters are not parsed
+# BatchDecoding = False
+# parser worker processes reading the captured frames from a shared memory ring, 0 parses in the packet parser service
+# ParserWorkers = 0
+# frames held by the ring and bytes per frame, longer frames are truncated and keep their wire length
+# ParserRingSlots = 4096
+# ParserRingSlotSize = 2048
+# protocols kept in the submitted packets, empty keeps every protocol. The layers above the deepest protocol used by
+# the output and the filters are not decoded
+# OutputProtocols = AF_Packet, Packet_802_3, IPv4, IPv6
+# protocols whose upper layer is never decoded, filters on the protocols above them no longer match
+# StopProtocols = IPv6
+
+# Specify pcap writer service settings. Writes the captured frames to rotating files in the logs Pcap directory
+[PcapWriterService]
+# Enabled = False
+# pcap (nanosecond timestamps) or pcapng
+# Format = pcap
+# start a new file when the current file reaches the size in bytes or has been open for the interval in seconds
+# MaxFileSize = 104857600
+# RotateInterval = 3600
+# number of files kept, the oldest files are removed. 0 keeps all files
+# MaxFiles = 10
 
 # Specify submitter service setting.
 [SubmitterService]
@@ -93,6 +328,8 @@ def generate_configuration_template(config_name: str):
 # configure filter settings
 [Filter]
 # Definition = {"AF_Packet":{"Interface_Name":"lo"}}
+# attribute values can be expressions: {"cidr": "10.0.0.0/8"}, {"range": [8000, 8100]}, {"in": [80, 443]} and {"not": 22}
+# Definition = {"IPv4": {"Source_Address": {"cidr": ["10.0.0.0/8", "172.16.0.0/12"]}}, "TCP": {"Destination_Port": {"not": {"range": [8000, 8100]}}}}
 
 # additional config string
 [Filter1]
@@ -4,3 +4,5 @@ from .deep_walker import (
     which_protocols_in_packet,
     flatten_protocols,
 )
+from .bpf_compiler import compile_filters, compile_definition, attach_filter
+from .expressions import compile_expression, is_expression, Prefix_Set
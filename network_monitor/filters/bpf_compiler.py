@@ -0,0 +1,366 @@
+import ctypes
+import socket
+import struct
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+"""
+    Classic BPF compiler for filter definitions
+
+    A filter drops a packet when all protocol attributes in its definition match. Definitions whose
+    attributes map to fixed header offsets are compiled into a socket filter, the kernel drops matching
+    frames before they are copied to userspace. Definitions that can not be expressed are left to the
+    userspace packet filter.
+
+    - every definition is compiled into one or more paths, a path is a list of checks that all need to
+      match for the frame to be dropped. A TCP/UDP definition without IP layer yields an IPv4 and IPv6 path
+    - a path starts with a frame length check, loads beyond the end of the frame abort the program and drop the frame
+    - transport ports are only compiled for IPv4 without options (IHL 5) and IPv6 without extension headers
+"""
+
+# (code, jt, jf, k)
+BPF_Instruction = Tuple[int, int, int, int]
+
+# (load instruction, mask, value, frame length required by the load)
+Check = Tuple[BPF_Instruction, Optional[int], int, int]
+
+
+class BPF(object):
+    # linux/filter.h
+    LD: int = 0x00
+    LDX: int = 0x01
+    ALU: int = 0x04
+    JMP: int = 0x05
+    RET: int = 0x06
+    W: int = 0x00
+    H: int = 0x08
+    B: int = 0x10
+    ABS: int = 0x20
+    LEN: int = 0x80
+    AND: int = 0x50
+    JEQ: int = 0x10
+    JGE: int = 0x30
+    K: int = 0x00
+    # ancillary data offsets
+    SKF_AD_OFF: int = -0x1000
+    SKF_AD_PROTOCOL: int = 0
+    SKF_AD_PKTTYPE: int = 4
+    SKF_AD_IFINDEX: int = 8
+    SKF_AD_HATYPE: int = 28
+    # asm/socket.h
+    SO_ATTACH_FILTER: int = 26
+    SO_DETACH_FILTER: int = 27
+    # accept the whole frame
+    SNAPLEN: int = 0x40000
+    # instructions accepted by the kernel in a socket filter program
+    MAXINSNS: int = 4096
+
+
+ETH_P_IP: int = 0x0800
+ETH_P_IPV6: int = 0x86DD
+IP_PROTOCOLS: Dict[str, int] = {"TCP": 6, "UDP": 17}
+TRANSPORT_HEADER_LENGTH: Dict[str, int] = {"TCP": 20, "UDP": 8}
+
+PKTTYPE_LOOKUP: Dict[str, int] = {
+    "PACKET_HOST": socket.PACKET_HOST,
+    "PACKET_BROADCAST": socket.PACKET_BROADCAST,
+    "PACKET_MULTICAST": socket.PACKET_MULTICAST,
+    "PACKET_OTHERHOST": socket.PACKET_OTHERHOST,
+    "PACKET_OUTGOING": socket.PACKET_OUTGOING,
+    "PACKET_FASTROUTE": socket.PACKET_FASTROUTE,
+}
+
+
+def _load(size: int, offset: int) -> BPF_Instruction:
+    return (BPF.LD | size | BPF.ABS, 0, 0, offset & 0xFFFFFFFF)
+
+
+def _ancillary(offset: int) -> BPF_Instruction:
+    return _load(BPF.W, BPF.SKF_AD_OFF + offset)
+
+
+def _check(size: int, offset: int, value: int, mask: Optional[int] = None) -> Check:
+    width: int = {BPF.B: 1, BPF.H: 2, BPF.W: 4}[size]
+    return (_load(size, offset), mask, value, offset + width)
+
+
+def _mac_checks(offset: int, value: Any) -> Optional[List[Check]]:
+    try:
+        address: bytes = bytes.fromhex(value.replace(":", ""))
+    except (AttributeError, ValueError):
+        return None
+
+    # userspace compares formatted strings, only compile the canonical representation
+    if len(address) != 6 or ":".join(f"{b:02X}" for b in address) != value:
+        return None
+
+    high, low = struct.unpack("! L H", address)
+    return [_check(BPF.W, offset, high), _check(BPF.H, offset + 4, low)]
+
+
+def _ipv4_checks(offset: int, value: Any) -> Optional[List[Check]]:
+    try:
+        address: bytes = socket.inet_aton(value)
+    except (OSError, TypeError):
+        return None
+
+    if ".".join(map(str, address)) != value:
+        return None
+
+    return [_check(BPF.W, offset, struct.unpack("! L", address)[0])]
+
+
+def _ipv6_checks(offset: int, value: Any) -> Optional[List[Check]]:
+    try:
+        address: bytes = socket.inet_pton(socket.AF_INET6, value)
+    except (OSError, TypeError):
+        return None
+
+    # userspace representation is eight groups of four hex digits
+    if ":".join(address[i:i + 2].hex() for i in range(0, 16, 2)) != value:
+        return None
+
+    return [
+        _check(BPF.W, offset + i, word)
+        for i, word in zip(range(0, 16, 4), struct.unpack("! 4L", address))
+    ]
+
+
+def _int_check(size: int, offset: int, mask: Optional[int] = None, shift: int = 0):
+    def checks(value: Any) -> Optional[List[Check]]:
+        if not isinstance(value, int) or isinstance(value, bool):
+            return None
+        return [_check(size, offset, value << shift, mask)]
+    return checks
+
+
+def _af_packet_checks(attribute: str, value: Any) -> Optional[List[Check]]:
+
+    if attribute == "Interface_Name":
+        try:
+            ifindex: int = socket.if_nametoindex(value)
+        except (OSError, TypeError):
+            return None
+        return [(_ancillary(BPF.SKF_AD_IFINDEX), None, ifindex, 0)]
+    elif attribute == "Ethernet_Protocol_Number" and isinstance(value, int):
+        return [(_ancillary(BPF.SKF_AD_PROTOCOL), None, value, 0)]
+    elif attribute == "Packet_Type" and isinstance(value, str) and value in PKTTYPE_LOOKUP:
+        return [(_ancillary(BPF.SKF_AD_PKTTYPE), None, PKTTYPE_LOOKUP[value], 0)]
+    elif attribute == "ARP_Hardware_Address_Type" and isinstance(value, int):
+        return [(_ancillary(BPF.SKF_AD_HATYPE), None, value, 0)]
+
+    return None
+
+
+# attribute check builders, offsets relative to the start of the network layer header
+ETHERNET_ATTRIBUTES = {
+    "Destination_MAC": lambda v: _mac_checks(0, v),
+    "Source_MAC": lambda v: _mac_checks(6, v),
+    "Ethertype": _int_check(BPF.H, 12),
+}
+
+IPV4_ATTRIBUTES = {
+    "Version": _int_check(BPF.B, 0, 0xF0, 4),
+    "IHL": _int_check(BPF.B, 0, 0x0F),
+    "DSCP": _int_check(BPF.B, 1, 0xFC, 2),
+    "ECN": _int_check(BPF.B, 1, 0x03),
+    "Total_Length": _int_check(BPF.H, 2),
+    "Identification": _int_check(BPF.H, 4),
+    "Fragment_Offset": _int_check(BPF.H, 6, 0x1FFF),
+    "TTL": _int_check(BPF.B, 8),
+    "Protocol": _int_check(BPF.B, 9),
+    "Header_Checksum": _int_check(BPF.H, 10),
+    "Source_Address": lambda v: _ipv4_checks(12, v),
+    "Destination_Address": lambda v: _ipv4_checks(16, v),
+}
+
+IPV6_ATTRIBUTES = {
+    "Payload_Length": _int_check(BPF.H, 4),
+    "Next_Header": _int_check(BPF.B, 6),
+    "Hop_Limit": _int_check(BPF.B, 7),
+    "Source_Address": lambda v: _ipv6_checks(8, v),
+    "Destination_Address": lambda v: _ipv6_checks(24, v),
+}
+
+TRANSPORT_ATTRIBUTES = {
+    "Source_Port": _int_check(BPF.H, 0),
+    "Destination_Port": _int_check(BPF.H, 2),
+}
+
+ETHERNET_HEADER_LENGTH: int = 14
+NETWORK_HEADER_LENGTH: Dict[int, int] = {ETH_P_IP: 20, ETH_P_IPV6: 40}
+NETWORK_ATTRIBUTES: Dict[int, Dict[str, Any]] = {
+    ETH_P_IP: IPV4_ATTRIBUTES, ETH_P_IPV6: IPV6_ATTRIBUTES}
+NETWORK_PROTOCOLS: Dict[str, int] = {"IPv4": ETH_P_IP, "IPv6": ETH_P_IPV6}
+
+
+def _relocate(checks: List[Check], offset: int) -> List[Check]:
+    """ move checks relative to a header to absolute frame offsets """
+    relocated = []
+    for (code, jt, jf, k), mask, value, length in checks:
+        relocated.append(((code, jt, jf, k + offset), mask, value, length + offset))
+    return relocated
+
+
+def _attribute_checks(attributes: Dict[str, Any], attrs: Dict[str, Union[str, int]], offset: int) -> Optional[List[Check]]:
+    checks: List[Check] = []
+    for name, value in attrs.items():
+        if name not in attributes:
+            return None
+        res = attributes[name](value)
+        if res is None:
+            return None
+        checks.extend(_relocate(res, offset))
+    return checks
+
+
+def compile_definition(definition: Dict[str, Dict[str, Union[str, int]]]) -> Optional[List[List[Check]]]:
+    """ return the paths of a filter definition or None when the definition can not be expressed """
+
+    definition = dict(definition)
+    common: List[Check] = []
+
+    # link layer information
+    if "AF_Packet" in definition:
+        for name, value in definition.pop("AF_Packet").items():
+            res = _af_packet_checks(name, value)
+            if res is None:
+                return None
+            common.extend(res)
+
+    if "Packet_802_3" in definition:
+        attrs = definition.pop("Packet_802_3")
+        # presence of the ethernet layer depends on the link layer protocol number
+        if not attrs:
+            return None
+        res = _attribute_checks(ETHERNET_ATTRIBUTES, attrs, 0)
+        if res is None:
+            return None
+        common.extend(res)
+
+    network = [name for name in definition if name in NETWORK_PROTOCOLS]
+    transport = [name for name in definition if name in IP_PROTOCOLS]
+
+    if len(network) + len(transport) != len(definition) or len(network) > 1 or len(transport) > 1:
+        # protocols without fixed offsets or contradicting definitions
+        return None
+
+    if not network and not transport:
+        return [common] if common else None
+
+    ethertypes: List[int] = [NETWORK_PROTOCOLS[network[0]]] if network else [
+        ETH_P_IP, ETH_P_IPV6]
+
+    paths: List[List[Check]] = []
+    for ethertype in ethertypes:
+        path: List[Check] = list(common)
+        # the userspace parser requires the complete header for the protocol to be present
+        header_length: int = ETHERNET_HEADER_LENGTH + \
+            NETWORK_HEADER_LENGTH[ethertype]
+        path.append((_load(BPF.H, 12), None, ethertype, header_length))
+
+        if network:
+            res = _attribute_checks(
+                NETWORK_ATTRIBUTES[ethertype], definition[network[0]], ETHERNET_HEADER_LENGTH)
+            if res is None:
+                return None
+            path.extend(res)
+
+        if transport:
+            # protocol field of the IPv4 header or next header of IPv6 header
+            protocol_offset: int = 9 if ethertype == ETH_P_IP else 6
+            path.append((
+                _load(BPF.B, ETHERNET_HEADER_LENGTH + protocol_offset),
+                None,
+                IP_PROTOCOLS[transport[0]],
+                header_length + TRANSPORT_HEADER_LENGTH[transport[0]]
+            ))
+
+            attrs = definition[transport[0]]
+            if attrs:
+                if ethertype == ETH_P_IP:
+                    # fixed transport offset, no IPv4 options
+                    path.append(
+                        _check(BPF.B, ETHERNET_HEADER_LENGTH, 0x05, 0x0F))
+
+                res = _attribute_checks(
+                    TRANSPORT_ATTRIBUTES, attrs, ETHERNET_HEADER_LENGTH + NETWORK_HEADER_LENGTH[ethertype])
+                if res is None:
+                    return None
+                path.extend(res)
+
+        paths.append(path)
+
+    return paths
+
+
+def _assemble_path(path: List[Check]) -> List[BPF_Instruction]:
+    """ checks followed by drop, a failed check jumps past the drop instruction to the next path """
+
+    length: int = max(check[3] for check in path)
+    body: List[Tuple[BPF_Instruction, bool]] = []
+    if length > 0:
+        body.append(((BPF.LD | BPF.W | BPF.LEN, 0, 0, 0), False))
+        body.append(((BPF.JMP | BPF.JGE | BPF.K, 0, 0, length), True))
+
+    for load, mask, value, _ in path:
+        body.append((load, False))
+        if mask is not None:
+            body.append(((BPF.ALU | BPF.AND | BPF.K, 0, 0, mask), False))
+        body.append(((BPF.JMP | BPF.JEQ | BPF.K, 0, 0, value), True))
+
+    # drop instruction
+    body.append(((BPF.RET | BPF.K, 0, 0, 0), False))
+
+    instructions: List[BPF_Instruction] = []
+    for idx, ((code, jt, jf, k), is_jump) in enumerate(body):
+        if is_jump:
+            jf = len(body) - idx - 1
+            if jf > 255:
+                raise ValueError("filter path too long for a conditional jump")
+        instructions.append((code, jt, jf, k))
+
+    return instructions
+
+
+def compile_filters(filters: List[Any], snaplen: int = BPF.SNAPLEN) -> Tuple[List[BPF_Instruction], List[Any]]:
+    """
+        compile the definitions of the filters into a socket filter program
+
+        return the program and the filters compiled into it. The program is empty when no filter could be compiled.
+        Filters that no longer fit in the kernel instruction limit are left to the packet parser
+    """
+    program: List[BPF_Instruction] = []
+    compiled: List[Any] = []
+
+    for filter_ in filters:
+        paths = compile_definition(filter_.Definition)
+        if paths is None:
+            continue
+
+        instructions: List[BPF_Instruction] = [
+            instruction for path in paths for instruction in _assemble_path(path)]
+        # the accept instruction ends the program
+        if len(program) + len(instructions) + 1 > BPF.MAXINSNS:
+            continue
+        compiled.append(filter_)
+        program.extend(instructions)
+
+    if not program:
+        return [], []
+
+    # accept frame
+    program.append((BPF.RET | BPF.K, 0, 0, snaplen))
+    return program, compiled
+
+
+def attach_filter(sock: socket.socket, program: List[BPF_Instruction]) -> None:
+    """ attach socket filter program with SO_ATTACH_FILTER """
+
+    # struct sock_filter, code, jt, jf, k
+    instructions: bytes = b"".join(struct.pack("HBBI", *instr)
+                                   for instr in program)
+    buffer = ctypes.create_string_buffer(instructions, len(instructions))
+    # struct sock_fprog, the kernel copies the program
+    fprog: bytes = struct.pack("HP", len(program), ctypes.addressof(buffer))
+    sock.setsockopt(socket.SOL_SOCKET, BPF.SO_ATTACH_FILTER, fprog)
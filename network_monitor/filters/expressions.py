@@ -0,0 +1,137 @@
+import ipaddress
+import socket
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Filter expressions extend the exact attribute values of a filter definition. An expression is a dictionary with a
+# single operator key, used on attributes that are not dictionaries themselves:
+#
+#   {"cidr": "10.0.0.0/8"} or {"cidr": ["10.0.0.0/8", "fd00::/8"]}    address in one of the prefixes
+#   {"range": [8000, 8100]}                                           inclusive numeric range
+#   {"in": [80, 443]}                                                 one of the values
+#   {"not": 22} or {"not": {"in": [22, 23]}}                          negated value or expression
+#
+# The expressions are validated and compiled into closures once, when the filter is created.
+
+OPERATORS: Tuple[str, ...] = ("cidr", "range", "in", "not")
+
+# bits per address family
+IPV4_BITS: int = 32
+IPV6_BITS: int = 128
+
+
+def is_expression(value: Any) -> bool:
+    """ return True when the filter value is an expression instead of an exact value """
+    return isinstance(value, dict) and len(value) == 1 and next(iter(value)) in OPERATORS
+
+
+@lru_cache(maxsize=4096)
+def address_value(address: str) -> Optional[Tuple[int, int]]:
+    """ return the bits of the address family and the integer value of a formatted address, None when not an address """
+    try:
+        # IPv6 addresses may end with a dotted IPv4 address (::ffff:10.0.0.1), the family is set by the colons
+        family, bits = (socket.AF_INET6, IPV6_BITS) if ":" in address else (
+            socket.AF_INET, IPV4_BITS)
+        return bits, int.from_bytes(socket.inet_pton(family, address), "big")
+    except (OSError, TypeError):
+        return None
+
+
+class Prefix_Set(object):
+    """
+        Longest prefix lookup of IPv4 and IPv6 addresses. The network bits of the prefixes are kept in a hash set per
+        prefix length, an address is compared with one set per distinct length. The cost depends on the number of
+        distinct prefix lengths, not on the number of prefixes or the addresses they cover
+    """
+
+    def __init__(self, prefixes: Iterable[str]) -> None:
+        """
+            prefixes: IPv4 and IPv6 prefixes in CIDR notation, the host bits are ignored
+        """
+        networks: Dict[int, Dict[int, Set[int]]] = {
+            IPV4_BITS: {}, IPV6_BITS: {}}
+        for prefix in prefixes:
+            network = ipaddress.ip_network(prefix, strict=False)
+            networks[network.max_prefixlen].setdefault(network.prefixlen, set()).add(
+                int(network.network_address) >> (network.max_prefixlen - network.prefixlen))
+
+        # longest prefixes first, shifted by the host bits
+        self._networks: Dict[int, List[Tuple[int, FrozenSet[int]]]] = {
+            bits: [(bits - length, frozenset(values)) for length, values in sorted(lengths.items(), reverse=True)]
+            for bits, lengths in networks.items()
+        }
+
+    def __contains__(self, address: Any) -> bool:
+        if not isinstance(address, str):
+            return False
+
+        value: Optional[Tuple[int, int]] = address_value(address)
+        if value is None:
+            return False
+
+        bits, address_int = value
+        for host_bits, networks in self._networks[bits]:
+            if address_int >> host_bits in networks:
+                return True
+        return False
+
+
+def _check_value(value: Any, attribute_type: Any) -> None:
+    if not isinstance(value, attribute_type):
+        raise ValueError(f"{value} not of type {attribute_type}")
+
+
+def compile_expression(expression: Dict[str, Any], attribute_type: Any) -> Callable[[Any], bool]:
+    """
+        return a function matching an attribute value with the expression, raises ValueError when the expression is
+        not valid for the attribute type
+
+        expression: filter expression, see OPERATORS
+        attribute_type: annotated type of the protocol attribute
+    """
+    operator, operand = next(iter(expression.items()))
+
+    if operator == "cidr":
+        if attribute_type is not str:
+            raise ValueError(f"cidr requires an address attribute, not {attribute_type}")
+        prefixes: List[Any] = operand if isinstance(operand, list) else [operand]
+        for prefix in prefixes:
+            _check_value(prefix, str)
+        try:
+            prefix_set: Prefix_Set = Prefix_Set(prefixes)
+        except ValueError as e:
+            raise ValueError(f"{operand} is not a valid prefix: {e}")
+        return prefix_set.__contains__
+
+    if operator == "range":
+        if attribute_type not in (int, float):
+            raise ValueError(f"range requires a numeric attribute, not {attribute_type}")
+        if not isinstance(operand, list) or len(operand) != 2:
+            raise ValueError(f"range {operand} is not a [low, high] list")
+        low, high = operand
+        for bound in (low, high):
+            if not isinstance(bound, (int, float)) or isinstance(bound, bool):
+                raise ValueError(f"range bound {bound} is not a number")
+        if low > high:
+            raise ValueError(f"range {operand} is empty")
+        return lambda value: low <= value <= high
+
+    if operator == "in":
+        if not isinstance(operand, list) or not operand:
+            raise ValueError(f"in {operand} is not a list of values")
+        for value in operand:
+            _check_value(value, attribute_type)
+        try:
+            values: FrozenSet[Any] = frozenset(operand)
+        except TypeError as e:
+            raise ValueError(f"in {operand} values can not be compared: {e}")
+        return values.__contains__
+
+    # not
+    if is_expression(operand):
+        matcher: Callable[[Any], bool] = compile_expression(
+            operand, attribute_type)
+        return lambda value: not matcher(value)
+    _check_value(operand, attribute_type)
+    return lambda value: value != operand
@@ -0,0 +1,365 @@
+import socket
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .protocol_utils import format_ipv4_addr, format_ipv6_addr, format_mac_addr
+
+# Vectorized decoder of the Ethernet/IPv4 and Ethernet/IPv6 TCP and UDP stacks. A batch of frames is decoded into a
+# NumPy structured array with one row per frame, the header fields are extracted for all frames at once. Filters and
+# aggregations operate on the columns, the rows of other stacks (decoded is False) are left to the protocol parsers.
+# numpy is optional, the functions raise ImportError without it.
+
+# bytes of the frame copied into the batch, Ethernet, IPv6 fixed header and TCP without options
+HEADER_BYTES: int = 14 + 40 + 20
+
+# offset of the network and transport layers, IPv4 without options
+NETWORK_OFFSET: int = 14
+IPV4_TRANSPORT_OFFSET: int = NETWORK_OFFSET + 20
+IPV6_TRANSPORT_OFFSET: int = NETWORK_OFFSET + 40
+
+HEADER_FIELDS: List[Tuple[Any, ...]] = [
+    ("timestamp", "f8"),
+    ("wire_length", "u4"),
+    ("capture_length", "u4"),
+    # the network and transport layers are decoded
+    ("decoded", "?"),
+    ("ethertype", "u2"),
+    ("destination_mac", "u8"),
+    ("source_mac", "u8"),
+    # 4, 6 or 0 when not decoded
+    ("ip_version", "u1"),
+    # IPv4 protocol or IPv6 next header
+    ("ip_protocol", "u1"),
+    # IPv4 TTL or IPv6 hop limit
+    ("ttl", "u1"),
+    ("source_ipv4", "u4"),
+    ("destination_ipv4", "u4"),
+    # most and least significant 64 bits of the address
+    ("source_ipv6", "u8", (2,)),
+    ("destination_ipv6", "u8", (2,)),
+    ("source_port", "u2"),
+    ("destination_port", "u2"),
+    ("tcp_flags", "u1"),
+]
+
+HEADER_DTYPE: Any = np.dtype(HEADER_FIELDS) if np is not None else None
+
+# filter definition (protocol, field) to column, the string fields are converted by the named encoder
+FILTER_COLUMNS: Dict[Tuple[str, str], Tuple[str, Optional[str]]] = {
+    ("Packet_802_3", "Destination_MAC"): ("destination_mac", "mac"),
+    ("Packet_802_3", "Source_MAC"): ("source_mac", "mac"),
+    ("Packet_802_3", "Ethertype"): ("ethertype", None),
+    ("IPv4", "Source_Address"): ("source_ipv4", "ipv4"),
+    ("IPv4", "Destination_Address"): ("destination_ipv4", "ipv4"),
+    ("IPv4", "Protocol"): ("ip_protocol", None),
+    ("IPv4", "TTL"): ("ttl", None),
+    ("IPv6", "Source_Address"): ("source_ipv6", "ipv6"),
+    ("IPv6", "Destination_Address"): ("destination_ipv6", "ipv6"),
+    ("IPv6", "Next_Header"): ("ip_protocol", None),
+    ("IPv6", "Hop_Limit"): ("ttl", None),
+    ("TCP", "Source_Port"): ("source_port", None),
+    ("TCP", "Destination_Port"): ("destination_port", None),
+    ("UDP", "Source_Port"): ("source_port", None),
+    ("UDP", "Destination_Port"): ("destination_port", None),
+}
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("the batch decoder requires numpy")
+
+
+def _field(data: Any, offset: int, width: int) -> Any:
+    """ return the big endian unsigned integers of width bytes at the offset of every row """
+    padded = np.zeros((len(data), 8), dtype=np.uint8)
+    padded[:, 8 - width:] = data[:, offset:offset + width]
+    return padded.view(">u8")[:, 0]
+
+
+def decode_headers(frames: List[Tuple[Any, ...]]) -> Any:
+    """
+        decode the Ethernet, IPv4 or IPv6 and TCP or UDP headers of a batch of captured frames into a structured
+        array of HEADER_DTYPE, one row per frame. The rows are decoded when the protocol parsers would return the
+        same stack: IPv4 without options or IPv6 without extension headers followed by a complete TCP or UDP header.
+
+        frames: (timestamp, (raw_bytes, address)[, wire_length]) tuples as returned by the interface listener
+    """
+    _require_numpy()
+
+    count: int = len(frames)
+    headers = np.zeros(count, dtype=HEADER_DTYPE)
+    if count == 0:
+        return headers
+
+    lengths: List[int] = []
+    protocol_numbers: List[int] = []
+    chunks: List[bytes] = []
+    for frame in frames:
+        raw_bytes, address = frame[1]
+        lengths.append(len(raw_bytes))
+        protocol_numbers.append(address[1])
+        chunks.append(bytes(raw_bytes[:HEADER_BYTES]).ljust(
+            HEADER_BYTES, b"\x00"))
+
+    data = np.frombuffer(b"".join(chunks), dtype=np.uint8).reshape(
+        count, HEADER_BYTES)
+    capture_length = np.array(lengths, dtype=np.uint32)
+
+    headers["timestamp"] = [frame[0] for frame in frames]
+    headers["capture_length"] = capture_length
+    headers["wire_length"] = [frame[2] if len(frame) > 2 else length
+                              for frame, length in zip(frames, lengths)]
+
+    # Packet_802_2 frames are selected on the protocol number of the socket address
+    ethernet = (np.array(protocol_numbers) > 1500) & (capture_length >= 14)
+    ethertype = _field(data, 12, 2)
+    headers["ethertype"] = ethertype
+    headers["destination_mac"] = _field(data, 0, 6)
+    headers["source_mac"] = _field(data, 6, 6)
+
+    # IPv4 without options, IPv6 followed by the transport header
+    ipv4 = ethernet & (ethertype == 0x0800) & (
+        data[:, NETWORK_OFFSET] & 15 == 5)
+    ipv6 = ethernet & (ethertype == 0x86DD)
+    ip_protocol = np.where(
+        ipv6, data[:, NETWORK_OFFSET + 6], data[:, NETWORK_OFFSET + 9])
+    transport_offset = np.where(
+        ipv6, IPV6_TRANSPORT_OFFSET, IPV4_TRANSPORT_OFFSET)
+
+    # TCP options require two more bytes, UDP has a fixed 8 byte header
+    tcp = (ipv4 | ipv6) & (ip_protocol == 6)
+    udp = (ipv4 | ipv6) & (ip_protocol == 17)
+    data_offset = np.where(
+        ipv6, data[:, IPV6_TRANSPORT_OFFSET + 12], data[:, IPV4_TRANSPORT_OFFSET + 12]) >> 4
+    tcp &= capture_length >= transport_offset + \
+        np.where(data_offset > 5, 22, 20)
+    udp &= capture_length >= transport_offset + 8
+    decoded = tcp | udp
+
+    headers["decoded"] = decoded
+    headers["ip_version"] = np.where(
+        decoded, np.where(ipv6, 6, 4), 0)
+    headers["ip_protocol"] = np.where(decoded, ip_protocol, 0)
+    headers["ttl"] = np.where(decoded, np.where(
+        ipv6, data[:, NETWORK_OFFSET + 7], data[:, NETWORK_OFFSET + 8]), 0)
+
+    decoded_ipv4 = decoded & ~ipv6
+    headers["source_ipv4"] = np.where(
+        decoded_ipv4, _field(data, NETWORK_OFFSET + 12, 4), 0)
+    headers["destination_ipv4"] = np.where(
+        decoded_ipv4, _field(data, NETWORK_OFFSET + 16, 4), 0)
+
+    decoded_ipv6 = (decoded & ipv6)[:, None]
+    headers["source_ipv6"] = np.where(decoded_ipv6, np.stack(
+        (_field(data, NETWORK_OFFSET + 8, 8), _field(data, NETWORK_OFFSET + 16, 8)), axis=1), 0)
+    headers["destination_ipv6"] = np.where(decoded_ipv6, np.stack(
+        (_field(data, NETWORK_OFFSET + 24, 8), _field(data, NETWORK_OFFSET + 32, 8)), axis=1), 0)
+
+    headers["source_port"] = np.where(ipv6, _field(
+        data, IPV6_TRANSPORT_OFFSET, 2), _field(data, IPV4_TRANSPORT_OFFSET, 2)) * decoded
+    headers["destination_port"] = np.where(ipv6, _field(
+        data, IPV6_TRANSPORT_OFFSET + 2, 2), _field(data, IPV4_TRANSPORT_OFFSET + 2, 2)) * decoded
+    headers["tcp_flags"] = np.where(tcp, np.where(
+        ipv6, data[:, IPV6_TRANSPORT_OFFSET + 13], data[:, IPV4_TRANSPORT_OFFSET + 13]), 0)
+
+    return headers
+
+
+def _encode(encoder: Optional[str], value: Any) -> Optional[Any]:
+    """
+        return the column value of a filter value, None when no frame can match. The protocol parsers compare the
+        formatted strings, only the exact formatting of an address matches
+    """
+    if encoder is None:
+        return value if isinstance(value, int) else None
+
+    if not isinstance(value, str):
+        return None
+
+    try:
+        if encoder == "mac":
+            raw_address: bytes = bytes.fromhex(value.replace(":", ""))
+            if len(raw_address) != 6 or format_mac_addr(raw_address) != value:
+                return None
+            return int.from_bytes(raw_address, "big")
+        if encoder == "ipv4":
+            raw_address = socket.inet_aton(value)
+            if format_ipv4_addr(raw_address) != value:
+                return None
+            return int.from_bytes(raw_address, "big")
+        raw_address = socket.inet_pton(socket.AF_INET6, value)
+        if format_ipv6_addr(raw_address) != value:
+            return None
+        return [int.from_bytes(raw_address[:8], "big"), int.from_bytes(raw_address[8:], "big")]
+    except (ValueError, OSError):
+        return None
+
+
+# protocols with a column mask, see _present
+COLUMN_PROTOCOLS: Tuple[str, ...] = (
+    "AF_Packet", "Packet_802_3", "IPv4", "IPv6", "TCP", "UDP")
+
+
+def _present(headers: Any, protocol: str) -> Optional[Any]:
+    """ return the mask of the decoded rows containing the protocol, None when the protocol is not decoded """
+    if protocol in ("AF_Packet", "Packet_802_3"):
+        return headers["decoded"]
+    if protocol == "IPv4":
+        return headers["ip_version"] == 4
+    if protocol == "IPv6":
+        return headers["ip_version"] == 6
+    if protocol == "TCP":
+        return headers["decoded"] & (headers["ip_protocol"] == 6)
+    if protocol == "UDP":
+        return headers["decoded"] & (headers["ip_protocol"] == 17)
+    return None
+
+
+def filter_mask(definition: Dict[str, Dict[str, Any]], headers: Any) -> Optional[Any]:
+    """
+        return the mask of the rows matched by a filter definition, the same rows the filter matches on the
+        serialized packets. Returns None when the definition uses a protocol or field that is not a column, the
+        filter is then applied by the packet filter. Rows that are not decoded are never in the mask.
+
+        definition: Filter.Definition, protocol name to field values
+        headers: array returned by decode_headers
+    """
+    _require_numpy()
+
+    mask = headers["decoded"].copy()
+    for protocol, fields in definition.items():
+        present = _present(headers, protocol)
+        if present is None:
+            return None
+        mask &= present
+
+        for name, value in fields.items():
+            # cidr, range, in and not expressions are applied by the packet filter
+            if (protocol, name) not in FILTER_COLUMNS or isinstance(value, dict):
+                return None
+            column, encoder = FILTER_COLUMNS[(protocol, name)]
+            encoded: Optional[Any] = _encode(encoder, value)
+            column_values = headers[column]
+
+            if encoded is None or (encoder is None and not 0 <= encoded <= np.iinfo(column_values.dtype).max):
+                # the filter can not match any frame
+                mask[:] = False
+            elif encoder == "ipv6":
+                mask &= (column_values == encoded).all(axis=1)
+            else:
+                mask &= column_values == encoded
+
+    return mask
+
+
+def in_columns(definition: Dict[str, Dict[str, Any]]) -> bool:
+    """ return True when the protocols and fields of a filter definition are columns, filter_mask returns a mask """
+    return all(
+        protocol in COLUMN_PROTOCOLS and all(
+            (protocol, name) in FILTER_COLUMNS and not isinstance(value, dict) for name, value in fields.items())
+        for protocol, fields in definition.items()
+    )
+
+
+def column_values(headers: Any, column: str) -> Any:
+    """ return the values of a column, the IPv6 address pairs as 16 byte values so an address compares as one value """
+    values = headers[column]
+    if values.ndim > 1:
+        return np.ascontiguousarray(values).view(np.dtype((np.void, values.itemsize * values.shape[1]))).ravel()
+    return values
+
+
+def column_keys(protocol: str, name: str, values: Iterable[Any]) -> Any:
+    """
+        return the sorted array of the filter values of a field encoded as the elements of column_values, the
+        values no frame can match are left out
+
+        protocol, name: filter definition field, a key of FILTER_COLUMNS
+        values: filter values of the field
+    """
+    _require_numpy()
+
+    column, encoder = FILTER_COLUMNS[(protocol, name)]
+    keys: List[Any] = []
+    for value in values:
+        encoded: Optional[Any] = _encode(encoder, value)
+        if encoded is None:
+            continue
+        if encoder == "ipv6":
+            keys.append(np.array(encoded, dtype="u8").tobytes())
+        elif 0 <= encoded <= np.iinfo(HEADER_DTYPE[column]).max:
+            keys.append(encoded)
+    return np.unique(np.array(keys, dtype="V16" if encoder == "ipv6" else HEADER_DTYPE[column]))
+
+
+def column_mask(headers: Any, protocol: str, name: str, keys: Any) -> Any:
+    """
+        return the mask of the decoded rows containing the protocol with one of the values of the field. The rows
+        are looked up in the sorted keys, the cost grows with the logarithm of the number of keys
+
+        keys: array returned by column_keys
+    """
+    _require_numpy()
+
+    column, _ = FILTER_COLUMNS[(protocol, name)]
+    values = column_values(headers, column)
+    if not len(keys):
+        return np.zeros(len(values), dtype=bool)
+    found = keys[np.minimum(np.searchsorted(keys, values), len(keys) - 1)] == values
+    return headers["decoded"] & _present(headers, protocol) & found
+
+
+def candidate_mask(headers: Any, protocol: str, name: str, keys: Any, candidates: Dict[Any, List[Dict[str, Dict[str, Any]]]]) -> Any:
+    """
+        return the mask of the rows matched by filter definitions with more than one condition, grouped by the value
+        of one of their fields. filter_mask is only applied to the rows holding the value of the definitions
+
+        keys: array returned by column_keys for the values of candidates
+        candidates: definitions by element of column_values
+    """
+    _require_numpy()
+
+    column, _ = FILTER_COLUMNS[(protocol, name)]
+    mask = column_mask(headers, protocol, name, keys)
+    rows = np.flatnonzero(mask)
+    grouped: Dict[Any, List[int]] = {}
+    for row, value in zip(rows.tolist(), column_values(headers, column)[rows].tolist()):
+        grouped.setdefault(value, []).append(row)
+
+    mask[:] = False
+    for value, value_rows in grouped.items():
+        selected = headers[value_rows]
+        for definition in candidates[value]:
+            mask[value_rows] |= filter_mask(definition, selected)
+    return mask
+
+
+def count_by(headers: Any, *columns: str) -> Dict[Tuple[Any, ...], Tuple[int, int]]:
+    """
+        return the frames and wire bytes of the decoded rows per distinct value of the columns, e.g.
+        count_by(headers, "destination_ipv4", "destination_port")
+    """
+    _require_numpy()
+
+    decoded = headers[headers["decoded"]]
+    if len(decoded) == 0:
+        return {}
+
+    keys, inverse = np.unique(
+        decoded[list(columns)], return_inverse=True)
+    inverse = inverse.ravel()
+    frames = np.bincount(inverse, minlength=len(keys))
+    wire_bytes = np.bincount(
+        inverse, weights=decoded["wire_length"], minlength=len(keys))
+
+    # the IPv6 address columns are returned as (most, least) significant 64 bit tuples
+    return {
+        tuple(tuple(value.tolist()) if isinstance(value, np.ndarray) else value for value in key.tolist()):
+        (int(count), int(size))
+        for key, count, size in zip(keys, frames, wire_bytes)
+    }
@@ -0,0 +1,113 @@
+import struct
+
+from typing import Any, Callable, Dict, Tuple
+
+from .internet_layer import IPv4, IPv6, IPV4_HEADER, IPV6_HEADER
+from .transport_layer import TCP, UDP, TCP_HEADER, UDP_HEADER
+from .parsers import Protocol_Parser
+
+# Fused decoders of the common Ethernet/IPv4/TCP, Ethernet/IPv4/UDP and Ethernet/IPv6/TCP stacks. The network and
+# transport headers are unpacked from the frame in one pass and the protocol objects are created with the decoded
+# headers. Frames with IPv4 options, IPv6 extension headers, TCP options or short headers are left to the
+# registered protocol parsers, as are frames whose decoding stops at the link or network layer.
+
+# offset of the network layer in the ethernet frame
+NETWORK_OFFSET: int = 14
+
+
+def fused_struct(*headers: struct.Struct) -> struct.Struct:
+    """ return a precompiled format of the consecutive headers """
+    return struct.Struct("! " + " ".join(header.format.lstrip("! ") for header in headers))
+
+
+IPV4_TCP = fused_struct(IPV4_HEADER, TCP_HEADER)
+IPV4_UDP = fused_struct(IPV4_HEADER, UDP_HEADER)
+IPV6_TCP = fused_struct(IPV6_HEADER, TCP_HEADER)
+
+IPV4_FIELDS: int = len(IPV4_HEADER.unpack(bytes(IPV4_HEADER.size)))
+IPV6_FIELDS: int = len(IPV6_HEADER.unpack(bytes(IPV6_HEADER.size)))
+
+
+def with_header(cls: Any, raw_bytes: memoryview, header: Tuple[Any, ...]) -> Any:
+    """ create a protocol object from the decoded fixed header, bypassing the constructor """
+    protocol: Any = cls.__new__(cls)
+    protocol._raw_bytes = raw_bytes
+    protocol._header = header
+    return protocol
+
+
+def stops_at(packet: Any, network: Any) -> bool:
+    """ return True when the upper layer of the packet or of the network protocol is not decoded """
+    return packet.__class__ in Protocol_Parser.stop_protocols or network in Protocol_Parser.stop_protocols
+
+
+def decode_ipv4(packet: Any, raw_bytes: memoryview) -> bool:
+    """ decode Ethernet/IPv4/TCP and Ethernet/IPv4/UDP frames, return False when the frame is not supported """
+    if Protocol_Parser.stop_protocols and stops_at(packet, IPv4):
+        return False
+
+    # IPv4 without options
+    if len(raw_bytes) < NETWORK_OFFSET + 20 or raw_bytes[NETWORK_OFFSET] & 15 != 5:
+        return False
+
+    transport_offset: int = NETWORK_OFFSET + 20
+    protocol: int = raw_bytes[NETWORK_OFFSET + 9]
+    if protocol == 6:
+        # TCP without options
+        if len(raw_bytes) < IPV4_TCP.size + NETWORK_OFFSET or raw_bytes[transport_offset + 12] >> 4 > 5:
+            return False
+        fields: Tuple[Any, ...] = IPV4_TCP.unpack_from(
+            raw_bytes, NETWORK_OFFSET)
+        transport: Any = with_header(
+            TCP, raw_bytes[transport_offset:], fields[IPV4_FIELDS:])
+    elif protocol == 17:
+        if len(raw_bytes) < IPV4_UDP.size + NETWORK_OFFSET:
+            return False
+        fields = IPV4_UDP.unpack_from(raw_bytes, NETWORK_OFFSET)
+        transport = with_header(
+            UDP, raw_bytes[transport_offset:], fields[IPV4_FIELDS:])
+    else:
+        return False
+
+    ipv4: IPv4 = with_header(
+        IPv4, raw_bytes[NETWORK_OFFSET:], fields[:IPV4_FIELDS])
+    ipv4.IHL = 5
+    ipv4.Total_Length = fields[2]
+    ipv4.Protocol = protocol
+    ipv4._encap = transport
+
+    packet._encap = ipv4
+    return True
+
+
+def decode_ipv6(packet: Any, raw_bytes: memoryview) -> bool:
+    """ decode Ethernet/IPv6/TCP frames, return False when the frame is not supported """
+    if Protocol_Parser.stop_protocols and stops_at(packet, IPv6):
+        return False
+
+    transport_offset: int = NETWORK_OFFSET + 40
+    # TCP directly after the fixed header, without options
+    if (len(raw_bytes) < IPV6_TCP.size + NETWORK_OFFSET or raw_bytes[NETWORK_OFFSET + 6] != 6
+            or raw_bytes[transport_offset + 12] >> 4 > 5):
+        return False
+
+    fields: Tuple[Any, ...] = IPV6_TCP.unpack_from(raw_bytes, NETWORK_OFFSET)
+    tcp: TCP = with_header(TCP, raw_bytes[transport_offset:],
+                           fields[IPV6_FIELDS:])
+
+    ipv6: IPv6 = with_header(
+        IPv6, raw_bytes[NETWORK_OFFSET:], fields[:IPV6_FIELDS])
+    ipv6.Payload_Length = fields[1]
+    ipv6.Next_Header = 6
+    ipv6.Ext_Headers = []
+    ipv6._encap = tcp
+
+    packet._encap = ipv6
+    return True
+
+
+# ethertype to fused decoder, called by Packet_802_3 before the registered protocol parsers
+FUSED_DECODERS: Dict[int, Callable[[Any, memoryview], bool]] = {
+    0x0800: decode_ipv4,
+    0x86DD: decode_ipv6,
+}
@@ -13,80 +13,73 @@ from .protocol_utils import (
     get_ipv6_addr,
     get_mac_addr,
     grouper,
+    check_header_length,
+    Lazy_Field,
+    protocol_slots,
     EnhancedJSONEncoder,
 )
 
 from .parsers import Protocol_Parser
 from .layer import Layer_Protocols
 
+# precompiled header formats, unpacked from the start of the raw bytes
+IPV4_HEADER = struct.Struct("! B B H H H B B H 4s 4s")
+IPV4_OPTION = struct.Struct("! B B")
+IPV6_HEADER = struct.Struct("! 4s H B B 16s 16s")
+IPV6_EXT_HEADER = struct.Struct("! B B")
+ARP_HEADER = struct.Struct("! H H B B H 6s 4s 6s 4s")
+LLDP_TLV_HEADER = struct.Struct("! H")
+# IGMP, ICMP and ICMPv6
+ICMP_HEADER = struct.Struct("! B B H 4s")
 
-@dataclass
+
+@protocol_slots
+@dataclass(init=False)
 class IPv4(object):
+    __slots__ = ("_raw_bytes", "_encap")
 
     Description = "Internet Protocol Version 4"
     Identifier = 2048
-    Version: int
+    Encapsulates = Layer_Protocols.IP_protocols
+    # fixed header part, decoded on first access
+    _header = Lazy_Field(lambda self: IPV4_HEADER.unpack_from(self._raw_bytes))
+    Version: int = Lazy_Field(lambda self: self._header[0] >> 4)
     IHL: int
-    DSCP: int
-    ECN: int
+    DSCP: int = Lazy_Field(lambda self: (self._header[1] & 252) >> 2)
+    ECN: int = Lazy_Field(lambda self: self._header[1] & 3)
     Total_Length: int
-    Identification: int
-    Flags: int
-    Fragment_Offset: int
-    TTL: int
+    Identification: int = Lazy_Field(lambda self: self._header[3])
+    Flags: int = Lazy_Field(lambda self: self._header[4] & 57344 >> 13)
+    Fragment_Offset: int = Lazy_Field(lambda self: self._header[4] & 8191)
+    TTL: int = Lazy_Field(lambda self: self._header[5])
     Protocol: int
-    Header_Checksum: int
-    Source_Address: str
-    Destination_Address: str
-    Options: dict
+    Header_Checksum: int = Lazy_Field(lambda self: self._header[7])
+    Source_Address: str = Lazy_Field(
+        lambda self: get_ipv4_addr(self._header[8]))
+    Destination_Address: str = Lazy_Field(
+        lambda self: get_ipv4_addr(self._header[9]))
+    Options: dict = Lazy_Field(lambda self: self.__parse_options())
 
     def __init__(self, raw_bytes: bytes) -> None:
+        check_header_length(raw_bytes, 20, "IPv4")
 
-        (
-            __vihl,
-            __dsen,
-            __tl,
-            __ident,
-            __ff,
-            __ttl,
-            __proto,
-            __hck,
-            __src,
-            __des,
-        ) = struct.unpack("! B B H H H B B H 4s 4s", raw_bytes[:20])
-
-        __flags = __ff & 57344 >> 13
-        self.Version: int = __vihl >> 4
-
-        self.IHL: int = __vihl & 15
-        self.DSCP: int = (__dsen & 252) >> 2
-        self.ECN: int = __dsen & 3
-        self.Total_Length: int = __tl
-        self.Identification: int = __ident
-
-        self.Flags: int = __flags
-        self.Fragment_Offset: int = __ff & 8191
-        self.TTL: int = __ttl
-        self.Protocol: int = __proto
-        self.Header_Checksum: int = __hck
-        self.Source_Address: str = get_ipv4_addr(__src)
-        self.Destination_Address: str = get_ipv4_addr(__des)
+        # fields required to find the upper layer protocol and its size, the other fields are decoded on first access
+        self.IHL: int = raw_bytes[0] & 15
+        self.Total_Length: int = int.from_bytes(raw_bytes[2:4], "big")
+        self.Protocol: int = raw_bytes[9]
+
+        self._raw_bytes: bytes = raw_bytes
 
         # Note: If the header length is greater than 5 (i.e., it is from 6 to 15)
         # it means that the options field is present and must be considered.
 
         if self.IHL > 5:
             # raw bytes contains Option field data
+            check_header_length(raw_bytes, 22, "IPv4 options")
             offset: int = 5 * self.IHL  # 8*4 24 bytes
-            options: bytes = raw_bytes[20:offset]
-
-            self.__parse_options(options)
             self.__parse_upper_layer_protocol(raw_bytes[offset:])
         else:
             self.__parse_upper_layer_protocol(raw_bytes[20:])
-            self.Options = {}
-
-        self.__raw_bytes: bytes = raw_bytes
 
     def __verify_checksum(self, raw_bytes_header: bytes) -> None:
         """ verify checksum is correct """
@@ -95,15 +88,19 @@ class IPv4(object):
 
         raise NotImplemented
 
-    def __parse_options(self, options: bytes) -> None:
+    def __parse_options(self) -> Dict[str, Union[str, int]]:
         """ used to parser Options flield """
+        if self.IHL <= 5:
+            return {}
+
+        options: bytes = self._raw_bytes[20:5 * self.IHL]
         # Note: Copied, Option Class, and Option Number are sometimes referred to as a single eight-bit field, the Option Type.
-        __ccn, __length = struct.unpack("! B B", options[:2])
+        __ccn, __length = IPV4_OPTION.unpack_from(options)
         __data = options[2:__length]
         copied = __ccn >> 7
         klass = (__ccn & 96) >> 5
         number = __ccn & 31
-        self.Options: Dict[str, Union[str, int]] = {
+        return {
             "Copied": copied,
             "Option Class": klass,
             "Option Number": number,
@@ -111,19 +108,16 @@ class IPv4(object):
         }
 
     def raw(self) -> bytes:
-        return self.__raw_bytes
+        return self._raw_bytes
 
     def upper_layer(self) -> Any:
 
-        return self.__encap
-
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
+        return self._encap
 
     def __parse_upper_layer_protocol(self, remaining_raw_bytes: bytes) -> None:
 
-        self.__encap: Any = Protocol_Parser.parse(
-            Layer_Protocols.IP_protocols, self.Protocol, remaining_raw_bytes
+        self._encap: Any = Protocol_Parser.parse_upper_layer(
+            self, Layer_Protocols.IP_protocols, self.Protocol, remaining_raw_bytes
         )
 
 
@@ -133,6 +127,8 @@ Protocol_Parser.register(Layer_Protocols.Ethertype, 2048, IPv4)
 class IPv6_Ext_Headers(object):
     """ ipv6 extension header extractor """
 
+    __slots__ = ("_headers",)
+
     EXT_HEADER_LOOKUP = [
         0,  #: "Hop by Hop_Options",
         43,  #: "Routing",
@@ -153,9 +149,8 @@ class IPv6_Ext_Headers(object):
 
     def parse_extension_headers(self, next_header: int, raw_bytes: bytes) -> Tuple[Any, int, bytes]:
         def parse_header(remaining_raw_bytes: bytes) -> Tuple[int, bytes, bytes]:
-            __next_header, __ext_header_len = struct.unpack(
-                "! B B", remaining_raw_bytes[:2]
-            )
+            __next_header, __ext_header_len = IPV6_EXT_HEADER.unpack_from(
+                remaining_raw_bytes)
 
             return (
                 __next_header,
@@ -186,42 +181,40 @@ class IPv6_Ext_Headers(object):
             return self._headers, ext_header, r_raw_bytes
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class IPv6(object):
+    __slots__ = ("_raw_bytes", "_encap")
 
     Description = "Internet Protocol Version 6"
     Identifier = 34525
-    Version: int
-    DS: int
-    ECN: int
-    Flow_Label: int
+    Encapsulates = Layer_Protocols.IP_protocols
+    # fixed header part, decoded on first access
+    _header = Lazy_Field(lambda self: IPV6_HEADER.unpack_from(self._raw_bytes))
+    # index first byte
+    Version: int = Lazy_Field(lambda self: self._header[0][0] >> 4)
+    DS: int = Lazy_Field(lambda self: self._traffic_class & 252)
+    ECN: int = Lazy_Field(lambda self: self._traffic_class & 3)
+    Flow_Label: int = Lazy_Field(lambda self: int.from_bytes(
+        self._header[0][1:4], sys.byteorder) & 1048575)
     Payload_Length: int
     Next_Header: int
-    Hop_Limit: int
-    Source_Address: str
-    Destination_Address: str
+    Hop_Limit: int = Lazy_Field(lambda self: self._header[3])
+    Source_Address: str = Lazy_Field(
+        lambda self: get_ipv6_addr(self._header[4]))
+    Destination_Address: str = Lazy_Field(
+        lambda self: get_ipv6_addr(self._header[5]))
     Ext_Headers: list
 
-    def __init__(self, raw_bytes: bytes) -> None:
-
-        # parse fixed header
-        __vtf, __pl_len, __next_h, __hop_l, __src_addr, __des_addr = struct.unpack(
-            "! 4s H B B 16s 16s", raw_bytes[:40]
-        )
+    _traffic_class = Lazy_Field(lambda self: (int.from_bytes(
+        self._header[0][:2], sys.byteorder) & 2040) >> 4)
 
-        # index first byte
-        self.Version: int = __vtf[0] >> 4
-        traffic_class = (int.from_bytes(__vtf[:2], sys.byteorder) & 2040) >> 4
-        self.DS: int = traffic_class & 252
-        self.ECN: int = traffic_class & 3
+    def __init__(self, raw_bytes: bytes) -> None:
+        check_header_length(raw_bytes, 40, "IPv6")
 
-        self.Flow_Label: int = int.from_bytes(
-            __vtf[1:4], sys.byteorder) & 1048575
-        self.Payload_Length: int = __pl_len
-        self.Next_Header: int = __next_h
-        self.Hop_Limit: int = __hop_l
-        self.Source_Address: str = get_ipv6_addr(__src_addr)
-        self.Destination_Address: str = get_ipv6_addr(__des_addr)
+        # fields required to find the upper layer protocol and its size, the other fields are decoded on first access
+        self.Payload_Length: int = int.from_bytes(raw_bytes[4:6], "big")
+        self.Next_Header: int = raw_bytes[6]
 
         # parse extension headers
         (
@@ -239,59 +232,42 @@ class IPv6(object):
         return self._raw_bytes
 
     def upper_layer(self) -> Any:
-        return self.__encap
-
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
+        return self._encap
 
     def __parse_upper_layer_protocol(self, protocol, remaining_raw_bytes: bytes) -> None:
         # The values are shared with those used for the IPv4 protocol field
 
-        self.__encap: Any = Protocol_Parser.parse(
-            Layer_Protocols.IP_protocols, protocol, remaining_raw_bytes
+        self._encap: Any = Protocol_Parser.parse_upper_layer(
+            self, Layer_Protocols.IP_protocols, protocol, remaining_raw_bytes
         )
 
 
 Protocol_Parser.register(Layer_Protocols.Ethertype, 34525, IPv6)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class ARP(object):
+    __slots__ = ("_raw_bytes",)
+
     description = "Address Resolution Protocol"
     identifier = 2054
 
-    HTYPE: int
-    PTYPE: int
-    HLEN: int
-    PLEN: int
-    Operation: int
-    SHA: str
-    SPA: str
-    THA: str
-    TPA: str
+    _header = Lazy_Field(lambda self: ARP_HEADER.unpack_from(self._raw_bytes))
+    HTYPE: int = Lazy_Field(lambda self: self._header[0])
+    PTYPE: int = Lazy_Field(lambda self: self._header[1])
+    HLEN: int = Lazy_Field(lambda self: self._header[2])
+    PLEN: int = Lazy_Field(lambda self: self._header[3])
+    Operation: int = Lazy_Field(lambda self: self._header[4])
+    SHA: str = Lazy_Field(lambda self: get_mac_addr(self._header[5]))
+    SPA: str = Lazy_Field(
+        lambda self: self._decode_protocol_addr(self._header[6]))
+    THA: str = Lazy_Field(lambda self: get_mac_addr(self._header[7]))
+    TPA: str = Lazy_Field(
+        lambda self: self._decode_protocol_addr(self._header[8]))
 
     def __init__(self, raw_bytes: bytes) -> None:
-        (
-            __hardware_type,
-            __protocol_type,
-            __hlen,
-            __plen,
-            __op_code,
-            __sender_hw_addr,
-            __sender_proto_addr,
-            __target_hw_addr,
-            __target_proto_addr,
-        ) = struct.unpack("! H H B B H 6s 4s 6s 4s", raw_bytes[:28])
-
-        self.HTYPE: int = __hardware_type
-        self.PTYPE: int = __protocol_type
-        self.HLEN: int = __hlen
-        self.PLEN: int = __plen
-        self.Operation: int = __op_code
-        self.SHA: str = get_mac_addr(__sender_hw_addr)
-        self.SPA: str = self._decode_protocol_addr(__sender_proto_addr)
-        self.THA: str = get_mac_addr(__target_hw_addr)
-        self.TPA: str = self._decode_protocol_addr(__target_proto_addr)
+        check_header_length(raw_bytes, 28, "ARP")
 
         self._raw_bytes: bytes = raw_bytes
 
@@ -301,9 +277,6 @@ class ARP(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
     def _decode_protocol_addr(self, proto_addr: int) -> str:
         if self.PTYPE == 2048:
             return get_ipv4_addr(proto_addr)
@@ -317,8 +290,11 @@ class ARP(object):
 Protocol_Parser.register(Layer_Protocols.Ethertype, 2054, ARP)
 
 
+@protocol_slots
 @dataclass
 class CDP(object):
+    __slots__ = ("_raw_bytes",)
+
     Description = "Cisco Discovery Protocol"
     Identifier = 8192
 
@@ -329,9 +305,6 @@ class CDP(object):
     def raw(self) -> bytes:
         return self._raw_bytes
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
     def upper_layer(self) -> Optional[Any]:
         return None
 
@@ -339,8 +312,10 @@ class CDP(object):
 Protocol_Parser.register(Layer_Protocols.Ethertype, 8192, CDP)
 
 
+@protocol_slots
 @dataclass
 class LLDP(object):
+    __slots__ = ("_raw_bytes",)
 
     Description = "35020 IEEE Std 802.1AB - Link Layer Discovery Protocol"
     Identifier = 35020
@@ -358,7 +333,7 @@ class LLDP(object):
         self._raw_bytes: bytes = raw_bytes
 
     def __parse_tlv(self, raw_bytes: bytes) -> Tuple[Dict[str, Union[str, int]], bytes]:
-        (__tl,) = struct.unpack("! H", raw_bytes[:2])
+        (__tl,) = LLDP_TLV_HEADER.unpack_from(raw_bytes)
         type_ = (__tl & 0b1111111000000000) >> 9
         length = __tl & 0b111111111
         value = raw_bytes[2:length]
@@ -375,23 +350,21 @@ class LLDP(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.Ethertype, 35020, LLDP)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class Xerox(object):
+    __slots__ = ("_raw_bytes",)
+
     Description = "Xerox Experimental"
     Identifier = 103
-    Message: str
+    Message: str = Lazy_Field(lambda self: base64.b64encode(
+        self._raw_bytes).decode("utf-8"))
 
     def __init__(self, raw_bytes: bytes) -> None:
-        (__msg,) = struct.unpack(f"! {len(raw_bytes)}s", raw_bytes)
-
-        self.Message: str = base64.b64encode(__msg).decode("utf-8")
         self._raw_bytes: bytes = raw_bytes
 
     def raw(self) -> bytes:
@@ -400,30 +373,26 @@ class Xerox(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.Ethertype, 103, Xerox)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class IGMP(object):
+    __slots__ = ("_raw_bytes",)
 
     Description = "Internet Group Management Protocol"
     Identifier = 2
-    Type: int
-    Max_Response_Time: int
-    Checksum: int
-    Group_Address: str
+    _header = Lazy_Field(lambda self: ICMP_HEADER.unpack_from(self._raw_bytes))
+    Type: int = Lazy_Field(lambda self: self._header[0])
+    Max_Response_Time: int = Lazy_Field(lambda self: self._header[1])
+    Checksum: int = Lazy_Field(lambda self: self._header[2])
+    Group_Address: str = Lazy_Field(
+        lambda self: get_ipv4_addr(self._header[3]))
 
     def __init__(self, raw_bytes: bytes) -> None:
-        __tp, __mrt, __chk, __ga = struct.unpack("! B B H 4s", raw_bytes[:8])
-
-        self.Type: int = __tp
-        self.Max_Response_Time: int = __mrt
-        self.Checksum: int = __chk
-        self.Group_Address: str = get_ipv4_addr(__ga)
+        check_header_length(raw_bytes, 8, "IGMP")
 
         self._raw_bytes: bytes = raw_bytes
         # need to implement parser for message types
@@ -434,29 +403,27 @@ class IGMP(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.IP_protocols, 2, IGMP)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class ICMPv6(object):
+    __slots__ = ("_raw_bytes",)
 
     Description = "Internet Control Message Protocol for IPv6"
     Identifier = 58
-    Type: int
-    Code: int
-    Checksum: int
-    Message: str
+    _header = Lazy_Field(lambda self: ICMP_HEADER.unpack_from(self._raw_bytes))
+    Type: int = Lazy_Field(lambda self: self._header[0])
+    Code: int = Lazy_Field(lambda self: self._header[1])
+    Checksum: int = Lazy_Field(lambda self: self._header[2])
+    Message: str = Lazy_Field(lambda self: base64.b64encode(
+        self._header[3]).decode("utf-8"))
 
     def __init__(self, raw_bytes: bytes) -> None:
-        __tp, __cd, __chk, __msg = struct.unpack("! B B H 4s", raw_bytes[:8])
-        self.Type: int = __tp
-        self.Code: int = __cd
-        self.Checksum: int = __chk
-        self.Message: str = base64.b64encode(__msg).decode("utf-8")
+        check_header_length(raw_bytes, 8, "ICMPv6")
+
         self._raw_bytes: bytes = raw_bytes
 
     def raw(self) -> bytes:
@@ -465,32 +432,28 @@ class ICMPv6(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.IP_protocols, 58, ICMPv6)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class ICMP(object):
+    __slots__ = ("_raw_bytes",)
 
     Description = "Internet Control Message Protocol"
     Identifier = 1
-    Type: int
-    Code: int
-    Checksum: int
-    Message: str
+    _header = Lazy_Field(lambda self: ICMP_HEADER.unpack_from(self._raw_bytes))
+    Type: int = Lazy_Field(lambda self: self._header[0])
+    Code: int = Lazy_Field(lambda self: self._header[1])
+    Checksum: int = Lazy_Field(lambda self: self._header[2])
+    # implement parser to decode control messages
+    Message: str = Lazy_Field(lambda self: base64.b64encode(
+        self._header[3]).decode("utf-8"))
 
     def __init__(self, raw_bytes: bytes) -> None:
+        check_header_length(raw_bytes, 8, "ICMP")
 
-        __tp, __cd, __chk, __msg = struct.unpack("! B B H 4s", raw_bytes[:8])
-        self.Type: int = __tp
-        self.Code: int = __cd
-        self.Checksum: int = __chk
-
-        # implement parser to decode control messages
-        self.Message = base64.b64encode(__msg).decode("utf-8")
         self._raw_bytes: bytes = raw_bytes
 
     def raw(self) -> bytes:
@@ -499,8 +462,5 @@ class ICMP(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.IP_protocols, 1, ICMP)
@@ -7,9 +7,10 @@ import base64
 import dataclasses
 
 from dataclasses import dataclass
-from .protocol_utils import get_mac_addr, EnhancedJSONEncoder, Unknown
+from .protocol_utils import get_mac_addr, check_header_length, Lazy_Field, protocol_slots, EnhancedJSONEncoder, Unknown
 from .layer import Layer_Protocols
 from .parsers import Protocol_Parser
+from .fast_paths import FUSED_DECODERS
 
 from typing import Optional, Dict, Any, Union, Tuple
 
@@ -22,16 +23,25 @@ PKTTYPE_LOOKUP = {
     socket.PACKET_OUTGOING: "PACKET_OUTGOING",
 }
 
+# precompiled header formats, unpacked from the start of the raw bytes
+ETHERNET_HEADER = struct.Struct("! 6s 6s H")
+LLC_HEADER = struct.Struct("! B B B")
+LLC_HEADER_16_BIT_CONTROL = struct.Struct("! B B H")
 
-@dataclass
+
+@protocol_slots
+@dataclass(init=False)
 class AF_Packet(object):
     """ Class for parsing low level packets"""
 
+    __slots__ = ("_address",)
+
     Interface_Name: str
     Ethernet_Protocol_Number: int
     Packet_Type: str
     ARP_Hardware_Address_Type: int
-    Hardware_Physical_Address: str
+    Hardware_Physical_Address: str = Lazy_Field(
+        lambda self: get_mac_addr(self._address[4]))
 
     def __init__(self, address: Tuple[str, int, int, int, bytes]) -> None:
 
@@ -39,30 +49,30 @@ class AF_Packet(object):
         self.Ethernet_Protocol_Number: int = address[1]
         self.Packet_Type: str = PKTTYPE_LOOKUP[address[2]]
         self.ARP_Hardware_Address_Type: int = address[3]
-        self.Hardware_Physical_Address: str = get_mac_addr(address[4])
-
-    def serialize(self) -> Dict[str, Union[str, int]]:
-
-        return dataclasses.asdict(self)
+        self._address: Tuple[str, int, int, int, bytes] = address
 
 
 Protocol_Parser._register_protocol_class_name("AF_Packet", AF_Packet)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class Packet_802_2(object):
+    __slots__ = ("_raw_bytes", "_encap")
 
     Description = "Ethernet 802.2 LLC Packet"
     Identifier = -2
+    Encapsulates = Layer_Protocols.LSAP_addresses
     DSAP: str
     SSAP: str
     Control: str
+    _LSAP_info = Lazy_Field(lambda self: self.__lsap_info())
 
     def __init__(self, raw_bytes: bytes) -> None:
         # https://en.wikipedia.org/wiki/IEEE_802.2
 
         # 802.2 LLC PDU
-        __dsap, __ssap, __ctl = struct.unpack("! B B B", raw_bytes[:3])
+        __dsap, __ssap, __ctl = LLC_HEADER.unpack_from(raw_bytes)
         self.DSAP: str = __dsap
         self.SSAP: str = __ssap
 
@@ -71,83 +81,91 @@ class Packet_802_2(object):
             self.Control: str = __ctl
             self.__parse_upper_layer_protocol(raw_bytes[3:])
         else:
-            _, _, __ctl = struct.unpack("! B B H", raw_bytes[:4])
+            _, _, __ctl = LLC_HEADER_16_BIT_CONTROL.unpack_from(raw_bytes)
             self.Control: str = __ctl
             self.__parse_upper_layer_protocol(raw_bytes[4:])
-        self._LSAP_info: Dict[str, str] = {}
+
+        # store raw
+        self._raw_bytes: bytes = raw_bytes
+
+    def __lsap_info(self) -> Dict[str, str]:
+        _LSAP_info: Dict[str, str] = {}
 
         # DSAP
         if self.DSAP & 1 == 0:
             # if lower-order bit is 0 - individual address
             # there are mulitple individual LSAP addresses
 
-            self._LSAP_info["DSAP"] = "individual address"
+            _LSAP_info["DSAP"] = "individual address"
         else:
             # if lower-order bit is 1 - group address
-            self._LSAP_info["DSAP"] = "group address"
+            _LSAP_info["DSAP"] = "group address"
 
         # SSAP
         if self.SSAP & 1 == 0:
             # if lower-order bit is 0 - command packet
-            self._LSAP_info["SSAP"] = "command"
+            _LSAP_info["SSAP"] = "command"
         else:
             # if lower-order bit is 1 - response packet
-            self._LSAP_info["SSAP"] = "response"
+            _LSAP_info["SSAP"] = "response"
 
-        # store raw
-        self._raw_bytes: bytes = raw_bytes
+        return _LSAP_info
 
     def raw(self) -> bytes:
         return self._raw_bytes
 
     def upper_layer(self) -> Any:
 
-        return self.__encap
-
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
+        return self._encap
 
     def __parse_upper_layer_protocol(self, remaining_raw_bytes) -> None:
 
-        self.__encap: Any = Protocol_Parser.parse(
-            Layer_Protocols.LSAP_addresses, self.DSAP, remaining_raw_bytes
+        self._encap: Any = Protocol_Parser.parse_upper_layer(
+            self, Layer_Protocols.LSAP_addresses, self.DSAP, remaining_raw_bytes
         )
 
 
 Protocol_Parser._register_protocol_class_name("Packet_802_2", Packet_802_2)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class Packet_802_3(object):
+    __slots__ = ("_raw_bytes", "_encap")
+
     Description = "Ethernet 802.3 Packet"
     Identifier = -3
-    Destination_MAC: str
-    Source_MAC: str
+    Encapsulates = Layer_Protocols.Ethertype
+    _header = Lazy_Field(
+        lambda self: ETHERNET_HEADER.unpack_from(self._raw_bytes))
+    Destination_MAC: str = Lazy_Field(
+        lambda self: get_mac_addr(self._header[0]))
+    Source_MAC: str = Lazy_Field(lambda self: get_mac_addr(self._header[1]))
     Ethertype: int
 
     def __init__(self, raw_bytes: bytes) -> None:
-        __des_addr, __src_addr, __tp = struct.unpack(
-            "! 6s 6s H", raw_bytes[:14])
-        self.Destination_MAC: str = get_mac_addr(__des_addr)
-        self.Source_MAC: str = get_mac_addr(__src_addr)
-        self.Ethertype: int = __tp
+        check_header_length(raw_bytes, 14, "Ethernet")
+        # the upper layers hold views on the frame instead of copies of the remaining bytes
+        raw_bytes = memoryview(raw_bytes)
+        # required to find the upper layer protocol, the mac addresses are decoded on first access
+        self.Ethertype: int = (raw_bytes[12] << 8) | raw_bytes[13]
 
         self._raw_bytes: bytes = raw_bytes
 
-        self.__parse_upper_layer_protocol(raw_bytes[14:])
+        # the common stacks are decoded with a single unpack at the network layer offset
+        fused_decoder = FUSED_DECODERS.get(self.Ethertype)
+        if fused_decoder is None or not fused_decoder(self, raw_bytes):
+            self.__parse_upper_layer_protocol(raw_bytes[14:])
 
     def raw(self) -> bytes:
         return self._raw_bytes
 
     def upper_layer(self) -> Any:
-        return self.__encap
-
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
+        return self._encap
 
     def __parse_upper_layer_protocol(self, remaining_raw_bytes: bytes) -> Any:
-        self.__encap: Any = Protocol_Parser.parse(
-            Layer_Protocols.Ethertype, self.Ethertype, remaining_raw_bytes
+        self._encap: Any = Protocol_Parser.parse_upper_layer(
+            self, Layer_Protocols.Ethertype, self.Ethertype, remaining_raw_bytes
         )
 
 
@@ -6,20 +6,25 @@ from dataclasses import dataclass
 from typing import Optional, Any, Dict, Union
 from .parsers import Protocol_Parser
 from .layer import Layer_Protocols
+from .protocol_utils import Lazy_Field, protocol_slots
+
+# precompiled
+SNAP_HEADER = struct.Struct("! 3s H")
 
 # other LSAP addresses available on https://en.wikipedia.org/wiki/IEEE_802.2
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class LSAP_One(object):
+    __slots__ = ("_raw_bytes",)
+
     Description = "my_identifeier_not_sure"
     Identifier = 1
-    Message: str
+    Message: str = Lazy_Field(lambda self: base64.b64encode(
+        self._raw_bytes).decode("utf-8"))
 
     def __init__(self, raw_bytes: bytes) -> None:
-        (__msg,) = struct.unpack(f"! {len(raw_bytes)}s", raw_bytes)
-
-        self.Message: str = base64.b64encode(__msg).decode("utf-8")
         self._raw_bytes: bytes = raw_bytes
 
     def raw(self) -> bytes:
@@ -28,51 +33,49 @@ class LSAP_One(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.LSAP_addresses, 1, LSAP_One)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class SNAP_Ext(object):
+    __slots__ = ("_raw_bytes", "_encap")
+
     Description = "SNAP extension"
     Identifier = 170
+    Encapsulates = Layer_Protocols.Ethertype
     OUI: str
     Protocol_ID: int
 
     def __init__(self, raw_bytes: bytes) -> None:
-        __oui, __proto = struct.unpack("! 3s H", raw_bytes[:5])
+        __oui, __proto = SNAP_HEADER.unpack_from(raw_bytes)
         self.OUI = int.from_bytes(__oui, sys.byteorder)
         self.Protocol_ID = __proto
 
-        self.__raw_bytes: bytes = raw_bytes
+        self._raw_bytes: bytes = raw_bytes
 
         self.__parse_upper_layer(raw_bytes[5:])
 
     def raw(self) -> bytes:
-        return self.__raw_bytes
+        return self._raw_bytes
 
     def upper_layer(self) -> Optional[Any]:
 
-        return self.__encap
-
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
+        return self._encap
 
     def __parse_upper_layer(self, remaining_raw_bytes: bytes):
 
         if self.OUI == 0:
-            self.__encap = Protocol_Parser.parse(
-                Layer_Protocols.Ethertype, self.Protocol_ID, remaining_raw_bytes
+            self._encap = Protocol_Parser.parse_upper_layer(
+                self, Layer_Protocols.Ethertype, self.Protocol_ID, remaining_raw_bytes
             )
         else:
             # if the OUI is an OUI for a particular organization, the protocol ID is
             # a value assigned by that organization to the protocol running on top
             # of SNAP.
 
-            self.__encap = remaining_raw_bytes
+            self._encap = remaining_raw_bytes
 
 
 Protocol_Parser.register(Layer_Protocols.LSAP_addresses, 170, SNAP_Ext)
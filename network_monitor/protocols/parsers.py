@@ -7,11 +7,12 @@ import sys
 
 from aiologger.handlers.streams import AsyncStreamHandler
 from asyncio import Task
-from typing import Dict, Union, Any, Optional, List
+from typing import Dict, Union, Any, Optional, List, Iterable, FrozenSet, Set
 from functools import lru_cache
 
 
-from .protocol_utils import Unknown
+from .protocol_utils import Unknown, protocol_serializer
+from .unknown_protocols import Unknown_Protocol_Log
 from logging import Formatter
 from aiologger import Logger
 
@@ -33,15 +34,26 @@ class __Parser:
         self.__logger: Optional[Logger] = None
         self.__loop: Optional[asyncio.AbstractEventLoop] = None
         self.__log: Optional[str] = None
-        self.__fname: str = f"raw_unknown_protocols_{int(time.time())}.lp"
+
+        # protocols whose upper layer is not decoded, set from the protocols used by the filters and output
+        self.stop_protocols: FrozenSet[Any] = frozenset()
+
+        # frames without protocol parser and parser errors are counted until an output directory is set
+        self.unknown_protocols: Unknown_Protocol_Log = Unknown_Protocol_Log(
+            log=self._log)
 
     @property
     def parsers(self) -> Dict[int, Dict[int, Any]]:
 
         return self.__protocol_parsers
 
-    def set_output_directory(self, output_directory: str) -> None:
-
+    def set_output_directory(self, output_directory: str, interval: float = 60.0, samples: int = 1, max_file_size: int = 10 << 20) -> None:
+        """
+            output_directory: directory the sampled raw bytes of the unknown protocols are written to
+            interval: seconds between the logged unknown protocol counts
+            samples: raw frames written per layer and identifier in an interval
+            max_file_size: size in bytes after which no more raw frames are written
+        """
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
 
@@ -52,16 +64,37 @@ class __Parser:
             stream=sys.stderr)
         logger.add_handler(stream_handler)
 
+        self.__logger = logger
+        self.__log = output_directory
+
+        self.unknown_protocols.close()
+        self.unknown_protocols = Unknown_Protocol_Log(
+            output_directory, self._log, interval, samples, max_file_size)
+        if self.__loop is not None:
+            self.unknown_protocols.schedule(self.__loop)
+
+    def close(self) -> None:
+        """ log the remaining unknown protocol counts and close the raw output file """
+        self.unknown_protocols.close()
+
     def set_async_loop(self, loop: asyncio.AbstractEventLoop):
         self.__loop = loop
+        # the unknown protocol counts are logged every interval, also when no unknown frames arrive
+        self.unknown_protocols.schedule(loop)
 
     def register(self, layer: Layer_Protocols, identifier: int, protocol_parser: Any):
         # check if dataclass and callable
         self.__protocol_parsers[layer][identifier] = protocol_parser
-        self.__protocol_str_lookup[protocol_parser.__name__] = protocol_parser
+        self._register_protocol_class_name(
+            protocol_parser.__name__, protocol_parser)
 
     def _register_protocol_class_name(self, class_name, protocol_parser):
+        """
+            register the protocol name, the name and the generated serialize method are set on the protocol class
+        """
         self.__protocol_str_lookup[class_name] = protocol_parser
+        protocol_parser.Protocol_Name = class_name
+        protocol_parser.serialize = protocol_serializer(protocol_parser)
 
     def get_protocol_class_by_name(self, class_name: str) -> Any:
         """ return an empty protocol class used in comparison """
@@ -80,6 +113,38 @@ class __Parser:
         else:
             return res
 
+    def _upper_layer_protocols(self, cls: Any) -> Set[Any]:
+        """ return the protocol classes that can be decoded above the protocol, at any depth """
+        upper_layer_protocols: Set[Any] = set()
+        layers: List[Any] = [getattr(cls, "Encapsulates", None)]
+        while layers:
+            layer: Any = layers.pop()
+            if layer is None:
+                continue
+            for protocol_parser in self.__protocol_parsers[layer].values():
+                if protocol_parser not in upper_layer_protocols:
+                    upper_layer_protocols.add(protocol_parser)
+                    layers.append(getattr(protocol_parser, "Encapsulates", None))
+        return upper_layer_protocols
+
+    def set_parse_depth(self, protocol_names: Optional[Iterable[str]] = None, stop_protocols: Iterable[str] = ()) -> None:
+        """
+            protocol_names: protocols used by the filters and the output, the upper layer of a protocol is not decoded
+                when none of them can be found above it. None decodes every layer
+            stop_protocols: names of the protocols whose upper layer is never decoded, overrides the protocol names
+        """
+        stopped: Set[Any] = {self.get_protocol_class_by_name(
+            name) for name in stop_protocols}
+
+        if protocol_names is not None:
+            required: Set[Any] = {self.get_protocol_class_by_name(
+                name) for name in protocol_names}
+            for protocol_parser in self.__protocol_str_lookup.values():
+                if hasattr(protocol_parser, "Encapsulates") and not required & self._upper_layer_protocols(protocol_parser):
+                    stopped.add(protocol_parser)
+
+        self.stop_protocols = frozenset(stopped)
+
     @lru_cache
     def _reverse_protocols_str_lookup(self) -> Dict[Any, int]:
 
@@ -104,47 +169,36 @@ class __Parser:
         else:
             return res
 
-    async def file_logger(self, info: str, raw_bytes: bytes) -> None:
-        async with aiofiles.open(os.path.join(self.__log, self.__fname), "ab") as fout:
-            await fout.write(base64.b64encode(info.encode()))
-            await fout.write(base64.b64encode(raw_bytes))
-
     async def std_logger(self, message: str) -> None:
-        await self.__logger.exception(message)
+        await self.__logger.warning(message)
+
+    def _log(self, message: str) -> None:
+        if self.__loop is not None and self.__logger is not None:
+            self.__loop.create_task(self.std_logger(message))
 
     def parse(self, layer: Layer_Protocols, identifier: int, raw_bytes: bytes) -> Any:
         """ 
             used to lookup registered protocol parsers and instantiate the protocol parser with the raw bytes 
         """
-        # all asynchronous task are retrieved via introspection and awaited before exist
-        try:
-            res = self.__protocol_parsers[layer][identifier](raw_bytes)
-
-        except KeyError as e:
-            if self.__loop is not None:
-                self.__loop.create_task(
-                    self.std_logger(
-                        f"Protocol Not Implemented Exception - Layer: {layer}, identifier: {identifier}"
-                    )
-                )
-                self.__loop.create_task(
-                    self.file_logger(
-                        f"{layer}_{identifier}",
-                        raw_bytes
-                    )
-                )
+        protocol_parser: Any = self.__protocol_parsers[layer].get(identifier)
+        if protocol_parser is None:
+            # counted and sampled, logged once per interval
+            self.unknown_protocols.record(layer, identifier, raw_bytes)
+            return None
 
+        try:
+            return protocol_parser(raw_bytes)
         except Exception as e:
-            if self.__loop is not None:
-                self.__loop.create_task(
-                    self.std_logger(
-                        f"Protocol Exception: {e}"
-                    )
-                )
+            self.unknown_protocols.record(layer, identifier, raw_bytes, e)
 
             return Unknown("no protocol parser available", identifier, raw_bytes)
-        else:
-            return res
+
+    def parse_upper_layer(self, protocol: Any, layer: Layer_Protocols, identifier: int, raw_bytes: bytes) -> Any:
+        """ parse the upper layer of the protocol, None when decoding stops at the protocol """
+        if protocol.__class__ in self.stop_protocols:
+            return None
+
+        return self.parse(layer, identifier, raw_bytes)
 
 
 Protocol_Parser: __Parser = __Parser()
@@ -1,29 +1,82 @@
 import binascii
 import struct
 import dataclasses
+import functools
 import json
 
 from itertools import zip_longest
-from typing import Optional, Any, Iterable, Dict, Union
+from typing import Optional, Any, Callable, Iterable, Dict, List, Tuple, Union
 
 
-def get_ipv4_addr(address: bytes) -> str:
+# precompiled
+IPV6_ADDRESS_GROUPS = struct.Struct("! 2s 2s 2s 2s 2s 2s 2s 2s")
+
+
+# distinct addresses cached per formatter, a probe sees a few thousand distinct addresses
+ADDRESS_CACHE_SIZE: int = 4096
+
+
+def format_ipv4_addr(address: bytes) -> str:
     return ".".join(map(str, address))
 
 
-def get_mac_addr(address: bytes) -> str:
+def format_mac_addr(address: bytes) -> str:
     addr_str = map("{:02x}".format, address)
     return ":".join(addr_str).upper()
 
 
-def get_ipv6_addr(address: bytes) -> str:
+def format_ipv6_addr(address: bytes) -> str:
     addr_str = [
         binascii.b2a_hex(x).decode("utf-8")
-        for x in struct.unpack("! 2s 2s 2s 2s 2s 2s 2s 2s", address)
+        for x in IPV6_ADDRESS_GROUPS.unpack(address)
     ]
     return ":".join(addr_str)
 
 
+# least recently used caches keyed on the raw address bytes, replaced by set_address_cache_size
+_ipv4_addr_cache = functools.lru_cache(ADDRESS_CACHE_SIZE)(format_ipv4_addr)
+_mac_addr_cache = functools.lru_cache(ADDRESS_CACHE_SIZE)(format_mac_addr)
+_ipv6_addr_cache = functools.lru_cache(ADDRESS_CACHE_SIZE)(format_ipv6_addr)
+
+
+def get_ipv4_addr(address: bytes) -> str:
+    return _ipv4_addr_cache(address)
+
+
+def get_mac_addr(address: bytes) -> str:
+    return _mac_addr_cache(address)
+
+
+def get_ipv6_addr(address: bytes) -> str:
+    return _ipv6_addr_cache(address)
+
+
+def set_address_cache_size(size: int) -> None:
+    """
+        replace the address caches with caches holding at most size addresses per formatter, the counters
+        start at zero. A size of 0 disables the caches
+    """
+    global _ipv4_addr_cache, _mac_addr_cache, _ipv6_addr_cache
+
+    if size < 0:
+        raise ValueError(f"{size} is not a valid address cache size")
+
+    _ipv4_addr_cache = functools.lru_cache(size)(format_ipv4_addr)
+    _mac_addr_cache = functools.lru_cache(size)(format_mac_addr)
+    _ipv6_addr_cache = functools.lru_cache(size)(format_ipv6_addr)
+
+
+def address_cache_stats() -> Dict[str, int]:
+    """ return the hits, misses and cached addresses of every address formatter """
+    stats: Dict[str, int] = {}
+    for name, cache in (("ipv4", _ipv4_addr_cache), ("mac", _mac_addr_cache), ("ipv6", _ipv6_addr_cache)):
+        info = cache.cache_info()
+        stats[f"{name}_address_cache_hits"] = info.hits
+        stats[f"{name}_address_cache_misses"] = info.misses
+        stats[f"{name}_address_cache_size"] = info.currsize
+    return stats
+
+
 def grouper(iterable: Iterable, n: int, fillvalue: Optional[str] = None) -> list:
     "Collect data into fixed-length chunks or blocks"
     # grouper('ABCDEFG', 3, 'x') --> ABC DEF Gxx"
@@ -31,8 +84,115 @@ def grouper(iterable: Iterable, n: int, fillvalue: Optional[str] = None) -> list
     return zip_longest(*args, fillvalue=fillvalue)
 
 
+def check_header_length(raw_bytes: bytes, length: int, protocol: str) -> None:
+    """ raise when the raw bytes are shorter than the header, the lazy fields can then always be decoded """
+    if len(raw_bytes) < length:
+        raise ValueError(
+            f"{protocol} header requires {length} bytes, {len(raw_bytes)} available")
+
+
+class Lazy_Field(object):
+    """
+        Protocol field decoded from the raw bytes on first access. The value is cached in the slot added by
+        protocol_slots, later accesses do not call the decoder. Assigning the field replaces the cached value.
+
+        decode: returns the field value of the protocol object
+    """
+
+    def __init__(self, decode: Callable[[Any], Any]) -> None:
+        self.decode: Callable[[Any], Any] = decode
+        self.name: Optional[str] = None
+        self.slot: Optional[str] = None
+        self.cache: Any = None
+
+    def __set_name__(self, owner: Any, name: str) -> None:
+        self.name = name
+        self.slot = f"_lazy_{name}"
+        # member descriptor of the cache slot, present once protocol_slots recreated the class
+        self.cache = owner.__dict__.get(self.slot)
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        if instance is None:
+            return self
+
+        try:
+            return self.cache.__get__(instance, owner)
+        except AttributeError:
+            value: Any = self.decode(instance)
+            self.cache.__set__(instance, value)
+            return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        self.cache.__set__(instance, value)
+
+    def decoded(self, instance: Any) -> bool:
+        """ return True when the field of the instance has been decoded """
+        try:
+            self.cache.__get__(instance, type(instance))
+        except AttributeError:
+            return False
+        return True
+
+
+def protocol_slots(cls: Any) -> Any:
+    """
+        Recreate a protocol dataclass with __slots__, instances have no per-instance __dict__. The class
+        declares its private attributes (raw bytes, encapsulated protocol) in __slots__, a slot is added for
+        every eagerly decoded field and for the cached value of every Lazy_Field.
+    """
+    private: Tuple[str, ...] = tuple(cls.__dict__.get("__slots__", ()))
+
+    slots: List[str] = list(private)
+    slots.extend(field.name for field in dataclasses.fields(cls)
+                 if not isinstance(field.default, Lazy_Field))
+    slots.extend(attribute.slot for attribute in cls.__dict__.values()
+                 if isinstance(attribute, Lazy_Field))
+
+    cls_dict: Dict[str, Any] = {name: attribute for name, attribute in cls.__dict__.items()
+                                if name not in private and name not in ("__dict__", "__weakref__")}
+    cls_dict["__slots__"] = tuple(slots)
+
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+def protocol_serializer(cls: Any) -> Callable[[Any], Dict[str, Any]]:
+    """
+        Generate the serialize method of a protocol dataclass. The fields are read directly into a dictionary,
+        instead of the recursive copy of dataclasses.asdict
+    """
+    items: str = ", ".join(
+        f"{field.name!r}: self.{field.name}" for field in dataclasses.fields(cls))
+
+    namespace: Dict[str, Any] = {}
+    exec(f"def serialize(self):\n    return {{{items}}}\n", namespace)
+
+    serialize: Callable[[Any], Dict[str, Any]] = namespace["serialize"]
+    serialize.__qualname__ = f"{cls.__qualname__}.serialize"
+    return serialize
+
+
+def truncated_length(protocols: List[Any], missing: int) -> None:
+    """
+        add the bytes cut from a frame truncated at capture to the payload size of the deepest protocol with a
+        payload size, the snap length cuts the last bytes of the frame
+
+        protocols: protocols of the frame from the outermost layer
+        missing: wire length of the frame minus the captured length
+    """
+    if missing <= 0:
+        return
+
+    for protocol in reversed(protocols):
+        if hasattr(protocol, "Payload_Size"):
+            protocol.Payload_Size += missing
+            return
+
+
+@protocol_slots
 @dataclasses.dataclass
 class Unknown(object):
+    __slots__ = ("_raw_bytes",)
+
     Description = "Unknown Protocol"
     Identifier = -99
     Message: str
@@ -42,19 +202,16 @@ class Unknown(object):
 
         self.Message: str = message
         self.Protocol_Identifier: int = ether_identifier
-        self.__raw_bytes: bytes = raw_bytes
+        self._raw_bytes: bytes = raw_bytes
 
     def raw(self) -> bytes:
 
-        return self.__raw_bytes
+        return self._raw_bytes
 
     def upper_layer(self) -> Optional[Any]:
 
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 # https://stackoverflow.com/a/51286749
 class EnhancedJSONEncoder(json.JSONEncoder):
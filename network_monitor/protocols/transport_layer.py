@@ -8,77 +8,56 @@ from dataclasses import dataclass
 from typing import Any, Dict, Union, Optional
 
 from .layer import Layer_Protocols
-from .protocol_utils import EnhancedJSONEncoder
+from .protocol_utils import EnhancedJSONEncoder, Lazy_Field, protocol_slots, check_header_length
 
 from .parsers import Protocol_Parser
 
+# precompiled header formats, unpacked from the start of the raw bytes
+TCP_HEADER = struct.Struct("! H H L L B B H H H")
+TCP_OPTION = struct.Struct("! B B")
+UDP_HEADER = struct.Struct("! H H H H")
 
-@dataclass
+
+@protocol_slots
+@dataclass(init=False)
 class TCP(object):
+    __slots__ = ("_raw_bytes",)
 
     Description = "Transmission Control Protocol"
     Identifier = 6
-    Source_Port: int
-    Destination_Port: int
-    Sequence_Number: int
-    Acknowledgement_Number: int  # if ACK set
-    Data_Offset: int
-    Reserved: int
-    Flags: dict
-    Window_Size: int
-    Checksum: int
-    Urgent_Pointer: int  # if URG set
-    Options: dict
-    Payload_Size: int
+    # fixed header part, decoded on first access
+    _header = Lazy_Field(lambda self: TCP_HEADER.unpack_from(self._raw_bytes))
+    Source_Port: int = Lazy_Field(lambda self: self._header[0])
+    Destination_Port: int = Lazy_Field(lambda self: self._header[1])
+    Sequence_Number: int = Lazy_Field(lambda self: self._header[2])
+    Acknowledgement_Number: int = Lazy_Field(
+        lambda self: self._header[3])  # if ACK set
+    Data_Offset: int = Lazy_Field(lambda self: self._header[4] >> 4)
+    Reserved: int = Lazy_Field(lambda self: (self._header[4] & 14) >> 1)
+    Flags: dict = Lazy_Field(lambda self: self.__parse_flags(
+        self._header[4] & 1, self._header[5]))
+    Window_Size: int = Lazy_Field(lambda self: self._header[6])
+    Checksum: int = Lazy_Field(lambda self: self._header[7])
+    Urgent_Pointer: int = Lazy_Field(
+        lambda self: self._header[8])  # if URG set
+    Options: dict = Lazy_Field(lambda self: self.__parse_options())
+    Payload_Size: int = Lazy_Field(
+        lambda self: len(self._raw_bytes[self.__header_length():]))
 
     def __init__(self, raw_bytes: bytes) -> None:
-        # fixed header part
-        (
-            __src_prt,
-            __des_prt,
-            __seq_num,
-            __ack_num,
-            __d_offset_reserved_ns,
-            _flags,
-            __win_size,
-            __chk_sum,
-            __urg_ptr,
-        ) = struct.unpack("! H H L L B B H H H", raw_bytes[:20])
-
-        self.Source_Port: int = __src_prt
-        self.Destination_Port: int = __des_prt
-        self.Sequence_Number: int = __seq_num
-        self.Acknowledgement_Number: int = __ack_num
-
-        self.Data_Offset: int = __d_offset_reserved_ns >> 4
-        self.Reserved: int = (__d_offset_reserved_ns & 14) >> 1
-        self.__parse_flags(__d_offset_reserved_ns & 1, _flags)
-
-        self.Window_Size: int = __win_size
-        self.Checksum: int = __chk_sum
-        self.Urgent_Pointer: int = __urg_ptr
-
-        self._raw_bytes: bytes = raw_bytes
-        self._payload: Optional[bytes] = None
+        check_header_length(raw_bytes, 20, "TCP")
         # if data_offset is larger than 5 then option present
-        if self.Data_Offset > 5:
-            # options field has been set need to extract to get to payload
-            # implement extractor
-            offset = 5 * self.Data_Offset
-            raw_options = raw_bytes[20:offset]
-            self.__parse_options(raw_options)
+        if raw_bytes[12] >> 4 > 5:
+            check_header_length(raw_bytes, 22, "TCP options")
 
-            self._payload = raw_bytes[offset:]
-
-        else:
-            # payload data probabily encrypted
-            self.Options: Dict[str, Union[str, int]] = {}
-            self._payload = raw_bytes[20:]
+        self._raw_bytes: bytes = raw_bytes
 
-        self.Payload_Size = len(self._payload)
+    def __header_length(self) -> int:
+        # options field has been set need to extract to get to payload
+        return 5 * self.Data_Offset if self.Data_Offset > 5 else 20
 
-    def __parse_flags(self, ns_flag: int, other_flags: int) -> None:
-        self.Flags: Dict[str, int] = {
+    def __parse_flags(self, ns_flag: int, other_flags: int) -> Dict[str, int]:
+        return {
             "NS": ns_flag,
             "CWR": (other_flags & 128) >> 7,
             "ECE": (other_flags & 64) >> 6,
@@ -90,12 +69,17 @@ class TCP(object):
             "FIN": (other_flags & 1)
         }
 
-    def __parse_options(self, raw_options_bytes) -> None:
+    def __parse_options(self) -> Dict[str, Union[str, int, Dict[str, Union[str, int]]]]:
+        if self.Data_Offset <= 5:
+            # payload data probabily encrypted
+            return {}
+
+        raw_options_bytes = self._raw_bytes[20:self.__header_length()]
         # Option-Kind (1 byte), Option-Length (1 byte), Option-Data (variable).
-        __kind, __length = struct.unpack("! B B", raw_options_bytes[:2])
+        __kind, __length = TCP_OPTION.unpack_from(raw_options_bytes)
         __data = raw_options_bytes[2:__length]
 
-        self.Options: Dict[str, Union[str, int, Dict[str, Union[str, int]]]] = {
+        return {
             "Option-Kind": __kind,
             "Option-Length": __length,
             "Option-Data": base64.b64encode(__data).decode("utf-8"),
@@ -107,41 +91,30 @@ class TCP(object):
     def upper_layer(self) -> Optional[Any]:
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.IP_protocols, 6, TCP)
 
 
-@dataclass
+@protocol_slots
+@dataclass(init=False)
 class UDP(object):
+    __slots__ = ("_raw_bytes",)
 
     Description = "User Datagram Protocol"
     Identifier = 17
-    Source_Port: int
-    Destination_Port: int
-    Length: int
-    Checksum: int
-    Payload_Size: int
+    _header = Lazy_Field(lambda self: UDP_HEADER.unpack_from(self._raw_bytes))
+    Source_Port: int = Lazy_Field(lambda self: self._header[0])
+    Destination_Port: int = Lazy_Field(lambda self: self._header[1])
+    Length: int = Lazy_Field(lambda self: self._header[2])
+    Checksum: int = Lazy_Field(lambda self: self._header[3])
+    # payload data probabily encrypted
+    # should be based on length field, This field specifies the length in bytes of the UDP header and UDP data.
+    Payload_Size: int = Lazy_Field(lambda self: len(self._raw_bytes) - 8)
 
     def __init__(self, raw_bytes: bytes) -> None:
-
-        __src_prt, __des_prt, __leng, __chk_sum = struct.unpack(
-            "! H H H H", raw_bytes[:8]
-        )
-
-        self.Source_Port: int = __src_prt
-        self.Destination_Port: int = __des_prt
-        self.Length: int = __leng
-        self.Checksum: int = __chk_sum
+        check_header_length(raw_bytes, 8, "UDP")
 
         self._raw_bytes: bytes = raw_bytes
-        # payload data probabily encrypted
-        # should be based on length field, This field specifies the length in bytes of the UDP header and UDP data.
-        # print(self.length, len(self._raw_bytes))
-        self._payload: bytes = raw_bytes[8:]
-        self.Payload_Size = len(self._payload)
 
     def raw(self) -> bytes:
         return self._raw_bytes
@@ -150,8 +123,5 @@ class UDP(object):
 
         return None
 
-    def serialize(self) -> Dict[str, Union[str, int]]:
-        return dataclasses.asdict(self)
-
 
 Protocol_Parser.register(Layer_Protocols.IP_protocols, 17, UDP)
@@ -0,0 +1,158 @@
+import asyncio
+import base64
+import os
+import time
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class Unknown_Protocol_Log(object):
+    """
+        Counts the frames of unregistered protocols and the protocol parser errors per (layer, identifier).
+        The counts are logged once per interval, from record or from the event loop set with schedule when no
+        unknown frames arrive, and a sample of the raw bytes of every (layer, identifier) is
+        written to a single buffered file, no more samples are written once the file reaches max_file_size.
+
+        directory: directory of the raw unknown protocols file, None only counts and logs
+        log: called with the summary message once per interval
+        interval: seconds between the logged summaries
+        samples: raw frames written per (layer, identifier) in an interval
+        max_file_size: size in bytes after which samples are dropped
+        buffer_size: bytes buffered before the samples are written to the file
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        log: Optional[Callable[[str], None]] = None,
+        interval: float = 60.0,
+        samples: int = 1,
+        max_file_size: int = 10 << 20,
+        buffer_size: int = 1 << 16,
+    ) -> None:
+
+        self.directory: Optional[str] = directory
+        self.log: Optional[Callable[[str], None]] = log
+        self.interval: float = interval
+        self.samples: int = samples
+        self.max_file_size: int = max_file_size
+        self.buffer_size: int = buffer_size
+
+        # totals per (layer, identifier)
+        self.unknown: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.stats: Counter = Counter()
+
+        # counts of the current interval
+        self._interval_unknown: Counter = Counter()
+        self._interval_errors: Counter = Counter()
+        self._last_error: Dict[Tuple[Any, int], str] = {}
+        self._sampled: Counter = Counter()
+        self._next_report: float = time.monotonic() + interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._report_handle: Optional[asyncio.TimerHandle] = None
+
+        self._file: Optional[Any] = None
+        self._file_size: int = 0
+        self.filename: Optional[str] = None
+        if directory is not None:
+            self.filename = os.path.join(
+                directory, f"raw_unknown_protocols_{int(time.time())}_{os.getpid()}.lp")
+
+    def record(self, layer: Any, identifier: int, raw_bytes: bytes, error: Optional[Exception] = None) -> None:
+        """ count a frame without protocol parser (error is None) or a frame the protocol parser raised on """
+        key: Tuple[Any, int] = (layer, identifier)
+        if error is None:
+            self.unknown[key] += 1
+            self._interval_unknown[key] += 1
+        else:
+            self.errors[key] += 1
+            self._interval_errors[key] += 1
+            self._last_error[key] = str(error)
+
+        if self._sampled[key] < self.samples:
+            self._sampled[key] += 1
+            self._write_sample(key, raw_bytes, error)
+
+        if time.monotonic() >= self._next_report:
+            self.report()
+
+    def _write_sample(self, key: Tuple[Any, int], raw_bytes: bytes, error: Optional[Exception]) -> None:
+        if self.filename is None:
+            return
+
+        line: bytes = b" ".join((
+            f"{time.time():.6f}".encode(),
+            f"{key[0]}_{key[1]}".encode(),
+            b"error" if error is not None else b"unknown",
+            base64.b64encode(raw_bytes),
+        )) + b"\n"
+
+        if self._file_size + len(line) > self.max_file_size:
+            self.stats["samples_dropped"] += 1
+            return
+
+        if self._file is None:
+            # one long lived file, the samples are written when the buffer is full or on report
+            self._file = open(self.filename, "ab", buffering=self.buffer_size)
+            self._file_size = self._file.tell()
+
+        self._file.write(line)
+        self._file_size += len(line)
+        self.stats["samples_written"] += 1
+
+    def summary(self) -> List[str]:
+        """ return a message per (layer, identifier) seen in the current interval """
+        messages: List[str] = [
+            f"Protocol Not Implemented - Layer: {layer}, identifier: {identifier}, frames: {count}"
+            for (layer, identifier), count in self._interval_unknown.most_common()
+        ]
+        messages.extend(
+            f"Protocol Exception - Layer: {layer}, identifier: {identifier}, frames: {count}, last: {self._last_error[(layer, identifier)]}"
+            for (layer, identifier), count in self._interval_errors.most_common()
+        )
+        return messages
+
+    def report(self) -> None:
+        """ log the counts of the interval, flush the samples and start the next interval """
+        messages: List[str] = self.summary()
+        if messages and self.log is not None:
+            self.log("\n".join(messages))
+
+        if self._file is not None:
+            self._file.flush()
+
+        self._interval_unknown.clear()
+        self._interval_errors.clear()
+        self._last_error.clear()
+        self._sampled.clear()
+        self._next_report = time.monotonic() + self.interval
+
+    def schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        """ report the interval counts from the loop, the counts of a quiet interval are logged on time """
+        self.cancel()
+        self._loop = loop
+        self._report_handle = loop.call_later(
+            max(self._next_report - time.monotonic(), 0.0), self._scheduled_report)
+
+    def _scheduled_report(self) -> None:
+        # record may have reported the interval already, the next report is scheduled from its end
+        if time.monotonic() >= self._next_report:
+            self.report()
+        if self._loop is not None and not self._loop.is_closed():
+            self._report_handle = self._loop.call_later(
+                max(self._next_report - time.monotonic(), 0.0), self._scheduled_report)
+
+    def cancel(self) -> None:
+        if self._report_handle is not None:
+            self._report_handle.cancel()
+            self._report_handle = None
+        self._loop = None
+
+    def close(self) -> None:
+        self.cancel()
+        self.report()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
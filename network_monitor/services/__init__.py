@@ -2,3 +2,11 @@ from .service_manager import Service_Manager, Data_Queue_Identifier, Service_Ide
 from .packet_parser import Packet_Parser, Packet_Filter, Filter
 from .interface_listener import Interface_Listener
 from .packet_submitter import Packet_Submitter
+from .buffer_pool import Buffer_Pool
+from .fanout_worker import Fanout_Worker
+from .parser_pool import Parser_Pool, Parser_Pool_Worker, Frame_Ring
+from .frame_batch import Frame_Batch
+from .pcap_replay import Pcap_Replay, Pcap_Reader
+from .pcap_writer import Pcap_Writer
+from .packet_sampler import Packet_Sampler
+from .bounded_queue import Bounded_Queue, Bounded_Async_Queue, QUEUE_POLICIES, low_priority_frames, low_priority_packets
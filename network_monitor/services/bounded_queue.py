@@ -0,0 +1,205 @@
+import asyncio
+import queue
+
+from collections import Counter
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..protocols import Protocol_Parser
+from ..protocols.layer import Layer_Protocols
+
+
+QUEUE_POLICIES: Tuple[str, ...] = ("block", "drop_newest", "drop_oldest", "shed")
+
+
+class Overload_Policy(object):
+    """
+        Overload policy of an inter-stage queue, the queue items are batches of frames or packets.
+
+        block: the producer waits until the consumer takes a batch
+        drop_newest: the batch that does not fit is dropped
+        drop_oldest: the oldest queued batch is dropped to make room
+        shed: once the queue is half full the low priority frames or packets are removed from the new
+            batches, the batch that does not fit is dropped
+
+        The dropped frames or packets are counted per policy in stats: blocked (puts that had to wait),
+        dropped_newest, dropped_oldest and shed.
+
+        policy: one of QUEUE_POLICIES
+        low_priority: returns True for the frames or packets shed first, required by the shed policy
+        on_drop: called with the dropped frames or packets, e.g. to return pooled buffers
+    """
+
+    def __init__(self, policy: str = "block", low_priority: Optional[Callable[[Any], bool]] = None, on_drop: Optional[Callable[[List[Any]], None]] = None) -> None:
+
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"{policy} is not a valid queue policy")
+
+        if policy == "shed" and low_priority is None:
+            raise ValueError("the shed queue policy requires the low priority protocols")
+
+        self.policy: str = policy
+        self.low_priority: Optional[Callable[[Any], bool]] = low_priority
+        self.on_drop: Optional[Callable[[List[Any]], None]] = on_drop
+        self.stats: Counter = Counter()
+
+    def at_capacity(self) -> bool:
+        return self.max_depth > 0 and self.qsize() >= self.max_depth
+
+    def _drop(self, batch: List[Any], counter: str) -> None:
+        self.stats[counter] += len(batch)
+        if self.on_drop is not None:
+            self.on_drop(batch)
+
+    def _shed(self, batch: List[Any]) -> List[Any]:
+        """ remove the low priority items of the batch once the queue is half full """
+        if self.max_depth == 0 or self.qsize() < max(1, self.max_depth // 2):
+            return batch
+
+        kept: List[Any] = []
+        shed: List[Any] = []
+        for item in batch:
+            (shed if self.low_priority(item) else kept).append(item)
+
+        if shed:
+            self._drop(shed, "shed")
+        return kept
+
+
+class Bounded_Queue(Overload_Policy, queue.Queue):
+    """
+        queue.Queue between threads holding at most max_depth batches, put_nowait applies the overload policy.
+
+        max_depth: maximum number of queued batches, 0 is unbounded
+    """
+
+    def __init__(self, max_depth: int = 0, policy: str = "block", low_priority: Optional[Callable[[Any], bool]] = None, on_drop: Optional[Callable[[List[Any]], None]] = None) -> None:
+        queue.Queue.__init__(self, maxsize=max_depth)
+        Overload_Policy.__init__(self, policy, low_priority, on_drop)
+        self.max_depth: int = max_depth
+
+    def put_nowait(self, batch: List[Any]) -> None:
+        if self.policy == "block":
+            if self.full():
+                self.stats["blocked"] += 1
+            # the producer thread waits for the consumer
+            self.put(batch)
+            return
+
+        if self.policy == "shed":
+            batch = self._shed(batch)
+            if not batch:
+                return
+
+        while True:
+            try:
+                self.put(batch, block=False)
+                return
+            except queue.Full:
+                if self.policy != "drop_oldest":
+                    self._drop(batch, "dropped_newest")
+                    return
+
+            try:
+                oldest: List[Any] = self.get_nowait()
+            except queue.Empty:
+                # the consumer took the oldest batch
+                continue
+            self.task_done()
+            self._drop(oldest, "dropped_oldest")
+
+
+class Bounded_Async_Queue(Overload_Policy, asyncio.Queue):
+    """
+        asyncio.Queue between services sharing the event loop holding at most max_depth batches. put waits
+        for room with the block policy, put_nowait applies the overload policy.
+
+        Synchronous producers on the loop can not wait, with the block policy put_nowait queues the batch and
+        the producer stops producing until the callbacks registered with call_when_not_full are called.
+
+        max_depth: maximum number of queued batches, 0 is unbounded
+    """
+
+    def __init__(self, max_depth: int = 0, policy: str = "block", low_priority: Optional[Callable[[Any], bool]] = None, on_drop: Optional[Callable[[List[Any]], None]] = None) -> None:
+        # unbounded, the depth is enforced by the policy
+        asyncio.Queue.__init__(self)
+        Overload_Policy.__init__(self, policy, low_priority, on_drop)
+        self.max_depth: int = max_depth
+        self._not_full_callbacks: List[Callable[[], None]] = []
+
+    def call_when_not_full(self, callback: Callable[[], None]) -> None:
+        self._not_full_callbacks.append(callback)
+
+    def put_nowait(self, batch: List[Any]) -> None:
+        if self.policy == "shed":
+            batch = self._shed(batch)
+            if not batch:
+                return
+
+        if self.at_capacity():
+            if self.policy == "block":
+                self.stats["blocked"] += 1
+            elif self.policy == "drop_oldest":
+                self._drop(asyncio.Queue.get_nowait(self), "dropped_oldest")
+                self.task_done()
+            else:
+                self._drop(batch, "dropped_newest")
+                return
+
+        asyncio.Queue.put_nowait(self, batch)
+
+    async def put(self, batch: List[Any]) -> None:
+        while self.policy == "block" and self.at_capacity():
+            waiter: asyncio.Future = asyncio.get_running_loop().create_future()
+            self.call_when_not_full(
+                lambda: waiter.done() or waiter.set_result(None))
+            await waiter
+        self.put_nowait(batch)
+
+    def get_nowait(self) -> List[Any]:
+        batch: List[Any] = asyncio.Queue.get_nowait(self)
+        if self._not_full_callbacks and not self.at_capacity():
+            callbacks, self._not_full_callbacks = self._not_full_callbacks, []
+            for callback in callbacks:
+                callback()
+        return batch
+
+
+def _protocol_identifiers(layer: Layer_Protocols, protocols: Iterable[str]) -> List[int]:
+    return [identifier for identifier, protocol_parser in Protocol_Parser.parsers[layer].items()
+            if protocol_parser.__name__ in protocols]
+
+
+def low_priority_frames(protocols: Iterable[str]) -> Callable[[Tuple[Any, ...]], bool]:
+    """
+        return a predicate for captured frames of the protocols, matched on the ethertype and the IPv4 protocol
+        or IPv6 next header of the raw bytes. The protocols are protocol class names, e.g. ARP, ICMP or UDP
+    """
+    protocols = set(protocols)
+    ethertypes = set(_protocol_identifiers(
+        Layer_Protocols.Ethertype, protocols))
+    ip_protocols = set(_protocol_identifiers(
+        Layer_Protocols.IP_protocols, protocols))
+
+    def low_priority(frame: Tuple[Any, ...]) -> bool:
+        raw_bytes = frame[1][0]
+        ethertype: int = int.from_bytes(raw_bytes[12:14], "big")
+        if ethertype in ethertypes:
+            return True
+        if ethertype == 0x0800 and len(raw_bytes) > 23:
+            return raw_bytes[23] in ip_protocols
+        if ethertype == 0x86DD and len(raw_bytes) > 20:
+            return raw_bytes[20] in ip_protocols
+        return False
+
+    return low_priority
+
+
+def low_priority_packets(protocols: Iterable[str]) -> Callable[[Dict[str, Any]], bool]:
+    """ return a predicate for serialized packets containing one of the protocols """
+    protocols = list(protocols)
+
+    def low_priority(packet: Dict[str, Any]) -> bool:
+        return any(protocol in packet for protocol in protocols)
+
+    return low_priority
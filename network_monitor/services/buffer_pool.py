@@ -0,0 +1,53 @@
+from collections import deque, Counter
+
+from typing import Deque, Union
+
+
+class Buffer_Pool(object):
+    """
+        Recycled slab of receive buffers. The listener receives frames into buffers acquired from the pool
+        and the parser returns the buffers once the packet has been processed.
+
+        buffer_count: number of preallocated buffers, the pool never keeps more free buffers than this
+        buffer_size: size of a buffer in bytes
+    """
+
+    def __init__(self, buffer_count: int = 256, buffer_size: int = 65565) -> None:
+
+        self.buffer_count: int = buffer_count
+        self.buffer_size: int = buffer_size
+
+        # deque append and pop are thread safe, the listener and parser run in different threads
+        self._free: Deque[bytearray] = deque(
+            bytearray(buffer_size) for _ in range(buffer_count))
+
+        # acquire and release counters are updated by different threads, use different keys
+        self.stats: Counter = Counter()
+
+    def acquire(self) -> bytearray:
+        """ return a free buffer, a new buffer is allocated when the pool is exhausted """
+        try:
+            buffer = self._free.pop()
+        except IndexError:
+            self.stats["buffers_allocated"] += 1
+            return bytearray(self.buffer_size)
+        else:
+            self.stats["buffers_reused"] += 1
+            return buffer
+
+    def release(self, raw_bytes: Union[bytes, bytearray, memoryview]) -> None:
+        """ return the buffer backing raw_bytes to the pool, bytes objects are ignored """
+        if isinstance(raw_bytes, memoryview):
+            raw_bytes = raw_bytes.obj
+
+        if not isinstance(raw_bytes, bytearray) or len(raw_bytes) != self.buffer_size:
+            return
+
+        if len(self._free) < self.buffer_count:
+            self._free.append(raw_bytes)
+            self.stats["buffers_released"] += 1
+        else:
+            self.stats["buffers_discarded"] += 1
+
+    def __len__(self) -> int:
+        return len(self._free)
@@ -0,0 +1,147 @@
+import socket
+import struct
+
+from typing import Dict, NamedTuple, Optional
+
+
+class PACKET_STATS(object):
+    # linux/if_packet.h
+    SOL_PACKET: int = 263
+    PACKET_STATISTICS: int = 6
+
+
+# struct tpacket_stats, tp_packets, tp_drops
+TPACKET_STATS = struct.Struct("II")
+# struct tpacket_stats_v3, tp_packets, tp_drops, tp_freeze_q_cnt. Returned when the socket uses a TPACKET_V3 ring
+TPACKET_STATS_V3 = struct.Struct("III")
+
+
+class Interface_Counters(NamedTuple):
+    rx_packets: int
+    rx_dropped: int
+    tx_packets: int
+
+
+def read_interface_counters(interface_name: Optional[str] = None, path: str = "/proc/net/dev") -> Interface_Counters:
+    """
+        return the received, dropped on receive and transmitted packet counters from /proc/net/dev, summed
+        over all interfaces when no interface name is provided
+    """
+    rx_packets: int = 0
+    rx_dropped: int = 0
+    tx_packets: int = 0
+    with open(path, "r") as fin:
+        # skip two header lines
+        for line in fin.readlines()[2:]:
+            name, counters = line.split(":", 1)
+            if interface_name is not None and name.strip() != interface_name:
+                continue
+            fields = counters.split()
+            rx_packets += int(fields[1])
+            rx_dropped += int(fields[3])
+            tx_packets += int(fields[9])
+
+    return Interface_Counters(rx_packets, rx_dropped, tx_packets)
+
+
+def capture_completeness(stats: Dict[str, float]) -> Dict[str, float]:
+    """
+        return the capture completeness ratios for the counters published by the capture statistics
+
+        capture_completeness: share of the frames accepted by the socket that were not dropped because the
+            receive queue or ring was full
+        interface_completeness: share of the frames received by the interface that were not dropped by the interface
+    """
+    ratios: Dict[str, float] = {}
+
+    received = stats.get("packets_kernel_received", 0)
+    if received > 0:
+        ratios["capture_completeness"] = round(
+            1 - stats.get("packets_kernel_dropped", 0) / received, 4)
+
+    interface_received = stats.get("interface_rx_packets", 0) + \
+        stats.get("interface_rx_dropped", 0)
+    if interface_received > 0:
+        ratios["interface_completeness"] = round(
+            stats.get("interface_rx_packets", 0) / interface_received, 4)
+
+    return ratios
+
+
+class Capture_Statistics(object):
+    """
+        Counters of the capture socket. PACKET_STATISTICS resets the kernel counters when read, the
+        values are accumulated here.
+
+        Frames dropped by a socket filter are not counted by the kernel. The frames filtered in the kernel
+        are estimated from the interface counters in /proc/net/dev, the listener socket is not bound to an
+        interface and sees the received and transmitted frames of all interfaces.
+
+        sock: capture socket
+        interface_name: interface whose /proc/net/dev receive counters are reported
+    """
+
+    def __init__(self, sock: socket.socket, interface_name: Optional[str] = None) -> None:
+        self._sock: socket.socket = sock
+        self.interface_name: Optional[str] = interface_name
+
+        # tp_packets includes the dropped frames
+        self.packets: int = 0
+        self.drops: int = 0
+        # number of times the ring was frozen because no block was available, TPACKET_V3 only
+        self.freeze_count: int = 0
+
+        self._interface_counters_start: int = self._all_interface_packets()
+        self._interface_start: Optional[Interface_Counters] = None
+        if interface_name is not None:
+            self._interface_start = read_interface_counters(interface_name)
+
+        # clear counters accumulated before the statistics are tracked
+        self._read_packet_statistics()
+        self.packets = 0
+        self.drops = 0
+        self.freeze_count = 0
+
+    def _all_interface_packets(self) -> int:
+        counters: Interface_Counters = read_interface_counters()
+        return counters.rx_packets + counters.tx_packets
+
+    def _read_packet_statistics(self) -> None:
+        # the kernel returns the struct matching the socket version, the ring may be set up after the statistics
+        stats: bytes = self._sock.getsockopt(
+            PACKET_STATS.SOL_PACKET, PACKET_STATS.PACKET_STATISTICS, TPACKET_STATS_V3.size)
+
+        if len(stats) == TPACKET_STATS_V3.size:
+            tp_packets, tp_drops, tp_freeze_q_cnt = TPACKET_STATS_V3.unpack(
+                stats)
+            self.freeze_count += tp_freeze_q_cnt
+        else:
+            tp_packets, tp_drops = TPACKET_STATS.unpack(stats)
+
+        self.packets += tp_packets
+        self.drops += tp_drops
+
+    def poll(self) -> Dict[str, int]:
+        """ return the capture counters since the statistics were created """
+
+        self._read_packet_statistics()
+
+        # the socket sees the frames received and transmitted on all interfaces
+        interface_packets: int = self._all_interface_packets() - \
+            self._interface_counters_start
+
+        counters: Dict[str, int] = {
+            "packets_kernel_received": self.packets,
+            "packets_kernel_dropped": self.drops,
+            "ring_freeze_count": self.freeze_count,
+            "packets_kernel_filtered": max(interface_packets - self.packets, 0),
+        }
+
+        if self._interface_start is not None:
+            interface = read_interface_counters(self.interface_name)
+            counters["interface_rx_packets"] = interface.rx_packets - \
+                self._interface_start.rx_packets
+            counters["interface_rx_dropped"] = interface.rx_dropped - \
+                self._interface_start.rx_dropped
+
+        return counters
@@ -0,0 +1,201 @@
+import asyncio
+import multiprocessing
+import signal
+import sys
+import time
+
+from collections import Counter
+from typing import Any, List, Optional
+
+from aiologger import Logger
+from aiologger.handlers.streams import AsyncStreamHandler
+
+from ..protocols import Protocol_Parser
+from ..protocols.protocol_utils import address_cache_stats, set_address_cache_size
+from .interface_listener import Interface_Listener
+from .packet_parser import Packet_Parser, Packet_Filter
+from .frame_batch import Frame_Batch
+
+
+class Fanout_Worker(object):
+    """
+        Capture and parse frames in a worker process. Every worker opens its own socket joined to the
+        same PACKET_FANOUT group, the kernel distributes the frames between the workers by flow hash so
+        the frames of a flow are processed by the same worker. The parsed packets of all workers are
+        submitted by a single packet submitter.
+    """
+
+    # seconds between stats snapshots published to the service manager
+    STATS_INTERVAL: float = 1.0
+
+    def __init__(
+        self,
+        interface_name: str,
+        log_directory: str,
+        fanout_group: int,
+        filters: Optional[List[Any]] = None,
+        undefined_protocol_storage: Optional[str] = None,
+        capture_mode: str = "socket",
+        ring_block_size: int = 1 << 22,
+        ring_block_count: int = 64,
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+        kernel_timestamps: bool = False,
+        receive_buffer_size: Optional[int] = None,
+        snap_length: int = 0,
+        sampling_mode: Optional[str] = None,
+        sampling_rate: int = 1,
+        unknown_protocol_interval: float = 60.0,
+        unknown_protocol_samples: int = 1,
+        unknown_protocol_max_file_size: int = 10 << 20,
+        address_cache_size: int = 4096,
+        batch_decoding: bool = False,
+        output_protocols: Optional[List[str]] = None,
+        stop_protocols: Optional[List[str]] = None,
+    ) -> None:
+
+        self.interface_name: str = interface_name
+        self.log_directory: str = log_directory
+        self.fanout_group: int = fanout_group
+        self.filters: List[Any] = filters if filters is not None else []
+        self.undefined_protocol_storage: Optional[str] = undefined_protocol_storage
+        self.capture_mode: str = capture_mode
+        self.ring_block_size: int = ring_block_size
+        self.ring_block_count: int = ring_block_count
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.kernel_timestamps: bool = kernel_timestamps
+        self.receive_buffer_size: Optional[int] = receive_buffer_size
+        self.snap_length: int = snap_length
+        self.sampling_mode: Optional[str] = sampling_mode
+        self.sampling_rate: int = sampling_rate
+        self.unknown_protocol_interval: float = unknown_protocol_interval
+        self.unknown_protocol_samples: int = unknown_protocol_samples
+        self.unknown_protocol_max_file_size: int = unknown_protocol_max_file_size
+        self.address_cache_size: int = address_cache_size
+        self.batch_decoding: bool = batch_decoding
+        self.output_protocols: Optional[List[str]] = output_protocols
+        self.stop_protocols: List[str] = stop_protocols if stop_protocols is not None else []
+
+    def _snapshot(self, stats: Counter, interface_listener: Interface_Listener) -> dict:
+        snapshot = dict(stats)
+        snapshot.update(address_cache_stats())
+        counters = interface_listener.capture_statistics.poll()
+        # the kernel filtered estimate and the interface counters cover all sockets of the group, summed over
+        # the workers they would be counted once per worker. Only report the counters of this socket
+        for name in ("packets_kernel_received", "packets_kernel_dropped", "ring_freeze_count"):
+            snapshot[name] = counters[name]
+        return snapshot
+
+    def run(self, stop_event: Any, out_channel: Any, stats_channel: Any) -> None:
+        """ worker process entry point """
+        # ctrl+c and ctrl+z reach the whole process group, the application stops the workers with the stop event
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTSTP, signal.SIG_IGN)
+        asyncio.run(self.worker(stop_event, out_channel, stats_channel))
+
+    async def worker(self, stop_event: Any, out_channel: Any, stats_channel: Any) -> None:
+
+        process_name: str = multiprocessing.current_process().name
+
+        logger = Logger(name=f"{__name__}.{process_name}")
+        stream_handler = AsyncStreamHandler(stream=sys.stderr)
+        logger.add_handler(stream_handler)
+
+        if self.undefined_protocol_storage is not None:
+            Protocol_Parser.set_output_directory(
+                self.undefined_protocol_storage, self.unknown_protocol_interval, self.unknown_protocol_samples,
+                self.unknown_protocol_max_file_size)
+        Protocol_Parser.set_async_loop(asyncio.get_running_loop())
+        # the address caches are per process
+        set_address_cache_size(self.address_cache_size)
+
+        interface_listener: Interface_Listener = Interface_Listener(
+            self.interface_name,
+            self.log_directory,
+            capture_mode=self.capture_mode,
+            ring_block_size=self.ring_block_size,
+            ring_block_count=self.ring_block_count,
+            filters=self.filters,
+            fanout_group=self.fanout_group,
+            batch_size=self.batch_size,
+            flush_interval=self.flush_interval,
+            kernel_timestamps=self.kernel_timestamps,
+            receive_buffer_size=self.receive_buffer_size,
+            snap_length=self.snap_length,
+            sampling_mode=self.sampling_mode,
+            sampling_rate=self.sampling_rate
+        )
+
+        packet_filter: Packet_Filter = Packet_Filter(
+            output_protocols=self.output_protocols)
+        packet_filter.register(self.filters)
+        # decoding stops at the deepest layer used by the filters and the output
+        Protocol_Parser.set_parse_depth(
+            packet_filter.protocol_names(), self.stop_protocols)
+
+        packet_parser: Packet_Parser = Packet_Parser(
+            packet_filter, buffer_pool=interface_listener.buffer_pool,
+            sampling_rate=self.sampling_rate if self.sampling_mode is not None else 1,
+            batch_decoding=self.batch_decoding)
+
+        stats: Counter = Counter()
+        # processed packets are pickled per batch onto the submitter queue
+        batch: Frame_Batch = Frame_Batch(self.batch_size, self.flush_interval)
+
+        try:
+            read_frames = interface_listener.open_capture()
+        except Exception as e:
+            await logger.exception(f"Unable open a low level socket: {e}")
+            interface_listener.close_capture()
+            # non zero exit code is reported by the service manager
+            sys.exit(1)
+
+        last_stats_update: float = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                try:
+                    frames = read_frames()
+                except BlockingIOError:
+                    # receive timeout, no frames available
+                    frames = []
+                except Exception as e:
+                    await logger.exception(
+                        f"An exception occured trying to read data from {self.interface_name}: {e}")
+                    frames = []
+
+                stats["packets_sniffed"] += len(frames)
+
+                parsed_frames = packet_parser.filter_batch(frames)
+                stats["packets_batch_filtered"] += len(
+                    frames) - len(parsed_frames)
+
+                for frame in parsed_frames:
+                    try:
+                        packet = await packet_parser.process_frame(frame)
+                    except Exception as e:
+                        await logger.exception(f"exception in packer_parser {e}")
+                        continue
+
+                    stats["packets_parsed"] += 1
+                    if packet is not None:
+                        batch.append(packet)
+
+                if batch.full() or batch.expired():
+                    out_channel.put(batch.flush())
+                    stats["batches_sent"] += 1
+
+                now: float = time.monotonic()
+                if now - last_stats_update > self.STATS_INTERVAL:
+                    last_stats_update = now
+                    stats_channel.put(
+                        (process_name, self._snapshot(stats, interface_listener)))
+
+            if len(batch) > 0:
+                out_channel.put(batch.flush())
+                stats["batches_sent"] += 1
+        finally:
+            stats_channel.put(
+                (process_name, self._snapshot(stats, interface_listener)))
+            interface_listener.close_capture()
+            Protocol_Parser.close()
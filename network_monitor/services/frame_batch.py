@@ -0,0 +1,52 @@
+import time
+
+from typing import Any, List, Optional
+
+
+class Frame_Batch(object):
+    """
+        Collects the items handed to the next service. The batch is flushed when it holds batch_size
+        items or when the oldest item has waited flush_interval seconds, one queue operation moves
+        the whole batch.
+
+        batch_size: number of items that triggers a flush
+        flush_interval: maximum seconds an item waits in the batch
+    """
+
+    def __init__(self, batch_size: int = 64, flush_interval: float = 0.05) -> None:
+
+        if batch_size < 1:
+            raise ValueError(f"batch size ({batch_size}) must be at least 1")
+
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+
+        self._items: List[Any] = []
+        # time the first item was added to the batch
+        self._started: Optional[float] = None
+
+    def append(self, item: Any) -> None:
+        if self._started is None:
+            self._started = time.monotonic()
+        self._items.append(item)
+
+    def extend(self, items: List[Any]) -> None:
+        if items and self._started is None:
+            self._started = time.monotonic()
+        self._items.extend(items)
+
+    def full(self) -> bool:
+        return len(self._items) >= self.batch_size
+
+    def expired(self) -> bool:
+        return self._started is not None and time.monotonic() - self._started >= self.flush_interval
+
+    def flush(self) -> List[Any]:
+        """ return the collected items and start a new batch """
+        items = self._items
+        self._items = []
+        self._started = None
+        return items
+
+    def __len__(self) -> int:
+        return len(self._items)
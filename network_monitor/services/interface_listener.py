@@ -4,16 +4,27 @@ import os
 import fcntl
 import time
 import sys
+import struct
+import functools
+import asyncio
+import queue
 
-from socket import socket, AF_PACKET, SOCK_RAW, htons
+from socket import socket, AF_PACKET, SOCK_RAW, SOL_SOCKET, SO_RCVTIMEO, SO_RCVBUF, CMSG_SPACE, MSG_TRUNC, htons
 
 from aiologger import Logger
 from aiologger.handlers.files import AsyncFileHandler
 from aiologger.handlers.streams import AsyncStreamHandler
 
 
-from typing import List, Any, Tuple
+from typing import List, Any, Tuple, Callable, Optional, Union
 from .service_manager import Service_Control
+from .packet_ring import Packet_Ring
+from .buffer_pool import Buffer_Pool
+from .capture_statistics import Capture_Statistics
+from .frame_batch import Frame_Batch
+from .packet_sampler import Packet_Sampler
+from .bounded_queue import Bounded_Async_Queue
+from ..filters.bpf_compiler import BPF, BPF_Instruction, attach_filter, compile_filters
 
 # used to manipulate file descriptor for unix
 
@@ -32,6 +43,19 @@ class FLAGS(object):
     # linux/sockios.h
     SIOCGIFFLAGS: int = 0x8913  # get the active flags
     SIOCSIFFLAGS: int = 0x8914  # set the active flags
+    # linux/if_packet.h
+    SOL_PACKET: int = 263
+    PACKET_FANOUT: int = 18
+    PACKET_FANOUT_HASH: int = 0
+    PACKET_FANOUT_FLAG_DEFRAG: int = 0x8000
+    # asm-generic/socket.h, the control message type equals the option
+    SO_TIMESTAMPNS: int = 35
+    # exceeds net.core.rmem_max, requires CAP_NET_ADMIN
+    SO_RCVBUFFORCE: int = 33
+
+
+# struct timespec, tv_sec, tv_nsec
+TIMESPEC = struct.Struct("ll")
 
 
 class InterfaceContextManager(object):
@@ -39,8 +63,21 @@ class InterfaceContextManager(object):
         abstraction layer for different operating systems. only tested ubuntu linux
     """
 
-    def __init__(self, interface_name: str) -> None:
+    def __init__(self, interface_name: str, bpf_program: Optional[List[BPF_Instruction]] = None, receive_timeout: float = 1.0, fanout_group: Optional[int] = None, kernel_timestamps: bool = False, receive_buffer_size: Optional[int] = None) -> None:
+        """
+            interface_name: interface set to operate in promiscuous mode
+            bpf_program: socket filter program attached to the socket
+            receive_timeout: seconds a blocking receive waits before failing with BlockingIOError
+            fanout_group: PACKET_FANOUT group id, frames are distributed by flow hash between the sockets of the group
+            kernel_timestamps: request the kernel receive timestamp of every frame as ancillary data
+            receive_buffer_size: socket receive buffer size in bytes, frames are dropped by the kernel when the buffer is full
+        """
         self.interface_name = interface_name
+        self.bpf_program: Optional[List[BPF_Instruction]] = bpf_program
+        self.receive_timeout: float = receive_timeout
+        self.fanout_group: Optional[int] = fanout_group
+        self.kernel_timestamps: bool = kernel_timestamps
+        self.receive_buffer_size: Optional[int] = receive_buffer_size
 
     def get_socket(self) -> socket:
         # linux os
@@ -53,6 +90,34 @@ class InterfaceContextManager(object):
                     FLAGS.ETH_P_ALL)
             )
             # sock.setblocking(False)
+
+            # drop frames in the kernel before they are copied to userspace
+            if self.bpf_program:
+                attach_filter(sock, self.bpf_program)
+
+            # kernel receive timeout, the socket stays in blocking mode to avoid a poll before every receive
+            seconds, fraction = divmod(self.receive_timeout, 1)
+            sock.setsockopt(SOL_SOCKET, SO_RCVTIMEO, struct.pack(
+                "ll", int(seconds), int(fraction * 1e6)))
+
+            if self.kernel_timestamps:
+                sock.setsockopt(SOL_SOCKET, FLAGS.SO_TIMESTAMPNS, 1)
+
+            if self.receive_buffer_size is not None:
+                try:
+                    sock.setsockopt(SOL_SOCKET, FLAGS.SO_RCVBUFFORCE,
+                                    self.receive_buffer_size)
+                except PermissionError:
+                    # capped at net.core.rmem_max
+                    sock.setsockopt(SOL_SOCKET, SO_RCVBUF,
+                                    self.receive_buffer_size)
+
+            if self.fanout_group is not None:
+                # hash mode keeps the frames of a flow on the same socket, defragment to hash fragments with their flow
+                # the option value does not fit a signed int, pack as unsigned
+                sock.setsockopt(FLAGS.SOL_PACKET, FLAGS.PACKET_FANOUT, struct.pack("I", (self.fanout_group & 0xFFFF) | (
+                    (FLAGS.PACKET_FANOUT_HASH | FLAGS.PACKET_FANOUT_FLAG_DEFRAG) << 16)))
+
             ifr: ifreq = ifreq()
             # set interface name
             ifr.ifr_ifrn = self.interface_name.encode("utf-8")
@@ -90,20 +155,237 @@ class InterfaceContextManager(object):
 class Interface_Listener(object):
     # maximum ethernet frame size is 1522 bytes
     BUFFER_SIZE: int = 65565
+    # seconds between capture statistics updates
+    STATISTICS_INTERVAL: float = 1.0
+    # maximum socket reads per readiness event of the event loop listener
+    DRAIN_LIMIT: int = 1024
+    # ancillary buffer size for a SO_TIMESTAMPNS control message
+    TIMESTAMP_ANCILLARY_SIZE: int = CMSG_SPACE(TIMESPEC.size)
+
+    def __init__(
+        self,
+        interface_name: str,
+        log_directory: str,
+        capture_mode: str = "socket",
+        ring_block_size: int = 1 << 22,
+        ring_block_count: int = 64,
+        buffer_pool: Optional[Buffer_Pool] = None,
+        filters: Optional[List[Any]] = None,
+        fanout_group: Optional[int] = None,
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+        kernel_timestamps: bool = False,
+        receive_buffer_size: Optional[int] = None,
+        snap_length: int = 0,
+        capture_channel: Optional[queue.Queue] = None,
+        sampling_mode: Optional[str] = None,
+        sampling_rate: int = 1,
+        log_stream: Optional[Any] = None,
+    ) -> None:
+        """
+            interface_name: interface to listen on
+            log_directory: directory where the listener log file is created
+            capture_mode: "socket" one recvfrom per frame, "ring" TPACKET_V3 ring buffer mapped into the process
+                or "pool" recvfrom_into buffers recycled by the parser
+            ring_block_size: size of a ring block in bytes, only used in ring capture mode
+            ring_block_count: number of blocks in the ring, only used in ring capture mode
+            buffer_pool: pool shared with the packet parser, only used in pool capture mode
+            filters: filters compiled into a socket filter, filters that can not be compiled are only applied by the packet parser
+            fanout_group: PACKET_FANOUT group joined by the socket, frames are distributed between the sockets in the group by flow hash
+            batch_size: number of frames handed to the parser in one batch
+            flush_interval: maximum seconds a frame waits for the batch to fill up
+            kernel_timestamps: use the kernel receive timestamp as sniffed timestamp instead of the time the frame was read
+            receive_buffer_size: socket receive buffer size in bytes, the kernel default is used when not provided
+            snap_length: number of bytes captured per frame, 0 captures the whole frame. The wire length of a
+                truncated frame is added to the frame as third element
+            capture_channel: queue of the pcap writer, receives every batch handed to the parser
+            sampling_mode: "count", "random" or "flow" keeps one in sampling_rate frames (or flows), every frame
+                is kept when not provided
+            sampling_rate: one in sampling_rate frames is kept, only used with a sampling mode
+            log_stream: pipe, socket or character device the log messages are written to, sys.stderr when not provided
+        """
+        if capture_mode not in ("socket", "ring", "pool"):
+            raise ValueError(f"{capture_mode} is not a valid capture mode")
+
+        if snap_length < 0:
+            raise ValueError(f"snap length ({snap_length}) can not be negative")
 
-    def __init__(self, interface_name: str, log_directory: str) -> None:
         # used to initialize required things
         # specify the interface to lister on
         self.interface_name: str = interface_name
         self.log_directory: str = log_directory
+        self.capture_mode: str = capture_mode
+        self.ring_block_size: int = ring_block_size
+        self.ring_block_count: int = ring_block_count
+
+        self.snap_length: int = snap_length
+        self.capture_channel: Optional[queue.Queue] = capture_channel
+        # number of bytes read from the socket per frame
+        self.capture_size: int = snap_length if snap_length > 0 else self.BUFFER_SIZE
+
+        if capture_mode == "pool" and buffer_pool is None:
+            buffer_pool = Buffer_Pool(buffer_size=self.capture_size)
+        self.buffer_pool: Optional[Buffer_Pool] = buffer_pool
+        self.filters: List[Any] = filters if filters is not None else []
+        self.fanout_group: Optional[int] = fanout_group
+        self.kernel_filters: List[Any] = []
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.kernel_timestamps: bool = kernel_timestamps
+        self.receive_buffer_size: Optional[int] = receive_buffer_size
+        self.packet_sampler: Optional[Packet_Sampler] = Packet_Sampler(
+            sampling_mode, sampling_rate) if sampling_mode is not None and sampling_rate > 1 else None
+        self.log_stream: Optional[Any] = log_stream
+
+        self._icm: Optional[InterfaceContextManager] = None
+        self._pm_socket: Optional[socket] = None
+        self._packet_ring: Optional[Packet_Ring] = None
+        self._scratch: Optional[bytearray] = None
+        self.capture_statistics: Optional[Capture_Statistics] = None
+
+    def _recv_socket(self, pm_socket: socket) -> List[Tuple[float, Tuple[bytes, Tuple[str, int, int, int, bytes]]]]:
+        packet: Tuple[bytes, Tuple[str, int, int, int, bytes]] = pm_socket.recvfrom(
+            self.BUFFER_SIZE)
+        # time the packed got sniffed
+        sniffed_timestamp: float = time.time()
+
+        return [(sniffed_timestamp, packet)]
+
+    def _frame(self, sniffed_timestamp: float, raw_bytes: Union[bytes, memoryview], address: Tuple[str, int, int, int, bytes], wire_length: int) -> Tuple[Any, ...]:
+        # MSG_TRUNC returns the wire length, only the bytes that fit the buffer are copied
+        if wire_length > len(raw_bytes):
+            return (sniffed_timestamp, (raw_bytes, address), wire_length)
+        return (sniffed_timestamp, (raw_bytes, address))
+
+    def _recv_socket_truncated(self, pm_socket: socket) -> List[Tuple[Any, ...]]:
+        nbytes, address = pm_socket.recvfrom_into(
+            self._scratch, 0, MSG_TRUNC)
+        sniffed_timestamp: float = time.time()
+
+        raw_bytes: bytes = bytes(self._scratch[:min(nbytes, self.snap_length)])
+        return [self._frame(sniffed_timestamp, raw_bytes, address, nbytes)]
+
+    def _recv_pool(self, pm_socket: socket) -> List[Tuple[Any, ...]]:
+        buffer: bytearray = self.buffer_pool.acquire()
+        try:
+            nbytes, address = pm_socket.recvfrom_into(buffer, 0, MSG_TRUNC)
+        except Exception as e:
+            self.buffer_pool.release(buffer)
+            raise e
+        sniffed_timestamp: float = time.time()
 
-    # if operation is not true asynchronous hence the need to run in a seperate thread
-    async def worker(self, service_control: Service_Control) -> None:
+        # frame is a view on the pooled buffer, the parser returns the buffer when done
+        return [self._frame(sniffed_timestamp, memoryview(buffer)[:min(nbytes, len(buffer))], address, nbytes)]
+
+    def _kernel_timestamp(self, ancdata: List[Tuple[int, int, bytes]]) -> float:
+        for cmsg_level, cmsg_type, cmsg_data in ancdata:
+            if cmsg_level == SOL_SOCKET and cmsg_type == FLAGS.SO_TIMESTAMPNS:
+                tv_sec, tv_nsec = TIMESPEC.unpack(cmsg_data)
+                return tv_sec + tv_nsec * 1e-9
+
+        # the kernel omits the timestamp when timestamping was not enabled in time for the frame
+        return time.time()
+
+    def _recv_socket_timestamped(self, pm_socket: socket) -> List[Tuple[float, Tuple[bytes, Tuple[str, int, int, int, bytes]]]]:
+        raw_bytes, ancdata, _, address = pm_socket.recvmsg(
+            self.BUFFER_SIZE, self.TIMESTAMP_ANCILLARY_SIZE)
+
+        # time the frame was received by the kernel
+        return [(self._kernel_timestamp(ancdata), (raw_bytes, address))]
+
+    def _recv_socket_truncated_timestamped(self, pm_socket: socket) -> List[Tuple[Any, ...]]:
+        # recvmsg resizes the returned bytes to the MSG_TRUNC length, receive into the scratch buffer instead
+        nbytes, ancdata, _, address = pm_socket.recvmsg_into(
+            [self._scratch], self.TIMESTAMP_ANCILLARY_SIZE, MSG_TRUNC)
+
+        raw_bytes: bytes = bytes(self._scratch[:min(nbytes, self.snap_length)])
+        return [self._frame(self._kernel_timestamp(ancdata), raw_bytes, address, nbytes)]
+
+    def _recv_pool_timestamped(self, pm_socket: socket) -> List[Tuple[Any, ...]]:
+        buffer: bytearray = self.buffer_pool.acquire()
+        try:
+            nbytes, ancdata, _, address = pm_socket.recvmsg_into(
+                [buffer], self.TIMESTAMP_ANCILLARY_SIZE, MSG_TRUNC)
+        except Exception as e:
+            self.buffer_pool.release(buffer)
+            raise e
+
+        return [self._frame(self._kernel_timestamp(ancdata), memoryview(buffer)[:min(nbytes, len(buffer))], address, nbytes)]
+
+    def open_capture(self, non_blocking: bool = False) -> Callable[[], List[Tuple[float, Tuple[Union[bytes, memoryview], Tuple[str, int, int, int, bytes]]]]]:
+        """
+            open the low level socket and return a function that reads the next captured frames
+
+            non_blocking: the read function raises BlockingIOError or returns no frames instead of waiting, used when the socket is registered with an event loop
+        """
+        if self.capture_mode == "ring" and self.snap_length > 0:
+            # the ring copies the number of bytes accepted by the socket filter and keeps the wire length in the frame header.
+            # A socket filter would trim the frame before recvfrom, the other modes truncate with MSG_TRUNC instead
+            bpf_program, self.kernel_filters = compile_filters(
+                self.filters, snaplen=self.snap_length)
+            if not bpf_program:
+                bpf_program = [(BPF.RET | BPF.K, 0, 0, self.snap_length)]
+        else:
+            bpf_program, self.kernel_filters = compile_filters(self.filters)
+
+        self._icm = InterfaceContextManager(
+            self.interface_name,
+            bpf_program=bpf_program,
+            # wake up in time to flush a partial batch, a zero timeout blocks forever
+            receive_timeout=min(max(self.flush_interval, 0.001), 1.0),
+            fanout_group=self.fanout_group,
+            # the ring frame header carries the timestamp
+            kernel_timestamps=self.kernel_timestamps and self.capture_mode != "ring",
+            receive_buffer_size=self.receive_buffer_size
+        )
+        self._pm_socket = self._icm.get_socket()
+        self.capture_statistics = Capture_Statistics(
+            self._pm_socket, self.interface_name)
+
+        if non_blocking:
+            self._pm_socket.setblocking(False)
+
+        if self.capture_mode == "ring":
+            self._packet_ring = Packet_Ring(
+                self._pm_socket,
+                block_size=self.ring_block_size,
+                block_count=self.ring_block_count,
+                kernel_timestamps=self.kernel_timestamps
+            )
+            if non_blocking:
+                return functools.partial(self._packet_ring.read, 0)
+            return functools.partial(self._packet_ring.read, max(int(self.flush_interval * 1000), 1))
+        elif self.capture_mode == "pool":
+            if self.kernel_timestamps:
+                return functools.partial(self._recv_pool_timestamped, self._pm_socket)
+            return functools.partial(self._recv_pool, self._pm_socket)
+        elif self.snap_length > 0:
+            # frames are received into a snap length buffer and copied
+            self._scratch = bytearray(self.snap_length)
+            if self.kernel_timestamps:
+                return functools.partial(self._recv_socket_truncated_timestamped, self._pm_socket)
+            return functools.partial(self._recv_socket_truncated, self._pm_socket)
+        else:
+            if self.kernel_timestamps:
+                return functools.partial(self._recv_socket_timestamped, self._pm_socket)
+            return functools.partial(self._recv_socket, self._pm_socket)
+
+    def close_capture(self) -> None:
+        if self._packet_ring is not None:
+            self._packet_ring.close()
+            self._packet_ring = None
+
+        if self._pm_socket is not None:
+            self._pm_socket.close()
+            self._pm_socket = None
+
+    async def _configure_logger(self, service_control: Service_Control) -> Optional[Logger]:
         # configure logger
         logger = Logger(name=__name__)
 
         # add stream handler
-        stream_handler = AsyncStreamHandler(stream=sys.stderr)
+        stream_handler = AsyncStreamHandler(
+            stream=self.log_stream if self.log_stream is not None else sys.stderr)
         logger.add_handler(stream_handler)
 
         try:
@@ -115,14 +397,71 @@ class Interface_Listener(object):
             service_control.error = True
             await logger.exception(
                 f"Unable to create log file for interface listener service: {e}")
+            return None
+
+        return logger
+
+    async def _capture_opened(self, service_control: Service_Control, logger: Logger) -> None:
+        service_control.error = False
+
+        await logger.info(
+            f"{len(self.kernel_filters)} of {len(self.filters)} filters compiled into the socket filter: {[f.Name for f in self.kernel_filters]}")
+        # batch policy reported with the listener stats
+        service_control.stats["batch_size"] = self.batch_size
+        service_control.stats["batch_flush_interval_ms"] = int(
+            self.flush_interval * 1000)
+        # the kernel doubles the requested size for bookkeeping overhead
+        service_control.stats["receive_buffer_size"] = self._pm_socket.getsockopt(
+            SOL_SOCKET, SO_RCVBUF)
+        service_control.stats["snap_length"] = self.snap_length
+        if self._packet_ring is not None:
+            service_control.stats["ring_size"] = self.ring_block_size * \
+                self.ring_block_count
+
+        if self.buffer_pool is not None:
+            # report buffer pool counters with the listener service stats
+            self.buffer_pool.stats = service_control.stats
+
+    def _sample(self, service_control: Service_Control, frames: List[Any]) -> List[Any]:
+        # frames are sampled before they are batched, the dropped frames never reach a queue
+        kept: List[Any] = self.packet_sampler.sample(frames)
+        if len(kept) < len(frames):
+            service_control.stats["packets_sampled_out"] += len(frames) - len(kept)
+            if self.buffer_pool is not None:
+                # the dropped frames are not released by the parser
+                kept_frames = {id(frame) for frame in kept}
+                for frame in frames:
+                    if id(frame) not in kept_frames:
+                        self.buffer_pool.release(frame[1][0])
+        return kept
+
+    def _flush_batch(self, service_control: Service_Control, batch: Frame_Batch) -> None:
+        # one queue operation hands all frames of the batch to the parser
+        frames: List[Any] = batch.flush()
+        service_control.out_channel.put_nowait(frames)
+        service_control.stats["batches_sent"] += 1
+
+        if self.capture_channel is not None:
+            # the pcap writer falls behind, the batch is not written instead of delaying the capture
+            try:
+                self.capture_channel.put_nowait(frames)
+            except queue.Full:
+                service_control.stats["pcap_batches_dropped"] += 1
+
+    def _update_capture_statistics(self, service_control: Service_Control) -> None:
+        # capture statistics are totals, Counter.update would add them
+        for name, value in self.capture_statistics.poll().items():
+            service_control.stats[name] = value
+
+    # if operation is not true asynchronous hence the need to run in a seperate thread
+    async def worker(self, service_control: Service_Control) -> None:
+        logger: Optional[Logger] = await self._configure_logger(service_control)
+        if logger is None:
             return
 
         # try to open low level socket
         try:
-            icm = InterfaceContextManager(
-                self.interface_name
-            )
-            pm_socket = icm.get_socket()
+            read_frames: Callable[[], List[Any]] = self.open_capture()
 
         except Exception as e:
             service_control.error = True
@@ -131,26 +470,129 @@ class Interface_Listener(object):
             )
 
         else:
-            service_control.error = False
+            await self._capture_opened(service_control, logger)
 
+            batch: Frame_Batch = Frame_Batch(
+                self.batch_size, self.flush_interval)
+
+            last_statistics_update: float = time.monotonic()
             while service_control.sentinal:
                 # s = time.monotonic()
                 try:
-                    #
-                    packet: Tuple[bytes, Tuple[str, int, int, int, bytes]] = pm_socket.recvfrom(
-                        self.BUFFER_SIZE)
-                    # time the packed got sniffed
-                    sniffed_timestamp: float = time.time()
-                    service_control.stats["packets_sniffed"] += 1
-                    # add raw to be processed by other service
-                    service_control.out_channel.put(
-                        (sniffed_timestamp, packet)
-                    )
+                    frames = read_frames()
+
+                    service_control.stats["packets_sniffed"] += len(frames)
+                    if self.packet_sampler is not None:
+                        frames = self._sample(service_control, frames)
+                    batch.extend(frames)
 
+                except BlockingIOError:
+                    # receive timeout, no frames available
+                    pass
                 except Exception:
                     await logger.exception(
                         f"An exception occured trying to read data from {self.interface_name}")
+
+                # add raw to be processed by other service
+                if batch.full() or batch.expired():
+                    self._flush_batch(service_control, batch)
+
+                now: float = time.monotonic()
+                if now - last_statistics_update > self.STATISTICS_INTERVAL:
+                    last_statistics_update = now
+                    self._update_capture_statistics(service_control)
+
+            if len(batch) > 0:
+                self._flush_batch(service_control, batch)
         finally:
+            self.close_capture()
+
+    def _drain(self, service_control: Service_Control, read_frames: Callable[[], List[Any]], batch: Frame_Batch, logger: Logger) -> None:
+        """
+            reader callback, move the available frames from the socket to the out channel. The loop does not
+            wait for more frames, the partial batch is flushed at the end of every readiness event.
+        """
+        try:
+            # bounded so a flooded socket can not starve the parser and submitter sharing the loop,
+            # the reader is called again on the next loop iteration while frames are available
+            for _ in range(self.DRAIN_LIMIT):
+                if self._parser_behind(service_control):
+                    self._pause_reading(
+                        service_control, read_frames, batch, logger)
+                    break
+
+                frames = read_frames()
+                if not frames:
+                    break
+
+                service_control.stats["packets_sniffed"] += len(frames)
+                if self.packet_sampler is not None:
+                    frames = self._sample(service_control, frames)
+                batch.extend(frames)
+                if batch.full():
+                    self._flush_batch(service_control, batch)
+        except BlockingIOError:
+            # all available frames have been read
+            pass
+        except Exception as e:
+            service_control.loop.create_task(logger.exception(
+                f"An exception occured trying to read data from {self.interface_name}: {e}"))
+
+        if len(batch) > 0:
+            self._flush_batch(service_control, batch)
+
+    def _parser_behind(self, service_control: Service_Control) -> bool:
+        out_channel = service_control.out_channel
+        return isinstance(out_channel, Bounded_Async_Queue) and out_channel.policy == "block" and out_channel.at_capacity()
+
+    def _pause_reading(self, service_control: Service_Control, *args: Any) -> None:
+        """
+            stop reading the socket until the parser takes a batch, the reader callback can not wait for room in
+            the queue. The frames wait in the socket receive buffer, the kernel drops frames when it is full
+        """
+        fileno: int = self._pm_socket.fileno()
+        service_control.loop.remove_reader(fileno)
+        service_control.stats["reader_paused"] += 1
+
+        def resume() -> None:
+            if service_control.sentinal and self._pm_socket is not None:
+                service_control.loop.add_reader(
+                    fileno, self._drain, service_control, *args)
+
+        service_control.out_channel.call_when_not_full(resume)
+
+    async def reader(self, service_control: Service_Control) -> None:
+        """
+            event loop native listener, the non blocking socket is registered with the running loop and the
+            frames are put on an asyncio.Queue. Allows the listener, parser and submitter to share a single loop.
+        """
+        service_control.loop = asyncio.get_running_loop()
+
+        logger: Optional[Logger] = await self._configure_logger(service_control)
+        if logger is None:
+            return
 
-            if not service_control.error:
-                pm_socket.close()
+        # try to open low level socket
+        try:
+            read_frames: Callable[[], List[Any]] = self.open_capture(
+                non_blocking=True)
+        except Exception as e:
+            service_control.error = True
+            await logger.exception(
+                f"Unable open a low level socket: {e}"
+            )
+            self.close_capture()
+            return
+
+        await self._capture_opened(service_control, logger)
+
+        fileno: int = self._pm_socket.fileno()
+        service_control.loop.add_reader(
+            fileno, self._drain, service_control, read_frames, Frame_Batch(self.batch_size, self.flush_interval), logger)
+        try:
+            while service_control.sentinal:
+                await asyncio.sleep(self.STATISTICS_INTERVAL)
+                self._update_capture_statistics(service_control)
+        finally:
+            service_control.loop.remove_reader(fileno)
+            self.close_capture()
@@ -5,12 +5,16 @@ import queue
 import sys
 from asyncio import CancelledError
 
-from typing import Dict, Any, Union, List, Optional, Tuple
+from typing import Callable, Dict, Any, Union, List, Optional, Tuple, FrozenSet, Iterator
 from dataclasses import dataclass
 
 from ..protocols import AF_Packet, Packet_802_3, Packet_802_2, Protocol_Parser
+from ..protocols.protocol_utils import address_cache_stats, truncated_length
+from ..protocols.batch_decoder import FILTER_COLUMNS, candidate_mask, column_keys, column_mask, decode_headers, filter_mask, in_columns
 from ..filters.deep_walker import flatten_protocols
+from ..filters.expressions import compile_expression, is_expression
 from .service_manager import Service_Control
+from .buffer_pool import Buffer_Pool
 from logging import Formatter
 from aiologger import Logger
 from aiologger.handlers.streams import AsyncStreamHandler
@@ -43,9 +47,13 @@ class Filter(object):
 
     def __init__(self, name: str, definition: Union[str, Dict[str, Dict[str, Union[str, int]]]]) -> None:
         self.Name: str = name
+        # compiled expressions of the definition, by protocol and attribute name
+        self._expressions: Dict[Tuple[str, str], Callable[[Any], bool]] = {}
         # check if definiion is valid
         self.Definition:  Dict[str, Dict[str, Union[str, int]]
                                ] = self._check_valid_definition(definition)
+        # applied to the protocol objects of a packet before it is serialized
+        self.predicate: Callable[[Dict[str, Any]], bool] = self._compile_predicate()
 
     def _check_valid_definition(self, definition: Union[str, Dict[str, Dict[str, Union[str, int]]]]) -> Dict[str, Dict[str, Union[str, int]]]:
 
@@ -83,42 +91,111 @@ class Filter(object):
                         f"{proto_attrs_name} not a attribute of {proto_class_name}"
                     )
 
+                # cidr, range, in and not expressions on attributes that are not dictionaries
+                if __temp[proto_attrs_name] is not dict and is_expression(proto_attrs_value):
+                    try:
+                        self._expressions[(proto_class_name, proto_attrs_name)] = compile_expression(
+                            proto_attrs_value, __temp[proto_attrs_name])
+                    except ValueError as e:
+                        raise ValueError(
+                            f"{self.Name}: {proto_class_name} {proto_attrs_name} {e}")
+                    continue
+
                 assert isinstance(
                     proto_attrs_value, __temp[proto_attrs_name]
                 ), f"{proto_attrs_name}:{proto_attrs_value} not of type {__temp[proto_attrs_name]}"
 
         return definition
 
-    def apply(self, packet: Dict[str, Dict[str, Union[str, int]]]) -> bool:
+    def _conditions(self) -> Tuple[Tuple[str, Tuple[Tuple[str, Any, Optional[Callable[[Any], bool]]], ...]], ...]:
+        """ return the attribute values per protocol with the compiled expression, None compares the exact value """
+        return tuple(
+            (proto_name, tuple((attr_name, attr_value, self._expressions.get((proto_name, attr_name)))
+                               for attr_name, attr_value in proto_attrs.items()))
+            for proto_name, proto_attrs in self.Definition.items())
+
+    def index_values(self, proto_name: str, attr_name: str) -> Optional[Tuple[Any, ...]]:
+        """ return the attribute values matched by the filter, None when the values can not be enumerated or hashed """
+        attr_value: Any = self.Definition[proto_name][attr_name]
+        if (proto_name, attr_name) in self._expressions:
+            if next(iter(attr_value)) != "in":
+                return None
+            values: Tuple[Any, ...] = tuple(attr_value["in"])
+        else:
+            values = (attr_value,)
 
-        res: List[bool] = []
-        for proto_name, proto_attrs in self.Definition.items():
-            if proto_name in packet.keys():
+        try:
+            hash(values)
+        except TypeError:
+            return None
+        return values
 
-                if not proto_attrs:
-                    res.append(True)
-                else:
-                    try:
-                        next(
-                            False
-                            for k, v in proto_attrs.items()
-                            if packet[proto_name][k] != v
-                        )
-                    except StopIteration:
-                        res.append(True)
-                    else:
-                        res.append(False)
-            else:
-                res.append(False)
+    def _compile_predicate(self) -> Callable[[Dict[str, Any]], bool]:
+        """
+            return a function matching the protocol objects of a packet by protocol name. The attributes are read
+            from the objects, the lazy fields not used by the filter are never decoded
+        """
+        conditions = self._conditions()
+
+        def predicate(protocols: Dict[str, Any]) -> bool:
+            for proto_name, proto_attrs in conditions:
+                protocol: Any = protocols.get(proto_name)
+                if protocol is None:
+                    return False
+
+                for attr_name, attr_value, matcher in proto_attrs:
+                    if matcher is None:
+                        if getattr(protocol, attr_name) != attr_value:
+                            return False
+                    elif not matcher(getattr(protocol, attr_name)):
+                        return False
+
+            return True
+
+        return predicate
+
+    def apply(self, packet: Dict[str, Dict[str, Union[str, int]]]) -> bool:
+        """ return True when the filter matches the serialized packet """
 
         # single filter all protocols should match
-        return all(res)
+        for proto_name, proto_attrs in self._conditions():
+            protocol: Optional[Dict[str, Union[str, int]]] = packet.get(proto_name)
+            if protocol is None:
+                return False
 
+            for attr_name, attr_value, matcher in proto_attrs:
+                if matcher is None:
+                    if protocol[attr_name] != attr_value:
+                        return False
+                elif not matcher(protocol[attr_name]):
+                    return False
 
-class Packet_Filter(object):
-    def __init__(self, filter_application_packets=False) -> None:
+        return True
 
+
+class Packet_Filter(object):
+    def __init__(self, filter_application_packets=False, output_protocols: Optional[List[str]] = None) -> None:
+        """
+            filter_application_packets: filter the traffic of the application
+            output_protocols: names of the protocols kept in the serialized packets, None keeps every protocol
+        """
         self.__filters: List[Filter] = []
+        # filters indexed on one of their (protocol, attribute, value) conditions, a packet is only compared with
+        # the filters of the values it contains
+        self.__index: Dict[Tuple[str, str, Any], List[Filter]] = {}
+        self.__indexed_attributes: Dict[str, Tuple[str, ...]] = {}
+        # filters without an indexable condition, candidates of every packet containing the protocol
+        self.__protocol_index: Dict[str, List[Filter]] = {}
+        self.__unindexed: List[Filter] = []
+        # the index applied to the columns of decode_headers, per (protocol, attribute) the values of the filters
+        # made of the indexed condition alone and the filters with more column conditions by indexed value
+        self.__column_filters: Dict[Tuple[str, str], Tuple[List[Any], Dict[Any, List[Filter]]]] = {}
+        # the values encoded as column keys, built by the first match_headers after a filter is registered
+        self.__column_plan: Optional[List[Tuple[Any, ...]]] = None
+        self.output_protocols: Optional[FrozenSet[str]] = frozenset(
+            output_protocols) if output_protocols else None
+        # protocols used by the filters and the output, None when every protocol is output
+        self.__protocol_names: Optional[FrozenSet[str]] = self.output_protocols
 
     # register filters which is in the form of a dictionary
     def register(self, filter_: Filter) -> None:
@@ -128,36 +205,164 @@ class Packet_Filter(object):
         if isinstance(filter_, list):
             # contain a list of Filter objects
             self.__filters.extend(filter_)
+            for f in filter_:
+                self.__index_filter(f)
         else:
             # single Filter object
             self.__filters.append(filter_)
+            self.__index_filter(filter_)
+
+        if self.output_protocols is not None:
+            self.__protocol_names = self.output_protocols.union(
+                *(filter_.Definition.keys() for filter_ in self.__filters))
+
+    def __index_filter(self, filter_: Filter) -> None:
+        """ add the filter to the index of its first hashable condition, once per value of an in expression """
+        for proto_name, proto_attrs in filter_.Definition.items():
+            for attr_name in proto_attrs:
+                values: Optional[Tuple[Any, ...]] = filter_.index_values(
+                    proto_name, attr_name)
+                if values is None:
+                    continue
+
+                for value in dict.fromkeys(values):
+                    self.__index.setdefault(
+                        (proto_name, attr_name, value), []).append(filter_)
+                attributes: Tuple[str, ...] = self.__indexed_attributes.get(
+                    proto_name, ())
+                if attr_name not in attributes:
+                    self.__indexed_attributes[proto_name] = (
+                        *attributes, attr_name)
+                self.__index_columns(filter_, proto_name, attr_name, values)
+                return
+
+        if filter_.Definition:
+            self.__protocol_index.setdefault(
+                next(iter(filter_.Definition)), []).append(filter_)
+        else:
+            # an empty definition matches every packet
+            self.__unindexed.append(filter_)
+
+    def __index_columns(self, filter_: Filter, proto_name: str, attr_name: str, values: Tuple[Any, ...]) -> None:
+        """ add an indexed filter to the column index, the filters with a condition that is not a column are parsed """
+        if (proto_name, attr_name) not in FILTER_COLUMNS:
+            return
+
+        self.__column_plan = None
+        column_values, candidates = self.__column_filters.setdefault(
+            (proto_name, attr_name), ([], {}))
+        if len(filter_.Definition) == 1 and len(filter_.Definition[proto_name]) == 1:
+            # exact value or in expression, the filter matches the rows holding one of its values
+            column_values.extend(values)
+        elif in_columns(filter_.Definition):
+            # exact values, the indexed condition has a single value
+            candidates.setdefault(values[0], []).append(filter_)
+
+    def match(self, protocols: Dict[str, Any]) -> bool:
+        """
+            return True when one of the filters matches the protocol objects of a packet, keyed by protocol name.
+            Only the candidate filters indexed on the values of the packet are applied, the cost does not grow with
+            the number of filters
+        """
+        for proto_name, attributes in self.__indexed_attributes.items():
+            protocol: Any = protocols.get(proto_name)
+            if protocol is None:
+                continue
 
-    def apply(self, af_packet: AF_Packet, out_packet: Union[Packet_802_3, Packet_802_2]) -> Optional[Dict[str, Dict[str, Union[str, int]]]]:
-
-        # flatten protocols into list for easy seriliazation
+            for attr_name in attributes:
+                try:
+                    candidates: Optional[List[Filter]] = self.__index.get(
+                        (proto_name, attr_name, getattr(protocol, attr_name, None)))
+                except TypeError:
+                    # unhashable values never equal the hashable filter values
+                    continue
+
+                if candidates is not None:
+                    for filter_ in candidates:
+                        if filter_.predicate(protocols):
+                            return True
+
+        for proto_name, candidates in self.__protocol_index.items():
+            if proto_name in protocols:
+                for filter_ in candidates:
+                    if filter_.predicate(protocols):
+                        return True
+
+        for filter_ in self.__unindexed:
+            if filter_.predicate(protocols):
+                return True
+
+        return False
+
+    def protocol_names(self) -> Optional[FrozenSet[str]]:
+        """ return the names of the protocols used by the filters and the output, None when every protocol is output """
+        return self.__protocol_names
+
+    def match_headers(self, headers: Any) -> Optional[Any]:
+        """
+            return the mask of the rows of a decode_headers array matched by one of the filters, these frames
+            are filtered without being parsed. None when no filter can be applied to the columns.
+            Each indexed column is looked up once in the values of its filters, the filters with more conditions
+            are only applied to the rows holding their indexed value and filter_mask is applied to the filters
+            without an indexed condition. The cost grows with the indexed columns, not with the filters
+        """
+        if self.__column_plan is None:
+            self.__column_plan = self.__plan_columns()
+
+        matched: Optional[Any] = None
+        for proto_name, attr_name, keys, candidate_keys, candidates in self.__column_plan:
+            if len(keys):
+                mask: Any = column_mask(headers, proto_name, attr_name, keys)
+                matched = mask if matched is None else matched | mask
+            if len(candidate_keys):
+                mask = candidate_mask(
+                    headers, proto_name, attr_name, candidate_keys, candidates)
+                matched = mask if matched is None else matched | mask
+
+        for filter_ in self.__unindexed_filters():
+            mask = filter_mask(filter_.Definition, headers)
+            if mask is not None:
+                matched = mask if matched is None else matched | mask
+        return matched
+
+    def __plan_columns(self) -> List[Tuple[Any, ...]]:
+        """ return the column keys of the values and of the candidate filters of every indexed column """
+        plan: List[Tuple[Any, ...]] = []
+        for (proto_name, attr_name), (values, candidates) in self.__column_filters.items():
+            definitions: Dict[Any, List[Dict[str, Dict[str, Any]]]] = {}
+            for value, filters in candidates.items():
+                # values no frame can match have no key
+                for key in column_keys(proto_name, attr_name, [value]).tolist():
+                    definitions.setdefault(key, []).extend(
+                        filter_.Definition for filter_ in filters)
+            plan.append((proto_name, attr_name, column_keys(proto_name, attr_name, values),
+                         column_keys(proto_name, attr_name, candidates), definitions))
+        return plan
+
+    def __unindexed_filters(self) -> Iterator[Filter]:
+        """ return the filters without an indexed condition """
+        for filters in self.__protocol_index.values():
+            yield from filters
+        yield from self.__unindexed
 
-        out_protocols: List[Any] = flatten_protocols(out_packet)
+    def apply(self, af_packet: AF_Packet, out_packet: Union[Packet_802_3, Packet_802_2]) -> Optional[Dict[str, Dict[str, Union[str, int]]]]:
 
-        # create list of dictionaries containing definitions
-        _p: Dict[str, Dict[str, Union[str, int]]] = {
-            Protocol_Parser.get_protocol_name_by_class(p.__class__): p.serialize()
-            for p in out_protocols
-        }
+        # flatten protocols into list, keyed by protocol name for the filters
+        protocols: Dict[str, Any] = {
+            p.Protocol_Name: p for p in flatten_protocols(out_packet)}
         # add originating information
-        _p["AF_Packet"] = af_packet.serialize()
-
-        # if no filters are defined return serialized packet
-        if not self.__filters:
-            return _p
+        protocols["AF_Packet"] = af_packet
 
-        res: List[bool] = []
-        for filter_ in self.__filters:
-            res.append(filter_.apply(_p))
-
-        if any(res):
+        # the filters read the attributes of the protocol objects, a filtered packet is never serialized
+        if self.__filters and self.match(protocols):
             return None
-        else:
-            return _p
+
+        output_protocols: Optional[FrozenSet[str]] = self.output_protocols
+        return {
+            name: protocol.serialize()
+            for name, protocol in protocols.items()
+            if output_protocols is None or name in output_protocols
+        }
 
 
 class Packet_Parser(object):
@@ -166,14 +371,28 @@ class Packet_Parser(object):
     def __init__(
         self,
         packet_filter: Optional[Packet_Filter] = None,
+        buffer_pool: Optional[Buffer_Pool] = None,
+        sampling_rate: int = 1,
+        batch_decoding: bool = False,
     ) -> None:
-
+        """
+            packet_filter: filters applied to the parsed packets
+            buffer_pool: pool the captured frames are returned to once processed, used with the listener pool capture mode
+            sampling_rate: one in sampling_rate frames is kept by the listener, recorded in the Info of each packet so
+                the counts can be scaled back up
+            batch_decoding: the headers of a batch are decoded into a numpy array first, the frames matched by the
+                filters on the array are not parsed. Requires numpy
+        """
         if packet_filter is None:
             self.packet_filter = Packet_Filter()
         else:
             self.packet_filter = packet_filter
 
-    async def _process_packet(self, af_packet: AF_Packet, raw_bytes: bytes) -> None:
+        self.buffer_pool: Optional[Buffer_Pool] = buffer_pool
+        self.sampling_rate: int = sampling_rate
+        self.batch_decoding: bool = batch_decoding
+
+    async def _process_packet(self, af_packet: AF_Packet, raw_bytes: Union[bytes, memoryview]) -> None:
 
         out_packet: Optional[Union[Packet_802_3, Packet_802_2]] = None
 
@@ -191,10 +410,89 @@ class Packet_Parser(object):
             # implement packet filter here before adding data to output
         return out_packet
 
+    async def process_frame(self, frame: Tuple[Any, ...]) -> Optional[Dict[str, Dict[str, Union[str, int, float]]]]:
+        """
+            parse and filter a captured frame, return the serialized packet or None when the packet is filtered.
+            A frame truncated at capture carries its wire length as third element
+        """
+        sniffed_timestamp, (raw_bytes, address) = frame[:2]
+        size: int = frame[2] if len(frame) > 2 else len(raw_bytes)
+
+        try:
+            af_packet: AF_Packet = AF_Packet(address)
+
+            # process raw packet
+            out_packet = await self._process_packet(af_packet, raw_bytes)
+            if len(frame) > 2:
+                # truncated by the listener, the payload size of the packet on the wire
+                truncated_length(flatten_protocols(
+                    out_packet), size - len(raw_bytes))
+
+            # this should be move outside the worker. packet parser process the raw bytes into and object.
+            # register callback to be called on object when processed. these callback could be different functionality such as pack filtering and stream tracking
+            packet: Optional[Dict[str, Dict[str, Union[str, int, float]]]] = self.packet_filter.apply(
+                af_packet, out_packet)
+        finally:
+            # the packet has been serialized, return the buffer to the listener
+            if self.buffer_pool is not None:
+                self.buffer_pool.release(raw_bytes)
+
+        if packet is not None:
+            processed_timestamp = time.time()
+            info = {
+                "Sniffed_Timestamp": sniffed_timestamp,
+                "Processed_Timestamp": processed_timestamp,
+                "Size": size
+            }
+            if self.sampling_rate > 1:
+                info["Sampling_Rate"] = self.sampling_rate
+            packet["Info"] = info
+
+        return packet
+
+    def filter_batch(self, frames: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        """
+            return the frames of the batch left for the protocol parsers. With batch decoding the frames matched by
+            the filters on the decoded headers are dropped and their buffers returned to the pool
+        """
+        if not self.batch_decoding or not frames:
+            return frames
+
+        matched: Optional[Any] = self.packet_filter.match_headers(
+            decode_headers(frames))
+        if matched is None:
+            return frames
+
+        kept: List[Tuple[Any, ...]] = []
+        for frame, filtered in zip(frames, matched.tolist()):
+            if not filtered:
+                kept.append(frame)
+            elif self.buffer_pool is not None:
+                self.buffer_pool.release(frame[1][0])
+        return kept
+
     async def _configure_protocol_parser(self):
         # set protocol asynchronous loop
         Protocol_Parser.set_async_loop(asyncio.get_running_loop())
 
+    async def _next_batch(self, channel: Union[queue.Queue, asyncio.Queue]) -> List[Tuple[float, Tuple[Union[bytes, memoryview], Tuple[str, int, int, int, bytes]]]]:
+        """
+            return the next batch of frames, raises queue.Empty when no batch is available within a second.
+            The asyncio.Queue is used when the listener shares the event loop with the parser.
+        """
+        if not isinstance(channel, asyncio.Queue):
+            return channel.get(timeout=1)
+
+        try:
+            return channel.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        try:
+            return await asyncio.wait_for(channel.get(), timeout=1)
+        except asyncio.TimeoutError:
+            raise queue.Empty
+
     async def worker(self, service_control: Service_Control) -> None:
 
         service_control.loop = asyncio.get_running_loop()
@@ -207,40 +505,54 @@ class Packet_Parser(object):
             stream=sys.stderr)
         logger.add_handler(stream_handler)
 
+        # unknown protocol counts are logged on the parser loop
+        await self._configure_protocol_parser()
+
         while service_control.sentinal:
 
             try:
+                batch = await self._next_batch(service_control.in_channel)
 
-                sniffed_timestamp, (raw_bytes,
-                                    address) = service_control.in_channel.get(timeout=1)
-
-                af_packet: AF_Packet = AF_Packet(address)
-
-                # process raw packet
-                out_packet = await self._process_packet(af_packet, raw_bytes)
-
-                service_control.in_channel.task_done()
-                service_control.stats["packets_parsed"] += 1
-                # this should be move outside the worker. packet parser process the raw bytes into and object.
-                # register callback to be called on object when processed. these callback could be different functionality such as pack filtering and stream tracking
-                packet: Optional[Dict[str, Dict[str, Union[str, int, float]]]] = self.packet_filter.apply(
-                    af_packet, out_packet)
-
-                if packet is not None:
-                    processed_timestamp = time.time()
-                    info = {
-                        "Sniffed_Timestamp": sniffed_timestamp,
-                        "Processed_Timestamp": processed_timestamp,
-                        "Size": len(raw_bytes)
-                    }
-                    packet["Info"] = info
-
-                    service_control.out_channel.put(packet)
+                packets: List[Dict[str, Dict[str, Union[str, int, float]]]] = []
+                try:
+                    frames = self.filter_batch(batch)
+                    service_control.stats["packets_batch_filtered"] += len(
+                        batch) - len(frames)
+                    for frame in frames:
+                        try:
+                            packet: Optional[Dict[str, Dict[str, Union[str, int, float]]]] = await self.process_frame(
+                                frame)
+                        except Exception as e:
+                            # a malformed frame does not discard the rest of the batch
+                            await logger.exception(f"exception in packer_parser {e}")
+                            continue
+
+                        if packet is not None:
+                            packets.append(packet)
+                finally:
+                    service_control.in_channel.task_done()
+
+                service_control.stats["packets_parsed"] += len(batch)
+                service_control.stats["batches_parsed"] += 1
+                # Counter.update would add the running totals
+                for name, value in address_cache_stats().items():
+                    service_control.stats[name] = value
+
+                # the processed packets of a batch are handed to the submitter in one batch
+                if packets:
+                    if isinstance(service_control.out_channel, asyncio.Queue):
+                        # waits for room in a bounded queue with the block policy
+                        await service_control.out_channel.put(packets)
+                    else:
+                        service_control.out_channel.put_nowait(packets)
             except queue.Empty:
                 pass
             except CancelledError as e:
                 # perform any operation before shut down here
+                Protocol_Parser.close()
                 await logger.info("packet parser service has been cancelled")
                 raise e
             except Exception as e:
                 await logger.exception(f"exception in packer_parser {e}")
+
+        Protocol_Parser.close()
@@ -0,0 +1,179 @@
+import mmap
+import select
+import socket
+import struct
+import time
+
+from typing import List, Tuple, Dict
+
+# https://www.kernel.org/doc/Documentation/networking/packet_mmap.txt
+
+
+class TPACKET(object):
+    # linux/if_packet.h
+    SOL_PACKET: int = 263
+    PACKET_RX_RING: int = 5
+    PACKET_VERSION: int = 10
+    TPACKET_V3: int = 2
+    # block status
+    TP_STATUS_KERNEL: int = 0
+    TP_STATUS_USER: int = 1
+    # TPACKET_ALIGN(sizeof(struct tpacket3_hdr))
+    TPACKET3_HDRLEN: int = 48
+
+
+# struct tpacket_req3
+TPACKET_REQ3 = struct.Struct("IIIIIII")
+# struct tpacket_block_desc, version, offset_to_priv followed by struct tpacket_hdr_v1
+# block_status, num_pkts, offset_to_first_pkt, blk_len
+BLOCK_DESC = struct.Struct("IIIIII")
+# struct tpacket3_hdr, tp_next_offset, tp_sec, tp_nsec, tp_snaplen, tp_len, tp_status, tp_mac, tp_net
+FRAME_HDR = struct.Struct("IIIIIIHH")
+# struct sockaddr_ll, sll_family, sll_protocol, sll_ifindex, sll_hatype, sll_pkttype, sll_halen, sll_addr
+SOCKADDR_LL = struct.Struct("HHiHBB8s")
+
+# offset of block_status in the block descriptor
+BLOCK_STATUS_OFFSET: int = 8
+
+
+class Packet_Ring(object):
+    """
+        TPACKET_V3 receive ring mapped into the process. The kernel fills whole blocks of frames
+        and hands them to userspace, one wakeup can yield hundreds of frames.
+
+        sock: AF_PACKET socket, the ring is attached to the socket
+        block_size: size of a block in bytes, must be a multiple of the page size
+        block_count: number of blocks in the ring
+        frame_size: maximum frame size used by the kernel to calculate the number of frames
+        block_timeout: time in milliseconds before the kernel retires a block which is not full
+        kernel_timestamps: use the receive timestamp of the frame header instead of the time the block was read
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        block_size: int = 1 << 22,
+        block_count: int = 64,
+        frame_size: int = 1 << 11,
+        block_timeout: int = 100,
+        kernel_timestamps: bool = False,
+    ) -> None:
+
+        if block_size % mmap.PAGESIZE != 0:
+            raise ValueError(
+                f"block size ({block_size}) not a multiple of the page size ({mmap.PAGESIZE})")
+
+        self.block_size: int = block_size
+        self.block_count: int = block_count
+        self.kernel_timestamps: bool = kernel_timestamps
+        self._sock: socket.socket = sock
+
+        sock.setsockopt(TPACKET.SOL_PACKET,
+                        TPACKET.PACKET_VERSION, TPACKET.TPACKET_V3)
+
+        frame_count: int = (block_size // frame_size) * block_count
+        sock.setsockopt(
+            TPACKET.SOL_PACKET,
+            TPACKET.PACKET_RX_RING,
+            TPACKET_REQ3.pack(block_size, block_count,
+                              frame_size, frame_count, block_timeout, 0, 0)
+        )
+
+        self._ring: mmap.mmap = mmap.mmap(
+            sock.fileno(),
+            block_size * block_count,
+            mmap.MAP_SHARED,
+            mmap.PROT_READ | mmap.PROT_WRITE
+        )
+
+        self._poller = select.poll()
+        self._poller.register(sock.fileno(), select.POLLIN | select.POLLERR)
+
+        # index of the next block to be handed to userspace
+        self._current: int = 0
+        self._interface_names: Dict[int, str] = {}
+
+    def _block_ready(self, block_idx: int) -> bool:
+        (block_status,) = struct.unpack_from(
+            "I", self._ring, block_idx * self.block_size + BLOCK_STATUS_OFFSET)
+        return block_status & TPACKET.TP_STATUS_USER == TPACKET.TP_STATUS_USER
+
+    def _release_block(self, block_idx: int) -> None:
+        # hand block back to the kernel
+        struct.pack_into("I", self._ring, block_idx * self.block_size +
+                         BLOCK_STATUS_OFFSET, TPACKET.TP_STATUS_KERNEL)
+
+    def _interface_name(self, ifindex: int) -> str:
+        try:
+            return self._interface_names[ifindex]
+        except KeyError:
+            name = socket.if_indextoname(ifindex)
+            self._interface_names[ifindex] = name
+            return name
+
+    def _walk_block(self, block_idx: int, sniffed_timestamp: float) -> List[Tuple[float, Tuple[bytes, Tuple[str, int, int, int, bytes]]]]:
+        """
+            copy all frames out of a block, keep the (timestamp, (raw_bytes, address)) contract of the socket listener.
+            The wire length is added as third element when the frame was truncated
+        """
+
+        block_offset: int = block_idx * self.block_size
+        _, _, _, num_pkts, offset_to_first_pkt, _ = BLOCK_DESC.unpack_from(
+            self._ring, block_offset)
+
+        frames = []
+        frame_offset: int = block_offset + offset_to_first_pkt
+        for _ in range(num_pkts):
+            next_offset, tp_sec, tp_nsec, snaplen, tp_len, _, mac, _ = FRAME_HDR.unpack_from(
+                self._ring, frame_offset)
+
+            _, protocol, ifindex, hatype, pkttype, halen, addr = SOCKADDR_LL.unpack_from(
+                self._ring, frame_offset + TPACKET.TPACKET3_HDRLEN)
+
+            address = (
+                self._interface_name(ifindex),
+                socket.ntohs(protocol),
+                pkttype,
+                hatype,
+                addr[:halen]
+            )
+
+            raw_bytes: bytes = self._ring[frame_offset +
+                                          mac:frame_offset + mac + snaplen]
+
+            # time the frame was received by the kernel
+            timestamp: float = tp_sec + tp_nsec * 1e-9 if self.kernel_timestamps else sniffed_timestamp
+
+            if tp_len > snaplen:
+                # truncated by the snap length of the socket filter, keep the wire length
+                frames.append((timestamp, (raw_bytes, address), tp_len))
+            else:
+                frames.append((timestamp, (raw_bytes, address)))
+
+            frame_offset += next_offset
+
+        return frames
+
+    def read(self, timeout: int = 100) -> List[Tuple[float, Tuple[bytes, Tuple[str, int, int, int, bytes]]]]:
+        """
+            return all frames from the blocks handed to userspace, waits timeout milliseconds for a block when none are available
+        """
+
+        if not self._block_ready(self._current):
+            self._poller.poll(timeout)
+
+        frames = []
+        # at most one pass over the ring, the kernel keeps filling released blocks under load
+        for _ in range(self.block_count):
+            if not self._block_ready(self._current):
+                break
+            frames.extend(self._walk_block(
+                self._current, 0.0 if self.kernel_timestamps else time.time()))
+            self._release_block(self._current)
+            self._current = (self._current + 1) % self.block_count
+
+        return frames
+
+    def close(self) -> None:
+        self._poller.unregister(self._sock.fileno())
+        self._ring.close()
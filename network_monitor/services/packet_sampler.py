@@ -0,0 +1,84 @@
+import random
+import struct
+import zlib
+
+from typing import Any, List, Optional, Tuple, Union
+
+
+class Packet_Sampler(object):
+    """
+        Selects a representative share of the captured frames, every kept frame stands for rate frames.
+
+        count: keeps every rate-th frame
+        random: keeps a frame with probability 1 / rate
+        flow: keeps the frames of a flow when the hash of the flow is a multiple of rate. Both directions
+            of a TCP or UDP connection have the same hash, the whole flow is either kept or dropped
+
+        mode: "count", "random" or "flow"
+        rate: one in rate frames (or flows) is kept
+        seed: random generator seed, only used in random mode
+    """
+
+    MODES: Tuple[str, ...] = ("count", "random", "flow")
+
+    def __init__(self, mode: str = "count", rate: int = 1, seed: Optional[int] = None) -> None:
+
+        if mode not in self.MODES:
+            raise ValueError(f"{mode} is not a valid sampling mode")
+
+        if rate < 1:
+            raise ValueError(f"sampling rate ({rate}) must be at least 1")
+
+        self.mode: str = mode
+        self.rate: int = rate
+
+        self._random: random.Random = random.Random(seed)
+        # frames seen by the count mode, the sampling continues across batches
+        self._count: int = 0
+
+    def sample(self, frames: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        """ return the frames that are kept """
+        if self.rate == 1:
+            return frames
+
+        if self.mode == "count":
+            # offset of the next kept frame in this batch
+            kept = frames[-self._count % self.rate::self.rate]
+            self._count += len(frames)
+            return kept
+        elif self.mode == "random":
+            probability: float = 1 / self.rate
+            return [frame for frame in frames if self._random.random() < probability]
+        else:
+            return [frame for frame in frames if flow_hash(frame[1][0]) % self.rate == 0]
+
+
+def flow_hash(raw_bytes: Union[bytes, memoryview]) -> int:
+    """
+        return a hash of the flow of an ethernet frame that does not depend on the direction. IPv4 and IPv6
+        frames are hashed on the protocol, addresses and TCP or UDP ports, other frames on the mac addresses
+        and ethertype. crc32 is used instead of hash so the hash does not change between processes
+    """
+    ethertype: bytes = bytes(raw_bytes[12:14])
+    if ethertype == b"\x08\x00" and len(raw_bytes) >= 34:
+        protocol: int = raw_bytes[23]
+        source: bytes = bytes(raw_bytes[26:30])
+        destination: bytes = bytes(raw_bytes[30:34])
+        (fragment,) = struct.unpack_from("! H", raw_bytes, 20)
+        # fragments after the first do not carry the ports, fragmented datagrams are hashed on the addresses
+        transport: int = 14 + (raw_bytes[14] & 15) * 4 if fragment & 0x3FFF == 0 else 0
+    elif ethertype == b"\x86\xdd" and len(raw_bytes) >= 54:
+        protocol = raw_bytes[20]
+        source = bytes(raw_bytes[22:38])
+        destination = bytes(raw_bytes[38:54])
+        transport = 54
+    else:
+        source = bytes(raw_bytes[6:12])
+        destination = bytes(raw_bytes[0:6])
+        return zlib.crc32(min(source, destination) + max(source, destination) + ethertype)
+
+    if protocol in (6, 17) and transport and len(raw_bytes) >= transport + 4:
+        source += bytes(raw_bytes[transport:transport + 2])
+        destination += bytes(raw_bytes[transport + 2:transport + 4])
+
+    return zlib.crc32(min(source, destination) + max(source, destination) + bytes((protocol,)))
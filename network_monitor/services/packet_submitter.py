@@ -282,10 +282,10 @@ class Packet_Submitter(object):
 
             try:
 
-                # wait for processed data from the packer service queue
-                data: Dict[str, Dict[str, Union[str, int]]
-                           ] = service_control.in_channel.get_nowait()
-            except queue.Empty:
+                # wait for a batch of processed data from the packer service queue
+                batch: List[Dict[str, Dict[str, Union[str, int]]]
+                            ] = service_control.in_channel.get_nowait()
+            except (queue.Empty, asyncio.QueueEmpty):
                 # queue empty, timeout before checking again
                 await asyncio.sleep(loop_timeout)
 
@@ -298,13 +298,15 @@ class Packet_Submitter(object):
 
             else:
                 # add data to submitter queue with out blocking. queue is growable
-                await data_channel.put(data)
+                for data in batch:
+                    await data_channel.put(data)
 
                 # inform queue task has been completed
                 service_control.in_channel.task_done()
 
                 # status updated
-                service_control.stats["packets_submitted"] += 1
+                service_control.stats["packets_submitted"] += len(batch)
+                service_control.stats["batches_submitted"] += 1
 
         # wait for queue to clear if there are still items available
 
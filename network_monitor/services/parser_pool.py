@@ -0,0 +1,384 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+import struct
+import sys
+import time
+
+from collections import Counter
+from multiprocessing import shared_memory
+from typing import Any, List, Optional, Tuple, Union
+
+from aiologger import Logger
+from aiologger.handlers.streams import AsyncStreamHandler
+
+from ..protocols import Protocol_Parser
+from ..protocols.protocol_utils import address_cache_stats, set_address_cache_size
+from .buffer_pool import Buffer_Pool
+from .packet_parser import Packet_Parser, Packet_Filter
+from .packet_sampler import flow_hash
+from .service_manager import Service_Control
+
+
+# slot header, timestamp, captured length, wire length and the socket address of the frame
+SLOT_HEADER = struct.Struct("= d I I H B H B 16s 8s")
+
+SLOT_FREE: int = 0
+SLOT_BUSY: int = 1
+
+
+class Frame_Ring(object):
+    """
+        Fixed size frame slots in a multiprocessing.shared_memory block. The dispatcher copies the captured frames
+        into the slots and hands the slot indexes to the parser processes, the frames are never pickled. A slot is
+        busy from the moment the frame is written until the parser process has processed it.
+
+        slot_count: number of frames held by the ring
+        slot_size: bytes of a frame slot, longer frames are truncated and keep their wire length
+        name: attach to the ring created by another process
+    """
+
+    def __init__(self, slot_count: int = 4096, slot_size: int = 2048, name: Optional[str] = None) -> None:
+
+        self.slot_count: int = slot_count
+        self.slot_size: int = slot_size
+        self._stride: int = SLOT_HEADER.size + slot_size
+        # one state byte per slot followed by the slots
+        size: int = slot_count + slot_count * self._stride
+
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self.name: str = self._memory.name
+        self._buffer: memoryview = self._memory.buf
+        self._cursor: int = 0
+
+    def acquire(self) -> Optional[int]:
+        """ return the index of the next slot in ring order, None while the parser processes still hold it """
+        index: int = self._cursor
+        if self._buffer[index] != SLOT_FREE:
+            return None
+        self._cursor = (index + 1) % self.slot_count
+        return index
+
+    def write(self, index: int, frame: Tuple[Any, ...]) -> bool:
+        """ copy the frame into the slot, return True when the frame was truncated """
+        timestamp, (raw_bytes, address) = frame[:2]
+        length: int = min(len(raw_bytes), self.slot_size)
+        wire_length: int = frame[2] if len(frame) > 2 else len(raw_bytes)
+
+        offset: int = self.slot_count + index * self._stride
+        SLOT_HEADER.pack_into(
+            self._buffer, offset, timestamp, length, wire_length, address[1], address[2], address[3],
+            len(address[4]), address[0].encode(), address[4])
+        offset += SLOT_HEADER.size
+        self._buffer[offset:offset + length] = raw_bytes[:length]
+        self._buffer[index] = SLOT_BUSY
+        return length < len(raw_bytes)
+
+    def read(self, index: int) -> Tuple[Any, ...]:
+        """ return the frame of the slot, the raw bytes are a view on the shared memory """
+        offset: int = self.slot_count + index * self._stride
+        (timestamp, length, wire_length, protocol, packet_type, hardware_type, address_length, interface_name,
+         hardware_address) = SLOT_HEADER.unpack_from(self._buffer, offset)
+        offset += SLOT_HEADER.size
+
+        address: Tuple[str, int, int, int, bytes] = (
+            interface_name.rstrip(b"\x00").decode(), protocol, packet_type, hardware_type,
+            hardware_address[:address_length])
+        raw_bytes: memoryview = self._buffer[offset:offset + length]
+
+        if wire_length != length:
+            return (timestamp, (raw_bytes, address), wire_length)
+        return (timestamp, (raw_bytes, address))
+
+    def release(self, index: int) -> None:
+        self._buffer[index] = SLOT_FREE
+
+    def busy(self) -> int:
+        """ return the number of busy slots """
+        return self.slot_count - bytes(self._buffer[:self.slot_count]).count(SLOT_FREE)
+
+    def close(self) -> None:
+        self._buffer = None
+        try:
+            self._memory.close()
+        except BufferError:
+            # protocol objects of the last packets still hold views, the mapping is released on exit
+            pass
+
+    def unlink(self) -> None:
+        self._memory.unlink()
+
+
+class Parser_Pool_Worker(object):
+    """
+        Parse, filter and serialize the frames of the shared memory ring in a worker process. The processed
+        packets are put on the submitter queue in the order the frames were dispatched to the worker.
+    """
+
+    # seconds between stats snapshots published to the service manager
+    STATS_INTERVAL: float = 1.0
+
+    def __init__(
+        self,
+        filters: Optional[List[Any]] = None,
+        undefined_protocol_storage: Optional[str] = None,
+        sampling_rate: int = 1,
+        batch_decoding: bool = False,
+        address_cache_size: int = 4096,
+        unknown_protocol_interval: float = 60.0,
+        unknown_protocol_samples: int = 1,
+        unknown_protocol_max_file_size: int = 10 << 20,
+        output_protocols: Optional[List[str]] = None,
+        stop_protocols: Optional[List[str]] = None,
+    ) -> None:
+
+        self.filters: List[Any] = filters if filters is not None else []
+        self.undefined_protocol_storage: Optional[str] = undefined_protocol_storage
+        self.sampling_rate: int = sampling_rate
+        self.batch_decoding: bool = batch_decoding
+        self.address_cache_size: int = address_cache_size
+        self.unknown_protocol_interval: float = unknown_protocol_interval
+        self.unknown_protocol_samples: int = unknown_protocol_samples
+        self.unknown_protocol_max_file_size: int = unknown_protocol_max_file_size
+        self.output_protocols: Optional[List[str]] = output_protocols
+        self.stop_protocols: List[str] = stop_protocols if stop_protocols is not None else []
+
+    def run(self, ring_name: str, slot_count: int, slot_size: int, slot_channel: Any, stop_event: Any, out_channel: Any, stats_channel: Any) -> None:
+        """ worker process entry point """
+        # ctrl+c and ctrl+z reach the whole process group, the application stops the workers through the dispatcher
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTSTP, signal.SIG_IGN)
+        asyncio.run(self.worker(Frame_Ring(slot_count, slot_size, ring_name),
+                    slot_channel, stop_event, out_channel, stats_channel))
+
+    async def _parse_slots(self, packet_parser: Packet_Parser, ring: Frame_Ring, slots: List[int], stats: Counter, logger: Logger) -> List[Any]:
+        """ return the processed packets of the frames in the slots and free the slots """
+        packets: List[Any] = []
+        frames: List[Tuple[Any, ...]] = [ring.read(index) for index in slots]
+        parsed_frames = packet_parser.filter_batch(frames)
+        stats["packets_batch_filtered"] += len(frames) - len(parsed_frames)
+
+        for frame in parsed_frames:
+            try:
+                packet = await packet_parser.process_frame(frame)
+            except Exception as e:
+                await logger.exception(f"exception in packer_parser {e}")
+                continue
+
+            stats["packets_parsed"] += 1
+            if packet is not None:
+                packets.append(packet)
+
+        # the packets are serialized, the views on the slots are released when the frames go out of scope
+        for index in slots:
+            ring.release(index)
+        return packets
+
+    async def worker(self, ring: Frame_Ring, slot_channel: Any, stop_event: Any, out_channel: Any, stats_channel: Any) -> None:
+
+        process_name: str = multiprocessing.current_process().name
+
+        logger = Logger(name=f"{__name__}.{process_name}")
+        stream_handler = AsyncStreamHandler(stream=sys.stderr)
+        logger.add_handler(stream_handler)
+
+        if self.undefined_protocol_storage is not None:
+            Protocol_Parser.set_output_directory(
+                self.undefined_protocol_storage, self.unknown_protocol_interval, self.unknown_protocol_samples,
+                self.unknown_protocol_max_file_size)
+        Protocol_Parser.set_async_loop(asyncio.get_running_loop())
+        # the address caches are per process
+        set_address_cache_size(self.address_cache_size)
+
+        packet_filter: Packet_Filter = Packet_Filter(
+            output_protocols=self.output_protocols)
+        packet_filter.register(self.filters)
+        # decoding stops at the deepest layer used by the filters and the output
+        Protocol_Parser.set_parse_depth(
+            packet_filter.protocol_names(), self.stop_protocols)
+        packet_parser: Packet_Parser = Packet_Parser(
+            packet_filter, sampling_rate=self.sampling_rate, batch_decoding=self.batch_decoding)
+
+        stats: Counter = Counter()
+        last_stats_update: float = time.monotonic()
+        try:
+            while True:
+                try:
+                    slots: Optional[List[int]] = slot_channel.get(timeout=1)
+                except queue.Empty:
+                    # the dispatcher sends None once all frames are dispatched
+                    if stop_event.is_set():
+                        break
+                    continue
+
+                if slots is None:
+                    break
+
+                packets: List[Any] = await self._parse_slots(
+                    packet_parser, ring, slots, stats, logger)
+
+                if packets:
+                    out_channel.put(packets)
+                    stats["batches_sent"] += 1
+
+                now: float = time.monotonic()
+                if now - last_stats_update > self.STATS_INTERVAL:
+                    last_stats_update = now
+                    stats_channel.put(
+                        (process_name, dict(stats, **address_cache_stats())))
+        finally:
+            stats_channel.put(
+                (process_name, dict(stats, **address_cache_stats())))
+            Protocol_Parser.close()
+            ring.close()
+
+
+class Parser_Pool(object):
+    """
+        Spread the parsing of the captured frames over worker processes. The dispatcher takes the frame batches
+        of the listener, copies the frames into a shared memory ring and hands the slot indexes to the workers.
+        The frames of a flow are dispatched to the same worker, the packets of a flow reach the submitter in
+        capture order. The order between flows is not kept.
+
+        pool_worker: parses the frames in the worker processes
+        workers: number of worker processes
+        slot_count: number of frames held by the ring, the dispatcher waits when the workers fall behind
+        slot_size: bytes of a frame slot, longer frames are truncated and keep their wire length
+        buffer_pool: pool the captured frames are returned to once copied into the ring
+    """
+
+    # seconds to wait for the worker processes to process the dispatched frames
+    PROCESS_JOIN_TIMEOUT: float = 10.0
+    # seconds between dispatcher stats snapshots
+    STATS_INTERVAL: float = 1.0
+
+    def __init__(self, pool_worker: Parser_Pool_Worker, workers: int, slot_count: int = 4096, slot_size: int = 2048, buffer_pool: Optional[Buffer_Pool] = None) -> None:
+
+        if workers < 1:
+            raise ValueError(f"{workers} is not a valid number of parser workers")
+
+        self.pool_worker: Parser_Pool_Worker = pool_worker
+        self.workers: int = workers
+        self.buffer_pool: Optional[Buffer_Pool] = buffer_pool
+        self.ring: Frame_Ring = Frame_Ring(slot_count, slot_size)
+
+        # spawn, the worker processes must not inherit the application threads
+        self.context = multiprocessing.get_context("spawn")
+        self.slot_channels: List[Any] = [
+            self.context.Queue() for _ in range(workers)]
+        self._pending: List[List[int]] = [[] for _ in range(workers)]
+        self.stats: Counter = Counter()
+
+    def processes(self, stop_event: Any, out_channel: Any, stats_channel: Any) -> List[multiprocessing.Process]:
+        """ return the worker processes, started by the service manager """
+        return [
+            self.context.Process(
+                target=self.pool_worker.run,
+                name=f"parser-worker-{idx}",
+                args=(
+                    self.ring.name,
+                    self.ring.slot_count,
+                    self.ring.slot_size,
+                    self.slot_channels[idx],
+                    stop_event,
+                    out_channel,
+                    stats_channel,
+                ),
+                daemon=False
+            )
+            for idx in range(self.workers)
+        ]
+
+    def _send_pending(self) -> None:
+        for slot_channel, slots in zip(self.slot_channels, self._pending):
+            if slots:
+                slot_channel.put(slots)
+        self._pending = [[] for _ in range(self.workers)]
+
+    async def dispatch(self, frames: List[Tuple[Any, ...]]) -> None:
+        """ copy the frames into the ring and hand the slots to the workers, waits while the ring is full """
+        for frame in frames:
+            index: Optional[int] = self.ring.acquire()
+            if index is None:
+                # the workers can only free the slots that have been handed to them
+                self._send_pending()
+                self.stats["ring_full_waits"] += 1
+                while index is None:
+                    await asyncio.sleep(0.0005)
+                    index = self.ring.acquire()
+
+            raw_bytes = frame[1][0]
+            if self.ring.write(index, frame):
+                self.stats["frames_truncated"] += 1
+            self._pending[flow_hash(raw_bytes) % self.workers].append(index)
+
+            # the frame has been copied, return the buffer to the listener
+            if self.buffer_pool is not None:
+                self.buffer_pool.release(raw_bytes)
+
+        self._send_pending()
+        self.stats["frames_dispatched"] += len(frames)
+
+    async def _next_batch(self, channel: Union[queue.Queue, asyncio.Queue]) -> List[Tuple[Any, ...]]:
+        if not isinstance(channel, asyncio.Queue):
+            return channel.get(timeout=1)
+
+        try:
+            return channel.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        try:
+            return await asyncio.wait_for(channel.get(), timeout=1)
+        except asyncio.TimeoutError:
+            raise queue.Empty
+
+    async def close(self, processes: List[multiprocessing.Process]) -> None:
+        """ stop the workers once they processed the dispatched frames and remove the ring """
+        for slot_channel in self.slot_channels:
+            slot_channel.put(None)
+
+        deadline: float = time.monotonic() + self.PROCESS_JOIN_TIMEOUT
+        while any(process.is_alive() for process in processes) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        self.ring.close()
+        self.ring.unlink()
+
+    async def worker(self, service_control: Service_Control) -> None:
+        """ dispatcher, runs in the packet parser service thread or task """
+        service_control.loop = asyncio.get_running_loop()
+
+        logger = Logger(name=__name__)
+        stream_handler = AsyncStreamHandler(stream=sys.stderr)
+        logger.add_handler(stream_handler)
+
+        last_stats_update: float = time.monotonic()
+        try:
+            while service_control.sentinal:
+                try:
+                    batch = await self._next_batch(service_control.in_channel)
+                except queue.Empty:
+                    batch = []
+
+                try:
+                    await self.dispatch(batch)
+                except Exception as e:
+                    await logger.exception(f"exception in parser pool dispatcher {e}")
+                finally:
+                    if batch:
+                        service_control.in_channel.task_done()
+
+                now: float = time.monotonic()
+                if now - last_stats_update > self.STATS_INTERVAL:
+                    last_stats_update = now
+                    self.stats["ring_busy_slots"] = self.ring.busy()
+                    service_control.stats_channel.put(
+                        ("dispatcher", dict(self.stats)))
+        finally:
+            service_control.stats_channel.put(("dispatcher", dict(self.stats)))
+            await self.close(service_control.processes)
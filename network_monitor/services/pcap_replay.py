@@ -0,0 +1,319 @@
+import asyncio
+import mmap
+import os
+import socket
+import struct
+import sys
+import time
+
+from aiologger import Logger
+from aiologger.handlers.streams import AsyncStreamHandler
+
+from typing import Any, Iterator, List, Optional, Tuple
+
+from .service_manager import Service_Control
+from .frame_batch import Frame_Batch
+from .packet_sampler import Packet_Sampler
+
+# https://www.tcpdump.org/manpages/pcap-savefile.5.html
+# https://www.ietf.org/archive/id/draft-tuexen-opsawg-pcapng-05.html
+
+
+class PCAP(object):
+    # pcap magic numbers, microsecond and nanosecond timestamps
+    MAGIC_USEC: int = 0xA1B2C3D4
+    MAGIC_NSEC: int = 0xA1B23C4D
+    # pcapng block types
+    SECTION_HEADER_BLOCK: int = 0x0A0D0D0A
+    INTERFACE_DESCRIPTION_BLOCK: int = 0x00000001
+    ENHANCED_PACKET_BLOCK: int = 0x00000006
+    BYTE_ORDER_MAGIC: int = 0x1A2B3C4D
+    # pcapng interface description block options
+    OPT_ENDOFOPT: int = 0
+    IF_NAME: int = 2
+    IF_TSRESOL: int = 9
+    # link types
+    LINKTYPE_ETHERNET: int = 1
+    LINKTYPE_LINUX_SLL: int = 113
+    # linux/if_ether.h, protocol of frames using the 802.3 length field
+    ETH_P_802_3: int = 0x0001
+    ETH_P_802_2: int = 0x0004
+    ETH_P_802_3_MIN: int = 0x0600
+    # linux/if_arp.h
+    ARPHRD_ETHER: int = 1
+
+
+# global header following the magic number, version_major, version_minor, thiszone, sigfigs, snaplen, network
+PCAP_HEADER = "HHiIII"
+# record header, ts_sec, ts_usec or ts_nsec, incl_len, orig_len
+PCAP_RECORD = "IIII"
+# linux cooked capture header, pkttype, hatype, halen, addr, protocol
+SLL_HEADER = struct.Struct("! H H H 8s H")
+
+BROADCAST: bytes = b"\xff" * 6
+
+
+def ethernet_address(interface_name: str, raw_bytes: bytes) -> Tuple[str, int, int, int, bytes]:
+    """
+        return the address tuple recvfrom returns for an ethernet frame on an AF_PACKET socket, the protocol
+        and packet type are derived from the frame like the kernel does in eth_type_trans
+    """
+    (ethertype,) = struct.unpack_from("! H", raw_bytes, 12)
+    if ethertype < PCAP.ETH_P_802_3_MIN:
+        # length field, raw 802.3 frames start with 0xFFFF
+        ethertype = PCAP.ETH_P_802_3 if raw_bytes[14:16] == b"\xff\xff" else PCAP.ETH_P_802_2
+
+    destination: bytes = raw_bytes[:6]
+    if destination == BROADCAST:
+        pkttype = socket.PACKET_BROADCAST
+    elif destination[0] & 1:
+        pkttype = socket.PACKET_MULTICAST
+    else:
+        pkttype = socket.PACKET_HOST
+
+    return (interface_name, ethertype, pkttype, PCAP.ARPHRD_ETHER, raw_bytes[6:12])
+
+
+class Pcap_Reader(object):
+    """
+        Streaming reader for pcap and pcapng files. The file is mapped into memory and the records are
+        decoded one at a time, every record is returned as a frame with the (timestamp, (raw_bytes, address))
+        contract of the interface listener. The wire length is added as third element when the record was
+        truncated by the snap length of the capture.
+
+        Ethernet and linux cooked capture (tcpdump -i any) link types are supported, an ethernet header is
+        added to linux cooked capture frames.
+
+        filename: pcap or pcapng file
+        interface_name: interface name of the frames, pcapng files use the name of the interface description block when present
+    """
+
+    def __init__(self, filename: str, interface_name: str = "pcap") -> None:
+        self.filename: str = filename
+        self.interface_name: str = interface_name
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        with open(self.filename, "rb") as fin:
+            if os.fstat(fin.fileno()).st_size == 0:
+                return
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                (magic,) = struct.unpack_from("<I", buffer, 0)
+                if magic == PCAP.SECTION_HEADER_BLOCK:
+                    yield from self._read_pcapng(buffer)
+                else:
+                    yield from self._read_pcap(buffer)
+
+    def _frame(self, link_type: int, interface_name: str, timestamp: float, raw_bytes: bytes, wire_length: int) -> Tuple[Any, ...]:
+        if link_type == PCAP.LINKTYPE_ETHERNET:
+            address = ethernet_address(interface_name, raw_bytes)
+        elif link_type == PCAP.LINKTYPE_LINUX_SLL:
+            pkttype, hatype, halen, addr, protocol = SLL_HEADER.unpack_from(
+                raw_bytes)
+            address = (interface_name, protocol, pkttype,
+                       hatype, addr[:min(halen, 8)])
+            # the parser expects ethernet frames
+            raw_bytes = struct.pack("! 6s 6s H", b"\x00" * 6, addr[:6].ljust(6, b"\x00"),
+                                    protocol) + raw_bytes[SLL_HEADER.size:]
+            wire_length -= SLL_HEADER.size - 14
+        else:
+            raise ValueError(
+                f"{self.filename}: link type {link_type} not supported")
+
+        if wire_length > len(raw_bytes):
+            return (timestamp, (raw_bytes, address), wire_length)
+        return (timestamp, (raw_bytes, address))
+
+    def _read_pcap(self, buffer: mmap.mmap) -> Iterator[Tuple[Any, ...]]:
+        (magic,) = struct.unpack_from("<I", buffer, 0)
+        if magic in (PCAP.MAGIC_USEC, PCAP.MAGIC_NSEC):
+            byte_order = "<"
+        else:
+            (magic,) = struct.unpack_from(">I", buffer, 0)
+            byte_order = ">"
+            if magic not in (PCAP.MAGIC_USEC, PCAP.MAGIC_NSEC):
+                raise ValueError(f"{self.filename} is not a pcap file")
+
+        resolution: float = 1e-9 if magic == PCAP.MAGIC_NSEC else 1e-6
+        *_, link_type = struct.unpack_from(byte_order + PCAP_HEADER, buffer, 4)
+        record = struct.Struct(byte_order + PCAP_RECORD)
+
+        offset: int = 24
+        end: int = len(buffer)
+        while offset + record.size <= end:
+            ts_sec, ts_frac, incl_len, orig_len = record.unpack_from(
+                buffer, offset)
+            offset += record.size
+            if offset + incl_len > end:
+                # partially written record at the end of a file still being captured
+                break
+
+            yield self._frame(link_type, self.interface_name, ts_sec + ts_frac * resolution,
+                              buffer[offset:offset + incl_len], orig_len)
+            offset += incl_len
+
+    def _read_pcapng(self, buffer: mmap.mmap) -> Iterator[Tuple[Any, ...]]:
+        byte_order: str = "<"
+        # (link type, interface name, timestamp units per second) of the interfaces of the current section
+        interfaces: List[Tuple[int, str, int]] = []
+
+        offset: int = 0
+        end: int = len(buffer)
+        while offset + 12 <= end:
+            (block_type,) = struct.unpack_from(byte_order + "I", buffer, offset)
+            if block_type == PCAP.SECTION_HEADER_BLOCK:
+                # every section sets its own byte order and interfaces
+                (byte_order_magic,) = struct.unpack_from(
+                    "<I", buffer, offset + 8)
+                byte_order = "<" if byte_order_magic == PCAP.BYTE_ORDER_MAGIC else ">"
+                interfaces = []
+
+            (block_length,) = struct.unpack_from(
+                byte_order + "I", buffer, offset + 4)
+            if block_length < 12 or offset + block_length > end:
+                # partially written block at the end of a file still being captured
+                break
+
+            body: int = offset + 8
+            if block_type == PCAP.INTERFACE_DESCRIPTION_BLOCK:
+                interfaces.append(self._interface_description(
+                    buffer, byte_order, body, offset + block_length - 4, len(interfaces)))
+            elif block_type == PCAP.ENHANCED_PACKET_BLOCK:
+                interface_id, ts_high, ts_low, captured_length, wire_length = struct.unpack_from(
+                    byte_order + "IIIII", buffer, body)
+                link_type, interface_name, units = interfaces[interface_id]
+                # split before the conversion to float, nanoseconds since the epoch exceed the float precision
+                seconds, fraction = divmod((ts_high << 32) | ts_low, units)
+                data: int = body + 20
+                yield self._frame(link_type, interface_name, seconds + fraction / units,
+                                  buffer[data:data + captured_length], wire_length)
+
+            offset += block_length
+
+    def _interface_description(self, buffer: mmap.mmap, byte_order: str, offset: int, end: int, interface_id: int) -> Tuple[int, str, int]:
+        link_type, _, _ = struct.unpack_from(byte_order + "HHI", buffer, offset)
+        interface_name: str = self.interface_name if interface_id == 0 else f"{self.interface_name}{interface_id}"
+        units: int = 1000000
+
+        # options are padded to 32 bits
+        offset += 8
+        while offset + 4 <= end:
+            code, length = struct.unpack_from(byte_order + "HH", buffer, offset)
+            if code == PCAP.OPT_ENDOFOPT:
+                break
+            value: bytes = buffer[offset + 4:offset + 4 + length]
+            if code == PCAP.IF_NAME:
+                interface_name = value.rstrip(b"\x00").decode(
+                    "utf-8", errors="replace")
+            elif code == PCAP.IF_TSRESOL:
+                # power of two when the most significant bit is set, otherwise power of ten
+                units = 2 ** (value[0] & 0x7F) if value[0] & 0x80 else 10 ** value[0]
+            offset += 4 + (length + 3) // 4 * 4
+
+        return link_type, interface_name, units
+
+
+class Pcap_Replay(object):
+    """
+        Capture source replaying a pcap or pcapng file, used in place of the interface listener. The frames are
+        handed to the packet parser in batches, either as fast as possible or paced by the recorded timestamps.
+        The recorded timestamp is used as sniffed timestamp. Does not require super user privileges.
+
+        filename: pcap or pcapng file
+        interface_name: interface name of the frames, pcapng files use the name of the interface description block when present
+        speed: replay speed relative to the recorded pacing, 1.0 replays at the original pacing. 0 replays as fast as possible
+        batch_size: number of frames handed to the parser in one batch
+        flush_interval: maximum seconds a frame waits for the batch to fill up
+        sampling_mode: "count", "random" or "flow" keeps one in sampling_rate frames (or flows), every frame
+            is replayed when not provided
+        sampling_rate: one in sampling_rate frames is kept, only used with a sampling mode
+    """
+
+    # batches waiting for the parser before the replay waits, a fast replay would otherwise read the whole file into the queue
+    MAX_QUEUED_BATCHES: int = 256
+
+    def __init__(
+        self,
+        filename: str,
+        interface_name: str = "pcap",
+        speed: float = 0.0,
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+        sampling_mode: Optional[str] = None,
+        sampling_rate: int = 1,
+    ) -> None:
+
+        if speed < 0:
+            raise ValueError(f"replay speed ({speed}) can not be negative")
+
+        self.filename: str = filename
+        self.interface_name: str = interface_name
+        self.speed: float = speed
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.packet_sampler: Optional[Packet_Sampler] = Packet_Sampler(
+            sampling_mode, sampling_rate) if sampling_mode is not None and sampling_rate > 1 else None
+
+    def _flush_batch(self, service_control: Service_Control, batch: Frame_Batch) -> None:
+        service_control.out_channel.put_nowait(batch.flush())
+        service_control.stats["batches_sent"] += 1
+
+    async def _wait_for_parser(self, service_control: Service_Control) -> None:
+        while service_control.sentinal and service_control.out_channel.qsize() >= self.MAX_QUEUED_BATCHES:
+            await asyncio.sleep(self.flush_interval)
+
+    async def worker(self, service_control: Service_Control) -> None:
+        """ replay the file once, runs in a thread or as a task on the event loop shared with the parser """
+
+        logger = Logger(name=__name__)
+        stream_handler = AsyncStreamHandler(stream=sys.stderr)
+        logger.add_handler(stream_handler)
+
+        if not os.path.isfile(self.filename):
+            service_control.error = True
+            await logger.error(f"Unable to replay {self.filename}: file does not exist")
+            return
+
+        service_control.error = False
+        service_control.stats["batch_size"] = self.batch_size
+        service_control.stats["batch_flush_interval_ms"] = int(
+            self.flush_interval * 1000)
+
+        batch: Frame_Batch = Frame_Batch(self.batch_size, self.flush_interval)
+        # wall clock time of the first recorded timestamp
+        replay_start: Optional[Tuple[float, float]] = None
+        try:
+            for frame in Pcap_Reader(self.filename, self.interface_name):
+                if not service_control.sentinal:
+                    break
+
+                if self.speed > 0:
+                    if replay_start is None:
+                        replay_start = (time.monotonic(), frame[0])
+                    delay: float = replay_start[0] + \
+                        (frame[0] - replay_start[1]) / self.speed - time.monotonic()
+                    if delay > 0:
+                        # frames do not wait in the batch while the replay is paced
+                        if len(batch) > 0 and (delay >= self.flush_interval or batch.expired()):
+                            self._flush_batch(service_control, batch)
+                        await asyncio.sleep(delay)
+
+                service_control.stats["packets_sniffed"] += 1
+                if self.packet_sampler is not None and not self.packet_sampler.sample([frame]):
+                    service_control.stats["packets_sampled_out"] += 1
+                    continue
+
+                batch.append(frame)
+
+                if batch.full() or batch.expired():
+                    self._flush_batch(service_control, batch)
+                    await self._wait_for_parser(service_control)
+                    # let the parser run when it shares the event loop
+                    await asyncio.sleep(0)
+        except Exception as e:
+            await logger.exception(f"An exception occured replaying {self.filename}: {e}")
+
+        if len(batch) > 0:
+            self._flush_batch(service_control, batch)
+
+        # reported with the service stats, the application keeps running until it is stopped
+        service_control.stats["replay_finished"] = 1
@@ -0,0 +1,240 @@
+import os
+import queue
+import struct
+import sys
+import time
+
+from collections import deque, Counter
+from aiologger import Logger
+from aiologger.handlers.streams import AsyncStreamHandler
+
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .service_manager import Service_Control
+from .pcap_replay import PCAP
+
+
+# pcap global header, magic, version_major, version_minor, thiszone, sigfigs, snaplen, network
+PCAP_FILE_HEADER = struct.Struct("IHHiIII")
+# pcap record header, ts_sec, ts_nsec, incl_len, orig_len
+PCAP_RECORD_HEADER = struct.Struct("IIII")
+# pcapng block type and total length, enhanced packet block interface id, timestamp high and low, captured and original length
+PCAPNG_BLOCK_HEADER = struct.Struct("II")
+PCAPNG_PACKET_HEADER = struct.Struct("IIIIIII")
+PCAPNG_BLOCK_TRAILER = struct.Struct("I")
+
+SNAP_LENGTH: int = 0x40000
+
+
+class Pcap_Writer(object):
+    """
+        Raw capture sink writing the captured frames to rotating pcap or pcapng files. The frames are
+        collected in a buffer and written with one system call when the buffer is full, the service runs in
+        its own thread and receives the frame batches of the listener on a separate queue.
+
+        A new file is started when the current file reaches max_file_size bytes or has been open for
+        rotate_interval seconds, the oldest files are removed when there are more than max_files.
+
+        directory: directory the capture files are written to
+        file_format: "pcap" (nanosecond timestamps) or "pcapng"
+        max_file_size: size in bytes that starts a new file
+        rotate_interval: seconds after which a new file is started, 0 only rotates by size
+        max_files: number of capture files kept in the directory, 0 keeps all files
+        buffer_size: bytes collected before they are written to the file
+        flush_interval: maximum seconds the frames wait in the buffer
+        prefix: capture file name prefix
+    """
+
+    # batches waiting to be written before the listener drops batches for the writer
+    MAX_QUEUED_BATCHES: int = 1024
+
+    def __init__(
+        self,
+        directory: str,
+        file_format: str = "pcap",
+        max_file_size: int = 100 << 20,
+        rotate_interval: float = 3600,
+        max_files: int = 10,
+        buffer_size: int = 1 << 20,
+        flush_interval: float = 1.0,
+        prefix: str = "capture",
+    ) -> None:
+
+        if file_format not in ("pcap", "pcapng"):
+            raise ValueError(f"{file_format} is not a valid capture file format")
+
+        self.directory: str = directory
+        self.file_format: str = file_format
+        self.max_file_size: int = max_file_size
+        self.rotate_interval: float = rotate_interval
+        self.max_files: int = max_files
+        self.buffer_size: int = buffer_size
+        self.flush_interval: float = flush_interval
+        self.prefix: str = prefix
+
+        self.stats: Counter = Counter()
+
+        self._buffer: bytearray = bytearray()
+        self._file: Optional[Any] = None
+        self._file_size: int = 0
+        self._file_opened: float = 0.0
+        self._last_flush: float = time.monotonic()
+        # pcapng interface description block index by interface name, per file
+        self._interfaces: Dict[str, int] = {}
+        # capture files oldest first, including the files of previous runs
+        self._files: Deque[str] = deque()
+        self._file_index: int = 0
+
+    def _file_names(self) -> List[str]:
+        extension: str = f".{self.file_format}"
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.startswith(f"{self.prefix}-") and name.endswith(extension)
+        )
+
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._files = deque(self._file_names())
+        self._open_file()
+
+    def _open_file(self) -> None:
+        now: float = time.time()
+        # names sort in creation order
+        filename: str = os.path.join(
+            self.directory,
+            f"{self.prefix}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{self._file_index:04d}.{self.file_format}"
+        )
+        self._file_index += 1
+        self._file = open(filename, "wb", buffering=0)
+        self._file_size = 0
+        self._file_opened = time.monotonic()
+        self._interfaces = {}
+        self._files.append(filename)
+        self._enforce_retention()
+
+        if self.file_format == "pcap":
+            self._buffer += PCAP_FILE_HEADER.pack(PCAP.MAGIC_NSEC, 2, 4, 0, 0,
+                                                  SNAP_LENGTH, PCAP.LINKTYPE_ETHERNET)
+        else:
+            self._buffer += self._block(PCAP.SECTION_HEADER_BLOCK, struct.pack(
+                "IHHq", PCAP.BYTE_ORDER_MAGIC, 1, 0, -1))
+
+    def _enforce_retention(self) -> None:
+        while self.max_files > 0 and len(self._files) > self.max_files:
+            filename: str = self._files.popleft()
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+            self.stats["pcap_files_removed"] += 1
+
+    def _block(self, block_type: int, body: bytes) -> bytes:
+        # pcapng blocks are padded to 32 bits
+        body += b"\x00" * (-len(body) % 4)
+        length: int = len(body) + 12
+        return PCAPNG_BLOCK_HEADER.pack(block_type, length) + body + PCAPNG_BLOCK_TRAILER.pack(length)
+
+    def _interface_id(self, interface_name: str) -> int:
+        try:
+            return self._interfaces[interface_name]
+        except KeyError:
+            name: bytes = interface_name.encode("utf-8")
+            # if_name, if_tsresol nanoseconds, end of options
+            options: bytes = struct.pack("HH", PCAP.IF_NAME, len(name)) + name + b"\x00" * (-len(name) % 4) + \
+                struct.pack("HHB3x", PCAP.IF_TSRESOL, 1, 9) + \
+                struct.pack("HH", PCAP.OPT_ENDOFOPT, 0)
+            self._buffer += self._block(PCAP.INTERFACE_DESCRIPTION_BLOCK, struct.pack(
+                "HHI", PCAP.LINKTYPE_ETHERNET, 0, SNAP_LENGTH) + options)
+            self._interfaces[interface_name] = len(self._interfaces)
+            return self._interfaces[interface_name]
+
+    def write(self, frames: List[Tuple[Any, ...]]) -> None:
+        """ add the frames of a batch to the buffer, the buffer is written to the file when full """
+        buffer: bytearray = self._buffer
+        for frame in frames:
+            timestamp, (raw_bytes, address) = frame[:2]
+            captured_length: int = len(raw_bytes)
+            # truncated frames carry the wire length
+            wire_length: int = frame[2] if len(frame) > 2 else captured_length
+            nanoseconds: int = int(timestamp * 1e9)
+
+            if self.file_format == "pcap":
+                seconds, fraction = divmod(nanoseconds, 1000000000)
+                buffer += PCAP_RECORD_HEADER.pack(seconds,
+                                                  fraction, captured_length, wire_length)
+                buffer += raw_bytes
+            else:
+                interface_id: int = self._interface_id(address[0])
+                padding: int = -captured_length % 4
+                length: int = PCAPNG_PACKET_HEADER.size + captured_length + padding + 4
+                buffer += PCAPNG_PACKET_HEADER.pack(PCAP.ENHANCED_PACKET_BLOCK, length, interface_id, nanoseconds >> 32,
+                                                    nanoseconds & 0xFFFFFFFF, captured_length, wire_length)
+                buffer += raw_bytes
+                buffer += b"\x00" * padding
+                buffer += PCAPNG_BLOCK_TRAILER.pack(length)
+
+        self.stats["pcap_frames_written"] += len(frames)
+
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """ write the buffer to the current file and start a new file when the rotation limits are reached """
+        self._last_flush = time.monotonic()
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file_size += len(self._buffer)
+            self.stats["pcap_bytes_written"] += len(self._buffer)
+            self._buffer = bytearray()
+
+        if self._file_size >= self.max_file_size or (
+                self.rotate_interval > 0 and self._last_flush - self._file_opened >= self.rotate_interval):
+            self._file.close()
+            self._open_file()
+            self.stats["pcap_files_rotated"] += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            if self._buffer:
+                self._file.write(self._buffer)
+                self._buffer = bytearray()
+            self._file.close()
+            self._file = None
+
+    async def worker(self, service_control: Service_Control) -> None:
+        """ write the frame batches of the in channel, runs in its own thread off the capture and parse path """
+
+        logger = Logger(name=__name__)
+        stream_handler = AsyncStreamHandler(stream=sys.stderr)
+        logger.add_handler(stream_handler)
+
+        try:
+            self.open()
+        except Exception as e:
+            service_control.error = True
+            await logger.exception(f"Unable to open a capture file in {self.directory}: {e}")
+            return
+
+        service_control.error = False
+        # report the writer counters with the service stats
+        self.stats = service_control.stats
+        try:
+            while service_control.sentinal:
+                try:
+                    frames = service_control.in_channel.get(
+                        timeout=self.flush_interval)
+                except queue.Empty:
+                    pass
+                else:
+                    try:
+                        self.write(frames)
+                    except Exception as e:
+                        await logger.exception(f"An exception occured writing the capture file: {e}")
+                    finally:
+                        service_control.in_channel.task_done()
+
+                # readers of the current file see the frames within the flush interval, idle files are rotated by time
+                if time.monotonic() - self._last_flush >= self.flush_interval:
+                    self.flush()
+        finally:
+            self.close()
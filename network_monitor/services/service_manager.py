@@ -3,6 +3,7 @@ import sys
 import asyncio
 import queue
 import threading
+import multiprocessing
 
 from logging import Formatter
 from aiologger import Logger
@@ -12,7 +13,9 @@ from dataclasses import dataclass, field
 
 from enum import Enum
 
-from typing import Optional, Dict, Any, Tuple, Union
+from .capture_statistics import capture_completeness
+
+from typing import Optional, Dict, Any, Tuple, Union, List
 
 
 @dataclass
@@ -22,15 +25,41 @@ class Service_Control(object):
     sentinal: bool = True
     loop: Optional[asyncio.AbstractEventLoop] = None
 
-    in_channel: Optional[queue.Queue] = None
-    out_channel: Optional[queue.Queue] = None
+    in_channel: Optional[Union[queue.Queue, asyncio.Queue]] = None
+    out_channel: Optional[Union[queue.Queue, asyncio.Queue]] = None
     stats: Counter = field(default_factory=lambda: Counter())
     error: Optional[bool] = None
 
+    # service running as a task on the application event loop instead of a thread
+    task: Optional[asyncio.Task] = None
+
+    # services running in worker processes, the sentinal is not shared with the processes
+    processes: List[multiprocessing.Process] = field(default_factory=list)
+    stop_event: Optional[Any] = None
+    # worker processes publish (process name, stats) snapshots
+    stats_channel: Optional[Any] = None
+    process_stats: Dict[str, Counter] = field(default_factory=dict)
+
+    def collect_process_stats(self) -> None:
+        """ aggregate the latest stats snapshot of every worker process """
+        if self.stats_channel is None:
+            return
+
+        while True:
+            try:
+                name, stats = self.stats_channel.get_nowait()
+            except queue.Empty:
+                break
+            else:
+                self.process_stats[name] = Counter(stats)
+
+        self.stats = sum(self.process_stats.values(), Counter())
+
 
 class Data_Queue_Identifier(Enum):
     Raw_Data = 0,
-    Processed_Data = 1
+    Processed_Data = 1,
+    Raw_Capture = 2
 
 
 class Service_Type(Enum):
@@ -41,10 +70,15 @@ class Service_Type(Enum):
 class Service_Identifier(Enum):
     Interface_Listener_Service = 0,
     Packet_Parser_Service = 1,
-    Packet_Submitter_Service = 2
+    Packet_Submitter_Service = 2,
+    Fanout_Worker_Service = 3,
+    Pcap_Writer_Service = 4
 
 
 class Service_Manager(object):
+    # seconds to wait for a worker process to exit before it is terminated
+    PROCESS_JOIN_TIMEOUT: float = 10.0
+
     def __init__(self) -> None:
 
         self._data_queues: Dict[Data_Queue_Identifier,
@@ -66,25 +100,39 @@ class Service_Manager(object):
         for k, v in self._data_queues.items():
             await self._logger.info(f"{k} size: {v.qsize()}")
 
+            # bounded queues count the batches that waited and the dropped frames or packets per policy
+            stats: Optional[Counter] = getattr(v, "stats", None)
+            if stats is not None:
+                await self._logger.info(f"{k} {v.policy}: {dict(stats)}")
+
     async def service_stats(self):
         for k, v in self._services.items():
+            v.collect_process_stats()
             await self._logger.info(f"{k} size: {v.stats}")
 
+            # share of the captured frames the kernel did not drop
+            ratios: Dict[str, float] = capture_completeness(v.stats)
+            if ratios:
+                await self._logger.info(f"{k} completeness: {ratios}")
+
     async def performance(self):
         ...
 
     def check_for_exceptions(self) -> bool:
         for k, v in self._services.items():
+            # worker process exited before it was asked to stop
+            if any(not p.is_alive() and p.exitcode != 0 for p in v.processes):
+                v.error = True
             print(k, v.error)
         return any(list(v.error for v in self._services.values()))
 
-    def register_queue_reference(self, queue_identifier: Data_Queue_Identifier, data_queue: queue.Queue) -> None:
+    def register_queue_reference(self, queue_identifier: Data_Queue_Identifier, data_queue: Union[queue.Queue, asyncio.Queue]) -> None:
         """
             Add a new data queue that used to share data between threads
         """
         self._data_queues[queue_identifier] = data_queue
 
-    def retrieve_queue_reference(self, queue_identifier: Data_Queue_Identifier) -> queue.Queue:
+    def retrieve_queue_reference(self, queue_identifier: Data_Queue_Identifier) -> Union[queue.Queue, asyncio.Queue]:
         """
             Get a reference to a data queue in order to configure endpoint
         """
@@ -94,43 +142,88 @@ class Service_Manager(object):
         # use service manager to handle threads
         self._services[service_identifier] = service_control
 
-        # start thread
-        self._services[service_identifier].thread.start()
+        # start thread and worker processes
+        if service_control.thread is not None:
+            service_control.thread.start()
+
+        for process in service_control.processes:
+            process.start()
 
     async def stop_service(self, service_identifier: Service_Identifier) -> None:
         print(f"requested: {service_identifier} to stop")
         service_control = self._services.pop(service_identifier)
         service_control.sentinal = False
+        if service_control.stop_event is not None:
+            service_control.stop_event.set()
         await asyncio.sleep(0.5)
         if service_control.loop is not None:
             print(asyncio.all_tasks(service_control.loop))
 
-        service_control.thread.join()
+        if service_control.thread is not None:
+            service_control.thread.join()
+
+        if service_control.task is not None:
+            # the service returns once the sentinal is cleared
+            await service_control.task
+
+        # worker processes finish the frames they are processing and flush their output before exiting, the joins
+        # run in the executor so the services sharing the loop keep draining the process queues
+        loop = asyncio.get_running_loop()
+        for process in service_control.processes:
+            await loop.run_in_executor(None, process.join, self.PROCESS_JOIN_TIMEOUT)
+            if process.is_alive():
+                print(f"terminating: {process.name} did not exit")
+                process.terminate()
+                await loop.run_in_executor(None, process.join)
         print(f"terminated: {service_identifier} has been closed")
 
     async def stop_all_service(self) -> None:
-        service_keys = list(self._services.keys())
+        # the submitter drains the output of the worker processes, stop it once they have exited
+        service_keys = sorted(self._services.keys(
+        ), key=lambda service_key: service_key == Service_Identifier.Packet_Submitter_Service)
         for service_key in service_keys:
-            self.stop_service(service_key)
+            await self.stop_service(service_key)
 
     async def close_application(self) -> None:
 
+        if Service_Identifier.Fanout_Worker_Service in self._services:
+            # worker processes capture and parse, stop them before draining the processed data queue
+            await self.stop_service(Service_Identifier.Fanout_Worker_Service)
+            await self._drain_processed_data()
+            return
+
         # stop listener service
 
         await self.stop_service(
             Service_Identifier.Interface_Listener_Service)
 
+        if Service_Identifier.Pcap_Writer_Service in self._services:
+            # write the captured frames before the pcap writer closes its file
+            await self._join_queue(Data_Queue_Identifier.Raw_Capture)
+            await self.stop_service(Service_Identifier.Pcap_Writer_Service)
+
         await self._logger.info(f"waiting for {Data_Queue_Identifier.Raw_Data} to join")
         # wait for packet service to clear the raw data queue
-        self.retrieve_queue_reference(Data_Queue_Identifier.Raw_Data).join()
+        await self._join_queue(Data_Queue_Identifier.Raw_Data)
         await self._logger.info(f"waiting for {Data_Queue_Identifier.Raw_Data} to joined")
         # # stop packet parser service
         await self.stop_service(Service_Identifier.Packet_Parser_Service)
 
+        await self._drain_processed_data()
+
+    async def _join_queue(self, queue_identifier: Data_Queue_Identifier) -> None:
+        data_queue = self.retrieve_queue_reference(queue_identifier)
+        if isinstance(data_queue, asyncio.Queue):
+            # services share the application loop, block the coroutine not the loop
+            await data_queue.join()
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, data_queue.join)
+
+    async def _drain_processed_data(self) -> None:
+
         await self._logger.info(f"waiting for {Data_Queue_Identifier.Processed_Data} to join")
         # wait for packet submiiter to clear the raw data queue
-        self.retrieve_queue_reference(
-            Data_Queue_Identifier.Processed_Data).join()
+        await self._join_queue(Data_Queue_Identifier.Processed_Data)
         await self._logger.info(f"waiting for {Data_Queue_Identifier.Processed_Data} to joined")
         # stop packet submitter service
         await self.stop_service(Service_Identifier.Packet_Submitter_Service)
@@ -0,0 +1,126 @@
+from testing_utils import build_address, build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp
+import asyncio
+import sys
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+np = pytest.importorskip("numpy")
+
+from network_monitor.protocols.batch_decoder import count_by, decode_headers, filter_mask  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Filter, Packet_Parser  # noqa
+
+RAW_FRAMES = [
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 6, build_tcp(40000, 443, b"x" * 100))),
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.3", "10.0.0.2", 17, build_udp(40001, 53, b"x" * 10))),
+    build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 6, build_tcp(40002, 22))),
+    build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 17, build_udp(40003, 123))),
+    # ICMP and a truncated TCP header are left to the protocol parsers
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 1, b"\x08\x00" + b"\x00" * 6)),
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 6, build_tcp(40000, 443)))[:40],
+]
+
+FRAMES = [(time.time(), (raw_bytes, build_address((raw_bytes[12] << 8) | raw_bytes[13])))
+          for raw_bytes in RAW_FRAMES]
+
+
+def test_decode_headers():
+    headers = decode_headers(FRAMES)
+
+    assert headers["decoded"].tolist() == [
+        True, True, True, True, False, False]
+    assert headers["ip_version"].tolist() == [4, 4, 6, 6, 0, 0]
+    assert headers["ip_protocol"].tolist() == [6, 17, 6, 17, 0, 0]
+    assert headers["source_port"].tolist() == [
+        40000, 40001, 40002, 40003, 0, 0]
+    assert headers["destination_port"].tolist() == [443, 53, 22, 123, 0, 0]
+    assert headers["source_ipv4"][0] == 0x0A000001
+    assert headers["destination_ipv6"][2].tolist() == [0xFD00 << 48, 2]
+    assert headers["capture_length"].tolist() == [
+        len(raw_bytes) for raw_bytes in RAW_FRAMES]
+    assert (headers["source_mac"] == 0x020000000002).all()
+
+    assert len(decode_headers([])) == 0
+
+
+@pytest.mark.parametrize("definition", [
+    {"TCP": {"Destination_Port": 443}},
+    {"IPv4": {"Source_Address": "10.0.0.3"}, "UDP": {}},
+    {"IPv6": {"Destination_Address": "fd00:0000:0000:0000:0000:0000:0000:0002"}},
+    # the protocol parsers format the IPv6 addresses in full, the short form never matches
+    {"IPv6": {"Destination_Address": "fd00::2"}},
+    {"Packet_802_3": {"Source_MAC": "02:00:00:00:00:02"}, "UDP": {"Source_Port": 40003}},
+    {"IPv4": {"TTL": 300}},
+])
+def test_filter_mask_matches_filter(definition):
+    """ the filters match the same decoded frames on the array as on the serialized packets """
+    mask = filter_mask(definition, decode_headers(FRAMES))
+    filter_ = Filter("test", definition)
+    packet_parser = Packet_Parser()
+
+    for frame, matched, decoded in zip(FRAMES, mask.tolist(), decode_headers(FRAMES)["decoded"].tolist()):
+        packet = asyncio.run(packet_parser.process_frame(frame))
+        if decoded:
+            assert matched == filter_.apply(packet)
+        else:
+            assert not matched
+
+
+def test_filter_batch():
+    packet_filter = Packet_Filter()
+    packet_filter.register(Filter("https", {"TCP": {"Destination_Port": 443}}))
+    packet_parser = Packet_Parser(packet_filter, batch_decoding=True)
+
+    assert packet_parser.filter_batch(FRAMES) == FRAMES[1:]
+
+    # filters on fields that are not decoded into the array are applied by the packet filter
+    packet_filter = Packet_Filter()
+    packet_filter.register(Filter("arp", {"ARP": {}}))
+    assert Packet_Parser(packet_filter, batch_decoding=True).filter_batch(
+        FRAMES) == FRAMES
+
+
+@pytest.mark.parametrize("definitions", [
+    [{"TCP": {"Destination_Port": 443}}, {"UDP": {"Destination_Port": {"in": [53, 123]}}}],
+    [{"IPv6": {"Destination_Address": "fd00:0000:0000:0000:0000:0000:0000:0002"}, "UDP": {}},
+     {"IPv6": {"Destination_Address": "fd00:0000:0000:0000:0000:0000:0000:0002", "Next_Header": 6}}],
+    [{"IPv4": {"Source_Address": "10.0.0.3", "Destination_Address": "10.0.0.2"}},
+     {"IPv4": {"Source_Address": "10.0.0.1"}, "UDP": {}}, {"IPv4": {"Source_Address": "10.0.0.300"}}],
+    [{"TCP": {"Destination_Port": 70000}}, {"IPv6": {}}, {"Packet_802_3": {"Source_MAC": "02:00:00:00:00:02"},
+                                                       "TCP": {"Source_Port": 40000}}],
+])
+def test_match_headers_index(definitions):
+    """ the column index matches the decoded frames matched by one of the filters on the serialized packets """
+    packet_filter = Packet_Filter()
+    filters = [Filter(f"filter_{idx}", definition)
+               for idx, definition in enumerate(definitions)]
+    packet_filter.register(filters)
+    mask = packet_filter.match_headers(decode_headers(FRAMES))
+    packet_parser = Packet_Parser()
+
+    for frame, matched, decoded in zip(FRAMES, mask.tolist(), decode_headers(FRAMES)["decoded"].tolist()):
+        packet = asyncio.run(packet_parser.process_frame(frame))
+        assert matched == (decoded and any(filter_.apply(packet) for filter_ in filters))
+
+
+def test_count_by():
+    counts = count_by(decode_headers(FRAMES), "ip_version", "ip_protocol")
+    assert counts == {
+        (4, 6): (1, len(RAW_FRAMES[0])),
+        (4, 17): (1, len(RAW_FRAMES[1])),
+        (6, 6): (1, len(RAW_FRAMES[2])),
+        (6, 17): (1, len(RAW_FRAMES[3])),
+    }
+
+
+def test_filter_mask_leaves_expressions():
+    """ cidr, range, in and not expressions are applied by the packet filter """
+    assert filter_mask({"TCP": {"Destination_Port": {"range": [1, 1000]}}}, decode_headers(FRAMES)) is None
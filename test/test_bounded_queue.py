@@ -0,0 +1,179 @@
+import asyncio
+import socket
+import sys
+import tempfile
+import threading
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import (  # noqa
+    Bounded_Queue, Bounded_Async_Queue, Frame_Batch, Interface_Listener, Service_Control, low_priority_frames, low_priority_packets)
+from testing_utils import build_address, build_ethernet, build_ipv4, build_ipv6, build_tcp  # noqa
+
+
+def frame(protocol: int, ethertype: int = 0x0800):
+    if ethertype == 0x86DD:
+        raw_bytes = build_ethernet(ethertype, build_ipv6(
+            "fe80::1", "fe80::2", protocol, b"\x00" * 8))
+    else:
+        raw_bytes = build_ethernet(ethertype, build_ipv4(
+            "10.0.0.1", "10.0.0.2", protocol, build_tcp(40000, 443)))
+    return (time.time(), (raw_bytes, build_address(ethertype)))
+
+
+def test_drop_newest():
+    dropped = []
+    channel = Bounded_Queue(2, "drop_newest", on_drop=dropped.extend)
+    for idx in range(3):
+        channel.put_nowait([idx, idx])
+
+    assert [channel.get_nowait() for _ in range(2)] == [[0, 0], [1, 1]]
+    assert channel.stats["dropped_newest"] == 2
+    assert dropped == [2, 2]
+
+
+def test_drop_oldest():
+    channel = Bounded_Queue(2, "drop_oldest")
+    for idx in range(4):
+        channel.put_nowait([idx])
+
+    assert [channel.get_nowait() for _ in range(2)] == [[2], [3]]
+    assert channel.stats["dropped_oldest"] == 2
+    # the dropped batches are not waited for
+    channel.task_done()
+    channel.task_done()
+    channel.join()
+
+
+def test_block():
+    channel = Bounded_Queue(1, "block")
+    channel.put_nowait([0])
+
+    producer = threading.Thread(target=channel.put_nowait, args=([1],))
+    producer.start()
+    time.sleep(0.1)
+    assert producer.is_alive()
+
+    assert channel.get_nowait() == [0]
+    producer.join(timeout=1)
+    assert channel.get_nowait() == [1]
+    assert channel.stats["blocked"] == 1
+
+
+def test_shed_low_priority_frames():
+    low_priority = low_priority_frames(["ICMP", "ICMPv6", "ARP"])
+    assert low_priority(frame(1))
+    assert low_priority(frame(58, 0x86DD))
+    assert low_priority(frame(0, 0x0806))
+    assert not low_priority(frame(6))
+
+    channel = Bounded_Queue(4, "shed", low_priority)
+    batch = [frame(6), frame(1)]
+    for _ in range(5):
+        channel.put_nowait(batch)
+
+    # not shed below half the depth
+    assert channel.get_nowait() == batch
+    assert channel.get_nowait() == batch
+    assert channel.get_nowait() == [frame for frame in batch if not low_priority(frame)]
+    assert channel.stats["shed"] == 3
+    assert channel.stats["dropped_newest"] == 1
+
+
+def test_shed_requires_protocols():
+    with pytest.raises(ValueError):
+        Bounded_Queue(4, "shed")
+    with pytest.raises(ValueError):
+        Bounded_Queue(4, "drop_random")
+
+
+def test_low_priority_packets():
+    low_priority = low_priority_packets(["UDP"])
+    assert low_priority({"IPv4": {}, "UDP": {}})
+    assert not low_priority({"IPv4": {}, "TCP": {}})
+
+
+async def async_policies() -> None:
+    channel = Bounded_Async_Queue(1, "block")
+    await channel.put([0])
+
+    producer = asyncio.create_task(channel.put([1]))
+    await asyncio.sleep(0.05)
+    assert not producer.done()
+
+    assert await channel.get() == [0]
+    await producer
+    assert channel.get_nowait() == [1]
+
+    # synchronous producers queue the batch and are called back once the queue has room
+    resumed = []
+    channel.put_nowait([2])
+    channel.put_nowait([3])
+    channel.call_when_not_full(lambda: resumed.append(True))
+    assert channel.stats["blocked"] == 1
+    channel.get_nowait()
+    assert not resumed
+    channel.get_nowait()
+    assert resumed
+
+    channel = Bounded_Async_Queue(2, "drop_oldest")
+    for idx in range(3):
+        channel.put_nowait([idx])
+    assert [channel.get_nowait() for _ in range(2)] == [[1], [2]]
+    assert channel.stats["dropped_oldest"] == 1
+
+
+def test_async_policies():
+    asyncio.run(async_policies())
+
+
+async def listen_with_full_queue(service_control: Service_Control) -> int:
+    listener = Interface_Listener("lo", tempfile.gettempdir())
+    read_frames = listener.open_capture(non_blocking=True)
+
+    # reader callback of Interface_Listener.reader
+    service_control.loop = asyncio.get_running_loop()
+    fileno: int = listener._pm_socket.fileno()
+    service_control.loop.add_reader(
+        fileno, listener._drain, service_control, read_frames, Frame_Batch(1, 0.05), None)
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for _ in range(16):
+            sender.sendto(b"bounded-queue", ("127.0.0.1", 41101))
+        await asyncio.sleep(0.2)
+
+        # the reader is paused while nobody takes a batch
+        depth: int = service_control.out_channel.qsize()
+
+        frames = 0
+        while frames < 32:
+            batch = await asyncio.wait_for(service_control.out_channel.get(), timeout=1)
+            frames += sum(1 for _, (raw_bytes, _) in batch
+                          if raw_bytes.endswith(b"bounded-queue"))
+    finally:
+        sender.close()
+        service_control.sentinal = False
+        service_control.loop.remove_reader(fileno)
+        listener.close_capture()
+    return depth
+
+
+def test_reader_paused_when_queue_full():
+    """
+        check that the event loop listener stops reading while the block policy queue is full and resumes
+        once the parser takes a batch
+    """
+    service_control = Service_Control("interface listener")
+    service_control.out_channel = Bounded_Async_Queue(2, "block")
+
+    try:
+        depth = asyncio.run(listen_with_full_queue(service_control))
+    except PermissionError:
+        pytest.skip("requires super user privileges")
+
+    # a partial batch is flushed at the end of the readiness event
+    assert depth <= 3
+    assert service_control.stats["reader_paused"] > 0
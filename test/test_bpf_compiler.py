@@ -0,0 +1,149 @@
+from testing_utils import build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp, build_address
+import socket
+import struct
+import sys
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.filters.bpf_compiler import BPF, compile_filters, attach_filter  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+from network_monitor.services import Filter, Packet_Filter  # noqa
+
+
+def run_program(program, raw_bytes: bytes, ifindex: int = 2, protocol: int = 0x0800) -> int:
+    """ minimal classic BPF interpreter for the instructions emitted by the compiler """
+    ancillary = {
+        BPF.SKF_AD_IFINDEX: ifindex,
+        BPF.SKF_AD_PROTOCOL: protocol,
+        BPF.SKF_AD_PKTTYPE: socket.PACKET_HOST,
+        BPF.SKF_AD_HATYPE: 1,
+    }
+    acc: int = 0
+    pc: int = 0
+    while True:
+        code, jt, jf, k = program[pc]
+        pc += 1
+        if code == BPF.LD | BPF.W | BPF.LEN:
+            acc = len(raw_bytes)
+        elif code & 0x07 == BPF.LD:
+            size = {BPF.W: 4, BPF.H: 2, BPF.B: 1}[code & 0x18]
+            offset = k - (1 << 32) if k & 0x80000000 else k
+            if offset < 0:
+                acc = ancillary[offset - BPF.SKF_AD_OFF]
+            elif offset + size > len(raw_bytes):
+                return 0
+            else:
+                acc = int.from_bytes(raw_bytes[offset:offset + size], "big")
+        elif code == BPF.ALU | BPF.AND | BPF.K:
+            acc &= k
+        elif code == BPF.JMP | BPF.JEQ | BPF.K:
+            pc += jt if acc == k else jf
+        elif code == BPF.JMP | BPF.JGE | BPF.K:
+            pc += jt if acc >= k else jf
+        elif code == BPF.RET | BPF.K:
+            return k
+        else:
+            raise ValueError(f"unexpected instruction {code}")
+
+
+FRAMES = [
+    build_ethernet(0x0800, build_ipv4("127.0.0.1", "127.0.0.1",
+                                      6, build_tcp(40000, 5050, b"x" * 20))),
+    build_ethernet(0x0800, build_ipv4("127.0.0.1", "127.0.0.1",
+                                      6, build_tcp(40000, 5051))),
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 17, build_udp(53, 5050))),
+    build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 6, build_tcp(5050, 5050))),
+    build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 17, build_udp(123, 123))),
+    # truncated IPv4 header
+    build_ethernet(0x0800, b"\x45\x00"),
+]
+
+DEFINITIONS = [
+    {"IPv4": {"Destination_Address": "127.0.0.1"}, "TCP": {"Destination_Port": 5050}},
+    {"TCP": {"Source_Port": 5050}},
+    {"UDP": {}},
+    {"IPv6": {"Source_Address": "fd00:0000:0000:0000:0000:0000:0000:0001"}},
+    {"IPv4": {"Protocol": 17, "TTL": 64}},
+    {"Packet_802_3": {"Source_MAC": "02:00:00:00:00:02"}, "IPv4": {}},
+]
+
+
+@pytest.mark.parametrize("definition", DEFINITIONS)
+@pytest.mark.parametrize("raw_bytes", FRAMES)
+def test_socket_filter_matches_userspace_filter(definition, raw_bytes):
+    filter_ = Filter("test", definition)
+    program, compiled = compile_filters([filter_])
+    assert compiled == [filter_]
+
+    packet_filter = Packet_Filter()
+    packet_filter.register(filter_)
+    address = build_address(struct.unpack("! H", raw_bytes[12:14])[0])
+    dropped = packet_filter.apply(
+        AF_Packet(address), Packet_802_3(raw_bytes)) is None
+
+    assert (run_program(program, raw_bytes) == 0) == dropped
+
+
+def test_interface_name_compiles_to_ifindex():
+    program, _ = compile_filters(
+        [Filter("loopback", {"AF_Packet": {"Interface_Name": "lo"}})])
+    lo_index = socket.if_nametoindex("lo")
+
+    assert run_program(program, FRAMES[0], ifindex=lo_index) == 0
+    assert run_program(program, FRAMES[0], ifindex=lo_index + 1) == BPF.SNAPLEN
+
+
+@pytest.mark.parametrize("definition", [
+    # not canonical, userspace compares formatted strings
+    {"IPv6": {"Source_Address": "fd00::1"}},
+    {"Packet_802_3": {"Source_MAC": "02:00:00:00:00:0a"}},
+    # no fixed offsets
+    {"TCP": {"Flags": {"SYN": 1}}},
+    {"ARP": {}},
+    {"AF_Packet": {"Interface_Name": "not-an-interface"}},
+])
+def test_definitions_left_to_userspace(definition):
+    program, compiled = compile_filters([Filter("test", definition)])
+    assert program == [] and compiled == []
+
+
+def test_program_within_instruction_limit():
+    """ the filters that do not fit in the kernel limit are left to userspace """
+    filters = [Filter(f"port_{port}", {"UDP": {"Destination_Port": port}})
+               for port in range(1000, 3000)]
+    program, compiled = compile_filters(filters)
+    assert len(program) <= BPF.MAXINSNS
+    assert 0 < len(compiled) < len(filters)
+    assert compiled == filters[:len(compiled)]
+
+
+def test_attach_filter():
+    try:
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW,
+                             socket.htons(0x0003))
+    except PermissionError:
+        pytest.skip("requires super user privileges")
+
+    program, _ = compile_filters(
+        [Filter("udp", {"UDP": {"Destination_Port": 5999}})])
+    attach_filter(sock, program)
+    sock.settimeout(1)
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.sendto(b"dropped", ("127.0.0.1", 5999))
+    sender.sendto(b"accepted", ("127.0.0.1", 5998))
+
+    while True:
+        raw_bytes, _ = sock.recvfrom(65565)
+        # skip icmp port unreachable messages quoting the datagrams
+        if raw_bytes[23] != 17:
+            continue
+        if raw_bytes.endswith(b"dropped"):
+            pytest.fail("frame not dropped by the socket filter")
+        if raw_bytes.endswith(b"accepted"):
+            break
+    sock.close()
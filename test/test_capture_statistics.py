@@ -0,0 +1,72 @@
+import socket
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Interface_Listener  # noqa
+from network_monitor.services.capture_statistics import capture_completeness, read_interface_counters  # noqa
+
+PROC_NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:  151200    1800    0    0    0     0          0         0   151200    1800    0    0    0     0       0          0
+  eth0: 9000000    6000    0   40    0     0          0         0   480000    3000    0    0    0     0       0          0
+"""
+
+
+def test_read_interface_counters(tmp_path):
+    path = tmp_path / "dev"
+    path.write_text(PROC_NET_DEV)
+
+    assert read_interface_counters("eth0", path=str(path)) == (6000, 40, 3000)
+    # summed over all interfaces
+    assert read_interface_counters(path=str(path)) == (7800, 40, 4800)
+
+
+def test_capture_completeness():
+    ratios = capture_completeness({
+        "packets_kernel_received": 1000,
+        "packets_kernel_dropped": 250,
+        "interface_rx_packets": 990,
+        "interface_rx_dropped": 10,
+    })
+    assert ratios == {"capture_completeness": 0.75,
+                      "interface_completeness": 0.99}
+    # no ratios before any frame was received
+    assert capture_completeness({}) == {}
+
+
+@pytest.mark.parametrize("capture_mode", ["socket", "ring"])
+def test_capture_statistics(capture_mode):
+    listener = Interface_Listener("lo", tempfile.gettempdir(), capture_mode=capture_mode,
+                                  ring_block_size=1 << 16, ring_block_count=4, receive_buffer_size=1 << 20)
+    try:
+        read_frames = listener.open_capture()
+    except PermissionError:
+        pytest.skip("requires super user privileges")
+
+    # the kernel doubles the requested size
+    assert listener._pm_socket.getsockopt(
+        socket.SOL_SOCKET, socket.SO_RCVBUF) >= 1 << 20
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for _ in range(8):
+        sender.sendto(b"statistics", ("127.0.0.1", 41300))
+    sender.close()
+
+    frames = []
+    while len(frames) < 16:
+        try:
+            frames.extend(read_frames())
+        except BlockingIOError:
+            break
+
+    counters = listener.capture_statistics.poll()
+    listener.close_capture()
+
+    # loopback frames are captured outgoing and incoming, icmp port unreachable replies may follow
+    assert counters["packets_kernel_received"] >= 16
+    assert counters["packets_kernel_dropped"] == 0
+    assert counters["ring_freeze_count"] == 0
+    assert counters["interface_rx_packets"] >= 8
@@ -0,0 +1,49 @@
+import socket
+import sys
+import tempfile
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Interface_Listener  # noqa
+
+
+@pytest.mark.parametrize("capture_mode", ["socket", "pool", "ring"])
+def test_kernel_timestamps(capture_mode):
+    """
+        check that the sniffed timestamp is the time the kernel received the frame, not the time it was read
+    """
+    listener = Interface_Listener(
+        "lo", tempfile.gettempdir(), capture_mode=capture_mode, ring_block_size=1 << 16, ring_block_count=4, kernel_timestamps=True)
+    try:
+        read_frames = listener.open_capture()
+    except PermissionError:
+        pytest.skip("requires super user privileges")
+
+    # the kernel enables receive timestamping asynchronously, frames received before are stamped when read
+    time.sleep(0.1)
+
+    sent: float = time.time()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.sendto(capture_mode.encode(), ("127.0.0.1", 41200))
+    sender.close()
+
+    # frames wait in the socket before they are read
+    time.sleep(0.3)
+
+    timestamps = []
+    deadline: float = time.time() + 2
+    while not timestamps and time.time() < deadline:
+        try:
+            frames = read_frames()
+        except BlockingIOError:
+            continue
+        # skip icmp port unreachable messages quoting the datagram
+        timestamps.extend(sniffed_timestamp for sniffed_timestamp, (raw_bytes, _) in frames
+                          if raw_bytes[23] == 17 and bytes(raw_bytes).endswith(capture_mode.encode()))
+    read: float = time.time()
+    listener.close_capture()
+
+    assert timestamps
+    assert sent <= timestamps[0] < read - 0.25
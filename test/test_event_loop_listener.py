@@ -0,0 +1,73 @@
+import asyncio
+import os
+import queue
+import socket
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Interface_Listener, Packet_Parser, Service_Control  # noqa
+
+
+async def listen_on_event_loop(service_control: Service_Control, log_stream) -> list:
+    # the stream handler requires a pipe or character device, pytest replaces sys.stderr
+    listener = Interface_Listener(
+        "lo", tempfile.gettempdir(), log_stream=log_stream)
+    listener.STATISTICS_INTERVAL = 0.1
+
+    task = asyncio.create_task(listener.reader(service_control))
+    await asyncio.sleep(0.2)
+    if service_control.error:
+        await task
+        return []
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for _ in range(16):
+        sender.sendto(b"event-loop", ("127.0.0.1", 41100))
+    sender.close()
+
+    await asyncio.sleep(0.5)
+    service_control.sentinal = False
+    await task
+
+    frames = []
+    while not service_control.out_channel.empty():
+        frames.extend(service_control.out_channel.get_nowait())
+    return frames
+
+
+def test_reader_shares_event_loop():
+    """
+        check that the event loop listener puts the frames on an asyncio.Queue
+    """
+    service_control = Service_Control("interface listener")
+    service_control.out_channel = asyncio.Queue()
+
+    with open(os.devnull, "w") as log_stream:
+        frames = asyncio.run(listen_on_event_loop(
+            service_control, log_stream))
+    if service_control.error:
+        pytest.skip("requires super user privileges")
+
+    datagrams = [raw_bytes for _, (raw_bytes, _) in frames
+                 if raw_bytes[23] == 17 and raw_bytes.endswith(b"event-loop")]
+    # loopback frames are captured outgoing and incoming
+    assert len(datagrams) == 32
+    assert service_control.stats["packets_sniffed"] == len(frames)
+
+
+async def next_frames(channel: asyncio.Queue) -> list:
+    packet_parser = Packet_Parser()
+    frames = await packet_parser._next_batch(channel)
+    with pytest.raises(queue.Empty):
+        await packet_parser._next_batch(channel)
+    return frames
+
+
+def test_parser_waits_on_asyncio_queue():
+    channel = asyncio.Queue()
+    channel.put_nowait(["frame"])
+
+    assert asyncio.run(next_frames(channel)) == ["frame"]
@@ -0,0 +1,61 @@
+import queue
+import socket
+import struct
+import sys
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Interface_Listener, Service_Control  # noqa
+
+
+def test_fanout_group_keeps_flows_on_one_socket():
+    """
+        check that the sockets of a fanout group split the frames by flow
+    """
+    listeners = [Interface_Listener("lo", "./logs", fanout_group=0x4e4d)
+                 for _ in range(2)]
+    try:
+        read_functions = [listener.open_capture() for listener in listeners]
+    except PermissionError:
+        pytest.skip("requires super user privileges")
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for idx in range(64):
+        sender.sendto(b"fanout", ("127.0.0.1", 41000 + idx % 16))
+    sender.close()
+
+    ports_per_socket = []
+    for read_frames in read_functions:
+        ports = set()
+        while True:
+            try:
+                frames = read_frames()
+            except BlockingIOError:
+                break
+            for _, (raw_bytes, _) in frames:
+                # udp datagrams sent by the test
+                if raw_bytes[23] == 17 and raw_bytes.endswith(b"fanout"):
+                    ports.add(struct.unpack_from("!H", raw_bytes, 36)[0])
+        ports_per_socket.append(ports)
+
+    for listener in listeners:
+        listener.close_capture()
+
+    assert set.union(*ports_per_socket) == set(range(41000, 41016))
+    assert set.intersection(*ports_per_socket) == set()
+
+
+def test_collect_process_stats():
+    """
+        check that the latest snapshot of every worker process is summed
+    """
+    service_control = Service_Control("fanout workers")
+    service_control.stats_channel = queue.Queue()
+
+    service_control.stats_channel.put(("worker-0", {"packets_parsed": 1}))
+    service_control.stats_channel.put(("worker-0", {"packets_parsed": 5}))
+    service_control.stats_channel.put(("worker-1", {"packets_parsed": 3}))
+    service_control.collect_process_stats()
+
+    assert service_control.stats["packets_parsed"] == 8
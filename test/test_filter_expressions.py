@@ -0,0 +1,108 @@
+from testing_utils import build_address, build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp
+import sys
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.filters import compile_definition  # noqa
+from network_monitor.filters.deep_walker import flatten_protocols  # noqa
+from network_monitor.filters.expressions import Prefix_Set  # noqa
+from network_monitor.protocols import AF_Packet, Packet_802_3  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Filter  # noqa
+
+RAW_FRAMES = [
+    build_ethernet(0x0800, build_ipv4(
+        "10.1.2.3", "192.168.1.10", 6, build_tcp(40000, 8080))),
+    build_ethernet(0x0800, build_ipv4(
+        "172.16.0.1", "192.168.1.10", 6, build_tcp(40001, 443))),
+    build_ethernet(0x0800, build_ipv4(
+        "10.200.0.1", "192.168.1.1", 17, build_udp(40002, 53))),
+    build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 6, build_tcp(40003, 22))),
+]
+
+
+def parsed_packets() -> list:
+    packets = []
+    for raw_bytes in RAW_FRAMES:
+        protocols = {p.Protocol_Name: p for p in flatten_protocols(
+            Packet_802_3(raw_bytes))}
+        protocols["AF_Packet"] = AF_Packet(
+            build_address((raw_bytes[12] << 8) | raw_bytes[13]))
+        packets.append(protocols)
+    return packets
+
+
+@pytest.mark.parametrize("definition,matched", [
+    ({"IPv4": {"Source_Address": {"cidr": "10.0.0.0/8"}}}, [True, False, True, False]),
+    ({"IPv4": {"Source_Address": {"cidr": ["10.1.0.0/16", "172.16.0.1/32"]}}},
+     [True, True, False, False]),
+    ({"IPv6": {"Source_Address": {"cidr": "fd00::/8"}}}, [False, False, False, True]),
+    ({"TCP": {"Destination_Port": {"range": [8000, 8100]}}}, [True, False, False, False]),
+    ({"TCP": {"Destination_Port": {"in": [22, 443]}}}, [False, True, False, True]),
+    ({"TCP": {"Destination_Port": {"not": 443}}}, [True, False, False, True]),
+    ({"IPv4": {"Source_Address": {"not": {"cidr": "10.0.0.0/8"}}}, "TCP": {}},
+     [False, True, False, False]),
+    ({"IPv4": {"Source_Address": {"cidr": "10.0.0.0/8"}, "Destination_Address": "192.168.1.1"}},
+     [False, False, True, False]),
+])
+def test_expressions(definition, matched):
+    """ the expressions match the protocol objects and the serialized packets """
+    filter_ = Filter("test", definition)
+    packet_filter = Packet_Filter()
+    packet_filter.register(filter_)
+
+    for protocols, expected in zip(parsed_packets(), matched):
+        packet = {name: protocol.serialize()
+                  for name, protocol in protocols.items()}
+        assert filter_.predicate(protocols) == expected
+        assert filter_.apply(packet) == expected
+        assert packet_filter.match(protocols) == expected
+
+
+@pytest.mark.parametrize("definition", [
+    {"IPv4": {"Source_Address": {"cidr": "10.0.0.0/33"}}},
+    {"IPv4": {"TTL": {"cidr": "10.0.0.0/8"}}},
+    {"TCP": {"Destination_Port": {"range": [8100, 8000]}}},
+    {"TCP": {"Destination_Port": {"range": [8000]}}},
+    {"IPv4": {"Source_Address": {"range": [1, 2]}}},
+    {"TCP": {"Destination_Port": {"in": []}}},
+    {"TCP": {"Destination_Port": {"in": ["443"]}}},
+    {"TCP": {"Destination_Port": {"not": {"range": ["a", 2]}}}},
+])
+def test_invalid_expressions(definition):
+    with pytest.raises(ValueError):
+        Filter("test", definition)
+
+
+def test_prefix_set():
+    prefixes = Prefix_Set(["10.0.0.0/8", "10.1.2.0/24", "0.0.0.0/0", "fd00::/8"])
+    assert "10.1.2.3" in prefixes
+    assert "8.8.8.8" in prefixes
+    assert "fd00:0000:0000:0000:0000:0000:0000:0001" in prefixes
+    assert "fe80::1" not in prefixes
+    # IPv4 mapped IPv6 addresses are IPv6 addresses
+    assert "::ffff:10.0.0.1" not in prefixes
+    assert "::ffff:10.0.0.1" in Prefix_Set(["::ffff:10.0.0.0/104"])
+    assert "::ffff:10.0.0.1" not in Prefix_Set(["10.0.0.0/8"])
+    assert "not an address" not in prefixes
+    assert 10 not in prefixes
+
+
+def test_in_expression_indexed():
+    """ an in expression is a candidate of each of its values, the index skips the other values """
+    packet_filter = Packet_Filter()
+    packet_filter.register([Filter(f"port_{port}", {"TCP": {"Destination_Port": {"in": [port, port + 1]}}})
+                            for port in range(1000, 2000, 2)])
+    packet_filter.register(
+        Filter("https", {"TCP": {"Destination_Port": {"in": [443]}}}))
+    assert [packet_filter.match(protocols) for protocols in parsed_packets()] == [
+        False, True, False, False]
+
+
+def test_expressions_left_to_userspace():
+    assert compile_definition(
+        {"TCP": {"Destination_Port": {"range": [8000, 8100]}}}) is None
+    assert compile_definition(
+        {"AF_Packet": {"Packet_Type": {"in": ["PACKET_HOST"]}}}) is None
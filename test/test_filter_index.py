@@ -0,0 +1,87 @@
+from testing_utils import build_address, build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp
+import sys
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.filters import get_protocol  # noqa
+from network_monitor.filters.deep_walker import flatten_protocols  # noqa
+from network_monitor.protocols import AF_Packet, IPv4, TCP, Packet_802_3  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Filter  # noqa
+
+RAW_FRAMES = [
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 6, build_tcp(40000, 443, b"x" * 100))),
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.3", "10.0.0.2", 17, build_udp(40001, 53, b"x" * 10))),
+    build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 6, build_tcp(40002, 22))),
+]
+
+
+def parsed_packets() -> list:
+    """ return the protocol objects of the frames keyed by protocol name and the serialized packets """
+    packets = []
+    for raw_bytes in RAW_FRAMES:
+        protocols = {p.Protocol_Name: p for p in flatten_protocols(
+            Packet_802_3(raw_bytes))}
+        protocols["AF_Packet"] = AF_Packet(
+            build_address((raw_bytes[12] << 8) | raw_bytes[13]))
+        packets.append((protocols, {name: protocol.serialize()
+                       for name, protocol in protocols.items()}))
+    return packets
+
+
+FILTERS = [
+    Filter("https", {"TCP": {"Destination_Port": 443}}),
+    Filter("dns_host", {"IPv4": {"Source_Address": "10.0.0.3"},
+           "UDP": {"Destination_Port": 53}}),
+    Filter("dns_other_host", {"IPv4": {
+           "Source_Address": "10.0.0.9"}, "UDP": {"Destination_Port": 53}}),
+    Filter("ipv6", {"IPv6": {}}),
+    Filter("tcp_on_eth0", {"AF_Packet": {
+           "Interface_Name": "eth0"}, "TCP": {}}),
+    # a dict value can not be indexed, the filter is a candidate of every IPv4 packet
+    Filter("no_options", {"IPv4": {"Options": {}}}),
+    Filter("ssh_port_mismatch", {"TCP": {
+           "Destination_Port": 22, "Source_Port": 1}}),
+]
+
+
+@pytest.mark.parametrize("filter_", FILTERS, ids=[f.Name for f in FILTERS])
+def test_index_matches_filter(filter_: Filter):
+    """ the indexed filters match the protocol objects of the packets the filter matches once serialized """
+    packet_filter = Packet_Filter()
+    packet_filter.register(filter_)
+    for protocols, packet in parsed_packets():
+        assert packet_filter.match(protocols) == filter_.apply(packet)
+        assert filter_.predicate(protocols) == filter_.apply(packet)
+
+
+def test_index_matches_any_filter():
+    packet_filter = Packet_Filter()
+    packet_filter.register(FILTERS[1:3] + FILTERS[-1:])
+    assert [packet_filter.match(protocols) for protocols, _ in parsed_packets()] == [
+        False, True, False]
+
+    # an empty definition matches every packet
+    packet_filter.register(Filter("everything", {}))
+    assert all(packet_filter.match(protocols)
+               for protocols, _ in parsed_packets())
+
+
+def test_filtered_packet_not_serialized():
+    """ the filters read the attributes they compare, the fields of a dropped packet are never decoded """
+    packet_filter = Packet_Filter()
+    packet_filter.register(FILTERS[0])
+
+    out_packet = Packet_802_3(RAW_FRAMES[0])
+    assert packet_filter.apply(AF_Packet(build_address(0x0800)), out_packet) is None
+    ipv4 = get_protocol(out_packet, IPv4)
+    assert not IPv4.Source_Address.decoded(ipv4)
+    assert not TCP.Flags.decoded(get_protocol(out_packet, TCP))
+
+    packet = packet_filter.apply(AF_Packet(build_address(
+        0x0800)), Packet_802_3(RAW_FRAMES[1]))
+    assert packet["IPv4"]["Source_Address"] == "10.0.0.3"
@@ -0,0 +1,36 @@
+import sys
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Frame_Batch  # noqa
+
+
+def test_flush_when_full():
+    batch = Frame_Batch(batch_size=3, flush_interval=60)
+    batch.extend([1, 2])
+    assert not batch.full()
+    batch.append(3)
+    assert batch.full()
+    assert batch.flush() == [1, 2, 3]
+    assert len(batch) == 0
+
+
+def test_flush_after_interval():
+    batch = Frame_Batch(batch_size=64, flush_interval=0.01)
+    # an empty batch never expires
+    time.sleep(0.02)
+    assert not batch.expired()
+
+    batch.append(1)
+    assert not batch.expired()
+    time.sleep(0.02)
+    assert batch.expired()
+    assert batch.flush() == [1]
+    assert not batch.expired()
+
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        Frame_Batch(batch_size=0)
@@ -0,0 +1,60 @@
+from testing_utils import build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp
+import sys
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.filters import get_protocol  # noqa
+from network_monitor.protocols import IPv4, IPv6, TCP, UDP, Packet_802_3  # noqa
+from network_monitor.protocols.protocol_utils import Unknown  # noqa
+
+TCP_FRAME = build_ethernet(0x0800, build_ipv4(
+    "10.0.0.1", "10.0.0.2", 6, build_tcp(40000, 443, b"x" * 100)))
+
+
+def test_fields_decoded_on_access():
+    out_packet = Packet_802_3(TCP_FRAME)
+    ipv4 = get_protocol(out_packet, IPv4)
+    tcp = get_protocol(out_packet, TCP)
+
+    # only the fields required to find the upper layer protocol are decoded
+    assert not IPv4.Source_Address.decoded(ipv4)
+    assert not Packet_802_3.Source_MAC.decoded(out_packet)
+    assert not TCP.Flags.decoded(tcp)
+
+    assert ipv4.Source_Address == "10.0.0.1"
+    assert IPv4.Source_Address.decoded(ipv4)
+    assert tcp.Destination_Port == 443
+    assert tcp.Payload_Size == 100
+
+
+def test_serialize_decodes_all_fields():
+    out_packet = Packet_802_3(TCP_FRAME)
+    assert out_packet.serialize() == {
+        "Destination_MAC": "02:00:00:00:00:01",
+        "Source_MAC": "02:00:00:00:00:02",
+        "Ethertype": 0x0800,
+    }
+
+    tcp = get_protocol(out_packet, TCP).serialize()
+    assert (tcp["Source_Port"], tcp["Destination_Port"]) == (40000, 443)
+    assert tcp["Flags"]["ACK"] == 1
+    assert tcp["Options"] == {}
+
+    ipv6 = get_protocol(Packet_802_3(build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 17, build_udp(40000, 53, b"x" * 10)))), IPv6).serialize()
+    assert ipv6["Source_Address"] == "fd00:0000:0000:0000:0000:0000:0000:0001"
+    assert ipv6["Hop_Limit"] == 64
+
+
+@pytest.mark.parametrize("protocol,length", [(IPv4, 19), (TCP, 19), (UDP, 7), (IPv6, 39)])
+def test_short_header_raises_on_construction(protocol, length: int):
+    """ lazy fields never fail on access, a short header is rejected when the object is created """
+    with pytest.raises(ValueError):
+        protocol(b"\x45" * length)
+
+
+def test_truncated_transport_is_unknown():
+    out_packet = Packet_802_3(TCP_FRAME[:14 + 20 + 10])
+    assert get_protocol(out_packet, TCP) is None
+    assert isinstance(get_protocol(out_packet, Unknown), Unknown)
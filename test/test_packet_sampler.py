@@ -0,0 +1,89 @@
+import asyncio
+import sys
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Buffer_Pool, Interface_Listener, Packet_Parser, Packet_Sampler, Service_Control  # noqa
+from network_monitor.services.packet_sampler import flow_hash  # noqa
+from testing_utils import build_address, build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp  # noqa
+
+
+def udp_frame(source_port: int, destination_port: int = 53, reverse: bool = False):
+    addresses = ("10.0.0.2", "10.0.0.1") if reverse else ("10.0.0.1", "10.0.0.2")
+    if reverse:
+        source_port, destination_port = destination_port, source_port
+    raw_bytes = build_ethernet(0x0800, build_ipv4(
+        *addresses, 17, build_udp(source_port, destination_port, b"x" * 10)))
+    return (time.time(), (raw_bytes, build_address(0x0800)))
+
+
+def test_count_sampling_across_batches():
+    packet_sampler = Packet_Sampler("count", 4)
+    frames = list(range(10))
+    kept = packet_sampler.sample(frames[:3]) + packet_sampler.sample(frames[3:])
+    assert kept == [0, 4, 8]
+
+
+def test_random_sampling():
+    packet_sampler = Packet_Sampler("random", 10, seed=1)
+    kept = packet_sampler.sample(list(range(100000)))
+    assert len(kept) == pytest.approx(10000, rel=0.05)
+
+
+def test_flow_sampling_keeps_whole_flows():
+    packet_sampler = Packet_Sampler("flow", 8)
+    frames = [udp_frame(40000 + idx % 64, reverse=idx % 3 == 0)
+              for idx in range(1024)]
+    kept = packet_sampler.sample(frames)
+
+    assert 0 < len(kept) < len(frames)
+    # a flow is either kept in both directions or dropped
+    for source_port in range(40000, 40064):
+        assert (flow_hash(udp_frame(source_port)[1][0]) % 8 == 0) == (
+            flow_hash(udp_frame(source_port, reverse=True)[1][0]) % 8 == 0)
+    assert len(kept) == sum(1 for frame in frames if flow_hash(
+        frame[1][0]) % 8 == 0)
+
+
+def test_flow_hash_ipv6():
+    forward = build_ethernet(0x86DD, build_ipv6(
+        "fe80::1", "fe80::2", 6, build_tcp(40000, 443)))
+    backward = build_ethernet(0x86DD, build_ipv6(
+        "fe80::2", "fe80::1", 6, build_tcp(443, 40000)))
+    other = build_ethernet(0x86DD, build_ipv6(
+        "fe80::2", "fe80::1", 6, build_tcp(443, 40001)))
+    assert flow_hash(forward) == flow_hash(backward)
+    assert flow_hash(forward) != flow_hash(other)
+
+
+def test_invalid_sampling():
+    with pytest.raises(ValueError):
+        Packet_Sampler("hash", 2)
+    with pytest.raises(ValueError):
+        Packet_Sampler("count", 0)
+
+
+def test_listener_releases_sampled_out_buffers():
+    buffer_pool = Buffer_Pool(buffer_count=4, buffer_size=128)
+    interface_listener = Interface_Listener(
+        "lo", "/tmp", capture_mode="pool", buffer_pool=buffer_pool, sampling_mode="count", sampling_rate=2)
+    service_control = Service_Control("interface listener")
+
+    frames = [(time.time(), (memoryview(buffer_pool.acquire())[:64], build_address(0x0800)))
+              for _ in range(4)]
+    kept = interface_listener._sample(service_control, frames)
+
+    assert kept == [frames[0], frames[2]]
+    assert service_control.stats["packets_sampled_out"] == 2
+    assert len(buffer_pool) == 2
+
+
+def test_sampling_rate_in_info():
+    frame = udp_frame(40000)
+    packet = asyncio.run(Packet_Parser(sampling_rate=16).process_frame(frame))
+    assert packet["Info"]["Sampling_Rate"] == 16
+
+    packet = asyncio.run(Packet_Parser().process_frame(frame))
+    assert "Sampling_Rate" not in packet["Info"]
@@ -0,0 +1,74 @@
+from testing_utils import build_address, build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp
+import asyncio
+import sys
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.filters import get_protocol  # noqa
+from network_monitor.protocols import IPv4, IPv6, TCP, Packet_802_2, Packet_802_3, Protocol_Parser  # noqa
+from network_monitor.services import Packet_Filter  # noqa
+from network_monitor.services.packet_parser import Filter, Packet_Parser  # noqa
+
+TCP_FRAME = build_ethernet(0x0800, build_ipv4(
+    "10.0.0.1", "10.0.0.2", 6, build_tcp(40000, 443, b"x" * 100)))
+UDP_FRAME = build_ethernet(0x86DD, build_ipv6(
+    "fd00::1", "fd00::2", 17, build_udp(40000, 53, b"x" * 10)))
+
+
+@pytest.fixture(autouse=True)
+def parse_every_layer():
+    yield
+    Protocol_Parser.set_parse_depth()
+
+
+def test_stop_protocols():
+    Protocol_Parser.set_parse_depth(["AF_Packet", "IPv4"])
+    assert Protocol_Parser.stop_protocols == {IPv4, IPv6}
+
+    # SNAP can carry an ethertype, the LLC layers are decoded to reach IPv4
+    Protocol_Parser.set_parse_depth(["TCP"])
+    assert Protocol_Parser.stop_protocols == set()
+
+    Protocol_Parser.set_parse_depth(["AF_Packet"])
+    assert {Packet_802_3, Packet_802_2} <= Protocol_Parser.stop_protocols
+
+    Protocol_Parser.set_parse_depth(None, ["IPv6"])
+    assert Protocol_Parser.stop_protocols == {IPv6}
+
+
+@pytest.mark.parametrize("frame,network", [(TCP_FRAME, IPv4), (UDP_FRAME, IPv6)])
+def test_decoding_stops_at_network_layer(frame: bytes, network):
+    Protocol_Parser.set_parse_depth(["IPv4", "IPv6"])
+    out_packet = Packet_802_3(frame)
+    assert isinstance(out_packet.upper_layer(), network)
+    assert out_packet.upper_layer().upper_layer() is None
+
+    Protocol_Parser.set_parse_depth(["Packet_802_3"])
+    assert Packet_802_3(frame).upper_layer() is None
+
+    Protocol_Parser.set_parse_depth()
+    assert get_protocol(Packet_802_3(frame), network).upper_layer() is not None
+
+
+def test_output_protocols():
+    """ the filters are applied on their protocols, the packets only keep the output protocols """
+    packet_filter = Packet_Filter(output_protocols=["AF_Packet", "IPv4"])
+    packet_filter.register(Filter("https", {"TCP": {"Destination_Port": 443}}))
+    assert packet_filter.protocol_names() == {"AF_Packet", "IPv4", "TCP"}
+    Protocol_Parser.set_parse_depth(packet_filter.protocol_names())
+
+    packet_parser = Packet_Parser(packet_filter)
+    assert asyncio.run(packet_parser.process_frame(
+        (time.time(), (TCP_FRAME, build_address(0x0800))))) is None
+
+    frame = build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 6, build_tcp(40000, 22)))
+    packet = asyncio.run(packet_parser.process_frame(
+        (time.time(), (frame, build_address(0x0800)))))
+    assert set(packet) == {"AF_Packet", "IPv4", "Info"}
+    assert packet["IPv4"]["Source_Address"] == "10.0.0.1"
+
+    # every protocol is output without output protocols
+    assert Packet_Filter().protocol_names() is None
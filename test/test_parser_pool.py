@@ -0,0 +1,117 @@
+from testing_utils import build_address, build_ethernet, build_ipv4, build_tcp, build_udp
+import asyncio
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Frame_Ring, Parser_Pool, Parser_Pool_Worker, Service_Control  # noqa
+from network_monitor.services.packet_sampler import flow_hash  # noqa
+
+
+def frame(source: str, source_port: int, destination_port: int = 443, timestamp: float = 0.0):
+    raw_bytes = build_ethernet(0x0800, build_ipv4(
+        source, "10.0.0.2", 6, build_tcp(source_port, destination_port, b"x" * 100)))
+    return (timestamp, (raw_bytes, build_address(0x0800)))
+
+
+def test_frame_ring():
+    ring = Frame_Ring(slot_count=2, slot_size=64)
+    try:
+        first = frame("10.0.0.1", 40000, timestamp=1.5)
+        index = ring.acquire()
+        assert ring.write(index, first)
+
+        timestamp, (raw_bytes, address), wire_length = ring.read(index)
+        assert timestamp == 1.5
+        assert bytes(raw_bytes) == first[1][0][:64]
+        assert address == first[1][1]
+        assert wire_length == len(first[1][0])
+
+        # the next slot in ring order is busy until the worker releases it
+        ring.write(ring.acquire(), (2.0, (b"\x00" * 60, build_address(0x0800))))
+        assert ring.busy() == 2
+        assert ring.acquire() is None
+        ring.release(index)
+        assert ring.acquire() == index
+        assert len(ring.read(1)) == 2
+        del raw_bytes
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_flow_hash_symmetric():
+    forward = build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 17, build_udp(40000, 53)))
+    reverse = build_ethernet(0x0800, build_ipv4(
+        "10.0.0.2", "10.0.0.1", 17, build_udp(53, 40000)))
+    assert flow_hash(forward) == flow_hash(reverse)
+    assert flow_hash(memoryview(forward)) == flow_hash(forward)
+    assert flow_hash(b"\x00" * 14) == flow_hash(b"\x00" * 14)
+
+
+async def dispatch(pool: Parser_Pool, service_control: Service_Control, batches: list) -> None:
+    # the dispatcher shares the event loop with the listener
+    service_control.in_channel = asyncio.Queue()
+    for batch in batches:
+        service_control.in_channel.put_nowait(batch)
+
+    task = asyncio.create_task(pool.worker(service_control))
+    await service_control.in_channel.join()
+    service_control.sentinal = False
+    await task
+
+
+def test_parser_pool_keeps_flow_order():
+    """ the packets of every flow reach the submitter queue in capture order """
+    flows = [("10.0.0.1", 40000 + idx) for idx in range(8)]
+    frames = [frame(*flows[idx % len(flows)], timestamp=float(idx))
+              for idx in range(400)]
+
+    # a small ring, the dispatcher waits for the workers
+    pool = Parser_Pool(Parser_Pool_Worker(), 2, slot_count=64)
+    service_control = Service_Control("packet parser")
+    service_control.out_channel = pool.context.Queue()
+    service_control.stats_channel = pool.context.Queue()
+    service_control.stop_event = pool.context.Event()
+    service_control.processes = pool.processes(
+        service_control.stop_event, service_control.out_channel, service_control.stats_channel)
+    for process in service_control.processes:
+        process.start()
+
+    timestamps = {}
+
+    def collect() -> None:
+        # the submitter takes the packets while the frames are dispatched
+        packets = 0
+        while packets < len(frames):
+            for packet in service_control.out_channel.get(timeout=10):
+                packets += 1
+                flow = (packet["IPv4"]["Source_Address"],
+                        packet["TCP"]["Source_Port"])
+                timestamps.setdefault(flow, []).append(
+                    packet["Info"]["Sniffed_Timestamp"])
+
+    collector = threading.Thread(target=collect)
+    collector.start()
+    asyncio.run(dispatch(pool, service_control, [
+        frames[idx:idx + 32] for idx in range(0, len(frames), 32)]))
+    collector.join(timeout=10)
+
+    # a worker exits once its packets have been taken from the queue
+    for process in service_control.processes:
+        process.join(timeout=10)
+    assert all(process.exitcode == 0 for process in service_control.processes)
+
+    assert sum(len(flow_timestamps) for flow_timestamps in timestamps.values()) == len(frames)
+    assert set(timestamps) == set(flows)
+    for flow_timestamps in timestamps.values():
+        assert flow_timestamps == sorted(flow_timestamps)
+    assert pool.stats["frames_dispatched"] == len(frames)
+
+
+def test_parser_pool_requires_workers():
+    with pytest.raises(ValueError):
+        Parser_Pool(Parser_Pool_Worker(), 0)
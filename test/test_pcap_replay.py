@@ -0,0 +1,147 @@
+import asyncio
+import queue
+import struct
+import sys
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Pcap_Reader, Pcap_Replay, Packet_Parser, Service_Control  # noqa
+from testing_utils import build_ethernet, build_ipv4, build_udp  # noqa
+
+
+FRAMES = [
+    build_ethernet(0x0800, build_ipv4("10.0.0.1", "10.0.0.2",
+                                      17, build_udp(40000 + idx, 53, b"x" * 100)))
+    for idx in range(4)
+]
+
+
+def write_pcap(path, frames, timestamps, byte_order="<", nanoseconds=False, snap_length=65535, link_type=1):
+    magic = 0xA1B23C4D if nanoseconds else 0xA1B2C3D4
+    with open(path, "wb") as fout:
+        fout.write(struct.pack(byte_order + "IHHiIII", magic,
+                               2, 4, 0, 0, snap_length, link_type))
+        for timestamp, raw_bytes in zip(timestamps, frames):
+            seconds, fraction = divmod(timestamp, 1)
+            fraction = round(fraction * (1e9 if nanoseconds else 1e6))
+            captured = raw_bytes[:snap_length]
+            fout.write(struct.pack(byte_order + "IIII", int(seconds),
+                                   fraction, len(captured), len(raw_bytes)) + captured)
+
+
+def pcapng_block(block_type, body):
+    body += b"\x00" * (-len(body) % 4)
+    length = len(body) + 12
+    return struct.pack("<II", block_type, length) + body + struct.pack("<I", length)
+
+
+def write_pcapng(path, frames, timestamps, interface_name=b"eth1"):
+    with open(path, "wb") as fout:
+        fout.write(pcapng_block(0x0A0D0D0A, struct.pack(
+            "<IHHq", 0x1A2B3C4D, 1, 0, -1)))
+        # if_name and if_tsresol, nanosecond timestamps
+        options = struct.pack("<HH", 2, len(interface_name)) + interface_name + b"\x00" * (-len(interface_name) % 4) + \
+            struct.pack("<HHB3x", 9, 1, 9) + struct.pack("<HH", 0, 0)
+        fout.write(pcapng_block(
+            0x00000001, struct.pack("<HHI", 1, 0, 0) + options))
+        for timestamp, raw_bytes in zip(timestamps, frames):
+            ticks = round(timestamp * 1e9)
+            fout.write(pcapng_block(0x00000006, struct.pack(
+                "<IIIII", 0, ticks >> 32, ticks & 0xFFFFFFFF, len(raw_bytes), len(raw_bytes)) + raw_bytes))
+
+
+@pytest.mark.parametrize("byte_order, nanoseconds", [("<", False), (">", False), ("<", True)])
+def test_read_pcap(tmp_path, byte_order, nanoseconds):
+    """
+        check that the records of a pcap file are returned as captured frames
+    """
+    path = tmp_path / "capture.pcap"
+    timestamps = [1600000000.25 + idx for idx in range(len(FRAMES))]
+    write_pcap(path, FRAMES, timestamps, byte_order, nanoseconds)
+
+    frames = list(Pcap_Reader(str(path), "eth0"))
+
+    assert [raw_bytes for _, (raw_bytes, _) in frames] == FRAMES
+    assert [timestamp for timestamp, _ in frames] == pytest.approx(timestamps)
+    assert frames[0][1][1] == ("eth0", 0x0800, 0, 1, FRAMES[0][6:12])
+
+
+def test_read_truncated_pcap(tmp_path):
+    """
+        check that records truncated by the snap length carry the wire length
+    """
+    path = tmp_path / "capture.pcap"
+    write_pcap(path, FRAMES, [0.0] * len(FRAMES), snap_length=64)
+
+    _, (raw_bytes, _), wire_length = next(iter(Pcap_Reader(str(path))))
+
+    assert len(raw_bytes) == 64
+    assert wire_length == len(FRAMES[0])
+
+
+def test_read_pcapng(tmp_path):
+    """
+        check that the interface name and timestamp resolution of the interface description block are used
+    """
+    path = tmp_path / "capture.pcapng"
+    timestamps = [1600000000.000000123 + idx for idx in range(len(FRAMES))]
+    write_pcapng(path, FRAMES, timestamps)
+
+    frames = list(Pcap_Reader(str(path)))
+
+    assert [raw_bytes for _, (raw_bytes, _) in frames] == FRAMES
+    assert [timestamp for timestamp, _ in frames] == pytest.approx(timestamps)
+    assert frames[0][1][1][0] == "eth1"
+
+
+def test_unsupported_link_type(tmp_path):
+    path = tmp_path / "capture.pcap"
+    write_pcap(path, FRAMES, [0.0] * len(FRAMES), link_type=105)
+
+    with pytest.raises(ValueError):
+        list(Pcap_Reader(str(path)))
+
+
+async def replay(path, speed):
+    service_control = Service_Control("pcap replay")
+    service_control.out_channel = queue.Queue()
+    await Pcap_Replay(str(path), speed=speed, batch_size=2).worker(service_control)
+
+    packet_parser = Packet_Parser()
+    packets = []
+    while not service_control.out_channel.empty():
+        for frame in service_control.out_channel.get_nowait():
+            packets.append(await packet_parser.process_frame(frame))
+    return packets
+
+
+async def replay_timed(path, speed):
+    start: float = time.monotonic()
+    packets = await replay(path, speed)
+    return packets, time.monotonic() - start
+
+
+async def replay_speeds(path):
+    return [await replay_timed(path, speed) for speed in (0, 1.0)]
+
+
+def test_replay(tmp_path):
+    """
+        check that the replayed frames are parsed, a paced replay keeps the recorded time between the frames
+    """
+    path = tmp_path / "capture.pcap"
+    timestamps = [1600000000 + idx * 0.1 for idx in range(len(FRAMES))]
+    write_pcap(path, FRAMES, timestamps)
+
+    (fast, fast_elapsed), (paced, paced_elapsed) = asyncio.run(
+        replay_speeds(path))
+
+    for packets in (fast, paced):
+        assert [packet["UDP"]["Source_Port"]
+                for packet in packets] == [40000, 40001, 40002, 40003]
+        assert packets[0]["Info"]["Sniffed_Timestamp"] == pytest.approx(
+            timestamps[0])
+    assert fast_elapsed < 0.3
+    assert paced_elapsed >= 0.3
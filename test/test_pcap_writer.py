@@ -0,0 +1,62 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Pcap_Reader, Pcap_Writer  # noqa
+from testing_utils import build_address, build_ethernet, build_ipv4, build_udp  # noqa
+
+
+FRAMES = [
+    (1600000000.123456789 + idx, (build_ethernet(0x0800, build_ipv4("10.0.0.1", "10.0.0.2", 17,
+                                                                     build_udp(40000 + idx, 53, b"x" * (100 + idx)))), build_address(0x0800, "eth0")))
+    for idx in range(4)
+]
+
+
+@pytest.mark.parametrize("file_format", ["pcap", "pcapng"])
+def test_write_and_replay(tmp_path, file_format):
+    """
+        check that the written frames are replayed with their bytes, timestamps and wire lengths
+    """
+    # truncated frame
+    timestamp, (raw_bytes, address) = FRAMES[0]
+    frames = FRAMES + [(timestamp, (raw_bytes[:64], address), len(raw_bytes))]
+
+    pcap_writer = Pcap_Writer(str(tmp_path), file_format=file_format)
+    pcap_writer.open()
+    pcap_writer.write(frames)
+    pcap_writer.close()
+
+    (filename,) = os.listdir(tmp_path)
+    replayed = list(Pcap_Reader(str(tmp_path / filename), "eth0"))
+
+    assert [frame[1][0] for frame in replayed] == [frame[1][0]
+                                                   for frame in frames]
+    assert [frame[0] for frame in replayed] == pytest.approx(
+        [frame[0] for frame in frames], abs=1e-9)
+    assert replayed[-1][2] == len(raw_bytes)
+    assert replayed[0][1][1][0] == "eth0"
+    assert pcap_writer.stats["pcap_frames_written"] == len(frames)
+
+
+def test_rotation_and_retention(tmp_path):
+    """
+        check that a new file is started when the size limit is reached and only the newest files are kept
+    """
+    pcap_writer = Pcap_Writer(
+        str(tmp_path), max_file_size=100, max_files=2, buffer_size=1)
+    pcap_writer.open()
+    for frame in FRAMES:
+        pcap_writer.write([frame])
+    pcap_writer.close()
+
+    filenames = sorted(os.listdir(tmp_path))
+    assert len(filenames) == 2
+    assert pcap_writer.stats["pcap_files_rotated"] == 4
+    assert pcap_writer.stats["pcap_files_removed"] == 3
+
+    # the newest complete file holds the last frame
+    replayed = list(Pcap_Reader(str(tmp_path / filenames[0])))
+    assert [frame[1][0] for frame in replayed] == [FRAMES[-1][1][0]]
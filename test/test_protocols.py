@@ -0,0 +1,129 @@
+from testing_utils import build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp, build_address
+import dataclasses
+import sys
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.filters import flatten_protocols, present_protocols  # noqa
+from network_monitor.protocols import Packet_802_3, AF_Packet, Protocol_Parser  # noqa
+from network_monitor.protocols.fast_paths import FUSED_DECODERS  # noqa
+from network_monitor.protocols.protocol_utils import (  # noqa
+    ADDRESS_CACHE_SIZE, address_cache_stats, format_ipv6_addr, format_mac_addr, get_ipv6_addr, get_mac_addr, set_address_cache_size)
+from network_monitor.services import Buffer_Pool, Packet_Filter  # noqa
+
+FRAMES = [
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 6, build_tcp(40000, 443, b"x" * 100))),
+    build_ethernet(0x0800, build_ipv4(
+        "10.0.0.1", "10.0.0.2", 17, build_udp(40000, 53, b"x" * 10))),
+    build_ethernet(0x86DD, build_ipv6(
+        "fd00::1", "fd00::2", 6, build_tcp(40000, 22))),
+]
+
+
+def serialize(out_packet):
+    return {
+        Protocol_Parser.get_protocol_name_by_class(p.__class__): p.serialize()
+        for p in flatten_protocols(out_packet)
+    }
+
+
+@pytest.mark.parametrize("raw_bytes", FRAMES)
+def test_memoryview_frames(raw_bytes: bytes):
+    """ views on a pooled buffer parse to the same protocols as bytes """
+    buffer = bytearray(65565)
+    buffer[:len(raw_bytes)] = raw_bytes
+    view = memoryview(buffer)[:len(raw_bytes)]
+
+    assert serialize(Packet_802_3(view)) == serialize(Packet_802_3(raw_bytes))
+
+
+def test_buffer_pool_recycles_buffers():
+    buffer_pool = Buffer_Pool(buffer_count=2, buffer_size=128)
+
+    first = buffer_pool.acquire()
+    second = buffer_pool.acquire()
+    third = buffer_pool.acquire()
+
+    assert buffer_pool.stats["buffers_reused"] == 2
+    assert buffer_pool.stats["buffers_allocated"] == 1
+
+    buffer_pool.release(memoryview(first)[:10])
+    buffer_pool.release(second)
+    buffer_pool.release(third)
+    # bytes objects do not belong to the pool
+    buffer_pool.release(b"\x00" * 128)
+
+    assert len(buffer_pool) == 2
+    assert buffer_pool.stats["buffers_discarded"] == 1
+    assert buffer_pool.acquire() is second
+
+
+@pytest.mark.parametrize("raw_bytes", FRAMES)
+def test_protocols_without_instance_dict(raw_bytes: bytes):
+    """ protocol objects are slotted, the public attributes are unchanged """
+    out_packet = Packet_802_3(raw_bytes)
+    for protocol in flatten_protocols(out_packet) + [AF_Packet(build_address(0x0800))]:
+        assert not hasattr(protocol, "__dict__")
+        assert list(protocol.serialize()) == list(
+            protocol.__dataclass_fields__)
+
+
+def test_registered_protocols_are_slotted():
+    for layer_parsers in Protocol_Parser.parsers.values():
+        for protocol_parser in layer_parsers.values():
+            assert "__dict__" not in dir(protocol_parser)
+            assert "__slots__" in vars(protocol_parser)
+
+
+@pytest.mark.parametrize("raw_bytes", FRAMES)
+def test_generated_serializers(raw_bytes: bytes):
+    """ the serialize method generated at registration matches dataclasses.asdict """
+    for protocol in flatten_protocols(Packet_802_3(raw_bytes)) + [AF_Packet(build_address(0x0800))]:
+        assert protocol.serialize() == dataclasses.asdict(protocol)
+        assert protocol.Protocol_Name == Protocol_Parser.get_protocol_name_by_class(
+            protocol.__class__)
+
+
+@pytest.mark.parametrize("raw_bytes", FRAMES + [FRAMES[0][:60]])
+def test_fused_decoders(raw_bytes: bytes, monkeypatch):
+    """ the fused Ethernet/IPv4/TCP, Ethernet/IPv4/UDP and Ethernet/IPv6/TCP decoders match the protocol parsers """
+    out_packet = Packet_802_3(raw_bytes)
+    network_layer = out_packet.upper_layer()
+    # the fixed header was decoded by the fused decoder
+    assert type(network_layer)._header.decoded(network_layer)
+    fused = serialize(out_packet)
+
+    for ethertype in list(FUSED_DECODERS):
+        monkeypatch.delitem(FUSED_DECODERS, ethertype)
+    out_packet = Packet_802_3(raw_bytes)
+    network_layer = out_packet.upper_layer()
+    assert not type(network_layer)._header.decoded(network_layer)
+    assert serialize(out_packet) == fused
+
+
+def test_address_cache():
+    """ the formatted addresses are cached per raw address, the cache holds at most the configured size """
+    set_address_cache_size(2)
+    try:
+        macs = [bytes([2, 0, 0, 0, 0, idx]) for idx in range(3)]
+        for mac in macs + macs[-1:]:
+            assert get_mac_addr(mac) == format_mac_addr(mac)
+
+        stats = address_cache_stats()
+        assert stats["mac_address_cache_hits"] == 1
+        assert stats["mac_address_cache_misses"] == 3
+        assert stats["mac_address_cache_size"] == 2
+
+        # disabled caches still format the addresses
+        set_address_cache_size(0)
+        address = bytes(range(16))
+        assert get_ipv6_addr(address) == get_ipv6_addr(
+            address) == format_ipv6_addr(address)
+        assert address_cache_stats()["ipv6_address_cache_size"] == 0
+
+        with pytest.raises(ValueError):
+            set_address_cache_size(-1)
+    finally:
+        set_address_cache_size(ADDRESS_CACHE_SIZE)
@@ -0,0 +1,94 @@
+import asyncio
+import socket
+import sys
+import tempfile
+import time
+import pytest
+
+sys.path.insert(0, "./")
+
+from network_monitor.services import Interface_Listener, Packet_Parser  # noqa
+from testing_utils import build_address, build_ethernet, build_ipv4, build_ipv6, build_tcp, build_udp  # noqa
+
+SNAP_LENGTH: int = 128
+
+
+@pytest.mark.parametrize("raw_bytes, protocol", [
+    (build_ethernet(0x0800, build_ipv4("10.0.0.1", "10.0.0.2", 6,
+                                       build_tcp(40000, 443, b"x" * 1000))), "TCP"),
+    (build_ethernet(0x0800, build_ipv4("10.0.0.1", "10.0.0.2", 17,
+                                       build_udp(40000, 53, b"x" * 1000))), "UDP"),
+    (build_ethernet(0x86DD, build_ipv6("fe80::1", "fe80::2", 6,
+                                       build_tcp(40000, 443, b"x" * 1000))), "TCP"),
+])
+def test_truncated_frame_sizes(raw_bytes, protocol):
+    """
+        check that the packet and payload sizes of a truncated frame are the sizes on the wire
+    """
+    ethertype: int = int.from_bytes(raw_bytes[12:14], "big")
+    frame = (time.time(), (raw_bytes[:SNAP_LENGTH],
+                           build_address(ethertype)), len(raw_bytes))
+
+    packet = asyncio.run(Packet_Parser().process_frame(frame))
+
+    assert packet["Info"]["Size"] == len(raw_bytes)
+    assert packet[protocol]["Payload_Size"] == 1000
+
+
+def test_short_frame_not_truncated():
+    """
+        check that the payload size of a frame without wire length is not taken from the IP length field
+    """
+    ipv4 = bytearray(build_ipv4("10.0.0.1", "10.0.0.2",
+                     17, build_udp(40000, 53, b"x" * 10)))
+    # bogus total length of a runt frame
+    ipv4[2:4] = (1500).to_bytes(2, "big")
+    raw_bytes = build_ethernet(0x0800, bytes(ipv4))
+
+    packet = asyncio.run(Packet_Parser().process_frame(
+        (time.time(), (raw_bytes, build_address(0x0800)))))
+    assert packet["Info"]["Size"] == len(raw_bytes)
+    assert packet["UDP"]["Payload_Size"] == 10
+
+    # the missing bytes of a truncated frame are taken from the wire length
+    packet = asyncio.run(Packet_Parser().process_frame(
+        (time.time(), (raw_bytes, build_address(0x0800)), len(raw_bytes) + 100)))
+    assert packet["UDP"]["Payload_Size"] == 110
+
+
+@pytest.mark.parametrize("capture_mode, kernel_timestamps", [
+    ("socket", False), ("socket", True), ("pool", False), ("pool", True), ("ring", False)])
+def test_snap_length_capture(capture_mode, kernel_timestamps):
+    """
+        check that captured frames are truncated to the snap length and carry their wire length
+    """
+    listener = Interface_Listener(
+        "lo", tempfile.gettempdir(), capture_mode=capture_mode, ring_block_size=1 << 16, ring_block_count=4,
+        kernel_timestamps=kernel_timestamps, snap_length=SNAP_LENGTH)
+    try:
+        read_frames = listener.open_capture()
+    except PermissionError:
+        pytest.skip("requires super user privileges")
+
+    payload: bytes = f"{capture_mode}-{kernel_timestamps}".encode().ljust(1000, b"x")
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.sendto(payload, ("127.0.0.1", 41300))
+    sender.close()
+
+    frames = []
+    deadline: float = time.time() + 2
+    while not frames and time.time() < deadline:
+        try:
+            captured = read_frames()
+        except BlockingIOError:
+            continue
+        # skip icmp port unreachable messages quoting the datagram
+        frames.extend(frame for frame in captured
+                      if frame[1][0][23] == 17 and bytes(frame[1][0][42:]) == payload[:SNAP_LENGTH - 42])
+    listener.close_capture()
+
+    assert frames
+    _, (raw_bytes, _), wire_length = frames[0]
+    assert len(raw_bytes) == SNAP_LENGTH
+    # ethernet, ipv4 and udp headers
+    assert wire_length == 42 + len(payload)
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, "./")
+
+from network_monitor.protocols import Protocol_Parser  # noqa
+from network_monitor.protocols.layer import Layer_Protocols  # noqa
+from network_monitor.protocols.protocol_utils import Unknown  # noqa
+from network_monitor.protocols.unknown_protocols import Unknown_Protocol_Log  # noqa
+
+
+def test_counts_logged_once_per_interval():
+    messages = []
+    unknown_protocols = Unknown_Protocol_Log(
+        log=messages.append, interval=0.2)
+    for _ in range(1000):
+        unknown_protocols.record(Layer_Protocols.Ethertype, 0x1234, b"x" * 60)
+        unknown_protocols.record(Layer_Protocols.IP_protocols, 99, b"y" * 20)
+
+    assert messages == []
+    time.sleep(0.2)
+    unknown_protocols.record(Layer_Protocols.Ethertype, 0x1234, b"x" * 60)
+
+    assert len(messages) == 1
+    assert "identifier: 4660, frames: 1001" in messages[0]
+    assert "identifier: 99, frames: 1000" in messages[0]
+    assert unknown_protocols.unknown[(Layer_Protocols.IP_protocols, 99)] == 1000
+
+
+def test_counts_logged_from_loop():
+    """ the loop logs the counts of an interval without further unknown frames """
+    messages = []
+    unknown_protocols = Unknown_Protocol_Log(
+        log=messages.append, interval=0.2)
+
+    async def quiet_interval():
+        unknown_protocols.schedule(asyncio.get_running_loop())
+        unknown_protocols.record(Layer_Protocols.Ethertype, 0x1234, b"x" * 60)
+        await asyncio.sleep(0.5)
+        unknown_protocols.close()
+
+    asyncio.run(quiet_interval())
+    assert len(messages) == 1
+    assert "identifier: 4660, frames: 1" in messages[0]
+
+
+def test_samples_written_to_one_capped_file():
+    directory = tempfile.mkdtemp()
+    unknown_protocols = Unknown_Protocol_Log(
+        directory, samples=2, max_file_size=300)
+    for _ in range(100):
+        unknown_protocols.record(Layer_Protocols.Ethertype, 0x1234, b"x" * 60)
+    # a new interval samples the identifier again, the file is full
+    unknown_protocols.report()
+    unknown_protocols.record(Layer_Protocols.Ethertype, 0x1234, b"x" * 60)
+    unknown_protocols.record(
+        Layer_Protocols.Ethertype, 0x0800, b"", ValueError("IPv4 header requires 20 bytes"))
+    unknown_protocols.close()
+
+    assert os.listdir(directory) == [os.path.basename(unknown_protocols.filename)]
+    with open(unknown_protocols.filename, "rb") as fin:
+        lines = fin.read().splitlines()
+    # two samples of the first interval fit in the file
+    assert len(lines) == unknown_protocols.stats["samples_written"] == 2
+    assert unknown_protocols.stats["samples_dropped"] == 2
+    assert os.path.getsize(unknown_protocols.filename) <= 300
+    assert lines[0].split()[1:3] == [b"Layer_Protocols.Ethertype_4660", b"unknown"]
+
+
+def test_parse_records_unknown_protocols():
+    unknown_protocols = Protocol_Parser.unknown_protocols
+    Protocol_Parser.unknown_protocols = Unknown_Protocol_Log()
+    try:
+        assert Protocol_Parser.parse(
+            Layer_Protocols.Ethertype, 0x1234, b"x" * 60) is None
+        assert isinstance(Protocol_Parser.parse(
+            Layer_Protocols.Ethertype, 0x0800, b"x" * 10), Unknown)
+
+        assert Protocol_Parser.unknown_protocols.unknown == {
+            (Layer_Protocols.Ethertype, 0x1234): 1}
+        assert Protocol_Parser.unknown_protocols.errors == {
+            (Layer_Protocols.Ethertype, 0x0800): 1}
+    finally:
+        Protocol_Parser.unknown_protocols = unknown_protocols
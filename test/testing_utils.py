@@ -7,6 +7,8 @@ import pytest
 import aiofiles
 import sys
 import time
+import socket
+import struct
 sys.path.insert(0, "./")
 
 from network_monitor.filters import get_protocol, present_protocols  # noqa
@@ -16,6 +18,38 @@ from network_monitor.protocols import (  # noqa
 )
 
 
+def build_ethernet(ethertype: int, payload: bytes, source: bytes = b"\x02\x00\x00\x00\x00\x02", destination: bytes = b"\x02\x00\x00\x00\x00\x01") -> bytes:
+    return struct.pack("! 6s 6s H", destination, source, ethertype) + payload
+
+
+def build_ipv4(source: str, destination: str, protocol: int, payload: bytes) -> bytes:
+    return struct.pack(
+        "! B B H H H B B H 4s 4s", 69, 0, 20 + len(payload), 1, 16384, 64, protocol, 0,
+        socket.inet_aton(source), socket.inet_aton(destination)
+    ) + payload
+
+
+def build_ipv6(source: str, destination: str, next_header: int, payload: bytes) -> bytes:
+    return struct.pack(
+        "! I H B B 16s 16s", 6 << 28, len(payload), next_header, 64,
+        socket.inet_pton(socket.AF_INET6, source), socket.inet_pton(
+            socket.AF_INET6, destination)
+    ) + payload
+
+
+def build_tcp(source_port: int, destination_port: int, payload: bytes = b"") -> bytes:
+    return struct.pack("! H H L L B B H H H", source_port, destination_port, 1, 1, 80, 24, 65535, 0, 0) + payload
+
+
+def build_udp(source_port: int, destination_port: int, payload: bytes = b"") -> bytes:
+    return struct.pack("! H H H H", source_port, destination_port, 8 + len(payload), 0) + payload
+
+
+def build_address(ethertype: int, interface_name: str = "eth0"):
+    """ address tuple returned by recvfrom on an AF_PACKET socket """
+    return (interface_name, ethertype, socket.PACKET_HOST, 1, b"\x02\x00\x00\x00\x00\x02")
+
+
 async def load_submitter_local_log(filename):
 
     if not os.path.exists(filename):